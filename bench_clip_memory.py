@@ -0,0 +1,79 @@
+"""
+Measure timeline memory per clip.
+
+Compares the old dataclass clip layout (per-instance __dict__) with the
+slotted TimelineClip, alone and on a timeline (clip + index node).
+
+Usage: python bench_clip_memory.py [clip_count]
+"""
+
+import sys
+import os
+import tracemalloc
+from dataclasses import dataclass
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from video.timeline import Timeline, TimelineClip
+
+
+@dataclass
+class DictClip:
+    """Layout of TimelineClip before it was slotted."""
+    id: int
+    source_path: str
+    start_time_ms: int
+    duration_ms: int
+    position_ms: int
+    label: str = ""
+    _node: object = None
+
+
+SOURCES = [f"/videos/source_{i:02d}.mp4" for i in range(20)]
+
+
+def source_for(i):
+    # A new string per clip, like paths coming back from dialogs or files
+    return "".join(SOURCES[i % len(SOURCES)])
+
+
+def measure(build, count):
+    """Bytes allocated per clip by build(count), with the result kept alive."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build(count)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return total / count
+
+
+def build_dict_clips(count):
+    return [DictClip(i, source_for(i), 0, 1000, i * 1000) for i in range(count)]
+
+
+def build_slotted_clips(count):
+    return [TimelineClip(i, source_for(i), 0, 1000, i * 1000) for i in range(count)]
+
+
+def build_timeline(count):
+    timeline = Timeline()
+    timeline.load_clips(build_slotted_clips(count))
+    return timeline
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print(f"Clips: {count}")
+    print("-" * 60)
+    old = measure(build_dict_clips, count)
+    new = measure(build_slotted_clips, count)
+    print(f"Dataclass clip (before): {old:8.1f} bytes/clip")
+    print(f"Slotted clip (after):    {new:8.1f} bytes/clip  ({100.0 * (old - new) / old:.0f}% smaller)")
+    print(f"Timeline (clip + index): {measure(build_timeline, count):8.1f} bytes/clip")
+
+
+if __name__ == "__main__":
+    main()
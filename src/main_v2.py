@@ -42,4 +42,7 @@ def main():
 
 if __name__ == "__main__":
     import sys as _sys
+    import multiprocessing
+    # Decoder worker processes (see video/process_decoder.py) in frozen builds
+    multiprocessing.freeze_support()
     _sys.exit(main())
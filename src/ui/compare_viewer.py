@@ -0,0 +1,289 @@
+"""
+Compare Viewer - Synchronized A/B playback of two sources or clips
+
+Two PrefetchPipelines decode in parallel and one clock drives both, so A
+and B always show the same offset from their own start. The view is
+either side by side or a wipe split that can be dragged with the mouse.
+
+The widget exposes the same signals and transport methods as
+OpenCVVideoPlayer, so the main window's slider, transport buttons and
+marker navigation drive it unchanged while compare mode is active.
+"""
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QLabel
+from PyQt5.QtCore import QElapsedTimer, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+# Add parent directory to path for imports when run directly
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from video.compare_pipeline import PrefetchPipeline
+from video.opencv_player import OpenCVVideoPlayer
+
+
+class CompareViewer(QLabel):
+    """
+    A/B compare viewer.
+
+    Signals:
+        positionChanged(int): Shared offset from the start of both ranges (in ms)
+        durationChanged(int): Length of the shorter range (in ms)
+        stateChanged(int): Playback state (same values as OpenCVVideoPlayer)
+    """
+
+    STATE_STOPPED = OpenCVVideoPlayer.STATE_STOPPED
+    STATE_PLAYING = OpenCVVideoPlayer.STATE_PLAYING
+    STATE_PAUSED = OpenCVVideoPlayer.STATE_PAUSED
+
+    MODE_SIDE_BY_SIDE = 0
+    MODE_WIPE = 1
+
+    positionChanged = pyqtSignal(int)
+    durationChanged = pyqtSignal(int)
+    stateChanged = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._a: Optional[PrefetchPipeline] = None
+        self._b: Optional[PrefetchPipeline] = None
+        self._labels = ("A", "B")
+
+        self.state = self.STATE_STOPPED
+        self.duration_ms = 0
+        self.playback_speed = 1.0
+        self.mode = self.MODE_SIDE_BY_SIDE
+        self.wipe_position = 0.5  # Fraction of the width showing A
+
+        # Shared clock
+        self._clock = QElapsedTimer()
+        self._origin_ms = 0
+        self._position_ms = 0
+        self._shown: Tuple = (None, None)
+        self._held = [None, None]  # Last decoded frame per side
+
+        # Presents whatever each pipeline has ready; also runs while paused
+        # so frames decoded after a seek appear as soon as they arrive
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+
+        self.setMinimumSize(640, 480)
+        self.setScaledContents(True)
+        self.setAlignment(Qt.AlignCenter)
+        self.setStyleSheet("background-color: black;")
+        self.setText("No comparison loaded")
+
+    def load_pair(self, a, b, labels=("A", "B")):
+        """
+        Load the two sides.
+
+        Args:
+            a: (source_path, start_ms, end_ms) for the left/wipe side; end_ms may be None
+            b: (source_path, start_ms, end_ms) for the right side
+            labels: Captions drawn on each side
+
+        Returns:
+            bool: True if both sources opened
+        """
+        self.unload()
+        self._a = PrefetchPipeline(*a)
+        self._b = PrefetchPipeline(*b)
+        if not (self._a.is_ok() and self._b.is_ok()):
+            self.unload()
+            self.setText("Failed to load comparison")
+            return False
+        self._labels = labels
+        self._apply_output_size()
+        self.duration_ms = min(self._a.length_ms, self._b.length_ms)
+        self.durationChanged.emit(self.duration_ms)
+        self.state = self.STATE_PAUSED
+        self.stateChanged.emit(self.state)
+        self.seek(0)
+        self.timer.start(int(1000 / max(self._a.fps, self._b.fps)))
+        print(f"[Compare] A={a[0]} B={b[0]} duration={self.duration_ms}ms")
+        return True
+
+    def unload(self):
+        """Release both pipelines."""
+        self.timer.stop()
+        for pipeline in (self._a, self._b):
+            if pipeline is not None:
+                pipeline.release()
+        self._a = self._b = None
+        self._shown = (None, None)
+        self._held = [None, None]
+        self.state = self.STATE_STOPPED
+        self.duration_ms = 0
+
+    def is_loaded(self):
+        return self._a is not None and self._b is not None
+
+    # Transport (same API as OpenCVVideoPlayer)
+    def play(self):
+        if not self.is_loaded():
+            return
+        if self._position_ms >= self.duration_ms:
+            self.seek(0)
+        self._origin_ms = self._position_ms
+        self._clock.start()
+        self.state = self.STATE_PLAYING
+        self.stateChanged.emit(self.state)
+
+    def pause(self):
+        if not self.is_loaded():
+            return
+        self._position_ms = self._clock_ms()
+        self.state = self.STATE_PAUSED
+        self.stateChanged.emit(self.state)
+
+    def stop(self):
+        self.pause()
+        self.seek(0)
+
+    def seek(self, position_ms):
+        if not self.is_loaded():
+            return
+        self._position_ms = max(0, min(int(position_ms), self.duration_ms))
+        self._origin_ms = self._position_ms
+        self._clock.start()
+        self._a.seek(self._position_ms)
+        self._b.seek(self._position_ms)
+        self.positionChanged.emit(self._position_ms)
+
+    def request_seek(self, position_ms):
+        # Pipelines already decode asynchronously
+        self.seek(position_ms)
+
+    def set_playback_speed(self, speed):
+        self._position_ms = self._clock_ms()
+        self._origin_ms = self._position_ms
+        self._clock.start()
+        self.playback_speed = max(0.1, abs(speed))
+
+    def get_playback_speed(self):
+        return self.playback_speed
+
+    def get_state(self):
+        return self.state
+
+    def get_position(self):
+        return self._position_ms
+
+    def get_duration(self):
+        return int(self.duration_ms)
+
+    # View options
+    def set_mode(self, mode):
+        self.mode = mode
+        self._apply_output_size()
+        self._shown = (None, None)
+
+    def set_wipe_position(self, fraction):
+        self.wipe_position = max(0.0, min(1.0, fraction))
+        self._shown = (None, None)
+        self._tick()
+
+    def cleanup(self):
+        self.unload()
+
+    # Internal helpers
+    def _clock_ms(self):
+        if self.state != self.STATE_PLAYING:
+            return self._position_ms
+        return self._origin_ms + int(self._clock.elapsed() * self.playback_speed)
+
+    def _cell_size(self):
+        w, h = max(2, self.width()), max(2, self.height())
+        if self.mode == self.MODE_SIDE_BY_SIDE:
+            w //= 2
+        return w, h
+
+    def _apply_output_size(self):
+        size = self._cell_size()
+        for pipeline in (self._a, self._b):
+            if pipeline is not None:
+                pipeline.set_output_size(size)
+
+    def _tick(self):
+        if not self.is_loaded():
+            return
+        if self.state == self.STATE_PLAYING:
+            position = self._clock_ms()
+            if position >= self.duration_ms:
+                self.pause()
+                self._position_ms = self.duration_ms
+                self.positionChanged.emit(self._position_ms)
+            elif position != self._position_ms:
+                self._position_ms = position
+                self.positionChanged.emit(position)
+
+        # Each side updates on its own: one still decoding after a seek keeps its last frame
+        for side, pipeline in enumerate((self._a, self._b)):
+            frame = pipeline.frame_for(self._position_ms)
+            if frame is not None:
+                self._held[side] = frame
+        frame_a, frame_b = self._held
+        if frame_a is None and frame_b is None:
+            return
+        if self._shown[0] is frame_a and self._shown[1] is frame_b:
+            return
+        self._shown = (frame_a, frame_b)
+        self._present(self._compose(frame_a, frame_b))
+
+    def _compose(self, frame_a, frame_b):
+        size = self._cell_size()
+        # A side with nothing decoded yet is drawn black
+        blank = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        frame_a = blank if frame_a is None else frame_a
+        frame_b = blank if frame_b is None else frame_b
+        # Frames decoded before a resize still have the old size
+        if (frame_a.shape[1], frame_a.shape[0]) != size:
+            frame_a = cv2.resize(frame_a, size)
+        if (frame_b.shape[1], frame_b.shape[0]) != size:
+            frame_b = cv2.resize(frame_b, size)
+
+        if self.mode == self.MODE_SIDE_BY_SIDE:
+            out = np.hstack((frame_a, frame_b))
+            self._caption(out, self._labels[0], 10)
+            self._caption(out, self._labels[1], size[0] + 10)
+            return out
+
+        split = int(size[0] * self.wipe_position)
+        out = frame_b.copy()
+        out[:, :split] = frame_a[:, :split]
+        cv2.line(out, (split, 0), (split, size[1]), (255, 255, 255), 2)
+        self._caption(out, self._labels[0], 10)
+        self._caption(out, self._labels[1], max(split + 10, size[0] - 200))
+        return out
+
+    @staticmethod
+    def _caption(frame, text, x):
+        cv2.putText(frame, text, (x, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 3, cv2.LINE_AA)
+        cv2.putText(frame, text, (x, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 1, cv2.LINE_AA)
+
+    def _present(self, frame):
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w = rgb.shape[:2]
+        image = QImage(rgb.data, w, h, 3 * w, QImage.Format_RGB888)
+        self.setPixmap(QPixmap.fromImage(image))
+
+    # QWidget events
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._apply_output_size()
+        self._shown = (None, None)
+
+    def mousePressEvent(self, event):
+        if self.mode == self.MODE_WIPE and event.button() == Qt.LeftButton:
+            self.set_wipe_position(event.x() / float(max(1, self.width())))
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self.mode == self.MODE_WIPE and event.buttons() & Qt.LeftButton:
+            self.set_wipe_position(event.x() / float(max(1, self.width())))
+        super().mouseMoveEvent(event)
@@ -2,23 +2,62 @@
 Composition Bar - Visualize merged timeline composition under the main slider
 
 Shows each clip as a colored segment proportionally to its duration, with
-segment boundaries and a moving playhead. Supports hover tooltip and click-to-seek.
+segment boundaries, a playhead and thin strips for overlay/audio tracks.
+Supports a sprite-cache hover preview and click or drag to seek.
 """
 from typing import List, Optional
-from PyQt5.QtWidgets import QWidget, QToolTip
+from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout
 from PyQt5.QtCore import Qt, QRectF, QPoint, pyqtSignal
-from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QFont
+from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QFont, QImage, QPixmap
 import os
 import hashlib
 
 # Add parent directory to path for imports when run directly
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from video.timeline import Timeline, TimelineClip
+from video.timeline import Timeline, TimelineChange, TimelineClip
+from video.sprite_cache import SpriteCache
+
+
+class HoverPreview(QWidget):
+    """Tooltip-style popup with a frame thumbnail and a caption."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.ToolTip | Qt.FramelessWindowHint)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.setStyleSheet("background-color: #202020; color: #f0f0f0;")
+        layout = QVBoxLayout()
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.setSpacing(2)
+        self.image_label = QLabel()
+        self.image_label.setAlignment(Qt.AlignCenter)
+        self.text_label = QLabel()
+        font = self.text_label.font(); font.setPointSize(8)
+        self.text_label.setFont(font)
+        layout.addWidget(self.image_label)
+        layout.addWidget(self.text_label)
+        self.setLayout(layout)
+
+    def show_preview(self, global_pos: QPoint, text: str, rgb_tile=None):
+        if rgb_tile is not None:
+            h, w = rgb_tile.shape[:2]
+            image = QImage(rgb_tile.data, w, h, 3 * w, QImage.Format_RGB888)
+            # QPixmap copies the pixels, so the array may be released afterwards
+            self.image_label.setPixmap(QPixmap.fromImage(image))
+            self.image_label.show()
+        else:
+            self.image_label.hide()
+        self.text_label.setText(text)
+        self.adjustSize()
+        # Centered above the cursor
+        self.move(global_pos.x() - self.width() // 2, global_pos.y() - self.height() - 12)
+        self.show()
 
 
 class CompositionBar(QWidget):
     seekRequested = pyqtSignal(int)  # position_ms
+    scrubStarted = pyqtSignal()  # Left button pressed (seeks follow until scrubFinished)
+    scrubFinished = pyqtSignal()  # Left button released
     segmentClicked = pyqtSignal(int)  # clip_id
 
     def __init__(self, parent=None):
@@ -28,6 +67,12 @@ class CompositionBar(QWidget):
         self._selected_clip_id: Optional[int] = None
         self._transitions_enabled: bool = False
         self._transition_ms: int = 500
+        self._last_seek_ms: Optional[int] = None
+        self._sprites: Optional[SpriteCache] = None
+        self._preview = HoverPreview(self)
+        self._hover_global: Optional[QPoint] = None
+        self._colors = {}  # source path -> QColor
+        self._layer: Optional[QPixmap] = None  # Rendered segments and track strips
         self.setFixedHeight(26)
         self.setMouseTracking(True)
         self.setToolTip("")
@@ -41,6 +86,8 @@ class CompositionBar(QWidget):
                 self._timeline.clip_modified.disconnect(self._on_timeline_changed)
                 self._timeline.timeline_cleared.disconnect(self._on_timeline_changed)
                 self._timeline.duration_changed.disconnect(self._on_timeline_changed)
+                self._timeline.batch_committed.disconnect(self._on_timeline_changed)
+                self._timeline.track_changed.disconnect(self._on_timeline_changed)
             except Exception:
                 pass
         self._timeline = timeline
@@ -50,26 +97,69 @@ class CompositionBar(QWidget):
             self._timeline.clip_modified.connect(self._on_timeline_changed)
             self._timeline.timeline_cleared.connect(self._on_timeline_changed)
             self._timeline.duration_changed.connect(self._on_timeline_changed)
+            self._timeline.batch_committed.connect(self._on_timeline_changed)
+            self._timeline.track_changed.connect(self._on_timeline_changed)
         self.update()
 
+    def set_sprite_cache(self, sprites: Optional[SpriteCache]):
+        """Use a sprite cache for hover thumbnails (sources are prefetched)."""
+        if self._sprites is not None:
+            try:
+                self._sprites.spriteReady.disconnect(self._on_sprite_ready)
+            except Exception:
+                pass
+        self._sprites = sprites
+        if self._sprites is not None:
+            self._sprites.spriteReady.connect(self._on_sprite_ready)
+            self._prefetch_sprites()
+
     def set_transitions(self, enabled: bool, transition_ms: int = 500):
         self._transitions_enabled = bool(enabled)
         self._transition_ms = max(0, int(transition_ms))
-        self.update()
+        self._invalidate()
 
     def set_position(self, position_ms: int):
         self._position_ms = max(0, int(position_ms))
         self.update()
 
+    def get_position(self) -> int:
+        """Playhead position on the timeline (ms)."""
+        return self._position_ms
+
     def set_selected_clip(self, clip_id: Optional[int]):
-        self._selected_clip_id = clip_id
-        self.update()
+        if clip_id != self._selected_clip_id:
+            self._selected_clip_id = clip_id
+            self._invalidate()
 
     # Timeline changed handler
     def _on_timeline_changed(self, *args, **kwargs):
         # Any structural change in timeline triggers a repaint
+        change = args[0] if args else None
+        if isinstance(change, TimelineClip):
+            self._prefetch_sprites([change])
+        elif isinstance(change, TimelineChange):
+            added = [self._timeline.get_clip(clip_id) for clip_id in change.added]
+            self._prefetch_sprites([clip for clip in added if clip is not None])
+        self._invalidate()
+
+    def _invalidate(self):
+        self._layer = None
         self.update()
 
+    def _prefetch_sprites(self, clips=None):
+        """Prefetch sprites for the sources of some clips (default: all)."""
+        if self._sprites is None:
+            return
+        if clips is None:
+            clips = self._get_sorted_clips()
+        for path in {c.source_path for c in clips}:
+            self._sprites.prefetch(path)
+
+    def _on_sprite_ready(self, path: str):
+        # Refresh an open preview that was waiting for this source
+        if self._hover_global is not None and self._preview.isVisible():
+            self._show_preview(self.mapFromGlobal(self._hover_global).x(), self._hover_global)
+
     # Painting helpers
     def _get_total_duration(self) -> int:
         if not self._timeline:
@@ -88,6 +178,13 @@ class CompositionBar(QWidget):
             return clips
 
     def _color_for_source(self, path: str) -> QColor:
+        color = self._colors.get(path)
+        if color is None:
+            color = self._colors[path] = self._hash_color(path)
+        return color
+
+    @staticmethod
+    def _hash_color(path: str) -> QColor:
         # Stable color based on file path hash
         h = int(hashlib.md5(path.encode('utf-8', errors='ignore')).hexdigest()[:6], 16)
         r = (h >> 16) & 0xFF
@@ -100,18 +197,18 @@ class CompositionBar(QWidget):
         return QColor(r, g, b)
 
     # QWidget events
+    def resizeEvent(self, event):
+        self._layer = None
+        super().resizeEvent(event)
+
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
         rect = self.rect()
-        # Background
-        painter.fillRect(rect, QColor(245, 245, 245))
-        painter.setPen(QPen(QColor(210, 210, 210), 1))
-        painter.drawRect(rect.adjusted(0, 0, -1, -1))
-
         total = self._get_total_duration()
-        clips = self._get_sorted_clips()
-        if total <= 0 or not clips:
+        if total <= 0 or not self._timeline or not self._timeline.get_clip_count():
+            painter.fillRect(rect, QColor(245, 245, 245))
+            painter.setPen(QPen(QColor(210, 210, 210), 1))
+            painter.drawRect(rect.adjusted(0, 0, -1, -1))
             # Draw hint text
             painter.setPen(QPen(QColor(130, 130, 130)))
             font = painter.font(); font.setPointSize(8)
@@ -124,47 +221,98 @@ class CompositionBar(QWidget):
             painter.drawText(rect, Qt.AlignCenter, text)
             return
 
+        if self._layer is None or self._layer.size() != rect.size():
+            self._layer = self._render_layer(total)
+        painter.drawPixmap(0, 0, self._layer)
+
+        # Draw playhead
+        x_play = int(self._position_ms * rect.width() / float(total))
+        painter.setPen(QPen(QColor(200, 30, 30), 1))
+        painter.drawLine(x_play, 0, x_play, rect.height())
+
+    def _render_layer(self, total: int) -> QPixmap:
+        """Segments, transition zones and track strips (everything but the playhead)."""
+        rect = self.rect()
+        layer = QPixmap(rect.size())
+        painter = QPainter(layer)
+        painter.setRenderHint(QPainter.Antialiasing)
+        # Background
+        painter.fillRect(rect, QColor(245, 245, 245))
+        painter.setPen(QPen(QColor(210, 210, 210), 1))
+        painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
         # Draw segments
         width = rect.width()
         height = rect.height()
         scale = width / float(total)
 
-        # Draw each clip as a segment
-        for i, clip in enumerate(clips):
-            seg_x = int(clip.position_ms * scale)
-            seg_w = max(2, int(clip.duration_ms * scale))
-            color = self._color_for_source(clip.source_path)
-            # Fill
-            painter.fillRect(QRectF(seg_x, 1, seg_w, height - 2), QBrush(color))
-            # Border (thicker if selected)
-            is_selected = (self._selected_clip_id == clip.id)
-            pen = QPen(QColor(90, 90, 90) if not is_selected else QColor(10, 120, 200), 2 if is_selected else 1)
-            painter.setPen(pen)
-            painter.drawRect(QRectF(seg_x + 0.5, 0.5, seg_w - 1, height - 1))
-            # Separator line at start (except first)
-            if i > 0:
-                painter.setPen(QPen(QColor(255, 255, 255, 200), 2))
-                painter.drawLine(seg_x, 0, seg_x, height)
-
-        # Optionally draw transition zones
-        if self._transitions_enabled and len(clips) > 1 and self._transition_ms > 0:
-            tw = int(self._transition_ms * scale)
-            if tw >= 1:
-                painter.setBrush(QBrush(QColor(255, 255, 255, 80)))
-                painter.setPen(Qt.NoPen)
-                acc = 0
-                for idx in range(len(clips) - 1):
-                    left = clips[idx]
-                    acc += left.duration_ms
-                    x = int(acc * scale) - tw
-                    if x < 0:
-                        x = 0
-                    painter.drawRect(QRectF(x, 1, tw, height - 2))
+        if self._timeline.get_clip_count() > width:
+            self._paint_dense_segments(painter, total, width, height)
+        else:
+            clips = self._get_sorted_clips()
+            # Draw each clip as a segment
+            for i, clip in enumerate(clips):
+                seg_x = int(clip.position_ms * scale)
+                seg_w = max(2, int(clip.duration_ms * scale))
+                color = self._color_for_source(clip.source_path)
+                # Fill
+                painter.fillRect(QRectF(seg_x, 1, seg_w, height - 2), QBrush(color))
+                # Border (thicker if selected)
+                is_selected = (self._selected_clip_id == clip.id)
+                pen = QPen(QColor(90, 90, 90) if not is_selected else QColor(10, 120, 200), 2 if is_selected else 1)
+                painter.setPen(pen)
+                painter.drawRect(QRectF(seg_x + 0.5, 0.5, seg_w - 1, height - 1))
+                # Separator line at start (except first)
+                if i > 0:
+                    painter.setPen(QPen(QColor(255, 255, 255, 200), 2))
+                    painter.drawLine(seg_x, 0, seg_x, height)
 
-        # Draw playhead
-        x_play = int(self._position_ms * scale)
-        painter.setPen(QPen(QColor(200, 30, 30), 1))
-        painter.drawLine(x_play, 0, x_play, height)
+            # Optionally draw transition zones
+            if self._transitions_enabled and len(clips) > 1 and self._transition_ms > 0:
+                tw = int(self._transition_ms * scale)
+                if tw >= 1:
+                    painter.setBrush(QBrush(QColor(255, 255, 255, 80)))
+                    painter.setPen(Qt.NoPen)
+                    acc = 0
+                    for idx in range(len(clips) - 1):
+                        left = clips[idx]
+                        acc += left.duration_ms
+                        x = int(acc * scale) - tw
+                        if x < 0:
+                            x = 0
+                        painter.drawRect(QRectF(x, 1, tw, height - 2))
+
+        # Overlay (blue) and audio (green) track clips, 3px strips from the bottom up
+        lane_y = height - 4
+        for track in self._timeline.tracks:
+            if not len(track) or lane_y < 2:
+                continue
+            lane_color = QColor(40, 110, 220) if track.is_video else QColor(40, 160, 80)
+            if track.muted:
+                lane_color.setAlpha(90)
+            for clip in track.clips_in_range(0, total):
+                painter.fillRect(QRectF(clip.position_ms * scale, lane_y, max(2, clip.duration_ms * scale), 3),
+                                 QBrush(lane_color))
+            lane_y -= 4
+        painter.end()
+        return layer
+
+    def _paint_dense_segments(self, painter: QPainter, total: int, width: int, height: int):
+        """Paint each pixel column in the color of the clip under it (more clips than pixels)."""
+        run_start, run_color = 0, None
+        for x in range(width + 1):
+            clip = self._timeline.get_clip_at_position(int(x * total / width)) if x < width else None
+            color = self._color_for_source(clip.source_path) if clip is not None else None
+            if x == width or color != run_color:
+                if run_color is not None:
+                    painter.fillRect(QRectF(run_start, 1, x - run_start, height - 2), QBrush(run_color))
+                run_start, run_color = x, color
+        selected = self._timeline.get_clip(self._selected_clip_id) if self._selected_clip_id is not None else None
+        if selected is not None:
+            scale = width / float(total)
+            painter.setPen(QPen(QColor(10, 120, 200), 2))
+            painter.drawRect(QRectF(int(selected.position_ms * scale) + 0.5, 0.5,
+                                    max(2, int(selected.duration_ms * scale)) - 1, height - 1))
 
     def _time_from_x(self, x: int) -> int:
         total = self._get_total_duration()
@@ -176,28 +324,63 @@ class CompositionBar(QWidget):
 
     def mouseMoveEvent(self, event):
         pos_ms = self._time_from_x(event.x())
-        clip = self._clip_at_time(pos_ms)
-        if clip:
-            label = clip.label if clip.label else os.path.basename(clip.source_path)
-            info = f"{label}\nIn: {self._fmt_ms(clip.start_time_ms)}  Out: {self._fmt_ms(clip.end_time_ms)}  Dur: {self._fmt_ms(clip.duration_ms)}"
-            QToolTip.showText(event.globalPos(), info, self)
-        else:
-            QToolTip.hideText()
+        if event.buttons() & Qt.LeftButton:
+            self._emit_seek(pos_ms)
+        self._show_preview(event.x(), event.globalPos())
         super().mouseMoveEvent(event)
 
+    def leaveEvent(self, event):
+        self._hover_global = None
+        self._preview.hide()
+        super().leaveEvent(event)
+
+    def hideEvent(self, event):
+        self._preview.hide()
+        super().hideEvent(event)
+
+    def _show_preview(self, x: int, global_pos: QPoint):
+        pos_ms = self._time_from_x(x)
+        clip = self._clip_at_time(pos_ms)
+        if not clip:
+            self._hover_global = None
+            self._preview.hide()
+            return
+        self._hover_global = global_pos
+        label = clip.label if clip.label else os.path.basename(clip.source_path)
+        info = f"{label}\nIn: {self._fmt_ms(clip.start_time_ms)}  Out: {self._fmt_ms(clip.end_time_ms)}  Dur: {self._fmt_ms(clip.duration_ms)}"
+        tile = None
+        sheet = self._sprites.get(clip.source_path) if self._sprites is not None else None
+        if sheet is not None:
+            # Source time under the cursor; a memory-mapped slice, no decoding
+            tile = sheet.tile_for_time(clip.start_time_ms + (pos_ms - clip.position_ms))
+        self._preview.show_preview(global_pos, info, tile)
+
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
-            pos_ms = self._time_from_x(event.x())
-            self.seekRequested.emit(pos_ms)
+            self._last_seek_ms = None
+            self.scrubStarted.emit()
+            self._emit_seek(self._time_from_x(event.x()))
         super().mousePressEvent(event)
 
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.scrubFinished.emit()
+        super().mouseReleaseEvent(event)
+
+    def _emit_seek(self, pos_ms: int):
+        # Move the playhead immediately; the player catches up asynchronously
+        if pos_ms == self._last_seek_ms:
+            return
+        self._last_seek_ms = pos_ms
+        self._position_ms = pos_ms
+        self.update()
+        self.seekRequested.emit(pos_ms)
+
     # Helpers
     def _clip_at_time(self, t_ms: int) -> Optional[TimelineClip]:
-        clips = self._get_sorted_clips()
-        for c in clips:
-            if c.position_ms <= t_ms < c.position_ms + c.duration_ms:
-                return c
-        return None
+        if not self._timeline:
+            return None
+        return self._timeline.get_clip_at_position(t_ms)
 
     @staticmethod
     def _fmt_ms(ms: int) -> str:
@@ -130,6 +130,15 @@ class ExportDialog(QDialog):
 
         layout.addWidget(trans_group)
 
+        # Chapters section
+        chapters_group = QGroupBox(i18n.t("export.chapters.group", "Chapters"))
+        chapters_layout = QVBoxLayout()
+        chapters_group.setLayout(chapters_layout)
+        self.chapters_checkbox = QCheckBox(i18n.t("export.chapters.enable", "Write markers as chapters (MP4/MOV/MKV)"))
+        self.chapters_checkbox.setChecked(True)
+        chapters_layout.addWidget(self.chapters_checkbox)
+        layout.addWidget(chapters_group)
+
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setRange(0, 100)
@@ -271,6 +280,20 @@ class ExportDialog(QDialog):
 
             self.export_completed.emit(False, message)
 
+    def set_export_settings(self, settings: dict):
+        """Pre-fill the dialog from settings returned by get_export_settings (e.g. saved in a project)."""
+        if not settings:
+            return
+        if settings.get("output_path"):
+            self.output_path = settings["output_path"]
+            self.path_edit.setText(self.output_path)
+        index = {"high": 0, "medium": 1, "low": 2}.get(settings.get("quality"))
+        if index is not None:
+            self.quality_combo.setCurrentIndex(index)
+        self.trans_checkbox.setChecked(bool(settings.get("transitions_enabled", False)))
+        self.trans_spin.setValue(int(settings.get("transition_ms", 500)))
+        self.chapters_checkbox.setChecked(bool(settings.get("chapters_enabled", True)))
+
     def get_export_settings(self):
         """
         Get export settings as dictionary.
@@ -282,7 +305,8 @@ class ExportDialog(QDialog):
             "output_path": self.output_path,
             "quality": self.quality,
             "transitions_enabled": bool(self.trans_checkbox.isChecked()) if hasattr(self, 'trans_checkbox') else False,
-            "transition_ms": int(self.trans_spin.value()) if hasattr(self, 'trans_spin') else 500
+            "transition_ms": int(self.trans_spin.value()) if hasattr(self, 'trans_spin') else 500,
+            "chapters_enabled": bool(self.chapters_checkbox.isChecked()) if hasattr(self, 'chapters_checkbox') else True
         }
 
 
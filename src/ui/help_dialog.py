@@ -94,6 +94,9 @@ class HelpDialog(QDialog):
             ("Ctrl+T", "Toggle trim mode", "Enable/disable trim mode for cutting video"),
             ("I", "Set In point", "Mark start of trim range at current position"),
             ("O", "Set Out point", "Mark end of trim range at current position"),
+            (", / .", "Ripple out", "Move the selected clip's out point one frame earlier/later"),
+            ("Ctrl+[ / Ctrl+]", "Roll", "Move the cut after the selected clip one frame"),
+            ("Alt+[ / Alt+]", "Slip", "Shift the selected clip's source range one frame"),
         ]
 
         table = self.create_shortcuts_table(shortcuts)
@@ -111,16 +114,20 @@ class HelpDialog(QDialog):
             ("Space", "Play/Pause", "Toggle video playback"),
             ("Left Arrow", "Seek backward 5s", "Move 5 seconds backward"),
             ("Right Arrow", "Seek forward 5s", "Move 5 seconds forward"),
+            ("L", "Shuttle forward", "Play forward; press again for 2x, 4x ... 32x"),
+            ("J", "Shuttle reverse", "Play in reverse; press again for 2x, 4x ... 32x"),
+            ("K", "Shuttle stop", "Pause and return to the selected speed"),
+            ("Ctrl+L", "Loop I/O from RAM", "Cache the In/Out region in memory and loop it"),
             ("Up Arrow", "Volume up", "Increase volume by 5%"),
             ("Down Arrow", "Volume down", "Decrease volume by 5%"),
-            ("M", "Mute/Unmute", "Toggle audio mute (note: OpenCV has no audio)"),
+            ("M", "Mute/Unmute", "Toggle audio mute (playback keeps its timing)"),
         ]
 
         table = self.create_shortcuts_table(shortcuts)
         layout.addWidget(table)
 
-        # Add note about OpenCV
-        note = QLabel("Note: OpenCV backend does not support audio playback.")
+        # Add note about audio
+        note = QLabel(i18n.t("help.audio_note", "Note: audio is decoded with FFmpeg; without FFmpeg, playback is silent."))
         note.setStyleSheet("color: #666; font-style: italic; padding: 10px;")
         layout.addWidget(note)
 
@@ -162,6 +169,8 @@ class HelpDialog(QDialog):
             ("F", "Fullscreen", "Toggle fullscreen mode"),
             ("Escape", "Exit fullscreen", "Return to normal window mode"),
             ("Ctrl+Shift+H", "High contrast mode", "Toggle high contrast theme for accessibility"),
+            ("Ctrl+Shift+D", "Performance overlay", "Show decode/convert/scale/paint timings, fps and dropped frames"),
+            ("Ctrl+Shift+C", "Compare A/B", "Play two clips or files side by side (or as a wipe) on one playhead"),
         ]
 
         table = self.create_shortcuts_table(shortcuts)
@@ -13,9 +13,9 @@ Integrates all video editing features:
 
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QPushButton, QSlider, QLabel, QFileDialog, QStyle, QAction, QComboBox, QMessageBox, QDockWidget, QInputDialog, QToolBar, QDialog, QProgressBar
+    QPushButton, QSlider, QLabel, QFileDialog, QStyle, QAction, QComboBox, QMessageBox, QDockWidget, QInputDialog, QToolBar, QDialog, QProgressBar, QActionGroup, QStackedWidget
 )
-from PyQt5.QtCore import Qt, QSettings
+from PyQt5.QtCore import Qt, QSettings, QTimer
 import os
 import sys
 
@@ -23,17 +23,33 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from video.opencv_player import OpenCVVideoPlayer
+from video.program_player import ProgramPlayer
+from video.decoder_pool import decoder_pool
+from video import decode_backends
+from video.sprite_cache import SpriteCache
 from video.timeline import Timeline
+from video.tracks import Track
 from video.marker import MarkerManager
+from video.project import PROJECT_EXTENSION, ProjectFormatError, load_project, save_project
+from video.edit_journal import EditJournal
+from video.scene_detect import SceneDetector
+from ui.scene_dialog import SceneDialog
+from video.audio_analysis import AudioAnalyzer
+from ui.silence_dialog import SilenceDialog
 from ui.timeline_widget import TimelineWidget
 from ui.export_dialog import ExportDialog
 from ui.help_dialog import HelpDialog
 from ui.inspector_panel import InspectorPanel
 from ui.composition_bar import CompositionBar
+from ui.compare_viewer import CompareViewer
 from ui.select_clips_dialog import SelectClipsDialog
 from utils.theme_manager import ThemeManager
-from utils.command_stack import CommandStack, AddClipCommand, AddMarkerCommand
-from video.ffmpeg_processor import FFmpegProcessor, FFmpegWorker
+from utils.command_stack import (
+    CommandStack, AddClipCommand, AddMarkerCommand, EditClipCommand, MacroCommand, SnapshotCommand,
+    SplitClipCommand, TrimCommand
+)
+from video.ffmpeg_processor import FFmpegProcessor, FFmpegWorker, get_media_duration
+from video.chapters import chapters_for_export, supports_chapters
 from utils.i18n_manager import i18n
 # Auth dialogs
 from ui.auth_dialogs import LoginDialog
@@ -48,6 +64,7 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.app = app
         self.is_seeking = False
+        self._resume_after_scrub = False
         self.in_point_ms = None  # Trim in point
         self.out_point_ms = None  # Trim out point
         self.trim_mode = False
@@ -57,6 +74,20 @@ class MainWindow(QMainWindow):
         self.marker_manager = MarkerManager()
         self.command_stack = CommandStack()
         self.selected_clip_id = None
+        # Scene detection (one source at a time, in worker processes)
+        self.scene_detector = SceneDetector(self)
+        self.scene_detector.progress.connect(self.on_scene_progress)
+        self.scene_detector.finished.connect(self.on_scenes_detected)
+        self._scene_clip_id = None
+        # Loudness analysis for silence removal (one source at a time)
+        self.audio_analyzer = AudioAnalyzer(self)
+        self.audio_analyzer.progress.connect(self.on_silence_progress)
+        self.audio_analyzer.finished.connect(self.on_audio_analysed)
+        self._silence_clip_id = None
+        # Trims stay inside the source media when its length is already known
+        self.timeline.source_duration_lookup = lambda path: (decoder_pool.cached_info(path) or {}).get("duration_ms")
+        self.project_path = None  # .vproj file the timeline was loaded from / saved to
+        self.export_settings = {}  # Last export dialog settings (saved with the project)
 
         # FFmpeg processor
         self.ffmpeg_processor = FFmpegProcessor()
@@ -69,6 +100,9 @@ class MainWindow(QMainWindow):
         self.program_index = 0
         self.program_current_clip_id = None
 
+        # A/B compare state
+        self.compare_mode = False
+
         # Theme manager
         self.theme_manager = ThemeManager(app)
 
@@ -82,6 +116,10 @@ class MainWindow(QMainWindow):
         self.load_sample_video()
         self.update_undo_redo_state()
 
+        # Crash recovery: journal edits once the window is up
+        self.journal = EditJournal(self.timeline, self.marker_manager, self.command_stack, self._editor_state)
+        QTimer.singleShot(0, self.start_journal)
+
     def init_ui(self):
         """Initialize the user interface."""
         self.setWindowTitle(i18n.t("window.title", "Video Editor/Player - XJCO2811 (Iteration 2)"))
@@ -120,12 +158,34 @@ class MainWindow(QMainWindow):
         # Video player
         self.video_player = OpenCVVideoPlayer()
         self.video_player.setMinimumSize(640, 480)
-        top_layout.addWidget(self.video_player)
+        self.video_player.set_stats_overlay(self.stats_overlay_action.isChecked())
+
+        # A/B compare viewer shares the player's slot
+        self.compare_viewer = CompareViewer()
+        self.compare_viewer.set_mode(CompareViewer.MODE_WIPE if self.compare_wipe_action.isChecked() else CompareViewer.MODE_SIDE_BY_SIDE)
+        self.video_stack = QStackedWidget()
+        self.video_stack.addWidget(self.video_player)
+        self.video_stack.addWidget(self.compare_viewer)
+        top_layout.addWidget(self.video_stack)
 
         # Connect signals
         self.video_player.positionChanged.connect(self.on_position_changed)
         self.video_player.durationChanged.connect(self.on_duration_changed)
         self.video_player.stateChanged.connect(self.on_state_changed)
+        self.video_player.loopChanged.connect(self.on_loop_changed)
+        self.video_player.loopProgress.connect(self.on_loop_progress)
+        self.compare_viewer.positionChanged.connect(self.on_position_changed)
+        self.compare_viewer.durationChanged.connect(self.on_duration_changed)
+        self.compare_viewer.stateChanged.connect(self.on_state_changed)
+
+        # Program preview engine (gapless playback of the whole timeline)
+        self.program_player = ProgramPlayer(self.video_player, self)
+        self.program_player.clipChanged.connect(self.on_program_clip_changed)
+        self.program_player.positionChanged.connect(self.on_position_changed)
+        self.program_player.programPositionChanged.connect(self.on_program_position_changed)
+        self.program_player.durationChanged.connect(self.on_duration_changed)
+        self.program_player.stateChanged.connect(self.on_state_changed)
+        self.program_player.finished.connect(self.on_program_finished)
 
         # Timeline slider with marker overlay
         timeline_container = QWidget()
@@ -144,6 +204,15 @@ class MainWindow(QMainWindow):
         self.composition_bar = CompositionBar(self)
         self.composition_bar.set_timeline(self.timeline)
         self.composition_bar.seekRequested.connect(self.on_composition_seek)
+        self.composition_bar.scrubStarted.connect(self.on_composition_scrub_started)
+        self.composition_bar.scrubFinished.connect(self.on_composition_scrub_finished)
+        # Hover thumbnails come from per-source sprite sheets generated in the background
+        self.sprite_cache = SpriteCache(self)
+        self.composition_bar.set_sprite_cache(self.sprite_cache)
+        self.composition_bar.set_transitions(
+            self.settings.value("preview/transitions", False, type=bool),
+            self.settings.value("preview/transition_ms", 500, type=int)
+        )
         timeline_container_layout.addWidget(self.composition_bar)
 
         top_layout.addWidget(timeline_container)
@@ -185,6 +254,8 @@ class MainWindow(QMainWindow):
         self.timeline_widget.clip_set_in_from_current.connect(self.on_timeline_clip_set_in_from_current)
         self.timeline_widget.clip_set_out_from_current.connect(self.on_timeline_clip_set_out_from_current)
         self.timeline_widget.clip_split_requested.connect(self.on_timeline_clip_split_requested)
+        self.timeline_widget.clip_detect_scenes_requested.connect(self.on_timeline_detect_scenes_requested)
+        self.timeline_widget.clip_remove_silence_requested.connect(self.on_timeline_remove_silence_requested)
         splitter.addWidget(self.timeline_widget)
 
         # Set splitter sizes (60% video, 40% timeline)
@@ -227,6 +298,23 @@ class MainWindow(QMainWindow):
 
         file_menu.addSeparator()
 
+        open_project_action = QAction(i18n.t("action.open_project", "Open &Project..."), self)
+        open_project_action.setShortcut("Ctrl+Shift+O")
+        open_project_action.triggered.connect(self.open_project)
+        file_menu.addAction(open_project_action)
+
+        save_project_action = QAction(i18n.t("action.save_project", "&Save Project"), self)
+        save_project_action.setShortcut("Ctrl+S")
+        save_project_action.triggered.connect(self.save_project)
+        file_menu.addAction(save_project_action)
+
+        save_project_as_action = QAction(i18n.t("action.save_project_as", "Save Project &As..."), self)
+        save_project_as_action.setShortcut("Ctrl+Shift+S")
+        save_project_as_action.triggered.connect(self.save_project_as)
+        file_menu.addAction(save_project_as_action)
+
+        file_menu.addSeparator()
+
         export_action = QAction(i18n.t("action.export", "&Export Video..."), self)
         export_action.setShortcut("Ctrl+E")
         export_action.triggered.connect(self.export_video)
@@ -280,6 +368,38 @@ class MainWindow(QMainWindow):
         clear_trim_action.triggered.connect(self.clear_trim_points)
         edit_menu.addAction(clear_trim_action)
 
+        edit_menu.addSeparator()
+
+        add_overlay_action = QAction(i18n.t("action.add_overlay_clip", "Add &Overlay Clip at Playhead..."), self)
+        add_overlay_action.triggered.connect(lambda: self.add_track_clip_dialog(Track.KIND_VIDEO))
+        edit_menu.addAction(add_overlay_action)
+
+        add_audio_action = QAction(i18n.t("action.add_audio_clip", "Add &Audio Clip at Playhead..."), self)
+        add_audio_action.triggered.connect(lambda: self.add_track_clip_dialog(Track.KIND_AUDIO))
+        edit_menu.addAction(add_audio_action)
+
+        edit_menu.addSeparator()
+
+        # Trim the selected clip one frame at a time (each step is one undo step)
+        trim_menu = edit_menu.addMenu(i18n.t("menu.trim_clip", "T&rim Selected Clip"))
+        trim_modes = (
+            ("ripple_in", i18n.t("action.trim_ripple_in", "Ripple In"), None),
+            ("ripple_out", i18n.t("action.trim_ripple_out", "Ripple Out"), (",", ".")),
+            ("roll", i18n.t("action.trim_roll", "Roll"), ("Ctrl+[", "Ctrl+]")),
+            ("slip", i18n.t("action.trim_slip", "Slip"), ("Alt+[", "Alt+]")),
+            ("slide", i18n.t("action.trim_slide", "Slide"), None),
+        )
+        for mode, mode_label, shortcuts in trim_modes:
+            for direction, text in ((-1, i18n.t("action.trim_earlier", "1 Frame Earlier")),
+                                    (1, i18n.t("action.trim_later", "1 Frame Later"))):
+                action = QAction(f"{mode_label}: {text}", self)
+                if shortcuts:
+                    action.setShortcut(shortcuts[0 if direction < 0 else 1])
+                action.triggered.connect(lambda checked, m=mode, label=mode_label, d=direction: self.trim_selected_clip(m, label, d))
+                trim_menu.addAction(action)
+            if mode != trim_modes[-1][0]:
+                trim_menu.addSeparator()
+
         # View menu
         view_menu = menubar.addMenu(i18n.t("menu.view", "&View"))
 
@@ -297,6 +417,27 @@ class MainWindow(QMainWindow):
         high_contrast_action.triggered.connect(self.toggle_high_contrast)
         view_menu.addAction(high_contrast_action)
 
+        self.stats_overlay_action = QAction(i18n.t("action.stats_overlay", "&Performance Overlay"), self)
+        self.stats_overlay_action.setShortcut("Ctrl+Shift+D")
+        self.stats_overlay_action.setCheckable(True)
+        self.stats_overlay_action.setChecked(self.settings.value("view/stats_overlay", False, type=bool))
+        self.stats_overlay_action.toggled.connect(self.toggle_stats_overlay)
+        view_menu.addAction(self.stats_overlay_action)
+
+        view_menu.addSeparator()
+
+        self.compare_action = QAction(i18n.t("action.compare", "Compare &A/B..."), self)
+        self.compare_action.setShortcut("Ctrl+Shift+C")
+        self.compare_action.setCheckable(True)
+        self.compare_action.triggered.connect(self.toggle_compare)
+        view_menu.addAction(self.compare_action)
+
+        self.compare_wipe_action = QAction(i18n.t("action.compare_wipe", "Compare &Wipe View"), self)
+        self.compare_wipe_action.setCheckable(True)
+        self.compare_wipe_action.setChecked(self.settings.value("view/compare_wipe", False, type=bool))
+        self.compare_wipe_action.toggled.connect(self.toggle_compare_wipe)
+        view_menu.addAction(self.compare_wipe_action)
+
         # Language menu (Iteration 3)
         language_menu = menubar.addMenu(i18n.t("menu.language", "&Language"))
         lang_en_action = QAction(i18n.t("action.lang_en", "English"), self)
@@ -342,6 +483,35 @@ class MainWindow(QMainWindow):
         self.program_next_action.triggered.connect(self.program_next_clip)
         playback_menu.addAction(self.program_next_action)
 
+        self.preview_transitions_action = QAction(i18n.t("action.preview_transitions", "Crossfade Transitions in Preview"), self)
+        self.preview_transitions_action.setCheckable(True)
+        self.preview_transitions_action.setChecked(self.settings.value("preview/transitions", False, type=bool))
+        self.preview_transitions_action.toggled.connect(self.toggle_preview_transitions)
+        playback_menu.addAction(self.preview_transitions_action)
+
+        self.ram_loop_action = QAction(i18n.t("action.ram_loop", "&Loop In/Out from RAM"), self)
+        self.ram_loop_action.setShortcut("Ctrl+L")
+        self.ram_loop_action.setCheckable(True)
+        self.ram_loop_action.triggered.connect(self.toggle_ram_loop)
+        playback_menu.addAction(self.ram_loop_action)
+
+        # Preview decoder backend (applies to the loaded source immediately)
+        decoder_menu = playback_menu.addMenu(i18n.t("menu.decoder", "Preview &Decoder"))
+        decoder_group = QActionGroup(self)
+        current_backend = decode_backends.get_backend_preference()
+        for backend, key, default in (
+            (decode_backends.BACKEND_AUTO, "action.decoder_auto", "Automatic"),
+            (decode_backends.BACKEND_OPENCV, "action.decoder_opencv", "OpenCV"),
+            (decode_backends.BACKEND_FFMPEG, "action.decoder_ffmpeg", "FFmpeg Pipe (multithreaded, scaled)"),
+            (decode_backends.BACKEND_PROCESS, "action.decoder_process", "Separate Process (crash-isolated)"),
+        ):
+            action = QAction(i18n.t(key, default), self)
+            action.setCheckable(True)
+            action.setChecked(backend == current_backend)
+            action.triggered.connect(lambda checked, b=backend: self.set_decoder_backend(b))
+            decoder_group.addAction(action)
+            decoder_menu.addAction(action)
+
         # Help menu
         help_menu = menubar.addMenu(i18n.t("menu.help", "&Help"))
 
@@ -422,6 +592,30 @@ class MainWindow(QMainWindow):
 
         control_layout.addSpacing(20)
 
+        # Preview resolution (Auto steps down under load; other entries lock it)
+        self.preview_res_label = QLabel(i18n.t("label.preview_res", "Preview:"))
+        control_layout.addWidget(self.preview_res_label)
+
+        self.preview_res_combo = QComboBox()
+        self.preview_res_combo.addItem(i18n.t("preview_res.auto", "Auto"), 0.0)
+        self.preview_res_combo.addItem(i18n.t("preview_res.full", "Full"), 1.0)
+        self.preview_res_combo.addItem("1/2", 0.5)
+        self.preview_res_combo.addItem("1/4", 0.25)
+        self.preview_res_combo.setToolTip(i18n.t("tooltip.preview_res", "Preview resolution (Auto lowers it when playback falls behind)"))
+        control_layout.addWidget(self.preview_res_combo)
+
+        self.preview_res_value = QLabel("")
+        control_layout.addWidget(self.preview_res_value)
+        self.video_player.previewScaleChanged.connect(self.on_preview_scale_changed)
+
+        saved_res = self.settings.value("preview/resolution", 0.0, type=float)
+        index = self.preview_res_combo.findData(saved_res)
+        self.preview_res_combo.setCurrentIndex(max(0, index))
+        self.change_preview_resolution(self.preview_res_combo.currentIndex())
+        self.preview_res_combo.currentIndexChanged.connect(self.change_preview_resolution)
+
+        control_layout.addSpacing(20)
+
         # Volume control
         self.volume_text_label = QLabel(i18n.t("label.volume", "Volume:"))
         control_layout.addWidget(self.volume_text_label)
@@ -469,6 +663,7 @@ class MainWindow(QMainWindow):
             self.load_video_file(file_path)
 
     def load_video_file(self, file_path):
+        self.exit_compare()
         if self.video_player.load_video(file_path):
             self.play_button.setEnabled(True)
             self.stop_button.setEnabled(True)
@@ -476,38 +671,196 @@ class MainWindow(QMainWindow):
             self.forward_button.setEnabled(True)
             self.statusBar().showMessage(i18n.t("status.loaded", "Loaded: {name}").replace("{name}", os.path.basename(file_path)))
 
+    # Project files
+    def open_project(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, i18n.t("action.open_project", "Open Project"), "",
+            i18n.t("dialog.project_filter", "Video Editor Project (*.vproj)")
+        )
+        if not path:
+            return
+        if self.program_mode:
+            self.toggle_program_preview()
+        self.exit_compare()
+        try:
+            state = load_project(path, self.timeline, self.marker_manager)
+        except (OSError, ProjectFormatError) as e:
+            QMessageBox.warning(self, i18n.t("dialog.project_open_failed", "Could Not Open Project"), str(e))
+            return
+        self.project_path = path
+        # Undo history refers to the clips that were just replaced
+        self.command_stack.clear()
+        self.selected_clip_id = None
+        self._apply_editor_state(state)
+        self.statusBar().showMessage(i18n.t("status.project_loaded", "Project loaded: {name}").replace("{name}", os.path.basename(path)))
+
+    def save_project(self):
+        if not self.project_path:
+            self.save_project_as()
+            return
+        state = self._editor_state()
+        state.pop("project_path", None)
+        try:
+            save_project(self.project_path, self.timeline, self.marker_manager, state)
+        except OSError as e:
+            QMessageBox.warning(self, i18n.t("dialog.project_save_failed", "Could Not Save Project"), str(e))
+            return
+        self.statusBar().showMessage(i18n.t("status.project_saved", "Project saved: {name}").replace("{name}", os.path.basename(self.project_path)))
+
+    def _editor_state(self) -> dict:
+        """Editor state stored with projects and recovery snapshots."""
+        return {
+            "video_path": self.video_player.video_path,
+            "in_ms": self.in_point_ms,
+            "out_ms": self.out_point_ms,
+            "export": self.export_settings,
+            "project_path": self.project_path,
+        }
+
+    def _apply_editor_state(self, state: dict):
+        video_path = state.get("video_path")
+        if video_path and os.path.exists(video_path):
+            self.load_video_file(video_path)
+        self.in_point_ms = state.get("in_ms")
+        self.out_point_ms = state.get("out_ms")
+        self.in_point_label.setText(f"In: {self.format_time(self.in_point_ms)}" if self.in_point_ms is not None else "")
+        self.out_point_label.setText(f"Out: {self.format_time(self.out_point_ms)}" if self.out_point_ms is not None else "")
+        self.export_settings = dict(state.get("export") or {})
+
+    def start_journal(self):
+        """Offer to recover an unclean previous session, then start journaling edits."""
+        if self.journal.has_recovery():
+            reply = QMessageBox.question(
+                self,
+                i18n.t("dialog.recover_title", "Recover Unsaved Edits"),
+                i18n.t("dialog.recover_msg", "The editor did not close properly last time. Restore the edits from that session?"),
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if reply == QMessageBox.Yes:
+                try:
+                    state = self.journal.recover()
+                except (OSError, ProjectFormatError) as e:
+                    QMessageBox.warning(self, i18n.t("dialog.recover_failed", "Could Not Recover Edits"), str(e))
+                else:
+                    self.project_path = state.get("project_path")
+                    self._apply_editor_state(state)
+                    self.update_undo_redo_state()
+                    self.statusBar().showMessage(i18n.t("status.edits_recovered", "Recovered edits from the previous session"))
+                    if self.journal.recovered_exactly is False:
+                        QMessageBox.warning(
+                            self,
+                            i18n.t("dialog.recover_title", "Recover Unsaved Edits"),
+                            i18n.t("dialog.recover_mismatch", "Some edits from the previous session could not be restored exactly. Please check the timeline before saving.")
+                        )
+            else:
+                self.journal.discard()
+        self.journal.start()
+
+    def save_project_as(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, i18n.t("action.save_project_as", "Save Project As"), self.project_path or "",
+            i18n.t("dialog.project_filter", "Video Editor Project (*.vproj)")
+        )
+        if not path:
+            return
+        if not path.lower().endswith(PROJECT_EXTENSION):
+            path += PROJECT_EXTENSION
+        self.project_path = path
+        self.save_project()
+
     def play_pause(self):
-        state = self.video_player.get_state()
+        if self.program_mode:
+            self.program_player.toggle_pause()
+            return
+        state = self._viewer().get_state()
         if state == OpenCVVideoPlayer.STATE_PLAYING:
-            self.video_player.pause()
+            self._viewer().pause()
         else:
-            self.video_player.play()
+            # Space always resumes at the selected speed, leaving any shuttle rate
+            self._viewer().set_playback_speed(self._selected_speed())
+            self._viewer().play()
+
+    def shuttle(self, direction):
+        """
+        J/K/L shuttle control.
+
+        Repeated presses in the current direction double the rate up to 32x;
+        pressing the opposite direction starts again at 1x.
+
+        Args:
+            direction (int): 1 = forward (L), -1 = reverse (J), 0 = stop (K)
+        """
+        if self.compare_mode:
+            return
+        if self.program_mode:
+            self.toggle_program_preview()
+        player = self.video_player
+        if player.capture is None:
+            return
+        if direction == 0:
+            player.pause()
+            player.set_playback_speed(self._selected_speed())
+            return
+
+        speed = player.get_playback_speed()
+        playing = player.get_state() == OpenCVVideoPlayer.STATE_PLAYING
+        rate = OpenCVVideoPlayer.SHUTTLE_RATES[0]
+        if playing and speed * direction > 0:
+            faster = [r for r in OpenCVVideoPlayer.SHUTTLE_RATES if r > abs(speed)]
+            rate = faster[0] if faster else OpenCVVideoPlayer.SHUTTLE_RATES[-1]
+        player.set_playback_speed(rate * direction)
+        if not playing:
+            player.play()
+        rate_text = f"{'-' if direction < 0 else ''}{rate:g}x"
+        self.statusBar().showMessage(i18n.t("status.shuttle", "Shuttle: {rate}").replace("{rate}", rate_text))
+
+    def _viewer(self):
+        """The widget the transport controls drive: the compare viewer or the player."""
+        return self.compare_viewer if self.compare_mode else self.video_player
+
+    def _selected_speed(self):
+        return float(self.speed_combo.currentText().replace('x', ''))
 
     def stop(self):
-        self.video_player.stop()
+        if self.program_mode:
+            self.toggle_program_preview()
+        self._viewer().stop()
 
     def rewind(self):
-        new_pos = max(0, self.video_player.get_position() - 10000)
-        self.video_player.seek(new_pos)
+        new_pos = max(0, self._viewer().get_position() - 10000)
+        self._viewer().seek(new_pos)
 
     def fast_forward(self):
         duration = self.timeline_slider.maximum()
-        new_pos = min(duration, self.video_player.get_position() + 10000)
-        self.video_player.seek(new_pos)
+        new_pos = min(duration, self._viewer().get_position() + 10000)
+        self._viewer().seek(new_pos)
 
     def set_volume(self, volume):
         self.volume_label.setText(f"{volume}%")
         self.video_player.set_volume(volume)
+        self.program_player.audio.set_volume(volume)
 
     def change_speed(self, speed_text):
         speed = float(speed_text.replace('x', ''))
-        self.video_player.set_playback_speed(speed)
+        self._viewer().set_playback_speed(speed)
         msg = i18n.t("status.speed", "Playback speed: {speed}").replace("{speed}", speed_text)
         self.statusBar().showMessage(msg)
 
+    def change_preview_resolution(self, index):
+        scale = self.preview_res_combo.itemData(index)
+        self.settings.setValue("preview/resolution", float(scale))
+        self.video_player.set_preview_scale(scale if scale > 0 else None)
+        self.on_preview_scale_changed(self.video_player.get_preview_scale())
+
+    def on_preview_scale_changed(self, scale):
+        # Show what Auto currently runs at
+        text = {1.0: i18n.t("preview_res.full", "Full"), 0.5: "1/2", 0.25: "1/4"}.get(scale, f"{scale:g}x")
+        self.preview_res_value.setText(f"({text})" if not self.video_player.is_preview_scale_locked() else "")
+
     def toggle_mute(self):
         current_muted = self.video_player.is_muted
         self.video_player.set_mute(not current_muted)
+        self.program_player.audio.set_muted(not current_muted)
         if not current_muted:
             self.mute_button.setIcon(self.style().standardIcon(QStyle.SP_MediaVolumeMuted))
             self.statusBar().showMessage(i18n.t("status.muted", "Muted"))
@@ -526,28 +879,35 @@ class MainWindow(QMainWindow):
     # Slider events
     def on_slider_pressed(self):
         self.is_seeking = True
+        if self.program_mode:
+            self.toggle_program_preview()
+        # Scrub paused; playback resumes on release
+        self._resume_after_scrub = self._viewer().get_state() == OpenCVVideoPlayer.STATE_PLAYING
+        if self._resume_after_scrub:
+            self._viewer().pause()
 
     def on_slider_released(self):
         position = self.timeline_slider.value()
-        self.video_player.seek(position)
+        if self._resume_after_scrub:
+            self._viewer().seek(position)
+            self._viewer().play()
+        else:
+            self._viewer().request_seek(position)
+        self._resume_after_scrub = False
         self.is_seeking = False
 
     def on_slider_moved(self, position):
         self.current_time_label.setText(self.format_time(position))
+        # Coalesced background seek: only the newest slider position is decoded
+        self._viewer().request_seek(position)
 
     def on_position_changed(self, position_ms):
         if not self.is_seeking:
             self.timeline_slider.setValue(position_ms)
         self.current_time_label.setText(self.format_time(position_ms))
-        # Sync composition bar playhead
-        if hasattr(self, 'composition_bar') and self.composition_bar:
+        # Sync composition bar playhead (program preview reports timeline time separately)
+        if hasattr(self, 'composition_bar') and self.composition_bar and not (self.program_mode or self.compare_mode):
             self.composition_bar.set_position(position_ms)
-        # Program preview: if current clip has an Out point, auto-advance when reaching it
-        if self.program_mode and self.program_current_clip_id:
-            clip = self.timeline.get_clip(self.program_current_clip_id)
-            if clip and position_ms >= clip.end_time_ms - 1:
-                self.program_next_clip()
-                return
 
     def on_duration_changed(self, duration_ms):
         self.timeline_slider.setRange(0, duration_ms)
@@ -558,9 +918,6 @@ class MainWindow(QMainWindow):
             self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPause))
         else:
             self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
-        # Program preview: auto-advance when a clip finishes
-        if self.program_mode and state == OpenCVVideoPlayer.STATE_STOPPED:
-            self.program_next_clip()
 
     @staticmethod
     def format_time(milliseconds):
@@ -570,6 +927,12 @@ class MainWindow(QMainWindow):
         return f"{minutes:02d}:{seconds:02d}"
 
     # Iteration 2 features
+    def toggle_stats_overlay(self, checked):
+        """Show decode/convert/scale/paint timings over the video."""
+        self.video_player.set_stats_overlay(checked)
+        self.video_player.reset_playback_stats()
+        self.settings.setValue("view/stats_overlay", bool(checked))
+
     def toggle_high_contrast(self):
         self.theme_manager.toggle_high_contrast()
         if self.theme_manager.is_high_contrast():
@@ -595,7 +958,7 @@ class MainWindow(QMainWindow):
                 self.inspector.set_in_from_ms(self.in_point_ms)
                 # Auto-apply if Out exists and valid
                 if self.out_point_ms is not None and self.out_point_ms > self.in_point_ms:
-                    self.timeline.update_clip_in_out(clip.id, self.in_point_ms, self.out_point_ms)
+                    self.edit_clip(clip.id, self.in_point_ms, self.out_point_ms)
                     # refresh inspector to show applied values
                     self.inspector.set_clip(clip.id, clip.label or os.path.basename(clip.source_path), clip.start_time_ms, clip.end_time_ms)
                     self.statusBar().showMessage(f"Applied to clip: {self.format_time(clip.start_time_ms)} - {self.format_time(clip.end_time_ms)}")
@@ -643,23 +1006,23 @@ class MainWindow(QMainWindow):
         self.statusBar().showMessage(i18n.t("status.marker_added", "Marker added at {time}").replace("{time}", self.format_time(current_time)))
 
     def goto_previous_marker(self):
-        current_time = self.video_player.get_position()
+        current_time = self._viewer().get_position()
         marker = self.marker_manager.get_previous_marker(current_time)
         if marker:
-            self.video_player.seek(marker.time_ms)
+            self._viewer().seek(marker.time_ms)
             self.statusBar().showMessage(i18n.t("status.marker_prev", "Jumped to marker: {label}").replace("{label}", marker.label))
 
     def goto_next_marker(self):
-        current_time = self.video_player.get_position()
+        current_time = self._viewer().get_position()
         marker = self.marker_manager.get_next_marker(current_time)
         if marker:
-            self.video_player.seek(marker.time_ms)
+            self._viewer().seek(marker.time_ms)
             self.statusBar().showMessage(f"Jumped to marker: {marker.label}")
 
     def on_marker_clicked(self, marker_id):
         marker = self.marker_manager.get_marker(marker_id)
         if marker:
-            self.video_player.seek(marker.time_ms)
+            self._viewer().seek(marker.time_ms)
 
     # Timeline context handlers
     def on_timeline_clip_rename_requested(self, clip_id: int):
@@ -668,7 +1031,7 @@ class MainWindow(QMainWindow):
             return
         text, ok = QInputDialog.getText(self, i18n.t("dialog.rename_title", "Rename Clip"), i18n.t("dialog.rename_prompt", "New name:"), text=clip.label or os.path.basename(clip.source_path))
         if ok:
-            if self.timeline.update_clip_label(clip_id, text.strip()):
+            if self.edit_clip(clip_id, label=text.strip()):
                 c = self.timeline.get_clip(clip_id)
                 if c:
                     self.inspector.set_clip(c.id, c.label or os.path.basename(c.source_path), c.start_time_ms, c.end_time_ms)
@@ -712,7 +1075,7 @@ class MainWindow(QMainWindow):
         cur = self.video_player.get_position()
         new_start = cur
         new_end = max(new_start + 10, clip.end_time_ms)  # ensure at least 10ms
-        if self.timeline.update_clip_in_out(clip_id, new_start, new_end):
+        if self.edit_clip(clip_id, new_start, new_end):
             c = self.timeline.get_clip(clip_id)
             if c:
                 self.inspector.set_clip(c.id, c.label or os.path.basename(c.source_path), c.start_time_ms, c.end_time_ms)
@@ -727,7 +1090,7 @@ class MainWindow(QMainWindow):
         new_start = min(clip.start_time_ms, new_end - 10) if new_end - 10 > 0 else 0
         if new_end <= new_start:
             new_end = new_start + 10
-        if self.timeline.update_clip_in_out(clip_id, new_start, new_end):
+        if self.edit_clip(clip_id, new_start, new_end):
             c = self.timeline.get_clip(clip_id)
             if c:
                 self.inspector.set_clip(c.id, c.label or os.path.basename(c.source_path), c.start_time_ms, c.end_time_ms)
@@ -750,18 +1113,123 @@ class MainWindow(QMainWindow):
         if split_ms <= clip.start_time_ms or split_ms >= clip.end_time_ms:
             self.statusBar().showMessage("Cannot split: position out of range")
             return
-        new_clip = self.timeline.split_clip(clip_id, split_ms)
+        cmd = SplitClipCommand(self.timeline, clip_id, split_ms)
+        self.command_stack.execute(cmd)
+        new_clip = self.timeline.get_clip(cmd.new_clip_id) if cmd.new_clip_id is not None else None
         if new_clip:
             # Focus the right part after split
             self.selected_clip_id = new_clip.id
             self.inspector.set_clip(new_clip.id, new_clip.label or os.path.basename(new_clip.source_path), new_clip.start_time_ms, new_clip.end_time_ms)
             self.statusBar().showMessage(f"Split at {self.format_time(split_ms)} -> new clip #{new_clip.id}")
 
+    def on_timeline_detect_scenes_requested(self, clip_id: int):
+        """Analyse the clip's source for scene changes (cached after the first run)."""
+        clip = self.timeline.get_clip(clip_id)
+        if not clip:
+            return
+        if self.scene_detector.is_running():
+            self.statusBar().showMessage(i18n.t("status.scenes_busy", "Scene detection is already running"))
+            return
+        self._scene_clip_id = clip_id
+        self.on_scene_progress(0)
+        self.scene_detector.start(clip.source_path)
+
+    def on_scene_progress(self, percent: int):
+        self.statusBar().showMessage(i18n.t("status.scenes_progress", "Detecting scenes: {percent}%").replace("{percent}", str(percent)))
+
+    def on_scenes_detected(self, path: str, result):
+        clip = self.timeline.get_clip(self._scene_clip_id) if self._scene_clip_id is not None else None
+        self._scene_clip_id = None
+        if result is None:
+            self.statusBar().showMessage(i18n.t("status.scenes_failed", "Scene detection failed: {name}").replace("{name}", os.path.basename(path)))
+            return
+        if not clip or clip.source_path != path:
+            return  # Clip was removed or replaced meanwhile
+        dialog = SceneDialog(result, clip.start_time_ms, clip.end_time_ms, self)
+        if dialog.exec_() != QDialog.Accepted or not dialog.cuts():
+            return
+        # Right to left, so every split keeps cutting the original clip;
+        # one macro is one undo step and one timeline batch
+        cuts = dialog.cuts()
+        splits = [SplitClipCommand(self.timeline, clip.id, cut_ms) for cut_ms in reversed(cuts)]
+        self.command_stack.execute(MacroCommand(f"Split clip {clip.id} at {len(cuts)} scene cuts", splits, self.timeline))
+        self.statusBar().showMessage(i18n.t("status.scenes_split", "Split into {count} scenes").replace("{count}", str(len(cuts) + 1)))
+
+    def on_timeline_remove_silence_requested(self, clip_id: int):
+        """Measure the loudness of the clip's source (cached after the first run)."""
+        clip = self.timeline.get_clip(clip_id)
+        if not clip:
+            return
+        if self.audio_analyzer.is_running():
+            self.statusBar().showMessage(i18n.t("status.silence_busy", "Audio analysis is already running"))
+            return
+        self._silence_clip_id = clip_id
+        self.on_silence_progress(0)
+        self.audio_analyzer.start(clip.source_path)
+
+    def on_silence_progress(self, percent: int):
+        self.statusBar().showMessage(i18n.t("status.silence_progress", "Analysing audio: {percent}%").replace("{percent}", str(percent)))
+
+    def on_audio_analysed(self, path: str, levels):
+        clip = self.timeline.get_clip(self._silence_clip_id) if self._silence_clip_id is not None else None
+        self._silence_clip_id = None
+        if levels is None:
+            self.statusBar().showMessage(i18n.t("status.silence_failed", "Audio analysis failed: {name}").replace("{name}", os.path.basename(path)))
+            return
+        if not clip or clip.source_path != path:
+            return  # Clip was removed or replaced meanwhile
+        dialog = SilenceDialog(levels, clip.start_time_ms, clip.end_time_ms, self)
+        if dialog.exec_() != QDialog.Accepted or not dialog.silent_ranges():
+            return
+        if dialog.mode == SilenceDialog.SPLIT:
+            cuts = sorted({ms for silent in dialog.silent_ranges() for ms in silent
+                           if clip.start_time_ms < ms < clip.end_time_ms})
+            commands = [SplitClipCommand(self.timeline, clip.id, cut_ms) for cut_ms in reversed(cuts)]
+            description = f"Split clip {clip.id} at {len(dialog.silent_ranges())} pauses"
+        else:
+            commands = self._silence_removal_commands(clip, dialog.kept_ranges())
+            description = f"Remove {len(dialog.silent_ranges())} pauses from clip {clip.id}"
+        if not commands:
+            return
+        before_ms = self.timeline.get_total_duration()
+        self.command_stack.execute(MacroCommand(description, commands, self.timeline))
+        self.statusBar().showMessage(
+            i18n.t("status.silence_removed", "{count} pauses handled, timeline {seconds}s shorter")
+            .replace("{count}", str(len(dialog.silent_ranges())))
+            .replace("{seconds}", f"{(before_ms - self.timeline.get_total_duration()) / 1000.0:.1f}")
+        )
+
+    def _silence_removal_commands(self, clip, kept):
+        """
+        Commands that leave only the kept source ranges of a clip, as adjacent clips.
+
+        Works right to left on the original clip: ripple the out point back
+        to the end of a kept range, split off that range, and repeat; the
+        first range is reached with a ripple of the in point. Every step
+        ripples, so the clips after it close up.
+        """
+        if not kept:
+            return []
+        commands = []
+        end_ms = clip.end_time_ms
+        for i in range(len(kept) - 1, -1, -1):
+            keep_start, keep_end = kept[i]
+            if keep_end < end_ms:
+                commands.append(TrimCommand(self.timeline, "ripple_out", clip.id, keep_end - end_ms))
+            if i > 0:
+                commands.append(SplitClipCommand(self.timeline, clip.id, keep_start))
+                end_ms = keep_start
+            elif keep_start > clip.start_time_ms:
+                commands.append(TrimCommand(self.timeline, "ripple_in", clip.id, keep_start - clip.start_time_ms))
+        return commands
+
     # Program preview controls
     def toggle_program_preview(self):
         if not self.program_mode:
+            self.exit_compare()
             # start program preview
-            order = [c.id for c in self.timeline.get_sorted_clips()]
+            clips = self.timeline.get_sorted_clips()
+            order = [c.id for c in clips]
             if not order:
                 self.statusBar().showMessage(i18n.t("status.program_no_clips", "No clips for program preview"))
                 return
@@ -771,68 +1239,207 @@ class MainWindow(QMainWindow):
                 self.program_index = order.index(self.selected_clip_id)
             else:
                 self.program_index = 0
+            self.video_player.pause()
             self.program_mode = True
             self.program_toggle_action.setText(i18n.t("action.program_stop", "Stop Program Preview"))
-            self._program_play_clip_by_index(self.program_index)
+            started = self.program_player.start(
+                clips,
+                self.program_index,
+                transitions_enabled=self.preview_transitions_action.isChecked(),
+                transition_ms=self.settings.value("preview/transition_ms", 500, type=int)
+            )
+            if not started:
+                self.toggle_program_preview()
         else:
             self.program_mode = False
             self.program_current_clip_id = None
+            self.program_player.stop()
             self.program_toggle_action.setText(i18n.t("action.program_start", "Start Program Preview"))
             self.statusBar().showMessage(i18n.t("status.program_stopped", "Program preview stopped"))
 
-    def _program_play_clip_by_index(self, idx: int):
-        if idx < 0 or idx >= len(self.program_order):
+    # A/B compare
+    def toggle_compare(self, checked):
+        if checked:
+            self.start_compare()
+        else:
+            self.exit_compare()
+
+    def start_compare(self):
+        """Pick two timeline clips (or two files) and show them in the compare viewer."""
+        if self.program_mode:
             self.toggle_program_preview()
+        self.video_player.pause()
+
+        specs = None
+        clips = self.timeline.get_sorted_clips()
+        if len(clips) >= 2:
+            dlg = SelectClipsDialog(
+                clips, self,
+                title=i18n.t("select.compare_title", "Compare Clips"),
+                subtitle=i18n.t("select.compare_subtitle", "Select two clips to compare")
+            )
+            if dlg.exec_() == QDialog.Accepted:
+                chosen = dlg.get_selection()
+                if len(chosen) == 2:
+                    specs = [(c.source_path, c.start_time_ms, c.end_time_ms,
+                              c.label or os.path.basename(c.source_path)) for c in chosen]
+            else:
+                self.compare_action.setChecked(self.compare_mode)
+                return
+        else:
+            paths, _ = QFileDialog.getOpenFileNames(
+                self, i18n.t("dialog.compare_files", "Select Two Videos to Compare"), "",
+                "Video Files (*.mp4 *.avi *.mkv *.mov *.wmv);;All Files (*.*)"
+            )
+            if not paths:
+                self.compare_action.setChecked(self.compare_mode)
+                return
+            if len(paths) == 2:
+                specs = [(p, 0, None, os.path.basename(p)) for p in paths]
+
+        if specs is None:
+            self.compare_action.setChecked(self.compare_mode)
+            self.statusBar().showMessage(i18n.t("status.compare_need_two", "Select exactly two clips or files to compare"))
+            return
+
+        (path_a, in_a, out_a, label_a), (path_b, in_b, out_b, label_b) = specs
+        if not self.compare_viewer.load_pair((path_a, in_a, out_a), (path_b, in_b, out_b), (label_a, label_b)):
+            self.compare_action.setChecked(self.compare_mode)
+            self.statusBar().showMessage(i18n.t("status.compare_failed", "Could not open both sources for comparison"))
+            return
+        self.compare_mode = True
+        self.compare_action.setChecked(True)
+        self.video_stack.setCurrentWidget(self.compare_viewer)
+        self.timeline_slider.setRange(0, self.compare_viewer.get_duration())
+        self.compare_viewer.set_playback_speed(self._selected_speed())
+        self.statusBar().showMessage(
+            i18n.t("status.compare_on", "Comparing {a} | {b}").replace("{a}", label_a).replace("{b}", label_b)
+        )
+
+    def exit_compare(self):
+        """Leave compare mode and give the slot back to the player."""
+        if not self.compare_mode:
             return
-        clip_id = self.program_order[idx]
+        self.compare_mode = False
+        self.compare_action.setChecked(False)
+        self.compare_viewer.unload()
+        self.video_stack.setCurrentWidget(self.video_player)
+        self.on_duration_changed(self.video_player.get_duration())
+        self.on_position_changed(self.video_player.get_position())
+        self.on_state_changed(self.video_player.get_state())
+        self.statusBar().showMessage(i18n.t("status.compare_off", "Compare view closed"))
+
+    def toggle_compare_wipe(self, checked):
+        self.settings.setValue("view/compare_wipe", checked)
+        if hasattr(self, 'compare_viewer'):
+            self.compare_viewer.set_mode(CompareViewer.MODE_WIPE if checked else CompareViewer.MODE_SIDE_BY_SIDE)
+
+    def on_program_clip_changed(self, clip_id: int):
+        """Program engine cut to a new clip: sync selection and inspector."""
         clip = self.timeline.get_clip(clip_id)
         if not clip:
-            self.program_next_clip()
             return
         self.program_current_clip_id = clip_id
-        self.on_timeline_clip_activated(clip_id)
+        if clip_id in self.program_order:
+            self.program_index = self.program_order.index(clip_id)
+        self.selected_clip_id = clip_id
+        self.inspector.set_clip(clip.id, clip.label or os.path.basename(clip.source_path), clip.start_time_ms, clip.end_time_ms)
+        self.composition_bar.set_selected_clip(clip_id)
+        self.statusBar().showMessage(i18n.t("status.preview_from", "Preview clip from {time}").replace("{time}", self.format_time(clip.start_time_ms)))
 
-    def program_next_clip(self):
-        if not self.program_mode:
+    def on_program_position_changed(self, timeline_ms: int):
+        self.composition_bar.set_position(timeline_ms)
+
+    def on_program_finished(self):
+        if self.program_mode:
+            self.toggle_program_preview()
+
+    def toggle_preview_transitions(self, enabled: bool):
+        self.settings.setValue("preview/transitions", bool(enabled))
+        self.composition_bar.set_transitions(enabled, self.settings.value("preview/transition_ms", 500, type=int))
+        self.program_player.transitions_enabled = bool(enabled)
+
+    def set_decoder_backend(self, backend: str):
+        decode_backends.set_backend_preference(backend)
+        self.video_player.reload_decoder()
+        msg = i18n.t("status.decoder", "Preview decoder: {name}").replace("{name}", self.video_player.get_decode_backend())
+        self.statusBar().showMessage(msg)
+
+    def toggle_ram_loop(self, checked):
+        """Loop the I/O region from frames cached in RAM (decoded once)."""
+        if not checked:
+            self.video_player.stop_loop()
             return
-        self.program_index += 1
-        if self.program_index >= len(self.program_order):
-            # end
+        if self.program_mode:
             self.toggle_program_preview()
+        if self.in_point_ms is None or self.out_point_ms is None or self.out_point_ms <= self.in_point_ms:
+            self.ram_loop_action.setChecked(False)
+            self.statusBar().showMessage(i18n.t("status.loop_needs_io", "Set In and Out points to loop a region"))
+            return
+        max_mb = self.settings.value("preview/loop_cache_mb", 512, type=int)
+        if not self.video_player.start_loop(self.in_point_ms, self.out_point_ms, max_mb * 1024 * 1024):
+            self.ram_loop_action.setChecked(False)
+            return
+        self.statusBar().showMessage(i18n.t("status.loop_caching", "Caching loop region... {percent}%").replace("{percent}", "0"))
+
+    def on_loop_progress(self, percent):
+        self.statusBar().showMessage(i18n.t("status.loop_caching", "Caching loop region... {percent}%").replace("{percent}", str(percent)))
+
+    def on_loop_changed(self, looping):
+        self.ram_loop_action.setChecked(looping)
+        if looping:
+            msg = i18n.t("status.loop_on", "Looping {start} - {end} from RAM")
+            msg = msg.replace("{start}", self.format_time(self.in_point_ms or 0)).replace("{end}", self.format_time(self.out_point_ms or 0))
+        else:
+            msg = i18n.t("status.loop_off", "Loop playback stopped")
+        self.statusBar().showMessage(msg)
+
+    def program_next_clip(self):
+        if not self.program_mode:
             return
-        self._program_play_clip_by_index(self.program_index)
+        self.program_player.skip(1)
 
     def program_prev_clip(self):
         if not self.program_mode:
             return
-        self.program_index -= 1
-        if self.program_index < 0:
-            self.program_index = 0
-        self._program_play_clip_by_index(self.program_index)
+        self.program_player.skip(-1)
 
     # Composition bar handlers
+    def on_composition_scrub_started(self):
+        """Scrub paused, like the slider; playback resumes on release."""
+        if self.program_mode:
+            self.toggle_program_preview()
+        self._resume_after_scrub = self.video_player.get_state() == OpenCVVideoPlayer.STATE_PLAYING
+        if self._resume_after_scrub:
+            self.video_player.pause()
+
+    def on_composition_scrub_finished(self):
+        if self._resume_after_scrub:
+            # play() moves the decoder to the last scrubbed frame
+            self.video_player.play()
+        self._resume_after_scrub = False
+
     def on_composition_seek(self, pos_ms: int):
         """Seek via composition bar: map timeline time to source clip and seek accordingly."""
+        if self.program_mode:
+            self.toggle_program_preview()
         clip = self.timeline.get_clip_at_position(pos_ms)
         if not clip:
             # If no clip at this time, just seek by position in current video if any
             if self.video_player.capture is not None:
-                self.video_player.seek(pos_ms)
+                self.video_player.request_seek(pos_ms)
             return
         # Compute source time = clip.start + (globalPos - clip.position)
         src_time = clip.start_time_ms + max(0, pos_ms - clip.position_ms)
         # Load source if different
         need_load = (not self.video_player.video_path) or (os.path.abspath(self.video_player.video_path) != os.path.abspath(clip.source_path))
-        prior_state = self.video_player.get_state()
         if need_load:
             if not self.video_player.load_video(clip.source_path):
                 return
             self.timeline_slider.setRange(0, self.video_player.get_duration())
-        # Seek
-        self.video_player.seek(src_time)
-        # Keep paused unless原本在播放
-        if prior_state == OpenCVVideoPlayer.STATE_PLAYING:
-            self.video_player.play()
+        # Seek (non-blocking, so dragging across the bar scrubs smoothly); the
+        # player is paused for the scrub and resumed on release
+        self.video_player.request_seek(src_time)
         # Sync selection and inspector
         self.selected_clip_id = clip.id
         self.inspector.set_clip(clip.id, clip.label or os.path.basename(clip.source_path), clip.start_time_ms, clip.end_time_ms)
@@ -860,7 +1467,7 @@ class MainWindow(QMainWindow):
         out_ms = self.out_point_ms if self.out_point_ms is not None else clip.end_time_ms
         if out_ms <= in_ms:
             out_ms = in_ms + 10
-        if self.timeline.update_clip_in_out(clip.id, in_ms, out_ms):
+        if self.edit_clip(clip.id, in_ms, out_ms):
             c = self.timeline.get_clip(clip.id)
             if c:
                 self.inspector.set_clip(c.id, c.label or os.path.basename(c.source_path), c.start_time_ms, c.end_time_ms)
@@ -969,6 +1576,7 @@ class MainWindow(QMainWindow):
         if not clip:
             return
         self.selected_clip_id = clip_id
+        self.exit_compare()
         # Load source and seek to In point
         if self.video_player.load_video(clip.source_path):
             self.timeline_slider.setRange(0, self.video_player.get_duration())
@@ -980,7 +1588,7 @@ class MainWindow(QMainWindow):
     # Inspector handlers
     def on_inspector_apply_inout(self, clip_id: int, start_ms: int, end_ms: int):
         """Apply edited In/Out to timeline clip and refresh UI."""
-        if not self.timeline.update_clip_in_out(clip_id, start_ms, end_ms):
+        if not self.edit_clip(clip_id, start_ms, end_ms):
             return
         clip = self.timeline.get_clip(clip_id)
         if clip:
@@ -992,7 +1600,7 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage(f"Updated clip In/Out: {self.format_time(clip.start_time_ms)} - {self.format_time(clip.end_time_ms)}")
 
     def on_inspector_rename_clip(self, clip_id: int, new_label: str):
-        if self.timeline.update_clip_label(clip_id, new_label):
+        if self.edit_clip(clip_id, label=new_label):
             clip = self.timeline.get_clip(clip_id)
             if clip:
                 self.inspector.set_clip(clip.id, clip.label or os.path.basename(clip.source_path), clip.start_time_ms, clip.end_time_ms)
@@ -1009,7 +1617,7 @@ class MainWindow(QMainWindow):
     def export_video(self):
         # Determine exportability first
         has_video = self.video_player.capture is not None
-        has_clips = self.timeline.get_clip_count() > 0
+        has_clips = self.timeline.get_clip_count() > 0 or self.timeline.has_overlay_tracks()
 
         if not has_video and not has_clips:
             QMessageBox.information(
@@ -1020,10 +1628,12 @@ class MainWindow(QMainWindow):
             return
 
         dialog = ExportDialog(self)
+        dialog.set_export_settings(self.export_settings)
         dialog.export_started.connect(self.on_export_started)
 
         if dialog.exec_() == ExportDialog.Accepted:
             settings = dialog.get_export_settings()
+            self.export_settings = settings
             # If export mode requires FFmpeg, check availability here
             requires_ffmpeg = False
             if has_clips:
@@ -1080,7 +1690,7 @@ class MainWindow(QMainWindow):
         quality = settings["quality"]
 
         # Determine export mode
-        if self.timeline.get_clip_count() > 0:
+        if self.timeline.get_clip_count() > 0 or self.timeline.has_overlay_tracks():
             # Export timeline (multiple clips)
             self.export_timeline(output_path, quality, dialog, settings)
         elif self.in_point_ms is not None or self.out_point_ms is not None:
@@ -1160,6 +1770,7 @@ class MainWindow(QMainWindow):
 
         transitions_enabled = bool(settings.get("transitions_enabled", False)) if settings else False
         transition_ms = int(settings.get("transition_ms", 500)) if settings else 500
+        chapters = self._export_chapters(clip_data, output_path, settings, transition_ms if transitions_enabled else 0)
 
         from PyQt5.QtCore import QThread
         processor = FFmpegProcessor()
@@ -1174,7 +1785,8 @@ class MainWindow(QMainWindow):
                 output_path,
                 quality,
                 transitions_enabled=transitions_enabled,
-                transition_ms=transition_ms
+                transition_ms=transition_ms,
+                chapters=chapters
             )
         )
         worker.start()
@@ -1182,23 +1794,25 @@ class MainWindow(QMainWindow):
 
     def export_timeline(self, output_path, quality, dialog, settings=None):
         """Export timeline with multiple clips."""
-        # Use sorted clips to preserve visual order
-        clips = self.timeline.get_sorted_clips()
+        # A frozen snapshot: editing can go on while the export renders it
+        snapshot = self.timeline.snapshot()
+        multitrack = snapshot.has_overlay_tracks()
 
-        if not clips:
+        if not snapshot.clip_count and not multitrack:
             dialog.on_export_completed(False, "No clips in timeline")
             return
 
-        dialog.set_status(f"Exporting {len(clips)} clips...")
+        dialog.set_status(f"Exporting {snapshot.clip_count} clips...")
 
-        # Prepare clip data for FFmpeg
-        clip_data = [
-            (clip.source_path, clip.start_time_ms, clip.end_time_ms)
-            for clip in clips
-        ]
+        # Prepare clip data for FFmpeg (timeline order)
+        clip_data = snapshot.clip_data()
 
         transitions_enabled = bool(settings.get("transitions_enabled", False)) if settings else False
         transition_ms = int(settings.get("transition_ms", 500)) if settings else 500
+        chapters = self._export_chapters(
+            clip_data, output_path, settings, transition_ms if transitions_enabled else 0,
+            max((track.end_ms() for track in snapshot.tracks if not track.muted), default=0)
+        )
 
         # Create FFmpeg worker
         from PyQt5.QtCore import QThread
@@ -1212,19 +1826,120 @@ class MainWindow(QMainWindow):
         # Run in thread
         worker = QThread()
         processor.moveToThread(worker)
-        worker.started.connect(
-            lambda: processor.concatenate_clips(
-                clip_data,
-                output_path,
-                quality,
-                transitions_enabled=transitions_enabled,
-                transition_ms=transition_ms
+        if multitrack:
+            # Overlay/audio tracks need one compositing graph; plain timelines keep the concat path
+            track_specs = snapshot.track_specs()
+            worker.started.connect(
+                lambda: processor.export_multitrack(
+                    clip_data,
+                    track_specs,
+                    output_path,
+                    quality,
+                    transitions_enabled=transitions_enabled,
+                    transition_ms=transition_ms,
+                    chapters=chapters
+                )
+            )
+        else:
+            worker.started.connect(
+                lambda: processor.concatenate_clips(
+                    clip_data,
+                    output_path,
+                    quality,
+                    transitions_enabled=transitions_enabled,
+                    transition_ms=transition_ms,
+                    chapters=chapters
+                )
             )
-        )
         worker.start()
 
         self.ffmpeg_worker = worker  # Keep reference
 
+    def _export_chapters(self, clip_data, output_path, settings, transition_ms, tracks_end_ms=0):
+        """Markers mapped to output time as chapters, if enabled and the container supports them."""
+        if not (settings or {}).get("chapters_enabled", True) or not supports_chapters(output_path):
+            return []
+        markers = [(marker.time_ms, marker.label) for marker in self.marker_manager.get_all_markers()]
+        chapters = chapters_for_export(clip_data, markers, transition_ms, self.video_player.video_path, tracks_end_ms)
+        if markers:
+            print(f"[Export] {len(chapters)} chapters from {len(markers)} markers")
+        return chapters
+
+    def trim_selected_clip(self, mode: str, mode_label: str, direction: int):
+        """Ripple/roll/slip/slide the selected clip by one source frame."""
+        clip = self.timeline.get_clip(self.selected_clip_id) if self.selected_clip_id is not None else None
+        if not clip:
+            self.statusBar().showMessage(i18n.t("dialog.no_selection", "No Selection"))
+            return
+        info = decoder_pool.cached_info(clip.source_path) or {}
+        frame_ms = max(1, int(round(1000.0 / (info.get("fps") or 30.0))))
+        cmd = TrimCommand(self.timeline, mode, clip.id, direction * frame_ms)
+        cmd.execute()
+        if cmd.applied_ms:
+            # Only trims that moved something become undo steps
+            self.command_stack.push(cmd)
+            message = i18n.t("status.trim_applied", "{mode}: {delta} ms").replace("{delta}", f"{cmd.applied_ms:+d}")
+        else:
+            message = i18n.t("status.trim_blocked", "{mode}: cannot trim further")
+        self.statusBar().showMessage(message.replace("{mode}", mode_label))
+
+    def add_track_clip_dialog(self, kind: str):
+        """Place a file on an overlay (picture-in-picture) or audio track at the composition playhead."""
+        if kind == Track.KIND_VIDEO:
+            title = i18n.t("timeline.dialog_add_overlay_title", "Add Overlay Clip")
+            file_filter = i18n.t("timeline.filter", "Video Files (*.mp4 *.avi *.mkv *.mov *.wmv);;All Files (*.*)")
+        else:
+            title = i18n.t("timeline.dialog_add_audio_title", "Add Audio Clip")
+            file_filter = i18n.t("timeline.filter_audio", "Media Files (*.mp3 *.wav *.m4a *.aac *.flac *.mp4 *.mov);;All Files (*.*)")
+        path, _ = QFileDialog.getOpenFileName(self, title, "", file_filter)
+        if not path:
+            return
+        # Audio files have no video stream for the usual probes to read
+        duration_ms = get_media_duration(path) if kind == Track.KIND_AUDIO else None
+        if not duration_ms:
+            duration_ms = self.timeline_widget.get_video_duration(path)
+        position_ms = self.composition_bar.get_position()
+
+        def place():
+            track = self.timeline.find_free_track(kind, position_ms, duration_ms)
+            return track, self.timeline.add_track_clip(track.id, path, 0, duration_ms, position_ms, os.path.basename(path))
+
+        # find_free_track may add a track: both are undone together
+        track, clip = self.edit_timeline(f"Add track clip: {path}", place)
+        if clip:
+            self.statusBar().showMessage(
+                i18n.t("status.track_clip_added", "Added {name} to track {track} at {time}")
+                .replace("{name}", os.path.basename(path))
+                .replace("{track}", track.name)
+                .replace("{time}", self.format_time(position_ms))
+            )
+
+    def edit_clip(self, clip_id: int, start_ms: int = None, end_ms: int = None, label: str = None) -> bool:
+        """
+        Set a clip's in/out points and/or label as one undo step.
+
+        Returns:
+            True if the edit was applied
+        """
+        command = EditClipCommand(self.timeline, clip_id, start_ms, end_ms, label)
+        command.execute()
+        if command.changed():
+            self.command_stack.push(command)
+        return command.result
+
+    def edit_timeline(self, description: str, edit):
+        """
+        Run a timeline edit that has no command of its own as one undo step.
+
+        Returns:
+            Whatever edit() returned
+        """
+        command = SnapshotCommand(description, self.timeline, edit)
+        command.execute()
+        if command.changed():
+            self.command_stack.push(command)
+        return command.result
+
     def undo(self):
         self.command_stack.undo()
         self.update_undo_redo_state()
@@ -1242,12 +1957,12 @@ class MainWindow(QMainWindow):
         if event.key() == Qt.Key_Space:
             self.play_pause()
         elif event.key() == Qt.Key_Left:
-            new_pos = max(0, self.video_player.get_position() - 5000)
-            self.video_player.seek(new_pos)
+            new_pos = max(0, self._viewer().get_position() - 5000)
+            self._viewer().seek(new_pos)
         elif event.key() == Qt.Key_Right:
             duration = self.timeline_slider.maximum()
-            new_pos = min(duration, self.video_player.get_position() + 5000)
-            self.video_player.seek(new_pos)
+            new_pos = min(duration, self._viewer().get_position() + 5000)
+            self._viewer().seek(new_pos)
         elif event.key() == Qt.Key_Up:
             new_volume = min(100, self.volume_slider.value() + 5)
             self.volume_slider.setValue(new_volume)
@@ -1259,6 +1974,12 @@ class MainWindow(QMainWindow):
         elif event.key() == Qt.Key_M:
             if event.modifiers() == Qt.NoModifier:
                 self.toggle_mute()
+        elif event.key() == Qt.Key_J and event.modifiers() == Qt.NoModifier:
+            self.shuttle(-1)
+        elif event.key() == Qt.Key_K and event.modifiers() == Qt.NoModifier:
+            self.shuttle(0)
+        elif event.key() == Qt.Key_L and event.modifiers() == Qt.NoModifier:
+            self.shuttle(1)
         elif event.key() == Qt.Key_I and event.modifiers() == Qt.NoModifier:
             self.set_in_point()
         elif event.key() == Qt.Key_O and event.modifiers() == Qt.NoModifier:
@@ -1372,5 +2093,9 @@ class MainWindow(QMainWindow):
         )
 
     def closeEvent(self, event):
+        self.journal.close()
+        self.program_player.stop()
+        self.compare_viewer.cleanup()
         self.video_player.cleanup()
+        decoder_pool.clear()
         event.accept()
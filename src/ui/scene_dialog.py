@@ -0,0 +1,131 @@
+"""
+SceneDialog - review detected scene cuts for a clip before splitting it
+
+- Plots the change score of every frame inside the clip
+- Threshold and minimum scene length update the proposed cuts instantly
+  (the scores are computed once, see video/scene_detect.py)
+- Returns the accepted cut points in source time
+"""
+from typing import List
+
+import numpy as np
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSlider,
+    QDoubleSpinBox, QWidget
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QColor, QPen
+
+from video.scene_detect import SceneScores
+from utils.i18n_manager import i18n
+
+
+class ScoreGraph(QWidget):
+    """Per-pixel maximum of the scores, with the threshold line and cut marks."""
+
+    def __init__(self, scores: np.ndarray, start_ms: int, end_ms: int, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(560, 140)
+        self.scores = scores
+        self.start_ms = start_ms
+        self.end_ms = max(end_ms, start_ms + 1)
+        self.threshold = 0.3
+        self.cuts: List[int] = []
+
+    def set_state(self, threshold: float, cuts: List[int]):
+        self.threshold = threshold
+        self.cuts = cuts
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        w, h = self.width(), self.height()
+        painter.fillRect(0, 0, w, h, QColor("#202020"))
+        if len(self.scores):
+            # One bar per pixel column: the highest score it covers
+            edges = np.linspace(0, len(self.scores), min(w, len(self.scores)) + 1).astype(int)[:-1]
+            peaks = np.maximum.reduceat(self.scores, edges)
+            painter.setPen(QPen(QColor("#6fa8dc"), 1))
+            step = w / float(len(peaks))
+            for i, peak in enumerate(peaks):
+                x = int(i * step)
+                painter.drawLine(x, h, x, h - int(min(1.0, float(peak)) * h))
+
+        painter.setPen(QPen(QColor("#ff6666"), 2))
+        for cut_ms in self.cuts:
+            x = int((cut_ms - self.start_ms) * w / float(self.end_ms - self.start_ms))
+            painter.drawLine(x, 0, x, h)
+
+        painter.setPen(QPen(QColor("#ffd966"), 1, Qt.DashLine))
+        y = h - int(self.threshold * h)
+        painter.drawLine(0, y, w, y)
+
+
+class SceneDialog(QDialog):
+    def __init__(self, result: SceneScores, start_ms: int, end_ms: int, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(i18n.t("scenes.title", "Detect Scenes"))
+        self.result = result
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self._cuts: List[int] = []
+
+        first = result.pts.ms_to_frame(start_ms)
+        last = max(first + 1, result.pts.ms_to_frame(end_ms))
+        self.graph = ScoreGraph(result.scores[first:last], start_ms, end_ms)
+        self._build_ui()
+        self._refresh()
+
+    def _build_ui(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        layout.addWidget(self.graph)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel(i18n.t("scenes.threshold", "Sensitivity threshold:")))
+        self.threshold_slider = QSlider(Qt.Horizontal)
+        self.threshold_slider.setRange(1, 100)
+        self.threshold_slider.setValue(30)
+        self.threshold_slider.valueChanged.connect(self._refresh)
+        row.addWidget(self.threshold_slider)
+        self.threshold_label = QLabel()
+        row.addWidget(self.threshold_label)
+        layout.addLayout(row)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel(i18n.t("scenes.min_length", "Shortest scene (s):")))
+        self.min_length_spin = QDoubleSpinBox()
+        self.min_length_spin.setRange(0.2, 60.0)
+        self.min_length_spin.setSingleStep(0.5)
+        self.min_length_spin.setValue(1.0)
+        self.min_length_spin.valueChanged.connect(self._refresh)
+        row.addWidget(self.min_length_spin)
+        row.addStretch()
+        self.count_label = QLabel()
+        self.count_label.setStyleSheet("font-weight: bold;")
+        row.addWidget(self.count_label)
+        layout.addLayout(row)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        self.split_btn = QPushButton(i18n.t("scenes.split", "Split Clip"))
+        self.split_btn.setDefault(True)
+        self.split_btn.clicked.connect(self.accept)
+        cancel_btn = QPushButton(i18n.t("scenes.cancel", "Cancel"))
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addWidget(self.split_btn)
+        buttons.addWidget(cancel_btn)
+        layout.addLayout(buttons)
+
+    def _refresh(self, *args):
+        threshold = self.threshold_slider.value() / 100.0
+        self._cuts = self.result.cuts(threshold, int(self.min_length_spin.value() * 1000),
+                                      self.start_ms, self.end_ms)
+        self.threshold_label.setText(f"{threshold:.2f}")
+        self.count_label.setText(i18n.t("scenes.count", "{count} cuts").replace("{count}", str(len(self._cuts))))
+        self.split_btn.setEnabled(bool(self._cuts))
+        self.graph.set_state(threshold, self._cuts)
+
+    def cuts(self) -> List[int]:
+        """Accepted cut points (source ms, ascending)."""
+        return list(self._cuts)
@@ -24,9 +24,11 @@ from utils.i18n_manager import i18n
 
 
 class SelectClipsDialog(QDialog):
-    def __init__(self, clips: List[TimelineClip], parent=None):
+    def __init__(self, clips: List[TimelineClip], parent=None, title: str = None, subtitle: str = None):
         super().__init__(parent)
-        self.setWindowTitle(i18n.t("select.title", "Export Selected Clips"))
+        self._title = title or i18n.t("select.title", "Export Selected Clips")
+        self._subtitle = subtitle or i18n.t("select.subtitle", "Select clips to merge/export")
+        self.setWindowTitle(self._title)
         self.setMinimumSize(700, 420)
         self._clips = clips[:]  # timeline order
         self._custom_order_enabled = False
@@ -36,7 +38,7 @@ class SelectClipsDialog(QDialog):
         layout = QVBoxLayout()
         self.setLayout(layout)
 
-        title = QLabel(i18n.t("select.subtitle", "Select clips to merge/export"))
+        title = QLabel(self._subtitle)
         title.setStyleSheet("font-size: 13pt; font-weight: bold;")
         layout.addWidget(title)
 
@@ -226,7 +228,7 @@ class SelectClipsDialog(QDialog):
                 selected.append(c)
         if not selected:
             # simple feedback: keep dialog open
-            self.setWindowTitle(i18n.t("select.title","Export Selected Clips") + " - " + i18n.t("select.please_select","(please select at least one)"))
+            self.setWindowTitle(self._title + " - " + i18n.t("select.please_select","(please select at least one)"))
             return
         self._selection = selected
         self._custom_order = self._custom_order_enabled
@@ -0,0 +1,168 @@
+"""
+SilenceDialog - review silent ranges of a clip before removing them
+
+- Plots the momentary loudness inside the clip with silent ranges shaded
+- Threshold, shortest pause and padding update the ranges instantly
+  (the levels are measured once, see video/audio_analysis.py)
+- Either removes the silent ranges or only splits the clip at them
+"""
+from typing import List, Tuple
+
+import numpy as np
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSlider,
+    QDoubleSpinBox, QSpinBox, QWidget
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QColor, QPen
+
+from video.audio_analysis import HOP_MS, AudioLevels, keep_ranges
+from video.timeline import Timeline
+from utils.i18n_manager import i18n
+
+GRAPH_FLOOR_LUFS = -80.0  # Bottom of the plot
+
+
+class LoudnessGraph(QWidget):
+    """Loudness per pixel column, with the threshold line and silent ranges shaded."""
+
+    def __init__(self, loudness: np.ndarray, start_ms: int, end_ms: int, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(560, 140)
+        self.loudness = loudness
+        self.start_ms = start_ms
+        self.end_ms = max(end_ms, start_ms + 1)
+        self.threshold = -45.0
+        self.silent: List[Tuple[int, int]] = []
+
+    def set_state(self, threshold: float, silent: List[Tuple[int, int]]):
+        self.threshold = threshold
+        self.silent = silent
+        self.update()
+
+    def _y(self, lufs: float, h: int) -> int:
+        return h - int(max(0.0, min(1.0, (lufs - GRAPH_FLOOR_LUFS) / -GRAPH_FLOOR_LUFS)) * h)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        w, h = self.width(), self.height()
+        painter.fillRect(0, 0, w, h, QColor("#202020"))
+        scale = w / float(self.end_ms - self.start_ms)
+        for s, e in self.silent:
+            painter.fillRect(int((s - self.start_ms) * scale), 0, max(1, int((e - s) * scale)), h, QColor(255, 102, 102, 70))
+
+        if len(self.loudness):
+            edges = np.linspace(0, len(self.loudness), min(w, len(self.loudness)) + 1).astype(int)[:-1]
+            peaks = np.maximum.reduceat(self.loudness, edges)
+            painter.setPen(QPen(QColor("#93c47d"), 1))
+            step = w / float(len(peaks))
+            for i, peak in enumerate(peaks):
+                x = int(i * step)
+                painter.drawLine(x, h, x, self._y(float(peak), h))
+
+        painter.setPen(QPen(QColor("#ffd966"), 1, Qt.DashLine))
+        y = self._y(self.threshold, h)
+        painter.drawLine(0, y, w, y)
+
+
+class SilenceDialog(QDialog):
+    REMOVE = "remove"
+    SPLIT = "split"
+
+    def __init__(self, levels: AudioLevels, start_ms: int, end_ms: int, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(i18n.t("silence.title", "Remove Silence"))
+        self.levels = levels
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.mode = self.REMOVE
+        self._silent: List[Tuple[int, int]] = []
+
+        first = start_ms // HOP_MS
+        last = max(first + 1, -(-end_ms // HOP_MS))
+        self.graph = LoudnessGraph(levels.momentary_loudness()[first:last], start_ms, end_ms)
+        # Start 20 LU below the programme loudness: quiet speech stays, room tone goes
+        self._default_threshold = int(round(max(-70.0, min(-25.0, levels.integrated_loudness() - 20.0))))
+        self._build_ui()
+        self._refresh()
+
+    def _build_ui(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        layout.addWidget(self.graph)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel(i18n.t("silence.threshold", "Silence below (LUFS):")))
+        self.threshold_slider = QSlider(Qt.Horizontal)
+        self.threshold_slider.setRange(-70, -20)
+        self.threshold_slider.setValue(self._default_threshold)
+        self.threshold_slider.valueChanged.connect(self._refresh)
+        row.addWidget(self.threshold_slider)
+        self.threshold_label = QLabel()
+        row.addWidget(self.threshold_label)
+        layout.addLayout(row)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel(i18n.t("silence.min_silence", "Shortest pause (s):")))
+        self.min_silence_spin = QDoubleSpinBox()
+        self.min_silence_spin.setRange(0.2, 30.0)
+        self.min_silence_spin.setSingleStep(0.1)
+        self.min_silence_spin.setValue(0.8)
+        self.min_silence_spin.valueChanged.connect(self._refresh)
+        row.addWidget(self.min_silence_spin)
+        row.addWidget(QLabel(i18n.t("silence.padding", "Padding (ms):")))
+        self.padding_spin = QSpinBox()
+        self.padding_spin.setRange(0, 1000)
+        self.padding_spin.setSingleStep(50)
+        self.padding_spin.setValue(150)
+        self.padding_spin.valueChanged.connect(self._refresh)
+        row.addWidget(self.padding_spin)
+        row.addStretch()
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-weight: bold;")
+        row.addWidget(self.summary_label)
+        layout.addLayout(row)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        self.remove_btn = QPushButton(i18n.t("silence.remove", "Remove Silence"))
+        self.remove_btn.setDefault(True)
+        self.remove_btn.clicked.connect(lambda: self._finish(self.REMOVE))
+        self.split_btn = QPushButton(i18n.t("silence.split", "Split Only"))
+        self.split_btn.clicked.connect(lambda: self._finish(self.SPLIT))
+        cancel_btn = QPushButton(i18n.t("silence.cancel", "Cancel"))
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addWidget(self.remove_btn)
+        buttons.addWidget(self.split_btn)
+        buttons.addWidget(cancel_btn)
+        layout.addLayout(buttons)
+
+    def _refresh(self, *args):
+        threshold = float(self.threshold_slider.value())
+        self._silent = self.levels.silent_ranges(
+            threshold, int(self.min_silence_spin.value() * 1000), self.padding_spin.value(),
+            self.start_ms, self.end_ms
+        )
+        kept = self.kept_ranges()
+        removed_ms = (self.end_ms - self.start_ms) - sum(e - s for s, e in kept)
+        self.threshold_label.setText(f"{threshold:.0f}")
+        self.summary_label.setText(
+            i18n.t("silence.summary", "{count} pauses, {seconds}s removed")
+            .replace("{count}", str(len(self._silent)))
+            .replace("{seconds}", f"{removed_ms / 1000.0:.1f}")
+        )
+        self.remove_btn.setEnabled(bool(self._silent) and bool(kept))
+        self.split_btn.setEnabled(bool(self._silent))
+        self.graph.set_state(threshold, self._silent)
+
+    def _finish(self, mode: str):
+        self.mode = mode
+        self.accept()
+
+    def silent_ranges(self) -> List[Tuple[int, int]]:
+        """Accepted silent ranges (source ms, ascending)."""
+        return list(self._silent)
+
+    def kept_ranges(self) -> List[Tuple[int, int]]:
+        """Ranges left once the silent ones are removed (source ms, ascending)."""
+        return keep_ranges(self._silent, self.start_ms, self.end_ms, Timeline.MIN_CLIP_DURATION_MS)
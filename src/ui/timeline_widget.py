@@ -2,13 +2,21 @@
 Timeline Widget - Multi-Clip Timeline UI
 
 Visual timeline for multi-clip editing with drag-and-drop reordering.
+
+The clip strip is virtualized: clips sit at fixed slots by timeline index
+and ClipItem widgets exist only for the slots in (or just beside) the
+visible part of the scroll area, so a timeline of tens of thousands of
+clips costs a few dozen widgets. Thumbnails are kept per source file, so
+clips scrolled back into view do not decode again. Markers are painted
+on the marker bar at their place in the clip strip, for the same visible
+slot range only.
 """
 
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QScrollArea,
-    QPushButton, QLabel, QFrame, QFileDialog, QMenu, QAction, QMessageBox
+    QPushButton, QLabel, QFrame, QFileDialog, QMenu, QAction, QMessageBox, QToolTip
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QRect, QPoint, QSize
+from PyQt5.QtCore import Qt, pyqtSignal, QEvent, QRect, QPoint, QSize, QTimer
 from PyQt5.QtWidgets import QInputDialog
 from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QFont, QMouseEvent, QPixmap
 import os
@@ -17,14 +25,21 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from video.timeline import Timeline, TimelineClip
+from video.timeline import Timeline, TimelineChange, TimelineClip
 from video.marker import MarkerManager, Marker
+from video.decoder_pool import decoder_pool
 from utils.i18n_manager import i18n
 
 
 class ClipItem(QFrame):
     """Visual representation of a timeline clip."""
 
+    WIDTH = 140
+    HEIGHT = 100
+
+    # Thumbnail per source file (None if it could not be decoded)
+    _thumbnails = {}
+
     clicked = pyqtSignal(int)  # clip_id
     activated = pyqtSignal(int)  # clip_id (double-click)
     delete_requested = pyqtSignal(int)  # clip_id
@@ -34,6 +49,9 @@ class ClipItem(QFrame):
     jump_to_out_requested = pyqtSignal(int)  # clip_id
     set_in_from_current_requested = pyqtSignal(int)  # clip_id
     set_out_from_current_requested = pyqtSignal(int)  # clip_id
+    split_requested = pyqtSignal(int)  # clip_id
+    detect_scenes_requested = pyqtSignal(int)  # clip_id
+    remove_silence_requested = pyqtSignal(int)  # clip_id
 
     def __init__(self, clip: TimelineClip, parent=None):
         super().__init__(parent)
@@ -42,8 +60,7 @@ class ClipItem(QFrame):
 
         self.setFrameStyle(QFrame.Box | QFrame.Raised)
         self.setLineWidth(2)
-        self.setMinimumSize(140, 100)
-        self.setMaximumHeight(110)
+        self.setFixedSize(self.WIDTH, self.HEIGHT)
 
         # Enable drag
         self.drag_start_pos = None
@@ -57,48 +74,75 @@ class ClipItem(QFrame):
         self.thumb.setStyleSheet("background-color:#ddd; border:1px solid #ccc;")
         self.thumb.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.thumb)
-        self._load_thumbnail()
+        self._thumb_pending = True
 
         # Clip label
-        filename = os.path.basename(clip.source_path)
-        name = clip.label or filename
-        self.label = QLabel(name)
+        self.label = QLabel()
         self.label.setWordWrap(True)
         self.label.setStyleSheet("font-size: 9pt; font-weight: bold;")
         layout.addWidget(self.label)
 
         # Duration label
-        duration_sec = clip.duration_ms / 1000.0
-        self.duration_label = QLabel(f"{duration_sec:.1f}s")
+        self.duration_label = QLabel()
         self.duration_label.setStyleSheet("font-size: 8pt; color: #666;")
         layout.addWidget(self.duration_label)
 
+        self.set_clip(clip)
         self.update_style()
 
+    def set_clip(self, clip: TimelineClip):
+        """Show another clip (widgets are reused as the strip scrolls)."""
+        self.clip = clip
+        self.refresh_meta()
+        if clip.source_path in self._thumbnails:
+            self._thumb_pending = False
+            self._show_thumbnail(self._thumbnails[clip.source_path])
+        else:
+            # Rendered on first paint: clips scrolled out of view never decode a frame
+            self._thumb_pending = True
+            self.thumb.clear()
+        if self.is_selected:
+            self.set_selected(False)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._thumb_pending:
+            self._thumb_pending = False
+            # Outside the paint event: decoding can take a while
+            QTimer.singleShot(0, self._load_thumbnail)
+
     def _load_thumbnail(self):
-        """Load a mid-frame thumbnail using OpenCV (fallback to text)."""
+        """Load a mid-frame thumbnail using a pooled decoder (fallback to text)."""
+        path = self.clip.source_path
+        if path not in self._thumbnails:
+            self._thumbnails[path] = self._decode_thumbnail(path)
+        self._show_thumbnail(self._thumbnails[path])
+
+    def _decode_thumbnail(self, path: str):
         try:
             import cv2
-            cap = cv2.VideoCapture(self.clip.source_path)
-            if cap.isOpened():
-                total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                mid = max(0, total // 2)
-                cap.set(cv2.CAP_PROP_POS_FRAMES, mid)
-                ok, frame = cap.read()
-                cap.release()
-                if ok and frame is not None:
-                    # BGR -> RGB
-                    import numpy as np
-                    h, w, ch = frame.shape
-                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    from PyQt5.QtGui import QImage
-                    qimg = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
-                    pix = QPixmap.fromImage(qimg).scaled(self.thumb.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    self.thumb.setPixmap(pix)
-                    return
+            with decoder_pool.borrow(path) as handle:
+                ok, frame = False, None
+                if handle is not None:
+                    mid = max(0, handle.frame_count // 2)
+                    handle.capture.set(cv2.CAP_PROP_POS_FRAMES, mid)
+                    ok, frame = handle.capture.read()
+            if ok and frame is not None:
+                # BGR -> RGB
+                h, w, ch = frame.shape
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                from PyQt5.QtGui import QImage
+                qimg = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
+                return QPixmap.fromImage(qimg).scaled(self.thumb.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
         except Exception:
             pass
-        self.thumb.setText("No\nThumb")
+        return None
+
+    def _show_thumbnail(self, pixmap):
+        if pixmap is not None:
+            self.thumb.setPixmap(pixmap)
+        else:
+            self.thumb.setText("No\nThumb")
 
     def refresh_meta(self):
         filename = os.path.basename(self.clip.source_path)
@@ -197,9 +241,17 @@ class ClipItem(QFrame):
         menu.addSeparator()
 
         split_action = QAction(i18n.t("timeline.context_split", "Split at Current"), self)
-        split_action.triggered.connect(lambda: self.clip_split_requested.emit(self.clip.id))
+        split_action.triggered.connect(lambda: self.split_requested.emit(self.clip.id))
         menu.addAction(split_action)
 
+        scenes_action = QAction(i18n.t("timeline.context_detect_scenes", "Detect Scenes..."), self)
+        scenes_action.triggered.connect(lambda: self.detect_scenes_requested.emit(self.clip.id))
+        menu.addAction(scenes_action)
+
+        silence_action = QAction(i18n.t("timeline.context_remove_silence", "Remove Silence..."), self)
+        silence_action.triggered.connect(lambda: self.remove_silence_requested.emit(self.clip.id))
+        menu.addAction(silence_action)
+
         delete_action = QAction(i18n.t("timeline.context_delete", "Delete Clip"), self)
         delete_action.triggered.connect(lambda: self.delete_requested.emit(self.clip.id))
         menu.addAction(delete_action)
@@ -207,43 +259,69 @@ class ClipItem(QFrame):
         menu.exec_(self.mapToGlobal(pos))
 
 
-class MarkerIndicator(QWidget):
-    """Visual marker indicator on timeline."""
+class MarkerBar(QWidget):
+    """
+    Strip above the clips that paints the markers in view as flags.
+
+    Markers are painted instead of getting a widget each: imported scene
+    or chapter markers can number in the thousands, and TimelineWidget
+    hands over only the ones in its visible clip range (see set_flags()).
+    """
 
     clicked = pyqtSignal(int)  # marker_id
 
-    def __init__(self, marker: Marker, parent=None):
+    FLAG_SIZE = 20
+
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.marker = marker
-        self.setFixedSize(20, 20)
-        self.setToolTip(f"{marker.label} ({marker.time_ms}ms)")
+        self.setAttribute(Qt.WA_StyledBackground)
+        self.setMinimumHeight(30)
+        self.setStyleSheet("background-color: #f9f9f9; border: 1px solid #ddd;")
+        self._flags = []  # (x, marker) of the markers in view, in time order
+
+    def set_flags(self, flags):
+        """Show these (x, marker) flags; x is the flag's pole in bar coordinates."""
+        self._flags = flags
+        self.update()
+
+    def flag_at(self, x: int):
+        """Marker whose flag covers x (the last drawn, so the topmost), or None."""
+        for flag_x, marker in reversed(self._flags):
+            if flag_x - 2 <= x <= flag_x + self.FLAG_SIZE - 2:
+                return marker
+        return None
 
     def paintEvent(self, event):
-        """Draw marker as a colored flag."""
+        """Draw each marker as a colored flag."""
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
-
-        # Draw flag shape
-        color = QColor(self.marker.color)
-        painter.setBrush(QBrush(color))
-        painter.setPen(QPen(Qt.white, 2))
-
-        # Triangle flag
-        points = [
-            QPoint(2, 2),
-            QPoint(18, 10),
-            QPoint(2, 18)
-        ]
-        painter.drawPolygon(*points)
-
-        # Pole
-        painter.setPen(QPen(Qt.white, 3))
-        painter.drawLine(2, 2, 2, 18)
+        top = (self.height() - self.FLAG_SIZE) // 2
+        for x, marker in self._flags:
+            # Triangle flag
+            painter.setBrush(QBrush(QColor(marker.color)))
+            painter.setPen(QPen(Qt.white, 2))
+            painter.drawPolygon(QPoint(x, top + 2), QPoint(x + 16, top + 10), QPoint(x, top + 18))
+            # Pole
+            painter.setPen(QPen(Qt.white, 3))
+            painter.drawLine(x, top + 2, x, top + 18)
+
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            marker = self.flag_at(event.pos().x())
+            if marker is None:
+                QToolTip.hideText()
+                event.ignore()
+            else:
+                QToolTip.showText(event.globalPos(), f"{marker.label} ({marker.time_ms}ms)", self)
+            return True
+        return super().event(event)
 
     def mousePressEvent(self, event: QMouseEvent):
         """Handle click to jump to marker."""
         if event.button() == Qt.LeftButton:
-            self.clicked.emit(self.marker.id)
+            marker = self.flag_at(event.pos().x())
+            if marker is not None:
+                self.clicked.emit(marker.id)
 
 
 class TimelineWidget(QWidget):
@@ -271,13 +349,21 @@ class TimelineWidget(QWidget):
     clip_set_out_from_current = pyqtSignal(int)
     clip_rename_requested = pyqtSignal(int)
     clip_split_requested = pyqtSignal(int)
+    clip_detect_scenes_requested = pyqtSignal(int)
+    clip_remove_silence_requested = pyqtSignal(int)
+
+    # Clip strip geometry: clip i occupies the slot at STRIP_MARGIN + i * SLOT_WIDTH
+    STRIP_MARGIN = 9
+    SLOT_WIDTH = ClipItem.WIDTH + 10
+    # Slots kept alive on each side of the visible ones (smooth scrolling)
+    OVERSCAN_SLOTS = 4
 
     def __init__(self, timeline: Timeline, marker_manager: MarkerManager, parent=None):
         super().__init__(parent)
         self.timeline = timeline
         self.marker_manager = marker_manager
-        self.clip_widgets = {}  # clip_id -> ClipItem
-        self.marker_widgets = {}  # marker_id -> MarkerIndicator
+        self.clip_widgets = {}  # clip_id -> ClipItem, for the clips currently in view
+        self._spare_clip_widgets = []  # Hidden ClipItems ready for reuse
         self.selected_clip_id = None
 
         self.init_ui()
@@ -287,10 +373,13 @@ class TimelineWidget(QWidget):
         self.timeline.clip_removed.connect(self.on_clip_removed)
         self.timeline.clip_modified.connect(self.on_clip_modified)
         self.timeline.timeline_cleared.connect(self.on_timeline_cleared)
+        self.timeline.batch_committed.connect(self.on_batch_committed)
 
         self.marker_manager.marker_added.connect(self.on_marker_added)
         self.marker_manager.marker_removed.connect(self.on_marker_removed)
+        self.marker_manager.marker_modified.connect(self.on_marker_modified)
         self.marker_manager.markers_cleared.connect(self.on_markers_cleared)
+        self.marker_manager.markers_loaded.connect(self.on_markers_loaded)
 
     def init_ui(self):
         """Initialize UI."""
@@ -319,26 +408,23 @@ class TimelineWidget(QWidget):
 
         main_layout.addLayout(header_layout)
 
-        # Marker bar (above clips)
-        self.marker_bar = QWidget()
-        self.marker_bar.setMinimumHeight(30)
-        self.marker_bar.setStyleSheet("background-color: #f9f9f9; border: 1px solid #ddd;")
+        # Marker bar (above clips; flags follow the clip strip, see _sync_markers)
+        self.marker_bar = MarkerBar()
+        self.marker_bar.clicked.connect(self.on_marker_clicked)
         main_layout.addWidget(self.marker_bar)
 
-        # Clip container (scrollable)
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        # Clip container (scrollable; clip widgets are placed by hand, see _sync_visible_clips)
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+        self.scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
 
         self.clip_container = QWidget()
-        self.clip_layout = QHBoxLayout()
-        self.clip_layout.setAlignment(Qt.AlignLeft)
-        self.clip_layout.setSpacing(10)
-        self.clip_container.setLayout(self.clip_layout)
+        self.clip_container.setMinimumHeight(ClipItem.HEIGHT + 2 * self.STRIP_MARGIN)
 
-        scroll_area.setWidget(self.clip_container)
-        main_layout.addWidget(scroll_area)
+        self.scroll_area.setWidget(self.clip_container)
+        self.scroll_area.horizontalScrollBar().valueChanged.connect(self._sync_visible_clips)
+        main_layout.addWidget(self.scroll_area)
 
         # Timeline info
         self.info_label = QLabel(i18n.t("timeline.no_clips", "No clips"))
@@ -347,50 +433,144 @@ class TimelineWidget(QWidget):
 
     def on_clip_added(self, clip: TimelineClip):
         """Handle clip added to timeline."""
-        clip_widget = ClipItem(clip)
-        clip_widget.clicked.connect(self.on_clip_clicked)
-        clip_widget.activated.connect(self.on_clip_activated)
-        clip_widget.delete_requested.connect(self.on_clip_delete_requested)
-        clip_widget.rename_requested.connect(lambda cid=clip.id: self.clip_rename_requested.emit(cid))
-        clip_widget.jump_to_in_requested.connect(lambda cid=clip.id: self.clip_jump_to_in.emit(cid))
-        clip_widget.jump_to_out_requested.connect(lambda cid=clip.id: self.clip_jump_to_out.emit(cid))
-        clip_widget.set_in_from_current_requested.connect(lambda cid=clip.id: self.clip_set_in_from_current.emit(cid))
-        clip_widget.set_out_from_current_requested.connect(lambda cid=clip.id: self.clip_set_out_from_current.emit(cid))
+        self._relayout_clips()
+        self.update_info()
 
-        self.clip_widgets[clip.id] = clip_widget
-        self.clip_layout.addWidget(clip_widget)
+    def _create_clip_widget(self, clip: TimelineClip) -> "ClipItem":
+        if self._spare_clip_widgets:
+            clip_widget = self._spare_clip_widgets.pop()
+            clip_widget.set_clip(clip)
+        else:
+            clip_widget = ClipItem(clip, self.clip_container)
+            # Every ClipItem signal carries the id of the clip it currently shows
+            clip_widget.clicked.connect(self.on_clip_clicked)
+            clip_widget.activated.connect(self.on_clip_activated)
+            clip_widget.delete_requested.connect(self.on_clip_delete_requested)
+            clip_widget.rename_requested.connect(self.clip_rename_requested)
+            clip_widget.jump_to_in_requested.connect(self.clip_jump_to_in)
+            clip_widget.jump_to_out_requested.connect(self.clip_jump_to_out)
+            clip_widget.set_in_from_current_requested.connect(self.clip_set_in_from_current)
+            clip_widget.set_out_from_current_requested.connect(self.clip_set_out_from_current)
+            clip_widget.split_requested.connect(self.clip_split_requested)
+            clip_widget.detect_scenes_requested.connect(self.clip_detect_scenes_requested)
+            clip_widget.remove_silence_requested.connect(self.clip_remove_silence_requested)
+        if clip.id == self.selected_clip_id:
+            clip_widget.set_selected(True)
 
-        self.update_info()
+        self.clip_widgets[clip.id] = clip_widget
+        return clip_widget
 
     def on_clip_removed(self, clip_id: int):
         """Handle clip removed from timeline."""
-        if clip_id in self.clip_widgets:
-            widget = self.clip_widgets[clip_id]
-            self.clip_layout.removeWidget(widget)
-            widget.deleteLater()
-            del self.clip_widgets[clip_id]
-
-            if self.selected_clip_id == clip_id:
-                self.selected_clip_id = None
-
+        if self.selected_clip_id == clip_id:
+            self.selected_clip_id = None
+        self._relayout_clips()
         self.update_info()
 
+    def _drop_clip_widget(self, clip_id: int):
+        widget = self.clip_widgets.pop(clip_id, None)
+        if widget is not None:
+            widget.hide()
+            self._spare_clip_widgets.append(widget)
+
     def on_clip_modified(self, clip: TimelineClip):
         """Refresh UI when clip metadata changes (label, in/out/duration)."""
         widget = self.clip_widgets.get(clip.id)
         if widget:
             widget.refresh_meta()
+        # Reorders are reported as modifications
+        self._sync_visible_clips()
         self.update_info()
 
     def on_timeline_cleared(self):
         """Handle timeline cleared."""
-        for widget in self.clip_widgets.values():
-            widget.deleteLater()
-
-        self.clip_widgets.clear()
         self.selected_clip_id = None
+        self._relayout_clips()
+        self.update_info()
+
+    def on_batch_committed(self, change: TimelineChange):
+        """Apply a whole batch of timeline edits with one relayout."""
+        if change.cleared or self.selected_clip_id in change.removed:
+            self.selected_clip_id = None
+        for clip_id in change.modified:
+            widget = self.clip_widgets.get(clip_id)
+            if widget:
+                widget.refresh_meta()
+        self._relayout_clips()
         self.update_info()
 
+    def _relayout_clips(self):
+        """Size the strip for the current clip count and refill the visible slots."""
+        count = self.timeline.get_clip_count()
+        self.clip_container.setMinimumWidth(2 * self.STRIP_MARGIN + count * self.SLOT_WIDTH)
+        self._sync_visible_clips()
+
+    def _sync_visible_clips(self):
+        """Create widgets for clips in view, drop the rest and move each to its slot."""
+        count = self.timeline.get_clip_count()
+        scroll_x = self.scroll_area.horizontalScrollBar().value()
+        view_width = max(self.scroll_area.viewport().width(), self.SLOT_WIDTH)
+        first = max(0, (scroll_x - self.STRIP_MARGIN) // self.SLOT_WIDTH - self.OVERSCAN_SLOTS)
+        last = min(count, (scroll_x + view_width) // self.SLOT_WIDTH + 1 + self.OVERSCAN_SLOTS)
+
+        # O(log n) per visible slot: the timeline index is an order-statistic tree
+        visible = {}
+        for index in range(first, last):
+            clip = self.timeline.clips[index]
+            visible[clip.id] = (index, clip)
+
+        for clip_id in [cid for cid in self.clip_widgets if cid not in visible]:
+            self._drop_clip_widget(clip_id)
+        # Spares beyond one screenful are not worth keeping
+        while len(self._spare_clip_widgets) > len(visible):
+            self._spare_clip_widgets.pop().deleteLater()
+        for clip_id, (index, clip) in visible.items():
+            widget = self.clip_widgets.get(clip_id)
+            if widget is None:
+                widget = self._create_clip_widget(clip)
+            widget.move(self.STRIP_MARGIN + index * self.SLOT_WIDTH, self.STRIP_MARGIN)
+            widget.show()
+        self._sync_markers(list(visible.values()), last == count)
+
+    def _sync_markers(self, slots, at_end: bool):
+        """
+        Hand the marker bar the markers within the visible clip slots.
+
+        A marker sits in the slot of the clip playing at its time, as far
+        into the slot as it is into the clip; markers past the end of the
+        timeline sit at the end of the last clip.
+
+        Args:
+            slots: (index, clip) of the visible slots, in order
+            at_end: The last clip is among them
+        """
+        scroll_x = self.scroll_area.horizontalScrollBar().value()
+        # Strip x -> marker bar x
+        offset = self.scroll_area.viewport().mapTo(self, QPoint(0, 0)).x() - self.marker_bar.x() - scroll_x
+        flags = []
+        if not slots:
+            # Empty timeline: nothing to place the markers on, line them up
+            for i, marker in enumerate(self.marker_manager.markers[:self.marker_bar.width() // 25 + 1]):
+                flags.append((self.STRIP_MARGIN + i * 25 + offset, marker))
+            self.marker_bar.set_flags(flags)
+            return
+        start_ms = slots[0][1].position_ms
+        end_ms = sys.maxsize if at_end else slots[-1][1].timeline_end_ms
+        k = 0
+        for marker in self.marker_manager.get_markers_in_range(start_ms, end_ms):
+            while k < len(slots) - 1 and marker.time_ms >= slots[k][1].timeline_end_ms:
+                k += 1
+            index, clip = slots[k]
+            into = (marker.time_ms - clip.position_ms) / clip.duration_ms if clip.duration_ms > 0 else 0.0
+            x = self.STRIP_MARGIN + index * self.SLOT_WIDTH + int(min(max(into, 0.0), 1.0) * ClipItem.WIDTH)
+            flags.append((x + offset, marker))
+        self.marker_bar.set_flags(flags)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # More (or fewer) slots fit in the viewport
+        QTimer.singleShot(0, self._sync_visible_clips)
+
     def on_clip_clicked(self, clip_id: int):
         """Handle clip selection."""
         # Deselect previous
@@ -414,23 +594,25 @@ class TimelineWidget(QWidget):
         self.clip_deleted.emit(clip_id)
 
     def add_clip_dialog(self):
-        """Show dialog to add a clip."""
-        file_path, _ = QFileDialog.getOpenFileName(
+        """Show dialog to add one or more clips."""
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self,
             i18n.t("timeline.dialog_add_title", "Add Video Clip"),
             "",
             i18n.t("timeline.filter", "Video Files (*.mp4 *.avi *.mkv *.mov *.wmv);;All Files (*.*)")
         )
 
-        if file_path:
-            # Get video duration using multiple methods
-            duration_ms = self.get_video_duration(file_path)
+        # One batch: the timeline (and this widget) update once for the whole selection
+        with self.timeline.batch():
+            for file_path in file_paths:
+                # Get video duration using multiple methods
+                duration_ms = self.get_video_duration(file_path)
 
-            self.timeline.add_clip(
-                source_path=file_path,
-                start_time_ms=0,
-                duration_ms=duration_ms
-            )
+                self.timeline.add_clip(
+                    source_path=file_path,
+                    start_time_ms=0,
+                    duration_ms=duration_ms
+                )
 
     def get_video_duration(self, file_path):
         """
@@ -451,19 +633,13 @@ class TimelineWidget(QWidget):
         except Exception as e:
             print(f"[Timeline] FFprobe unavailable: {e}")
 
-        # Method 2: Try OpenCV (fallback)
+        # Method 2: Try OpenCV via the decoder pool (fallback; handle stays open for preview)
         try:
-            import cv2
-            cap = cv2.VideoCapture(file_path)
-            if cap.isOpened():
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                if fps > 0 and frame_count > 0:
-                    duration_ms = int((frame_count / fps) * 1000)
-                    cap.release()
-                    print(f"[Timeline] Got duration from OpenCV: {duration_ms}ms ({frame_count} frames at {fps:.2f} fps)")
-                    return duration_ms
-                cap.release()
+            info = decoder_pool.probe(file_path)
+            if info and info["frame_count"] > 0:
+                duration_ms = info["duration_ms"]
+                print(f"[Timeline] Got duration from OpenCV: {duration_ms}ms ({info['frame_count']} frames at {info['fps']:.2f} fps)")
+                return duration_ms
         except Exception as e:
             print(f"[Timeline] OpenCV fallback failed: {e}")
 
@@ -499,31 +675,23 @@ class TimelineWidget(QWidget):
 
     def on_marker_added(self, marker: Marker):
         """Handle marker added."""
-        # Create marker indicator
-        # (Positioning would require knowing timeline scale)
-        # For simplicity, we'll add to marker bar
-        indicator = MarkerIndicator(marker)
-        indicator.clicked.connect(self.on_marker_clicked)
-        self.marker_widgets[marker.id] = indicator
-
-        # Position on marker bar (simple linear layout for now)
-        # In production, would calculate position based on time
-        indicator.move(10 + len(self.marker_widgets) * 25, 5)
-        indicator.setParent(self.marker_bar)
-        indicator.show()
+        self._sync_visible_clips()
+
+    def on_marker_modified(self, marker: Marker):
+        """Handle marker moved, relabelled or recolored."""
+        self._sync_visible_clips()
 
     def on_marker_removed(self, marker_id: int):
         """Handle marker removed."""
-        if marker_id in self.marker_widgets:
-            widget = self.marker_widgets[marker_id]
-            widget.deleteLater()
-            del self.marker_widgets[marker_id]
+        self._sync_visible_clips()
 
     def on_markers_cleared(self):
         """Handle all markers cleared."""
-        for widget in self.marker_widgets.values():
-            widget.deleteLater()
-        self.marker_widgets.clear()
+        self._sync_visible_clips()
+
+    def on_markers_loaded(self):
+        """Handle a bulk marker import (markers are only placed for the visible slots)."""
+        self._sync_visible_clips()
 
     def on_marker_clicked(self, marker_id: int):
         """Handle marker click."""
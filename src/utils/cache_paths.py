@@ -0,0 +1,52 @@
+"""
+Cache Paths - Locations for derived per-source data
+
+Sprite sheets, analysis results and similar files are derived from a
+source video and can be regenerated at any time. They live under the
+per-user cache directory, keyed by the source path plus its size and
+modification time so that edited files are never served stale data.
+"""
+
+import hashlib
+import os
+
+try:
+    from PyQt5.QtCore import QStandardPaths
+
+    def _cache_root() -> str:
+        return QStandardPaths.writableLocation(QStandardPaths.CacheLocation) or \
+            os.path.join(os.path.expanduser("~"), ".qt_cw_vedio", "cache")
+except Exception:
+    def _cache_root() -> str:
+        return os.path.join(os.path.expanduser("~"), ".qt_cw_vedio", "cache")
+
+
+def cache_dir(kind: str) -> str:
+    """
+    Get (and create) the cache directory for one kind of derived data.
+
+    Args:
+        kind: Subdirectory name, e.g. "sprites"
+
+    Returns:
+        Absolute directory path
+    """
+    path = os.path.join(_cache_root(), kind)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def source_key(file_path: str) -> str:
+    """
+    Stable cache key for a source file.
+
+    The key changes when the file is replaced or modified.
+    """
+    abs_path = os.path.normcase(os.path.abspath(file_path))
+    try:
+        st = os.stat(abs_path)
+        stamp = f"{st.st_size}:{int(st.st_mtime)}"
+    except OSError:
+        stamp = "missing"
+    digest = hashlib.sha1(f"{abs_path}|{stamp}".encode("utf-8", errors="ignore")).hexdigest()
+    return digest[:20]
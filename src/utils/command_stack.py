@@ -4,7 +4,8 @@ Command Stack - Undo/Redo System
 Implements the Command Pattern for reversible editing operations.
 """
 
-from typing import List, Optional
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
 from abc import ABC, abstractmethod
 from PyQt5.QtCore import QObject, pyqtSignal
 
@@ -25,6 +26,16 @@ class Command(ABC):
         """Undo the command."""
         pass
 
+    def to_record(self) -> Optional[dict]:
+        """
+        Plain description of the command for the edit journal.
+
+        Returns:
+            Dict accepted by command_from_record(), or None if the command
+            cannot be replayed (the journal then saves a snapshot instead)
+        """
+        return None
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self.description})"
 
@@ -62,7 +73,15 @@ class CommandStack(QObject):
         """
         # Execute the command
         command.execute()
+        self.push(command)
+
+    def push(self, command: Command):
+        """
+        Add a command that has already been executed to the undo stack.
 
+        Args:
+            command: Executed command
+        """
         # Add to undo stack
         self.undo_stack.append(command)
 
@@ -138,6 +157,19 @@ class CommandStack(QObject):
         """Check if redo is available."""
         return len(self.redo_stack) > 0
 
+    def restore_history(self, undo_commands: List[Command], redo_commands: List[Command]):
+        """
+        Replace the undo/redo history without executing anything (crash recovery).
+
+        Args:
+            undo_commands: Executed commands, oldest first
+            redo_commands: Undone commands, the next one to redo last
+        """
+        self.undo_stack = list(undo_commands)[-self.max_stack_size:]
+        self.redo_stack = list(redo_commands)
+        self.can_undo_changed.emit(self.can_undo())
+        self.can_redo_changed.emit(self.can_redo())
+
     def clear(self):
         """Clear all command history."""
         self.undo_stack.clear()
@@ -159,6 +191,44 @@ class CommandStack(QObject):
         return None
 
 
+class MacroCommand(Command):
+    """
+    Several commands executed and undone as one undo step.
+
+    With a timeline the children run inside one Timeline.batch(), so the
+    whole macro (and its undo/redo) reaches the UI as a single change.
+    """
+
+    def __init__(self, description: str, commands: List[Command], timeline=None):
+        super().__init__(description)
+        self.commands = list(commands)
+        self.timeline = timeline
+
+    def execute(self):
+        with self._batch():
+            for command in self.commands:
+                command.execute()
+
+    def undo(self):
+        with self._batch():
+            for command in reversed(self.commands):
+                command.undo()
+
+    def to_record(self) -> Optional[dict]:
+        records = [command.to_record() for command in self.commands]
+        if any(record is None for record in records):
+            return None
+        return {"type": "macro", "description": self.description, "commands": records}
+
+    @classmethod
+    def from_record(cls, record: dict, timeline, marker_manager):
+        commands = [command_from_record(child, timeline, marker_manager) for child in record["commands"]]
+        return cls(record["description"], commands, timeline)
+
+    def _batch(self):
+        return self.timeline.batch() if self.timeline is not None else nullcontext()
+
+
 # Example commands for timeline operations
 
 class AddClipCommand(Command):
@@ -182,6 +252,16 @@ class AddClipCommand(Command):
         if self.clip_id:
             self.timeline.remove_clip(self.clip_id)
 
+    def to_record(self) -> Optional[dict]:
+        return {"type": "add_clip", "source_path": self.source_path,
+                "duration_ms": self.duration_ms, "clip_id": self.clip_id}
+
+    @classmethod
+    def from_record(cls, record: dict, timeline, marker_manager):
+        command = cls(timeline, record["source_path"], record["duration_ms"])
+        command.clip_id = record.get("clip_id")
+        return command
+
 
 class RemoveClipCommand(Command):
     """Command to remove a clip from timeline."""
@@ -209,6 +289,15 @@ class RemoveClipCommand(Command):
         if self.removed_clip_data:
             self.timeline.add_clip(**self.removed_clip_data)
 
+    def to_record(self) -> Optional[dict]:
+        return {"type": "remove_clip", "clip_id": self.clip_id, "clip": self.removed_clip_data}
+
+    @classmethod
+    def from_record(cls, record: dict, timeline, marker_manager):
+        command = cls(timeline, record["clip_id"])
+        command.removed_clip_data = record.get("clip")
+        return command
+
 
 class ReorderClipCommand(Command):
     """Command to reorder a clip on timeline."""
@@ -226,6 +315,178 @@ class ReorderClipCommand(Command):
     def undo(self):
         self.timeline.reorder_clip(self.clip_id, self.old_index)
 
+    def to_record(self) -> Optional[dict]:
+        return {"type": "reorder_clip", "clip_id": self.clip_id,
+                "old_index": self.old_index, "new_index": self.new_index}
+
+    @classmethod
+    def from_record(cls, record: dict, timeline, marker_manager):
+        return cls(timeline, record["clip_id"], record["old_index"], record["new_index"])
+
+
+class SplitClipCommand(Command):
+    """Command to split a clip at a source time (the clip keeps the left part)."""
+
+    def __init__(self, timeline, clip_id: int, split_ms: int):
+        super().__init__(f"Split clip: {clip_id} at {split_ms}ms")
+        self.timeline = timeline
+        self.clip_id = clip_id
+        self.split_ms = split_ms
+        self.new_clip_id = None  # Kept across undo so redo recreates the same right clip
+
+    def execute(self):
+        new_clip = self.timeline.split_clip(self.clip_id, self.split_ms, self.new_clip_id)
+        self.new_clip_id = new_clip.id if new_clip else None
+
+    def undo(self):
+        if self.new_clip_id is None:
+            return
+        right = self.timeline.get_clip(self.new_clip_id)
+        left = self.timeline.get_clip(self.clip_id)
+        if right and left:
+            self.timeline.remove_clip(self.new_clip_id)
+            self.timeline.update_clip_duration(self.clip_id, left.duration_ms + right.duration_ms)
+
+    def to_record(self) -> Optional[dict]:
+        return {"type": "split_clip", "clip_id": self.clip_id, "split_ms": self.split_ms,
+                "new_clip_id": self.new_clip_id}
+
+    @classmethod
+    def from_record(cls, record: dict, timeline, marker_manager):
+        command = cls(timeline, record["clip_id"], record["split_ms"])
+        command.new_clip_id = record.get("new_clip_id")
+        return command
+
+
+class TrimCommand(Command):
+    """
+    Command for one ripple, roll, slip or slide step.
+
+    Only the first execution of a user edit clamps the requested delta.
+    Undo, redo and journal replay re-apply the delta that was actually
+    applied, unclamped, so they restore the clips exactly even when the
+    source lengths used for clamping are unknown (crash recovery).
+    """
+
+    MODES = ("ripple_in", "ripple_out", "roll", "slip", "slide")
+
+    def __init__(self, timeline, mode: str, clip_id: int, delta_ms: int):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown trim mode: {mode}")
+        super().__init__(f"{mode.replace('_', ' ').capitalize()}: clip {clip_id} {delta_ms:+d}ms")
+        self.timeline = timeline
+        self.mode = mode
+        self.clip_id = clip_id
+        self.delta_ms = delta_ms
+        self.applied_ms = 0
+        self.applied = False  # applied_ms is known (executed once, or read from a record)
+
+    def execute(self):
+        if self.applied:
+            if self.applied_ms:
+                self._apply(self.applied_ms, clamp=False)
+            return
+        self.applied_ms = self._apply(self.delta_ms, clamp=True) or 0
+        self.applied = True
+
+    def undo(self):
+        if self.applied_ms:
+            self._apply(-self.applied_ms, clamp=False)
+
+    def _apply(self, delta_ms: int, clamp: bool):
+        if self.mode == "ripple_in":
+            return self.timeline.ripple_trim(self.clip_id, "in", delta_ms, clamp)
+        if self.mode == "ripple_out":
+            return self.timeline.ripple_trim(self.clip_id, "out", delta_ms, clamp)
+        if self.mode == "roll":
+            return self.timeline.roll_edit(self.clip_id, delta_ms, clamp)
+        if self.mode == "slip":
+            return self.timeline.slip_clip(self.clip_id, delta_ms, clamp)
+        return self.timeline.slide_clip(self.clip_id, delta_ms, clamp)
+
+    def to_record(self) -> Optional[dict]:
+        return {"type": "trim", "mode": self.mode, "clip_id": self.clip_id,
+                "delta_ms": self.delta_ms, "applied_ms": self.applied_ms}
+
+    @classmethod
+    def from_record(cls, record: dict, timeline, marker_manager):
+        command = cls(timeline, record["mode"], record["clip_id"], record["delta_ms"])
+        if "applied_ms" in record:
+            # Replay the recorded result; the clamps depend on source lengths that may be unknown now
+            command.applied_ms = record["applied_ms"]
+            command.applied = True
+        return command
+
+
+class EditClipCommand(Command):
+    """
+    Command to set a clip's in/out points and/or label.
+
+    Keeps only that clip's values from before and after the edit; undo and
+    redo set them back with the timeline's own edits (in/out ripples the
+    clips after it), so they cost O(log n) on any timeline.
+    """
+
+    def __init__(self, timeline, clip_id: int, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+                 label: Optional[str] = None):
+        super().__init__("Rename clip" if start_ms is None else "Set clip In/Out")
+        self.timeline = timeline
+        self.clip_id = clip_id
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.label = label
+        self.result = False  # The edit was applied
+        self.before = None  # (start_ms, end_ms, label) of the clip
+        self.after = None
+
+    def execute(self):
+        if self.after is not None:
+            self._apply(self.after)  # Redo
+            return
+        clip = self.timeline.get_clip(self.clip_id)
+        if clip is None:
+            return
+        self.before = (clip.start_time_ms, clip.end_time_ms, clip.label)
+        with self.timeline.batch():
+            self.result = True
+            if self.start_ms is not None:
+                self.result = self.timeline.update_clip_in_out(self.clip_id, self.start_ms, self.end_ms)
+            if self.result and self.label is not None:
+                self.result = self.timeline.update_clip_label(self.clip_id, self.label)
+        self.after = (clip.start_time_ms, clip.end_time_ms, clip.label)
+
+    def undo(self):
+        if self.before is not None:
+            self._apply(self.before)
+
+    def changed(self) -> bool:
+        """Check if the edit changed anything."""
+        return self.after is not None and self.after != self.before
+
+    def _apply(self, values):
+        clip = self.timeline.get_clip(self.clip_id)
+        if clip is None:
+            return
+        start_ms, end_ms, label = values
+        with self.timeline.batch():
+            if (clip.start_time_ms, clip.end_time_ms) != (start_ms, end_ms):
+                self.timeline.update_clip_in_out(self.clip_id, start_ms, end_ms)
+            if clip.label != label:
+                self.timeline.update_clip_label(self.clip_id, label)
+
+    def to_record(self) -> Optional[dict]:
+        return {"type": "edit_clip", "description": self.description, "clip_id": self.clip_id,
+                "before": self.before, "after": self.after}
+
+    @classmethod
+    def from_record(cls, record: dict, timeline, marker_manager):
+        command = cls(timeline, record["clip_id"])
+        command.description = record["description"]
+        # Executing sets the recorded values, as a redo does
+        command.before = tuple(record["before"])
+        command.after = tuple(record["after"])
+        return command
+
 
 class AddMarkerCommand(Command):
     """Command to add a marker."""
@@ -250,6 +511,16 @@ class AddMarkerCommand(Command):
         if self.marker_id:
             self.marker_manager.remove_marker(self.marker_id)
 
+    def to_record(self) -> Optional[dict]:
+        return {"type": "add_marker", "time_ms": self.time_ms, "label": self.label,
+                "color": self.color, "marker_id": self.marker_id}
+
+    @classmethod
+    def from_record(cls, record: dict, timeline, marker_manager):
+        command = cls(marker_manager, record["time_ms"], record["label"], record["color"])
+        command.marker_id = record.get("marker_id")
+        return command
+
 
 class RemoveMarkerCommand(Command):
     """Command to remove a marker."""
@@ -275,6 +546,77 @@ class RemoveMarkerCommand(Command):
         if self.removed_marker_data:
             self.marker_manager.add_marker(**self.removed_marker_data)
 
+    def to_record(self) -> Optional[dict]:
+        return {"type": "remove_marker", "marker_id": self.marker_id, "marker": self.removed_marker_data}
+
+    @classmethod
+    def from_record(cls, record: dict, timeline, marker_manager):
+        command = cls(marker_manager, record["marker_id"])
+        command.removed_marker_data = record.get("marker")
+        return command
+
+
+class SnapshotCommand(Command):
+    """
+    Command for a timeline edit that has no hand-written inverse.
+
+    The edit runs once inside a batch; undo and redo restore the timeline
+    snapshots taken before and after it. Snapshots share every index node
+    the edit did not touch, so keeping both in history costs little more
+    than the clips it touched, and restoring one only visits those. Not
+    journaled: the journal snapshots instead.
+    """
+
+    def __init__(self, description: str, timeline, edit: Callable[[], object]):
+        super().__init__(description)
+        self.timeline = timeline
+        self.edit = edit
+        self.result = None  # What edit() returned
+        self.before = None
+        self.after = None
+
+    def execute(self):
+        if self.after is not None:
+            self.timeline.restore(self.after)  # Redo
+            return
+        self.before = self.timeline.snapshot()
+        with self.timeline.batch():
+            self.result = self.edit()
+        self.after = self.timeline.snapshot()
+        self.edit = None  # Not needed again; do not keep its closure alive
+
+    def undo(self):
+        if self.before is not None:
+            self.timeline.restore(self.before)
+
+    def changed(self) -> bool:
+        """Check if the edit changed anything."""
+        return self.after is not None and self.after is not self.before
+
+
+# Journal record type -> command class
+COMMAND_TYPES: Dict[str, type] = {
+    "macro": MacroCommand,
+    "add_clip": AddClipCommand,
+    "remove_clip": RemoveClipCommand,
+    "reorder_clip": ReorderClipCommand,
+    "split_clip": SplitClipCommand,
+    "trim": TrimCommand,
+    "edit_clip": EditClipCommand,
+    "add_marker": AddMarkerCommand,
+    "remove_marker": RemoveMarkerCommand,
+}
+
+
+def command_from_record(record: dict, timeline, marker_manager) -> Command:
+    """
+    Rebuild a command from Command.to_record() output.
+
+    Raises:
+        KeyError: Unknown command type or missing field
+    """
+    return COMMAND_TYPES[record["type"]].from_record(record, timeline, marker_manager)
+
 
 # Testing
 if __name__ == "__main__":
@@ -320,5 +662,18 @@ if __name__ == "__main__":
     stack.redo()
     print(f"After redo: Markers: {marker_mgr.get_marker_count()}\n")
 
+    # Batched edits: one undo step, one timeline change
+    print("=== Macro Command ===")
+    timeline.batch_committed.connect(lambda change: print(f"Batch: added={change.added} removed={change.removed}"))
+    macro = MacroCommand(
+        "Add 3 clips",
+        [AddClipCommand(timeline, f"batch{i}.mp4", 1000) for i in range(3)],
+        timeline
+    )
+    stack.execute(macro)
+    print(f"After macro: Clips: {timeline.get_clip_count()}")
+    stack.undo()
+    print(f"After undo: Clips: {timeline.get_clip_count()}\n")
+
     print(f"Can undo: {stack.can_undo()}")
     print(f"Can redo: {stack.can_redo()}")
@@ -0,0 +1,265 @@
+"""
+Audio Analysis - Loudness over time and silent ranges for dead-air removal
+
+ffmpeg decodes a source's audio straight into a pipe as 16 kHz mono PCM,
+with the K-weighting of ITU-R BS.1770 applied in its filter chain
+(high-pass + high-shelf). NumPy reduces the stream block by block to the
+mean square of every 100 ms hop, so memory stays flat and an hour of
+audio is a few seconds of decoding. Momentary loudness (400 ms windows,
+in LUFS), integrated loudness and silent ranges are all derived from
+that small per-hop array, which is cached per source.
+"""
+
+import os
+import subprocess
+import threading
+from typing import BinaryIO, Callable, List, Optional, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from utils.cache_paths import cache_dir, source_key
+from video.ffmpeg_processor import get_media_duration
+
+LEVELS_VERSION = 1
+SAMPLE_RATE = 16000
+HOP_MS = 100  # Resolution of the analysis
+WINDOW_MS = 400  # Momentary loudness window (BS.1770 block)
+READ_HOPS = 600  # Hops read from the pipe per NumPy pass (one minute)
+# K-weighting approximated with ffmpeg's biquads: RLB high-pass and +4 dB high shelf
+K_WEIGHTING = "highpass=f=38:poles=2,treble=g=4:f=1681:t=q:w=0.707"
+SILENCE_FLOOR_LUFS = -120.0  # Loudness reported for digital silence
+
+
+class AudioLevels:
+    """K-weighted mean square of every hop of a source, with loudness and silence queries."""
+
+    def __init__(self, path: str, mean_square: np.ndarray):
+        self.path = path
+        self.mean_square = mean_square
+        self._momentary: Optional[np.ndarray] = None
+
+    @property
+    def duration_ms(self) -> int:
+        return len(self.mean_square) * HOP_MS
+
+    def momentary_loudness(self) -> np.ndarray:
+        """Loudness (LUFS) of the 400 ms window centred on every hop."""
+        if self._momentary is None:
+            hops = max(1, WINDOW_MS // HOP_MS)
+            padded = np.pad(self.mean_square.astype(np.float64), (hops // 2, hops - 1 - hops // 2), mode="edge")
+            sums = np.cumsum(np.concatenate(([0.0], padded)))
+            window = (sums[hops:] - sums[:-hops]) / hops
+            self._momentary = _to_lufs(window).astype(np.float32)
+        return self._momentary
+
+    def integrated_loudness(self) -> float:
+        """Programme loudness (LUFS) with the absolute (-70) and relative (-10 LU) gates."""
+        loudness = self.momentary_loudness()
+        power = _from_lufs(loudness)
+        gated = power[loudness > -70.0]
+        if not len(gated):
+            return SILENCE_FLOOR_LUFS
+        relative_gate = float(_to_lufs(gated.mean())) - 10.0
+        gated = power[(loudness > -70.0) & (loudness > relative_gate)]
+        return float(_to_lufs(gated.mean())) if len(gated) else SILENCE_FLOOR_LUFS
+
+    def silent_ranges(self, threshold_lufs: float = -45.0, min_silence_ms: int = 800,
+                      padding_ms: int = 150, start_ms: int = 0,
+                      end_ms: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Ranges (source ms) quieter than a threshold, inside [start_ms, end_ms).
+
+        Args:
+            threshold_lufs: Momentary loudness below which audio counts as silent
+            min_silence_ms: Shorter pauses are kept
+            padding_ms: Silence left next to speech on each side (not at the range ends)
+        """
+        end_ms = self.duration_ms if end_ms is None else min(end_ms, self.duration_ms)
+        first, last = max(0, start_ms // HOP_MS), max(0, -(-end_ms // HOP_MS))
+        if last <= first:
+            return []
+        silent = self.momentary_loudness()[first:last] < threshold_lufs
+        # Run starts and ends from the edges of the boolean mask
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.view(np.int8), [0]))))
+        ranges = []
+        for run_start, run_end in zip(edges[::2], edges[1::2]):
+            s = max(start_ms, (first + int(run_start)) * HOP_MS)
+            e = min(end_ms, (first + int(run_end)) * HOP_MS)
+            if s > start_ms:
+                s += padding_ms
+            if e < end_ms:
+                e -= padding_ms
+            if e - s >= min_silence_ms:
+                ranges.append((s, e))
+        return ranges
+
+
+def keep_ranges(silent: List[Tuple[int, int]], start_ms: int, end_ms: int,
+                min_keep_ms: int) -> List[Tuple[int, int]]:
+    """
+    Ranges left after dropping silent ones, without pieces shorter than min_keep_ms.
+
+    Returns:
+        Kept (start, end) ranges in order (empty if nothing worth keeping)
+    """
+    kept = []
+    position = start_ms
+    for s, e in sorted(silent):
+        if s > position:
+            kept.append((position, s))
+        position = max(position, e)
+    if position < end_ms:
+        kept.append((position, end_ms))
+    return [(s, e) for s, e in kept if e - s >= min_keep_ms]
+
+
+def load_cached_levels(path: str) -> Optional[AudioLevels]:
+    """Levels computed earlier for this exact file, or None."""
+    try:
+        return AudioLevels(path, np.load(_cache_file(path)))
+    except Exception:
+        return None
+
+
+def analyse_audio(path: str, progress: Optional[Callable[[int], None]] = None,
+                  cancel: Optional[threading.Event] = None) -> Optional[AudioLevels]:
+    """
+    Measure the loudness of a source's audio (cached after the first run).
+
+    Returns:
+        AudioLevels, or None if the audio cannot be decoded or analysis was cancelled
+    """
+    levels = load_cached_levels(path)
+    if levels is not None:
+        return levels
+
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", path,
+        "-vn", "-sn", "-dn",
+        "-af", K_WEIGHTING,
+        "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "s16le", "-"
+    ]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except (FileNotFoundError, OSError) as e:
+        print(f"[Audio] ffmpeg failed to start: {e}")
+        return None
+
+    total_ms = get_media_duration(path) or 0
+    print(f"[Audio] Analysing {os.path.basename(path)}")
+    try:
+        mean_square = _read_levels(
+            proc.stdout,
+            lambda hops: progress(min(99, hops * HOP_MS * 100 // total_ms)) if progress and total_ms else None,
+            cancel
+        )
+    finally:
+        if cancel is not None and cancel.is_set():
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+    if mean_square is None or (cancel is not None and cancel.is_set()):
+        return None
+    if proc.returncode != 0 or not len(mean_square):
+        print(f"[Audio] No decodable audio in {path}")
+        return None
+
+    _save_cached(path, mean_square)
+    if progress:
+        progress(100)
+    return AudioLevels(path, mean_square)
+
+
+class AudioAnalyzer(QObject):
+    """
+    Runs analyse_audio() in the background.
+
+    Signals:
+        progress(int): Percentage analysed
+        finished(str, object): Source path and AudioLevels (None on failure or cancel)
+    """
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+
+    def start(self, path: str):
+        self.cancel()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(path, self._cancel), daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, path: str, cancel: threading.Event):
+        try:
+            result = analyse_audio(path, progress=self.progress.emit, cancel=cancel)
+        except Exception as e:
+            print(f"[Audio] Analysis failed for {path}: {e}")
+            result = None
+        if not cancel.is_set():
+            self.finished.emit(path, result)
+
+
+# Internal helpers
+def _read_levels(stream: BinaryIO, progress: Optional[Callable[[int], None]] = None,
+                 cancel: Optional[threading.Event] = None) -> Optional[np.ndarray]:
+    """Mean square of every hop of a 16-bit mono PCM stream (the last hop may be partial)."""
+    hop = SAMPLE_RATE * HOP_MS // 1000
+    block_bytes = hop * READ_HOPS * 2
+    parts = []
+    tail = b""
+    hops = 0
+    while True:
+        if cancel is not None and cancel.is_set():
+            return None
+        data = stream.read(block_bytes)
+        if not data:
+            break
+        data = tail + data
+        whole = len(data) // (hop * 2) * (hop * 2)
+        tail = data[whole:]
+        if whole:
+            samples = np.frombuffer(data[:whole], dtype="<i2").astype(np.float32) / 32768.0
+            frames = samples.reshape(-1, hop)
+            parts.append(np.einsum("ij,ij->i", frames, frames) / hop)
+            hops += len(frames)
+            if progress:
+                progress(hops)
+    if len(tail) >= 2:
+        samples = np.frombuffer(tail[:len(tail) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+        parts.append(np.array([np.dot(samples, samples) / len(samples)], dtype=np.float32))
+    return np.concatenate(parts).astype(np.float32) if parts else np.zeros(0, dtype=np.float32)
+
+
+def _to_lufs(mean_square):
+    return -0.691 + 10.0 * np.log10(np.maximum(mean_square, 10.0 ** ((SILENCE_FLOOR_LUFS + 0.691) / 10.0)))
+
+
+def _from_lufs(loudness):
+    return 10.0 ** ((np.asarray(loudness, dtype=np.float64) + 0.691) / 10.0)
+
+
+def _cache_file(path: str) -> str:
+    return os.path.join(cache_dir("audio_levels"), f"{source_key(path)}.v{LEVELS_VERSION}.npy")
+
+
+def _save_cached(path: str, mean_square: np.ndarray):
+    cache_file = _cache_file(path)
+    try:
+        with open(cache_file + ".part", "wb") as f:
+            np.save(f, mean_square)
+        os.replace(cache_file + ".part", cache_file)
+    except Exception as e:
+        print(f"[Audio] Failed to cache levels: {e}")
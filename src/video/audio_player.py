@@ -0,0 +1,453 @@
+"""
+Audio Player - PCM audio playback for the OpenCV player
+
+OpenCV only decodes pictures, so the audio track is decoded separately:
+an ffmpeg process writes raw PCM to a pipe, a reader thread queues it in
+small chunks and the GUI thread pushes it into a QAudioOutput with a short
+buffer. The amount of audio actually played is used as the master clock
+that the video presenter follows.
+
+Whether a source has audio is probed with ffprobe on a background thread;
+the source plays on the wall clock until the answer arrives
+(availabilityChanged).
+
+For RAM loop playback the region's PCM is decoded once and fed to the sink
+over and over, so wrapping to the in point never restarts the decoder.
+"""
+
+import queue
+import subprocess
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+try:
+    from PyQt5.QtMultimedia import QAudio, QAudioFormat, QAudioOutput, QAudioDeviceInfo
+except ImportError:  # QtMultimedia is optional; playback stays silent without it
+    QAudio = QAudioFormat = QAudioOutput = QAudioDeviceInfo = None
+
+from video.ffmpeg_processor import FFmpegProcessor, has_audio_stream
+
+
+class AudioPlayer(QObject):
+    """
+    Streams a source's audio through an ffmpeg pipe into a low-latency sink.
+
+    The player is restarted (not resynchronised) on seek and speed changes:
+    killing the pipe and spawning a new one at the target position is cheaper
+    and more predictable than flushing a deep buffer.
+
+    Signals:
+        availabilityChanged(bool): The background probe found (or ruled out)
+            an audio track for the current source
+    """
+
+    availabilityChanged = pyqtSignal(bool)
+    _probed = pyqtSignal(str, bool)
+
+    SAMPLE_RATE = 48000
+    CHANNELS = 2
+    SAMPLE_BYTES = 2  # s16le
+
+    CHUNK_MS = 20  # Size of each PCM chunk read from the pipe
+    SINK_BUFFER_MS = 120  # QAudioOutput buffer (what the user hears late)
+    READ_AHEAD_CHUNKS = 10  # Decoded audio held in memory ahead of the sink
+
+    # atempo only accepts 0.5..2.0 per instance (older ffmpeg builds)
+    MIN_SPEED = 0.25
+    MAX_SPEED = 4.0
+
+    # Probe results by path, shared by all players (sources do not change while open)
+    _probe_results: Dict[str, bool] = {}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source_path: Optional[str] = None
+        self.has_audio = False
+
+        self.volume = 70
+        self.is_muted = False
+
+        self._process: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._queue: Optional[queue.Queue] = None
+        self._pending = b""
+        self._generation = 0
+
+        # Loop region PCM (decoded once, kept across restarts inside the loop)
+        self._loop_range: Optional[Tuple[int, int]] = None
+        self._loop_key = None
+        self._loop_pcm = bytearray()
+        self._loop_complete = False
+        self._loop_offset = 0
+
+        self._output = None
+        self._device = None
+        self._start_ms = 0
+        self._speed = 1.0
+
+        bytes_per_ms = self.SAMPLE_RATE * self.CHANNELS * self.SAMPLE_BYTES // 1000
+        self._chunk_bytes = bytes_per_ms * self.CHUNK_MS
+
+        # Feed timer runs on the GUI thread; QAudioOutput is not thread-safe
+        self._feed_timer = QTimer(self)
+        self._feed_timer.setTimerType(Qt.PreciseTimer)
+        self._feed_timer.setInterval(self.CHUNK_MS // 2)
+        self._feed_timer.timeout.connect(self._feed_sink)
+
+        self._probed.connect(self._on_probed)
+
+    @staticmethod
+    def is_available() -> bool:
+        """Check whether audio playback can work (QtMultimedia + FFmpeg)."""
+        return QAudioOutput is not None and FFmpegProcessor.check_ffmpeg_available()
+
+    def open(self, file_path: str, has_audio: Optional[bool] = None) -> bool:
+        """
+        Prepare audio for a source file.
+
+        Without an earlier result the file is probed in the background;
+        availabilityChanged(True) follows if it has audio.
+
+        Args:
+            file_path: Path to the media file
+            has_audio: Result of an earlier probe (skips running ffprobe again)
+
+        Returns:
+            True if the file is already known to have a playable audio track
+        """
+        self.close()
+        self.source_path = file_path
+        if has_audio is None:
+            has_audio = self._probe_results.get(file_path)
+        if has_audio is None:
+            has_audio = False
+            if self.is_available():
+                threading.Thread(target=self._probe, args=(file_path,), daemon=True).start()
+        self.has_audio = bool(has_audio)
+        print(f"[Audio] Source opened: {file_path} (audio={self.has_audio})")
+        return self.has_audio
+
+    def close(self):
+        """Stop playback and forget the current source."""
+        self.stop()
+        self._drop_loop_pcm()
+        self.source_path = None
+        self.has_audio = False
+
+    def start(self, position_ms: int, speed: float = 1.0,
+              loop: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        Start (or restart) audio playback at a source position.
+
+        Args:
+            position_ms: Source position to start from
+            speed: Playback speed; speeds outside MIN_SPEED..MAX_SPEED play silent
+            loop: (start_ms, end_ms) region to repeat; its PCM is decoded once
+                and reused by later starts with the same region and speed
+
+        Returns:
+            True if audio is now the master clock
+        """
+        self.stop()
+        if not self.has_audio or not self.source_path:
+            return False
+        if speed < self.MIN_SPEED or speed > self.MAX_SPEED:
+            return False
+
+        self._start_ms = max(0, int(position_ms))
+        self._speed = speed
+        self._generation += 1
+
+        if loop is not None:
+            if not self._start_loop(loop, speed):
+                return False
+        else:
+            self._drop_loop_pcm()
+            self._process = self._spawn_decoder(self._start_ms, None, speed)
+            if self._process is None:
+                return False
+            self._queue = queue.Queue(maxsize=self.READ_AHEAD_CHUNKS)
+            self._pending = b""
+            self._reader = threading.Thread(
+                target=self._read_pipe,
+                args=(self._process, self._queue, self._generation),
+                daemon=True
+            )
+            self._reader.start()
+
+        if not self._open_sink():
+            self.stop()
+            return False
+        print(f"[Audio] Playing from {self._start_ms}ms at {speed}x" + (" (loop)" if loop is not None else ""))
+        return True
+
+    def _start_loop(self, loop: Tuple[int, int], speed: float) -> bool:
+        """Point the feed at the loop PCM, decoding the region unless it is already cached."""
+        start_ms, end_ms = int(loop[0]), int(loop[1])
+        if end_ms <= start_ms:
+            return False
+        self._loop_range = (start_ms, end_ms)
+        key = (self.source_path, start_ms, end_ms, speed)
+        if key != self._loop_key:
+            self._loop_key = key
+            self._loop_pcm = bytearray()
+            self._loop_complete = False
+            self._process = self._spawn_decoder(start_ms, end_ms - start_ms, speed)
+            if self._process is None:
+                self._drop_loop_pcm()
+                return False
+            self._reader = threading.Thread(
+                target=self._read_loop_pipe,
+                args=(self._process, self._loop_pcm, self._generation),
+                daemon=True
+            )
+            self._reader.start()
+        # Start inside the loop: skip the PCM that plays before position_ms
+        sample_bytes = self.CHANNELS * self.SAMPLE_BYTES
+        offset_ms = max(0, self._start_ms - start_ms) / speed
+        offset = int(offset_ms * self.SAMPLE_RATE / 1000.0) * sample_bytes
+        if self._loop_complete and self._loop_pcm:
+            offset %= len(self._loop_pcm)
+        self._loop_offset = offset
+        return True
+
+    def _spawn_decoder(self, start_ms: int, duration_ms: Optional[int], speed: float):
+        """Start ffmpeg writing PCM from start_ms (for duration_ms, or to the end) to a pipe."""
+        cmd = [
+            "ffmpeg", "-v", "error", "-nostdin",
+            "-ss", f"{start_ms / 1000.0:.3f}",
+        ]
+        if duration_ms is not None:
+            cmd.extend(["-t", f"{duration_ms / 1000.0:.3f}"])
+        cmd.extend([
+            "-i", self.source_path,
+            "-vn", "-sn",
+        ])
+        filters = self._atempo_filters(speed)
+        if filters:
+            cmd.extend(["-filter:a", ",".join(filters)])
+        cmd.extend([
+            "-f", "s16le", "-acodec", "pcm_s16le",
+            "-ac", str(self.CHANNELS), "-ar", str(self.SAMPLE_RATE),
+            "pipe:1"
+        ])
+
+        try:
+            return subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0
+            )
+        except Exception as e:
+            print(f"[Audio] Failed to start decoder: {e}")
+            return None
+
+    def _open_sink(self) -> bool:
+        """Open the QAudioOutput and start feeding it."""
+        fmt = QAudioFormat()
+        fmt.setSampleRate(self.SAMPLE_RATE)
+        fmt.setChannelCount(self.CHANNELS)
+        fmt.setSampleSize(self.SAMPLE_BYTES * 8)
+        fmt.setCodec("audio/pcm")
+        fmt.setByteOrder(QAudioFormat.LittleEndian)
+        fmt.setSampleType(QAudioFormat.SignedInt)
+        if not QAudioDeviceInfo.defaultOutputDevice().isFormatSupported(fmt):
+            print("[Audio] Default output device does not support 48kHz s16 stereo")
+            return False
+
+        self._output = QAudioOutput(fmt, self)
+        self._output.setBufferSize(self._chunk_bytes * self.SINK_BUFFER_MS // self.CHUNK_MS)
+        self._apply_volume()
+        self._device = self._output.start()
+        self._feed_timer.start()
+        return True
+
+    def stop(self):
+        """Stop playback and tear down the decoder pipe."""
+        self._feed_timer.stop()
+        self._generation += 1
+
+        if self._output is not None:
+            self._output.stop()
+            self._output.deleteLater()
+            self._output = None
+            self._device = None
+
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+            try:
+                self._process.stdout.close()
+            except Exception:
+                pass
+            self._process = None
+
+        self._reader = None
+        self._queue = None
+        self._pending = b""
+        self._loop_range = None
+        if not self._loop_complete:
+            # A partly decoded loop cannot be resumed; decode it again next time
+            self._drop_loop_pcm()
+
+    def is_active(self) -> bool:
+        """True while audio is playing and drives the clock."""
+        return self._output is not None
+
+    def set_volume(self, volume: int):
+        """Set volume (0-100)."""
+        self.volume = max(0, min(100, int(volume)))
+        self._apply_volume()
+
+    def set_muted(self, muted: bool):
+        """Mute or unmute; the clock keeps running while muted."""
+        self.is_muted = bool(muted)
+        self._apply_volume()
+
+    def get_clock_ms(self) -> Optional[int]:
+        """
+        Current audible source position in milliseconds.
+
+        Returns:
+            Position derived from samples consumed by the sink, or None if
+            audio is not active
+        """
+        if self._output is None:
+            return None
+        played_us = self._output.processedUSecs()
+        # processedUSecs counts what we handed over; subtract what still sits in the sink
+        queued_bytes = max(0, self._output.bufferSize() - self._output.bytesFree())
+        bytes_per_us = self.SAMPLE_RATE * self.CHANNELS * self.SAMPLE_BYTES / 1_000_000.0
+        audible_us = max(0.0, played_us - queued_bytes / bytes_per_us)
+        position_ms = self._start_ms + int(audible_us / 1000.0 * self._speed)
+        if self._loop_range is not None and self._loop_complete and self._loop_pcm:
+            # The sink wraps to the in point at the end of the loop PCM
+            start_ms = self._loop_range[0]
+            loop_ms = len(self._loop_pcm) / bytes_per_us / 1000.0 * self._speed
+            position_ms = start_ms + int((position_ms - start_ms) % loop_ms)
+        return position_ms
+
+    def is_exhausted(self) -> bool:
+        """True when the pipe reached the end of the audio and everything was handed to the sink."""
+        if self._output is None or self._queue is None:
+            # Loop playback never runs out
+            return False
+        reader_done = self._reader is None or not self._reader.is_alive()
+        return reader_done and self._queue.empty() and not self._pending
+
+    def get_buffer_fill(self) -> float:
+        """Fraction (0..1) of the read-ahead queue currently filled."""
+        if self._queue is None:
+            return 0.0
+        return self._queue.qsize() / float(self.READ_AHEAD_CHUNKS)
+
+    # Internal helpers
+    def _probe(self, file_path: str):
+        """Probe thread: check the source for an audio track."""
+        found = has_audio_stream(file_path)
+        self._probe_results[file_path] = found
+        self._probed.emit(file_path, found)
+
+    def _on_probed(self, file_path: str, found: bool):
+        if file_path != self.source_path or found == self.has_audio:
+            return
+        self.has_audio = found
+        print(f"[Audio] Audio track found: {file_path}")
+        self.availabilityChanged.emit(found)
+
+    def _drop_loop_pcm(self):
+        self._loop_key = None
+        self._loop_pcm = bytearray()
+        self._loop_complete = False
+        self._loop_offset = 0
+
+    def _apply_volume(self):
+        if self._output is not None:
+            self._output.setVolume(0.0 if self.is_muted else self.volume / 100.0)
+
+    @staticmethod
+    def _atempo_filters(speed: float) -> List[str]:
+        """Build an atempo chain (each stage limited to 0.5..2.0)."""
+        filters = []
+        remaining = speed
+        while remaining > 2.0:
+            filters.append("atempo=2.0")
+            remaining /= 2.0
+        while remaining < 0.5:
+            filters.append("atempo=0.5")
+            remaining /= 0.5
+        if abs(remaining - 1.0) > 1e-3:
+            filters.append(f"atempo={remaining:.4f}")
+        return filters
+
+    def _read_pipe(self, process: subprocess.Popen, chunks: queue.Queue, generation: int):
+        """Reader thread: move PCM from the pipe into the bounded queue."""
+        stream = process.stdout
+        while generation == self._generation:
+            try:
+                data = stream.read(self._chunk_bytes)
+            except Exception:
+                break
+            if not data:
+                break
+            # Bounded put keeps memory (and latency after a seek) small
+            while generation == self._generation:
+                try:
+                    chunks.put(data, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def _read_loop_pipe(self, process: subprocess.Popen, pcm: bytearray, generation: int):
+        """Reader thread: decode the whole loop region into pcm."""
+        stream = process.stdout
+        while generation == self._generation:
+            try:
+                data = stream.read(self._chunk_bytes)
+            except Exception:
+                return
+            if not data:
+                break
+            pcm.extend(data)
+        if generation == self._generation and pcm is self._loop_pcm:
+            self._loop_complete = True
+
+    def _feed_sink(self):
+        """Push queued PCM into the sink while it has room."""
+        if self._output is None or self._device is None:
+            return
+        if self._output.state() == QAudio.StoppedState:
+            return
+        if self._loop_range is not None:
+            self._feed_loop()
+            return
+        if self._queue is None:
+            return
+        while self._output.bytesFree() >= self._chunk_bytes:
+            if not self._pending:
+                try:
+                    self._pending = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+            written = self._device.write(self._pending)
+            if written <= 0:
+                return
+            self._pending = self._pending[written:]
+
+    def _feed_loop(self):
+        """Push loop PCM into the sink, wrapping to its start once it is fully decoded."""
+        pcm = self._loop_pcm
+        while self._output.bytesFree() >= self._chunk_bytes:
+            available = len(pcm)
+            if self._loop_offset >= available:
+                if not self._loop_complete or available == 0:
+                    return
+                self._loop_offset = 0
+            end = min(available, self._loop_offset + self._chunk_bytes)
+            written = self._device.write(bytes(pcm[self._loop_offset:end]))
+            if written <= 0:
+                return
+            self._loop_offset += written
@@ -0,0 +1,106 @@
+"""
+Chapters - Markers written into exported files as chapter metadata
+
+Markers are placed in source time (the position in the video loaded in
+the player). On export each marker is mapped through the main track: a
+marker inside a clip's source range becomes a chapter at the matching
+point of the output, once for every clip that shows it, and markers in
+ranges the edit cut out are dropped.
+
+The chapters reach ffmpeg as an FFMETADATA file given as one more input
+of the final encode (see FFmpegProcessor), so no remux pass is needed.
+"""
+
+import os
+from bisect import bisect_left
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+CHAPTER_EXTENSIONS = (".mp4", ".m4v", ".mov", ".mkv")  # Containers that store chapters
+
+
+class Chapter(NamedTuple):
+    start_ms: int
+    end_ms: int
+    title: str
+
+
+def supports_chapters(output_path: str) -> bool:
+    """Check if the output container can carry chapters."""
+    return os.path.splitext(output_path)[1].lower() in CHAPTER_EXTENSIONS
+
+
+def chapters_for_export(
+    clips: Sequence[Tuple[str, int, int]],
+    markers: Sequence[Tuple[int, str]],
+    transition_ms: int = 0,
+    source_path: Optional[str] = None,
+    tracks_end_ms: int = 0
+) -> List[Chapter]:
+    """
+    Chapters of an export, from markers in source time.
+
+    Args:
+        clips: Main track (path, in, out) in timeline order, as exported
+        markers: (time_ms, title) pairs
+        transition_ms: Crossfade length if transitions are on (clips overlap by it)
+        source_path: Source the markers were placed on; if any clip uses it,
+            only those clips are searched
+        tracks_end_ms: End of the latest overlay/audio clip (the output can run past the main track)
+
+    Returns:
+        Chapters in output order; each one ends where the next starts
+    """
+    # Mirrors the exporter: xfade overlaps consecutive clips by at least 50 ms
+    overlap_ms = max(50, transition_ms) if transition_ms and len(clips) > 1 else 0
+    key = _path_key(source_path) if source_path else None
+    if key is not None and not any(_path_key(path) == key for path, _, _ in clips):
+        key = None
+
+    ordered = sorted(markers, key=lambda m: m[0])
+    times = [time_ms for time_ms, _ in ordered]
+    points = []
+    output_ms = 0
+    for index, (path, start_ms, end_ms) in enumerate(clips):
+        clip_start = output_ms - index * overlap_ms
+        if key is None or _path_key(path) == key:
+            first = bisect_left(times, start_ms)
+            last = bisect_left(times, end_ms)
+            for time_ms, title in ordered[first:last]:
+                points.append((clip_start + time_ms - start_ms, title))
+        output_ms += end_ms - start_ms
+    total_ms = max(output_ms - max(0, len(clips) - 1) * overlap_ms, tracks_end_ms)
+
+    points.sort(key=lambda p: p[0])
+    starts = []
+    for start_ms, title in points:
+        if start_ms >= total_ms or (starts and starts[-1][0] == start_ms):
+            continue  # Past the end, or a second marker at the same point
+        starts.append((int(start_ms), title))
+    ends = [start_ms for start_ms, _ in starts[1:]] + [int(total_ms)]
+    return [Chapter(start_ms, end_ms, title) for (start_ms, title), end_ms in zip(starts, ends)]
+
+
+def write_ffmetadata(chapters: Sequence[Chapter], path: str):
+    """Write chapters as an FFMETADATA file (ffmpeg -i path ... -map_chapters N)."""
+    lines = [";FFMETADATA1"]
+    for chapter in chapters:
+        lines += [
+            "[CHAPTER]",
+            "TIMEBASE=1/1000",
+            f"START={chapter.start_ms}",
+            f"END={chapter.end_ms}",
+            f"title={_escape(chapter.title)}",
+        ]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _escape(value: str) -> str:
+    # FFMETADATA special characters: = ; # \ and newline are backslash-escaped
+    for ch in ("\\", "=", ";", "#", "\n"):
+        value = value.replace(ch, "\\" + ch)
+    return value
+
+
+def _path_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
@@ -0,0 +1,587 @@
+"""
+Clip Index - Ordered clip sequence with logarithmic position queries
+
+The timeline keeps its clips in timeline order, and most edits either
+insert/remove one clip or move every clip after a point by the same
+amount (ripple). A plain list makes both, and every position lookup,
+linear in the number of clips, which is too slow for generated timelines
+with tens of thousands of clips.
+
+ClipIndex is an implicit treap (a randomized balanced tree ordered by
+sequence position). Each node caches its subtree size and the latest
+clip end in its subtree; ripple shifts are lazy additions on a subtree.
+Inserts, removals, shifts, index/rank lookups and point/range position
+queries are O(log n) expected (range queries add the number of results).
+Queries prune with subtree position bounds rather than assuming positions
+increase along the order, so they stay correct on timelines with overlaps.
+
+A clip stored in the index reads its position_ms through its node, so
+positions stay correct after lazy shifts without touching every clip.
+
+The index is persistent: freeze() hands out the current root as an
+immutable version in O(1), and later edits copy the O(log n) nodes on
+the paths they change instead of changing them. Each node carries its
+clip's content for its version, so a frozen root describes the whole
+main track; restore() goes back to one by visiting only the nodes that
+differ (undo/redo of one edit is O(log n), not O(clips)).
+"""
+
+import random
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("clip", "state", "prio", "left", "right", "parent", "size", "pos", "min_pos", "max_pos", "max_end",
+                 "total", "packed", "add", "epoch", "digest")
+
+    def __init__(self, clip, pos: int, epoch: int):
+        self.clip = clip
+        self.state = clip._state  # The clip's content in this version (immutable)
+        self.prio = random.random()
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+        self.parent: Optional["_Node"] = None  # Only kept right in the current version
+        self.size = 1
+        # Positions are exact once every ancestor's pending add is included;
+        # min_pos/max_pos/max_end/total/packed cover the whole subtree
+        self.pos = pos
+        self.min_pos = pos
+        self.max_pos = pos
+        self.max_end = pos + self.state.duration_ms
+        self.total = self.state.duration_ms  # Sum of durations
+        self.packed = True  # Clips lie end to end from min_pos
+        self.add = 0  # Shift not yet applied to the children
+        self.epoch = epoch  # Nodes of an older epoch are frozen (shared with a snapshot)
+        self.digest = None  # Subtree digest, filled in by frozen_digest() once frozen
+
+    def copy(self, epoch: int) -> "_Node":
+        node = _Node.__new__(_Node)
+        node.clip, node.state, node.prio = self.clip, self.state, self.prio
+        node.left, node.right, node.parent = self.left, self.right, self.parent
+        node.size, node.pos, node.min_pos, node.max_pos = self.size, self.pos, self.min_pos, self.max_pos
+        node.max_end, node.total, node.packed, node.add = self.max_end, self.total, self.packed, self.add
+        node.epoch = epoch
+        node.digest = None
+        return node
+
+
+def _size(node: Optional[_Node]) -> int:
+    return node.size if node is not None else 0
+
+
+def _apply(node: Optional[_Node], delta: int):
+    if node is not None and delta:
+        node.pos += delta
+        node.min_pos += delta
+        node.max_pos += delta
+        node.max_end += delta
+        node.add += delta
+
+
+def _update(node: _Node):
+    left, right, add = node.left, node.right, node.add
+    node.size = 1 + _size(left) + _size(right)
+    duration = node.state.duration_ms
+    lo = hi = node.pos
+    end = node.pos + duration
+    total = duration
+    packed = True
+    if left is not None:
+        left.parent = node
+        lo = min(lo, left.min_pos + add)
+        hi = max(hi, left.max_pos + add)
+        end = max(end, left.max_end + add)
+        total += left.total
+        packed = left.packed and left.min_pos + add + left.total == node.pos
+    if right is not None:
+        right.parent = node
+        lo = min(lo, right.min_pos + add)
+        hi = max(hi, right.max_pos + add)
+        end = max(end, right.max_end + add)
+        total += right.total
+        packed = packed and right.packed and right.min_pos + add == node.pos + duration
+    node.min_pos, node.max_pos, node.max_end, node.total, node.packed = lo, hi, end, total, packed
+
+
+def _walk(root: Optional[_Node]) -> Iterator[Tuple[_Node, int]]:
+    """(node, position) pairs of a tree in order, resolving pending shifts on the way down (O(n))."""
+    stack = []
+    node, add = root, 0
+    while stack or node is not None:
+        while node is not None:
+            stack.append((node, add))
+            add += node.add
+            node = node.left
+        node, add = stack.pop()
+        yield node, node.pos + add
+        add += node.add
+        node = node.right
+
+
+def _previous(node: _Node):
+    """Clip before a node in its tree's order (None for the first); needs current parent links."""
+    if node.left is not None:
+        node = node.left
+        while node.right is not None:
+            node = node.right
+        return node.clip
+    while node.parent is not None and node is node.parent.left:
+        node = node.parent
+    return node.parent.clip if node.parent is not None else None
+
+
+def node_position(node: _Node) -> int:
+    """Exact timeline position of a node's clip."""
+    pos = node.pos
+    parent = node.parent
+    while parent is not None:
+        pos += parent.add
+        parent = parent.parent
+    return pos
+
+
+def frozen_items(root: Optional[_Node]) -> Iterator[Tuple[object, int]]:
+    """(state, position_ms) pairs of a frozen version (see ClipIndex.freeze()), safe from any thread."""
+    for node, position in _walk(root):
+        yield node.state, position
+
+
+def frozen_end(root: Optional[_Node]) -> int:
+    """Latest clip end of a frozen version (0 when empty)."""
+    return max(0, root.max_end) if root is not None else 0
+
+
+_DIGEST_BASE = 1000003
+_DIGEST_MOD = (1 << 61) - 1
+
+
+def frozen_digest(root: Optional[_Node]) -> int:
+    """
+    Digest of a frozen version's clip states in order.
+
+    Equal clip sequences give equal digests whatever the tree shape, in any
+    process. Subtree digests are kept on the frozen nodes, so digesting a
+    version that shares most nodes with one digested before is O(changed nodes).
+    """
+    if root is None:
+        return 0
+    if root.digest is None:
+        right_size = _size(root.right)
+        own = zlib.crc32(repr(root.state).encode("utf-8"))
+        root.digest = (frozen_digest(root.left) * pow(_DIGEST_BASE, right_size + 1, _DIGEST_MOD)
+                       + own * pow(_DIGEST_BASE, right_size, _DIGEST_MOD)
+                       + frozen_digest(root.right)) % _DIGEST_MOD
+    return root.digest
+
+
+class ClipIndex:
+    """
+    Clips in timeline order.
+
+    Supports the list operations the timeline uses (len, iteration,
+    indexing, insert, pop, remove, index, clear) plus position queries.
+    Items must have _state (immutable, with duration_ms), _node and _index
+    slots, like TimelineClip.
+    """
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+        self._epoch = 0  # Nodes of this epoch belong to the current version only
+
+    # Sequence interface
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __bool__(self) -> bool:
+        return self._root is not None
+
+    def __iter__(self) -> Iterator:
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.clip
+            node = node.right
+
+    def items(self) -> Iterator:
+        """(clip, position_ms) pairs in order, resolving pending shifts on the way down (O(n))."""
+        for node, position in _walk(self._root):
+            yield node.clip, position
+
+    def __getitem__(self, index: int):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return self._node_at(index).clip
+
+    def __contains__(self, clip) -> bool:
+        return self._node_of(clip) is not None
+
+    def insert(self, index: int, clip):
+        """Insert a clip before position index (its position_ms is kept)."""
+        index = max(0, min(index, len(self)))
+        node = _Node(clip, clip.position_ms, self._epoch)
+        clip._node, clip._index = node, self
+        left, right = self._split(self._root, index)
+        self._root = self._merge(self._merge(left, node), right)
+        self._root.parent = None
+
+    def append(self, clip):
+        self.insert(len(self), clip)
+
+    def pop(self, index: int = -1):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("pop index out of range")
+        left, rest = self._split(self._root, index)
+        middle, right = self._split(rest, 1)
+        self._root = self._merge(left, right)
+        if self._root is not None:
+            self._root.parent = None
+        clip = middle.clip
+        clip._node = clip._index = None
+        clip.position_ms = middle.pos
+        return clip
+
+    def remove(self, clip):
+        self.pop(self.index(clip))
+
+    def index(self, clip) -> int:
+        node = self._node_of(clip)
+        if node is None:
+            raise ValueError("clip is not in the index")
+        rank = _size(node.left)
+        while node.parent is not None:
+            if node is node.parent.right:
+                rank += _size(node.parent.left) + 1
+            node = node.parent
+        return rank
+
+    def clear(self):
+        clips = list(self)
+        # Read every position before detaching: they are resolved through the tree
+        positions = [clip.position_ms for clip in clips]
+        for clip, position in zip(clips, positions):
+            clip._node = clip._index = None
+            clip.position_ms = position
+        self._root = None
+
+    def build(self, clips: List):
+        """Replace the contents with clips in the given order, in O(n) (bulk loading)."""
+        self.clear()
+        nodes = []
+        for clip in clips:
+            node = _Node(clip, clip.position_ms, self._epoch)
+            clip._node, clip._index = node, self
+            nodes.append(node)
+
+        def build_range(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = nodes[mid]
+            node.left = build_range(lo, mid)
+            node.right = build_range(mid + 1, hi)
+            _update(node)
+            return node
+
+        self._root = build_range(0, len(nodes))
+        # Balanced shape; priorities handed out in level order keep the heap property
+        priorities = sorted((random.random() for _ in nodes), reverse=True)
+        level = [self._root] if self._root is not None else []
+        k = 0
+        while level:
+            children = []
+            for node in level:
+                node.prio = priorities[k]
+                k += 1
+                children.extend(child for child in (node.left, node.right) if child is not None)
+            level = children
+
+    # Versions
+    def freeze(self) -> Optional[_Node]:
+        """
+        The current contents as an immutable version, in O(1).
+
+        Later edits copy the nodes they change (path copying) instead of
+        changing them, so the returned root keeps describing this version;
+        read it with frozen_items() and bring it back with restore().
+        """
+        self._epoch += 1
+        return self._root
+
+    def restore(self, root: Optional[_Node]) -> Tuple[List, List, List]:
+        """
+        Make a version returned by freeze() current again.
+
+        Subtrees the two versions share are skipped, so the cost is the
+        number of nodes that differ (a few per edit since the version was
+        frozen), not the number of clips.
+
+        Returns:
+            (added, removed, changed) clips; changed clips have other
+            content or another clip before them than in the current version
+        """
+        # Nodes only the restored version has, with their parent in it
+        incoming = []
+        shared = []
+        stack = [(root, None)]
+        while stack:
+            node, parent = stack.pop()
+            if node is None:
+                continue
+            if node.clip._node is node:
+                shared.append((node, parent))  # The whole subtree is in the current version too
+                continue
+            incoming.append((node, parent))
+            stack.append((node.left, node))
+            stack.append((node.right, node))
+        skip = {id(node) for node, _ in shared}
+        outgoing = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None or id(node) in skip:
+                continue
+            outgoing.append(node)
+            stack.append(node.left)
+            stack.append(node.right)
+
+        # Compare against the current version while its parent links are intact
+        staying = {id(node.clip) for node, _ in incoming}
+        removed = []
+        previous = {}
+        for node in outgoing:
+            if id(node.clip) in staying:
+                previous[id(node.clip)] = (node.state, _previous(node))
+            else:
+                removed.append((node.clip, node_position(node)))
+
+        for node, parent in shared:
+            node.parent = parent
+        for clip, position in removed:
+            clip._node = clip._index = None
+            clip.position_ms = position
+        for node, parent in incoming:
+            node.parent = parent
+            clip = node.clip
+            clip._node, clip._index, clip._state = node, self, node.state
+        self._root = root  # Its nodes stay frozen: they still belong to the restored version
+
+        added, changed = [], []
+        for node, _ in incoming:
+            before = previous.get(id(node.clip))
+            if before is None:
+                added.append(node.clip)
+            elif before[0] != node.state or before[1] is not _previous(node):
+                changed.append(node.clip)
+        return added, [clip for clip, _ in removed], changed
+
+    def refresh(self, clip):
+        """Take in a clip's new _state (recomputes the cached subtree ends up to the root)."""
+        node = self._own_path(clip._node)
+        node.state = clip._state
+        while node is not None:
+            _update(node)
+            node = node.parent
+
+    def set_position(self, clip, position_ms: int):
+        """Move one clip without touching the others."""
+        node = self._own_path(clip._node)
+        node.pos += position_ms - node_position(node)
+        while node is not None:
+            _update(node)
+            node = node.parent
+
+    # Position operations
+    def shift_from(self, index: int, delta_ms: int):
+        """Add delta_ms to the position of every clip from index on (ripple)."""
+        if not delta_ms or index >= len(self):
+            return
+        left, right = self._split(self._root, max(0, index))
+        right = self._own(right)
+        _apply(right, delta_ms)
+        self._root = self._merge(left, right)
+        self._root.parent = None
+
+    def pack(self):
+        """
+        Lay all clips end to end from 0, in order (closes gaps and overlaps).
+
+        Subtrees that are already end to end are only shifted, so after an
+        edit that changed a few clips this costs O(log n) per change.
+        """
+
+        def visit(node, start):
+            if node.packed:
+                if node.min_pos != start:
+                    node = self._own(node)
+                    _apply(node, start - node.min_pos)
+                return node
+            node = self._own(node)
+            self._push(node)
+            if node.left is not None:
+                node.left = visit(node.left, start)
+                start += node.left.total
+            node.pos = start
+            if node.right is not None:
+                node.right = visit(node.right, start + node.state.duration_ms)
+            _update(node)
+            return node
+
+        if self._root is not None:
+            self._root = visit(self._root, 0)
+            self._root.parent = None
+
+    def max_end(self) -> int:
+        """Latest clip end on the timeline (0 when empty)."""
+        return frozen_end(self._root)
+
+    def count_starting_at_or_before(self, position_ms: int) -> int:
+        """Index of the first clip positioned after position_ms (insertion index)."""
+        add = 0
+        count = 0
+        node = self._root
+        while node is not None:
+            child_add = add + node.add
+            if node.left is not None and node.left.max_pos + child_add > position_ms:
+                node = node.left
+            elif node.pos + add > position_ms:
+                return count + _size(node.left)
+            else:
+                count += _size(node.left) + 1
+                node = node.right
+            add = child_add
+        return count
+
+    def clip_at(self, position_ms: int):
+        """First clip (in order) with position <= position_ms < end, or None."""
+        found = self._collect(position_ms, position_ms + 1, first_only=True)
+        return found[0] if found else None
+
+    def clips_in_range(self, start_ms: int, end_ms: int) -> List:
+        """Clips overlapping [start_ms, end_ms), in order."""
+        return self._collect(start_ms, end_ms, first_only=False)
+
+    # Internal helpers
+    @staticmethod
+    def _node_of(clip) -> Optional[_Node]:
+        return getattr(clip, "_node", None)
+
+    def _own(self, node: Optional[_Node]) -> Optional[_Node]:
+        """
+        A node the current version may change: the node itself, or a copy
+        of a frozen one. The caller links the copy in place of the node.
+        """
+        if node is None or node.epoch == self._epoch:
+            return node
+        copy = node.copy(self._epoch)
+        copy.clip._node = copy
+        if copy.left is not None:
+            copy.left.parent = copy
+        if copy.right is not None:
+            copy.right.parent = copy
+        return copy
+
+    def _own_path(self, node: _Node) -> _Node:
+        """Own a node and its ancestors (path copying); returns the node to change."""
+        if node.epoch == self._epoch:
+            return node  # Ancestors of an owned node are owned
+        parent = self._own_path(node.parent) if node.parent is not None else None
+        copy = self._own(node)
+        if parent is None:
+            self._root = copy
+        elif parent.left is node:
+            parent.left = copy
+        else:
+            parent.right = copy
+        return copy
+
+    def _push(self, node: _Node):
+        """Hand an owned node's pending shift down to its children."""
+        if node.add:
+            node.left = self._own(node.left)
+            node.right = self._own(node.right)
+            _apply(node.left, node.add)
+            _apply(node.right, node.add)
+            node.add = 0
+
+    def _split(self, node: Optional[_Node], k: int):
+        """Split into (first k nodes, rest)."""
+        if node is None:
+            return None, None
+        node = self._own(node)
+        self._push(node)
+        if _size(node.left) >= k:
+            left, node.left = self._split(node.left, k)
+            _update(node)
+            if left is not None:
+                left.parent = None
+            return left, node
+        node.right, right = self._split(node.right, k - _size(node.left) - 1)
+        _update(node)
+        if right is not None:
+            right.parent = None
+        return node, right
+
+    def _merge(self, a: Optional[_Node], b: Optional[_Node]) -> Optional[_Node]:
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if a.prio > b.prio:
+            a = self._own(a)
+            self._push(a)
+            a.right = self._merge(a.right, b)
+            _update(a)
+            return a
+        b = self._own(b)
+        self._push(b)
+        b.left = self._merge(a, b.left)
+        _update(b)
+        return b
+
+    def _node_at(self, index: int) -> _Node:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("clip index out of range")
+        node = self._root
+        while True:
+            left = _size(node.left)
+            if index < left:
+                node = node.left
+            elif index == left:
+                return node
+            else:
+                index -= left + 1
+                node = node.right
+
+    def _collect(self, start_ms: int, end_ms: int, first_only: bool) -> List:
+        """In-order clips with position < end_ms and end > start_ms, skipping subtrees that cannot match."""
+        result = []
+        stack = []
+        node, add = self._root, 0
+        while stack or node is not None:
+            while node is not None:
+                if node.max_end + add <= start_ms or node.min_pos + add >= end_ms:
+                    node = None
+                    break
+                stack.append((node, add))
+                add += node.add
+                node = node.left
+            if not stack:
+                break
+            node, add = stack.pop()
+            pos = node.pos + add
+            if pos < end_ms and pos + node.state.duration_ms > start_ms:
+                result.append(node.clip)
+                if first_only:
+                    break
+            add += node.add
+            node = node.right
+        return result
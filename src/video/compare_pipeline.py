@@ -0,0 +1,166 @@
+"""
+Compare Pipeline - Independent prefetching decoder for the A/B viewer
+
+Each side of a comparison decodes on its own thread with its own pooled
+decoder and keeps a few frames ready ahead of the shared clock. The
+viewer only ever takes what is already decoded, so a slow side shows its
+previous frame for a moment instead of holding up the other side.
+"""
+
+import threading
+from collections import deque
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from video.decoder_pool import decoder_pool
+from video.pts_table import PtsTable
+
+
+def letterbox(frame: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """Scale a frame to fit (width, height), padding the rest with black."""
+    w, h = size
+    fh, fw = frame.shape[:2]
+    scale = min(w / float(fw), h / float(fh))
+    nw, nh = max(1, int(fw * scale)), max(1, int(fh * scale))
+    resized = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR)
+    if (nw, nh) == (w, h):
+        return resized
+    out = np.zeros((h, w, 3), dtype=np.uint8)
+    x, y = (w - nw) // 2, (h - nh) // 2
+    out[y:y + nh, x:x + nw] = resized
+    return out
+
+
+class PrefetchPipeline:
+    """
+    Decodes the range start_ms..end_ms of one source ahead of a shared clock.
+
+    Offsets passed to seek() and frame_for() are relative to start_ms.
+    """
+
+    CAPACITY = 8  # Frames decoded ahead
+
+    def __init__(self, path: str, start_ms: int = 0, end_ms: Optional[int] = None):
+        self.path = path
+        self.handle = decoder_pool.acquire(path)
+        self.fps = self.handle.fps if self.handle else 30.0
+        self.pts = self.handle.pts if self.handle else PtsTable(self.fps, 0)
+
+        self.start_frame = max(0, self.pts.ms_to_frame(start_ms))
+        last = self.pts.frame_count - 1
+        if end_ms is not None:
+            last = min(last, self.pts.ms_to_frame(end_ms))
+        self.end_frame = max(self.start_frame, last)
+
+        self._cond = threading.Condition()
+        self._frames = deque()
+        self._current = None  # (index, frame) last handed out
+        self._next = self.start_frame
+        self._generation = 0
+        self._size: Optional[Tuple[int, int]] = None
+        self._running = self.handle is not None
+        self._thread = None
+        if self._running:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def is_ok(self) -> bool:
+        return self.handle is not None
+
+    @property
+    def length_ms(self) -> int:
+        return self.pts.frame_to_ms(self.end_frame + 1) - self.pts.frame_to_ms(self.start_frame)
+
+    def set_output_size(self, size: Optional[Tuple[int, int]]):
+        """Letterbox decoded frames to (width, height); already queued frames are redone."""
+        with self._cond:
+            if size == self._size:
+                return
+            self._size = size
+            resume = self._current[0] if self._current else self._next
+            self._restart(resume)
+
+    def seek(self, offset_ms: int):
+        with self._cond:
+            self._current = None
+            self._restart(self._index_for(offset_ms))
+
+    def frame_for(self, offset_ms: int) -> Optional[np.ndarray]:
+        """
+        Latest decoded frame at or before an offset, without waiting.
+
+        Returns:
+            Frame, or None if nothing has been decoded since the last seek
+        """
+        target = self._index_for(offset_ms)
+        with self._cond:
+            consumed = False
+            while self._frames and self._frames[0][0] <= target:
+                self._current = self._frames.popleft()
+                consumed = True
+            if consumed:
+                self._cond.notify_all()
+            return self._current[1] if self._current else None
+
+    def release(self):
+        """Stop decoding; the worker returns the decoder to the pool once its last read is done."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is None:
+            decoder_pool.release(self.handle)
+        self._thread = None
+        self.handle = None
+
+    # Internal helpers
+    def _index_for(self, offset_ms: int) -> int:
+        index = self.pts.ms_to_frame(self.pts.frame_to_ms(self.start_frame) + max(0, offset_ms))
+        return min(index, self.end_frame)
+
+    def _restart(self, index: int):
+        # Caller holds the condition
+        self._generation += 1
+        self._frames.clear()
+        self._next = index
+        self._cond.notify_all()
+
+    def _run(self):
+        # The pool must not hand the decoder out again while a read may still be running
+        handle = self.handle
+        try:
+            self._decode_loop(handle)
+        finally:
+            decoder_pool.release(handle)
+
+    def _decode_loop(self, handle):
+        decoder_pos = -1
+        while True:
+            with self._cond:
+                while self._running and (len(self._frames) >= self.CAPACITY or self._next > self.end_frame):
+                    self._cond.wait()
+                if not self._running:
+                    return
+                generation = self._generation
+                index = self._next
+                size = self._size
+
+            with handle.lock:
+                cap = handle.capture
+                if index != decoder_pos:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, self.pts.capture_index(index))
+                ok, frame = cap.read()
+                decoder_pos = index + 1 if ok else -1
+            if ok and size is not None:
+                frame = letterbox(frame, size)
+
+            with self._cond:
+                if generation != self._generation:
+                    continue
+                if not ok:
+                    # End of the readable range
+                    self._next = self.end_frame + 1
+                    continue
+                self._frames.append((index, frame))
+                self._next = index + 1
@@ -0,0 +1,293 @@
+"""
+Decode Backends - Alternatives to cv2.VideoCapture for preview playback
+
+cv2.VideoCapture decodes at full resolution with little control over
+threading, which is too slow for 4K HEVC previews. FFmpegPipeCapture runs
+ffmpeg with multithreaded decode and a scale filter sized to the preview,
+and a reader thread fills preallocated numpy buffers from the rawvideo
+pipe. It implements the subset of the VideoCapture interface the player
+uses, so the two are interchangeable.
+
+The backend is chosen per source (see choose_backend): from the
+"playback/decoder" setting, or in "auto" mode by timing a few cv2 decodes
+against the source's frame budget. The "process" backend (cv2 in a
+separate worker process, see process_decoder.py) is only used when
+selected explicitly.
+"""
+
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QSettings
+
+from video.ffmpeg_processor import FFmpegProcessor
+
+BACKEND_AUTO = "auto"
+BACKEND_OPENCV = "opencv"
+BACKEND_FFMPEG = "ffmpeg"
+BACKEND_PROCESS = "process"
+BACKENDS = (BACKEND_AUTO, BACKEND_OPENCV, BACKEND_FFMPEG, BACKEND_PROCESS)
+
+
+class FFmpegPipeCapture:
+    """
+    VideoCapture-like reader over an ffmpeg rawvideo pipe.
+
+    Frame indices follow the source's nominal frame rate, like OpenCV's.
+    Seeking restarts ffmpeg at the target (input seeking is frame accurate);
+    sequential reads never restart.
+    """
+
+    # Decoded frames buffered ahead of the reader
+    QUEUE_FRAMES = 4
+    # Seconds to wait for a frame before treating the pipe as dead
+    READ_TIMEOUT = 10.0
+
+    def __init__(self, path: str, fps: float, frame_count: int, width: int, height: int,
+                 max_size: Optional[Tuple[int, int]] = None, threads: int = 0):
+        """
+        Args:
+            path: Source file path
+            fps, frame_count, width, height: Source properties (e.g. from a pooled handle)
+            max_size: (width, height) box the output is scaled to fit, None for source size
+            threads: Decoder threads (0 = one per core)
+        """
+        self.path = path
+        self.fps = fps if fps > 0 else 30.0
+        self.frame_count = frame_count
+        self.source_width = width
+        self.source_height = height
+        self.threads = threads or (os.cpu_count() or 2)
+
+        self.width, self.height = self._fit(width, height, max_size)
+        self._frame_bytes = self.width * self.height * 3
+        self._opened = width > 0 and height > 0 and FFmpegProcessor.check_ffmpeg_available()
+
+        self._pos = 0  # Index of the frame the next read() returns
+        self._eof = False
+        self._process: Optional[subprocess.Popen] = None
+        self._generation = 0
+        self._free: Optional[queue.Queue] = None
+        self._filled: Optional[queue.Queue] = None
+
+    @staticmethod
+    def _fit(width: int, height: int, max_size: Optional[Tuple[int, int]]) -> Tuple[int, int]:
+        """Scale (width, height) down to fit max_size, keeping even dimensions."""
+        if max_size and width > 0 and height > 0:
+            scale = min(1.0, max_size[0] / float(width), max_size[1] / float(height))
+            width, height = int(width * scale), int(height * scale)
+        return max(2, width - width % 2), max(2, height - height % 2)
+
+    # VideoCapture interface
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._pos)
+        return 0.0
+
+    def set(self, prop_id, value) -> bool:
+        if prop_id != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        target = max(0, int(value))
+        if target != self._pos or self._eof:
+            # Restarted lazily on the next read
+            self._stop_process()
+            self._pos = target
+            self._eof = False
+        return True
+
+    def grab(self) -> bool:
+        buf = self._next_buffer()
+        if buf is None:
+            return False
+        self._free.put(buf)
+        return True
+
+    def read(self, image: Optional[np.ndarray] = None):
+        """
+        Read the next frame.
+
+        Args:
+            image: Optional array to decode into (reused if it has the output shape)
+
+        Returns:
+            (ok, BGR frame)
+        """
+        buf = self._next_buffer()
+        if buf is None:
+            return False, None
+        if image is not None and image.shape == buf.shape and image.dtype == buf.dtype:
+            np.copyto(image, buf)
+            self._free.put(buf)
+            return True, image
+        # Hand the buffer itself to the caller and replace it in the pool
+        self._free.put(np.empty_like(buf))
+        return True, buf
+
+    def release(self):
+        self._stop_process()
+        self._opened = False
+
+    # Internal helpers
+    def _next_buffer(self) -> Optional[np.ndarray]:
+        if not self._opened or self._eof:
+            return None
+        if self._process is None and not self._start_process():
+            return None
+        try:
+            buf = self._filled.get(timeout=self.READ_TIMEOUT)
+        except queue.Empty:
+            buf = None
+        if buf is None:
+            self._eof = True
+            self._stop_process()
+            return None
+        self._pos += 1
+        return buf
+
+    def _start_process(self) -> bool:
+        cmd = ["ffmpeg", "-v", "error", "-nostdin", "-threads", str(self.threads)]
+        if self._pos > 0:
+            # Half a frame early so rounding cannot skip the target frame
+            cmd.extend(["-ss", f"{max(0.0, (self._pos - 0.5) / self.fps):.6f}"])
+        cmd.extend(["-i", self.path, "-an", "-sn"])
+        if (self.width, self.height) != (self.source_width, self.source_height):
+            cmd.extend(["-vf", f"scale={self.width}:{self.height}:flags=fast_bilinear"])
+        cmd.extend(["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"])
+        try:
+            self._process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        except Exception as e:
+            print(f"[FFmpegPipe] Failed to start decoder: {e}")
+            self._process = None
+            self._opened = False
+            return False
+
+        self._generation += 1
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        for _ in range(self.QUEUE_FRAMES):
+            self._free.put(np.empty((self.height, self.width, 3), dtype=np.uint8))
+        threading.Thread(
+            target=self._read_pipe,
+            args=(self._process, self._free, self._filled, self._generation),
+            daemon=True
+        ).start()
+        return True
+
+    def _read_pipe(self, process, free: queue.Queue, filled: queue.Queue, generation: int):
+        """Reader thread: fill free buffers from the pipe, None marks the end."""
+        stream = process.stdout
+        while generation == self._generation:
+            try:
+                buf = free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            view = memoryview(buf.reshape(-1))
+            got = 0
+            try:
+                while got < self._frame_bytes:
+                    n = stream.readinto(view[got:])
+                    if not n:
+                        break
+                    got += n
+            except Exception:
+                got = 0
+            if got < self._frame_bytes:
+                filled.put(None)
+                return
+            filled.put(buf)
+
+    def _stop_process(self):
+        self._generation += 1
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+            try:
+                self._process.stdout.close()
+            except Exception:
+                pass
+            self._process = None
+        self._free = None
+        self._filled = None
+
+
+# Backend selection
+BENCH_FRAMES = 8
+# cv2 is kept while it decodes within this share of the frame budget
+BENCH_BUDGET_SHARE = 0.6
+
+_bench_results: Dict[str, str] = {}
+
+
+def get_backend_preference() -> str:
+    value = QSettings("XJCO2811", "VideoEditor").value("playback/decoder", BACKEND_AUTO)
+    return value if value in BACKENDS else BACKEND_AUTO
+
+
+def set_backend_preference(backend: str):
+    if backend in BACKENDS:
+        QSettings("XJCO2811", "VideoEditor").setValue("playback/decoder", backend)
+
+
+def choose_backend(handle) -> str:
+    """
+    Pick the decode backend for a source.
+
+    Args:
+        handle: PooledCapture of the source (used for the auto benchmark)
+
+    Returns:
+        BACKEND_OPENCV, BACKEND_FFMPEG or BACKEND_PROCESS
+    """
+    preference = get_backend_preference()
+    if preference == BACKEND_PROCESS:
+        return BACKEND_PROCESS
+    if preference == BACKEND_OPENCV or not FFmpegProcessor.check_ffmpeg_available():
+        return BACKEND_OPENCV
+    if preference == BACKEND_FFMPEG:
+        return BACKEND_FFMPEG
+
+    key = os.path.normcase(os.path.abspath(handle.path))
+    if key not in _bench_results:
+        _bench_results[key] = _benchmark_opencv(handle)
+    return _bench_results[key]
+
+
+def _benchmark_opencv(handle) -> str:
+    """Time a few cv2 decodes and compare them with the frame budget."""
+    with handle.lock:
+        cap = handle.capture
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        cap.read()  # First read includes decoder start-up
+        start = time.perf_counter()
+        decoded = 0
+        for _ in range(BENCH_FRAMES):
+            if not cap.read()[0]:
+                break
+            decoded += 1
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    if decoded == 0:
+        return BACKEND_OPENCV
+    per_frame_ms = elapsed_ms / decoded
+    budget_ms = 1000.0 / handle.fps
+    backend = BACKEND_FFMPEG if per_frame_ms > budget_ms * BENCH_BUDGET_SHARE else BACKEND_OPENCV
+    print(f"[Decode] {os.path.basename(handle.path)}: cv2 {per_frame_ms:.1f}ms/frame "
+          f"(budget {budget_ms:.1f}ms) -> {backend}")
+    return backend
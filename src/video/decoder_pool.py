@@ -0,0 +1,212 @@
+"""
+Decoder Pool - Shared cv2.VideoCapture handles
+
+Opening a VideoCapture is expensive (hundreds of milliseconds on networked
+storage), yet the player, thumbnails, program preview and duration probing
+all open the same few files over and over. The pool keeps recently used
+handles open, keyed by source path, and lends them out one borrower at a
+time. Idle handles are retained in LRU order up to a fixed limit.
+
+Handles are stateful: a borrower must always seek before reading.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import cv2
+
+from utils.cache_paths import source_key
+from video import pts_table
+
+
+class PooledCapture:
+    """An open VideoCapture lent out by the pool, with its cached properties."""
+
+    def __init__(self, path: str, capture):
+        self.path = path
+        self.capture = capture
+        # Guards the decoder when the borrower shares it between threads
+        self.lock = threading.RLock()
+
+        self.fps = capture.get(cv2.CAP_PROP_FPS)
+        if self.fps <= 0:
+            self.fps = 30.0
+        self.width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # Frame timestamps (exact count and duration for variable-frame-rate sources);
+        # a CFR estimate until the background probe of a new source finishes
+        self._pts_key = source_key(path)
+        self._pts = pts_table.pts_table_for(path, self.fps, int(capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+        self._pts_final = pts_table.ready_table(self._pts_key) is not None
+
+    @property
+    def pts(self) -> "pts_table.PtsTable":
+        if not self._pts_final:
+            table = pts_table.ready_table(self._pts_key)
+            if table is not None:
+                self._pts, self._pts_final = table, True
+        return self._pts
+
+    @property
+    def frame_count(self) -> int:
+        return self.pts.frame_count
+
+    @property
+    def duration_ms(self) -> int:
+        return self.pts.duration_ms
+
+    def __repr__(self):
+        return f"PooledCapture(path='{self.path}', fps={self.fps:.2f}, frames={self.frame_count})"
+
+
+class DecoderPool:
+    """
+    Pool of open decoders keyed by source path.
+
+    Several handles may exist for one path when it is borrowed concurrently
+    (e.g. player and thumbnailer); only idle handles count against the limit.
+    """
+
+    def __init__(self, max_idle: int = 8):
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        # key -> idle handles, least recently used key first
+        self._idle: "OrderedDict[str, List[PooledCapture]]" = OrderedDict()
+        self._idle_count = 0
+        self._info: Dict[str, dict] = {}
+        self.opens = 0  # Number of real file opens (for diagnostics)
+        pts_table.add_listener(self._on_pts_ready)
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def acquire(self, path: str) -> Optional[PooledCapture]:
+        """
+        Borrow a decoder for a file, opening one only if none is idle.
+
+        Args:
+            path: Source file path
+
+        Returns:
+            The handle (exclusively owned until release), or None if the file
+            cannot be opened
+        """
+        key = self._key(path)
+        with self._lock:
+            handles = self._idle.get(key)
+            if handles:
+                handle = handles.pop()
+                self._idle_count -= 1
+                if not handles:
+                    del self._idle[key]
+                return handle
+
+        # Open outside the pool lock so slow storage does not block other borrowers
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            capture.release()
+            print(f"[DecoderPool] Failed to open: {path}")
+            return None
+        handle = PooledCapture(path, capture)
+        with self._lock:
+            self.opens += 1
+            self._info[key] = {
+                "fps": handle.fps,
+                "frame_count": handle.frame_count,
+                "duration_ms": handle.duration_ms,
+                "width": handle.width,
+                "height": handle.height,
+            }
+        print(f"[DecoderPool] Opened {handle}")
+        return handle
+
+    def release(self, handle: Optional[PooledCapture]):
+        """Return a borrowed handle; the least recently used idle handles beyond the limit are closed."""
+        if handle is None:
+            return
+        key = self._key(handle.path)
+        evicted = []
+        with self._lock:
+            self._idle.setdefault(key, []).append(handle)
+            self._idle.move_to_end(key)
+            self._idle_count += 1
+            while self._idle_count > self.max_idle:
+                old_key, old_handles = next(iter(self._idle.items()))
+                evicted.append(old_handles.pop(0))
+                self._idle_count -= 1
+                if not old_handles:
+                    del self._idle[old_key]
+        for old in evicted:
+            old.capture.release()
+
+    @contextmanager
+    def borrow(self, path: str):
+        """
+        Context manager around acquire/release that also holds the handle lock.
+
+        Yields:
+            PooledCapture or None if the file cannot be opened
+        """
+        handle = self.acquire(path)
+        if handle is None:
+            yield None
+            return
+        try:
+            with handle.lock:
+                yield handle
+        finally:
+            self.release(handle)
+
+    def probe(self, path: str) -> Optional[dict]:
+        """
+        Get basic stream info (fps, frame_count, duration_ms, width, height).
+
+        Served from cache after the first open of a path.
+        """
+        key = self._key(path)
+        with self._lock:
+            info = self._info.get(key)
+        if info is not None:
+            return dict(info)
+        with self.borrow(path) as handle:
+            if handle is None:
+                return None
+        with self._lock:
+            return dict(self._info[key])
+
+    def cached_info(self, path: str) -> Optional[dict]:
+        """Probe info if it is already known, without opening the file."""
+        with self._lock:
+            info = self._info.get(self._key(path))
+        return dict(info) if info is not None else None
+
+    def _on_pts_ready(self, path: str, table: "pts_table.PtsTable"):
+        """Correct probe info once a source's real frame timestamps are known."""
+        with self._lock:
+            info = self._info.get(self._key(path))
+            if info is not None:
+                info["frame_count"] = table.frame_count
+                info["duration_ms"] = table.duration_ms
+
+    def seed_info(self, path: str, info: dict):
+        """Adopt saved probe info (e.g. from a project file) so probe() need not open the file."""
+        key = self._key(path)
+        with self._lock:
+            self._info.setdefault(key, dict(info))
+
+    def clear(self):
+        """Close every idle handle."""
+        with self._lock:
+            handles = [h for hs in self._idle.values() for h in hs]
+            self._idle.clear()
+            self._idle_count = 0
+        for handle in handles:
+            handle.capture.release()
+
+
+# Shared instance used by the player, thumbnails and probing
+decoder_pool = DecoderPool()
@@ -0,0 +1,376 @@
+"""
+Edit Journal - Crash recovery for timeline edits
+
+Saving a large project after every edit would stall the editor, so edits
+are journaled instead: every command run through the CommandStack, and
+every undo and redo, is appended to a journal file as one short line.
+From time to time the journal is compacted: the whole project is written
+as a snapshot and the journal starts again empty. After a crash, loading
+the snapshot and replaying the journal on top of it brings back the
+timeline, markers and undo history as they were.
+
+The GUI thread only formats records and takes timeline snapshots (see
+timeline_snapshot.py). A writer thread does all file work (serializing
+snapshots, appends, fsync) and commits whatever has queued up in one
+write. Edits made outside the command stack (dragging clips, opening
+a project) cannot be replayed; they are covered by a snapshot taken
+shortly after them instead.
+
+Every write ends with a check record: a fingerprint of the timeline and
+markers as they were after the last record in it. Recovery compares the
+replayed state with the last check it reaches, so a replay that comes
+out differently (e.g. an edit whose result depended on something not in
+the journal) is reported instead of silently accepted. Commands are
+replayed from their recorded results (trims keep the delta that was
+applied), not recomputed from source lengths that are unknown this early.
+"""
+
+import json
+import os
+import queue
+import threading
+from typing import Callable, List, Optional
+
+from PyQt5.QtCore import QObject, QTimer
+
+from utils.cache_paths import cache_dir
+from utils.command_stack import Command, CommandStack, command_from_record
+from video.marker import MarkerManager
+from video.project import load_project, snapshot_lines, write_project_lines
+from video.timeline import Timeline
+
+JOURNAL_FORMAT = "qt-cw-vedio-journal"
+
+
+class EditJournal(QObject):
+    """
+    Write-ahead journal of the command stack, plus periodic snapshots.
+
+    Usage: create it, call recover() if has_recovery() and the user agrees,
+    then start(). close() on a clean exit removes the recovery files.
+    """
+
+    SNAPSHOT_INTERVAL_MS = 60000  # Compact at most this long after the last snapshot
+    UNTRACKED_DELAY_MS = 2000  # Snapshot this long after an edit the journal cannot replay
+    COMPACT_AFTER = 500  # Journal records before compacting early
+
+    def __init__(self, timeline: Timeline, marker_manager: MarkerManager, command_stack: CommandStack,
+                 state_provider: Optional[Callable[[], dict]] = None, directory: Optional[str] = None):
+        """
+        Args:
+            timeline, marker_manager, command_stack: Models to journal
+            state_provider: Returns the editor state to store in snapshots
+            directory: Where the journal and snapshot live (default: recovery cache)
+        """
+        super().__init__()
+        self.timeline = timeline
+        self.marker_manager = marker_manager
+        self.command_stack = command_stack
+        self.state_provider = state_provider or dict
+        directory = directory or cache_dir("recovery")
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.snapshot_path = os.path.join(directory, "snapshot.vproj")
+
+        self._generation = 0
+        self._records = 0  # Journal records since the last snapshot
+        self._untracked = False  # Model changed without a journal record
+        self._check_pending = False
+        self._records_at_change = 0
+        self._running = False
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        # Outcome of recover(): True if the replay matched the journaled state,
+        # False if it did not or stopped early, None if nothing could be checked
+        self.recovered_exactly: Optional[bool] = None
+
+        self._snapshot_timer = QTimer(self)
+        self._snapshot_timer.timeout.connect(self._on_snapshot_timer)
+        self._untracked_timer = QTimer(self)
+        self._untracked_timer.setSingleShot(True)
+        self._untracked_timer.timeout.connect(self.compact)
+
+    # Recovery
+    def has_recovery(self) -> bool:
+        """Check if a previous session left recovery files behind (it did not exit cleanly)."""
+        return os.path.exists(self.snapshot_path)
+
+    def recover(self) -> dict:
+        """
+        Restore the previous session: load the snapshot, then replay the journal.
+
+        Returns:
+            Editor state stored with the snapshot
+
+        Raises:
+            OSError, ProjectFormatError: Snapshot cannot be read
+        """
+        state = load_project(self.snapshot_path, self.timeline, self.marker_manager)
+        self.command_stack.restore_history(
+            self._commands(state.pop("undo", [])),
+            self._commands(state.pop("redo", []))
+        )
+        records = self._read_journal(state.pop("journal_generation", None))
+        replayed = 0
+        stopped = False
+        checked = None  # Last check record reached, with the replayed state at that point
+        with self.timeline.batch():
+            for number, record in enumerate(records, 1):
+                try:
+                    op = record["op"]
+                    if op == "check":
+                        checked = (record, self.timeline.snapshot(), self._marker_check())
+                        continue
+                    if op == "do":
+                        self.command_stack.execute(self._command(record["command"]))
+                    elif op == "undo":
+                        self.command_stack.undo()
+                    elif op == "redo":
+                        self.command_stack.redo()
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"[Journal] Stopped replay at record {number}: {e}")
+                    stopped = True
+                    break
+                replayed += 1
+        self.recovered_exactly = self._verify(checked, stopped)
+        print(f"[Journal] Recovered snapshot + {replayed} journaled edits")
+        return state
+
+    def discard(self):
+        """Delete the recovery files (clean exit, or the user declined recovery)."""
+        for path in (self.journal_path, self.snapshot_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # Journaling
+    def start(self):
+        """Start journaling from the current state (takes a first snapshot)."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.command_stack.command_executed.connect(self._on_executed)
+        self.command_stack.command_undone.connect(self._on_undone)
+        self.command_stack.command_redone.connect(self._on_redone)
+        for signal in (self.timeline.clip_added, self.timeline.clip_removed, self.timeline.clip_modified,
+                       self.timeline.timeline_cleared, self.timeline.track_changed,
+                       self.timeline.batch_committed, self.marker_manager.marker_added,
+                       self.marker_manager.marker_removed, self.marker_manager.marker_modified,
+                       self.marker_manager.markers_cleared, self.marker_manager.markers_loaded):
+            signal.connect(self._on_model_changed)
+        self.compact()
+        self._snapshot_timer.start(self.SNAPSHOT_INTERVAL_MS)
+        print(f"[Journal] Journaling edits to {self.journal_path}")
+
+    def close(self, discard: bool = True):
+        """
+        Stop journaling and wait for pending writes.
+
+        Args:
+            discard: Remove the recovery files (the session ended cleanly)
+        """
+        if not self._running:
+            return
+        self._running = False
+        self._snapshot_timer.stop()
+        self._untracked_timer.stop()
+        self._queue.put(("stop", None))
+        self._thread.join(timeout=5.0)
+        self._thread = None
+        if discard:
+            self.discard()
+
+    def compact(self):
+        """Write a snapshot of the current state and start an empty journal."""
+        if not self._running:
+            return
+        self._generation += 1
+        state = dict(self.state_provider() or {})
+        state["journal_generation"] = self._generation
+        state["undo"] = self._records_of(self.command_stack.undo_stack)
+        state["redo"] = self._records_of(self.command_stack.redo_stack)
+        # Only freezing happens here; the writer thread serializes the snapshot
+        snapshot = (self.timeline.snapshot(), self.marker_manager.export_markers(),
+                    self.marker_manager.next_marker_id, state)
+        self._queue.put(("snapshot", (snapshot, self._generation)))
+        self._records = 0
+        self._untracked = False
+        self._untracked_timer.stop()
+
+    # Signal handlers
+    def _on_executed(self, command: Command):
+        record = command.to_record()
+        if record is None:
+            self._untracked = True
+            self._untracked_timer.start(self.UNTRACKED_DELAY_MS)
+            return
+        self._append({"op": "do", "command": record})
+
+    def _on_undone(self, command: Command):
+        if command.to_record() is None:
+            self._on_executed(command)  # Not in the snapshot's history either: snapshot again
+            return
+        self._append({"op": "undo"})
+
+    def _on_redone(self, command: Command):
+        if command.to_record() is None:
+            self._on_executed(command)
+            return
+        self._append({"op": "redo"})
+
+    def _on_model_changed(self, *args):
+        # A command's changes are followed by its record in the same event;
+        # anything still unrecorded once control returns to the event loop
+        # was edited outside the command stack
+        if self._check_pending:
+            return
+        self._check_pending = True
+        self._records_at_change = self._records
+        QTimer.singleShot(0, self._check_untracked)
+
+    def _check_untracked(self):
+        self._check_pending = False
+        if self._running and self._records == self._records_at_change:
+            self._untracked = True
+            self._untracked_timer.start(self.UNTRACKED_DELAY_MS)
+
+    def _on_snapshot_timer(self):
+        if self._records or self._untracked:
+            self.compact()
+
+    def _append(self, record: dict):
+        if not self._running:
+            return
+        # The state after the record, for the writer's check (freezing only)
+        check = (self.timeline.snapshot(), self._marker_check())
+        self._queue.put(("record", (json.dumps(record, separators=(",", ":")), check)))
+        self._records += 1
+        if self._records >= self.COMPACT_AFTER:
+            QTimer.singleShot(0, self.compact)
+
+    # Internal helpers
+    def _marker_check(self) -> List[int]:
+        return [self.marker_manager.get_marker_count(), self.marker_manager.next_marker_id]
+
+    @staticmethod
+    def _check_line(check) -> str:
+        snapshot, markers = check
+        return json.dumps({"op": "check", "timeline": snapshot.fingerprint(), "markers": markers},
+                          separators=(",", ":"))
+
+    @staticmethod
+    def _verify(checked, stopped: bool) -> Optional[bool]:
+        """Compare the replay with the last check record it reached."""
+        if stopped:
+            return False
+        if checked is None:
+            return None  # No check written (nothing journaled, or an older journal)
+        record, snapshot, markers = checked
+        if record.get("timeline") == snapshot.fingerprint() and record.get("markers") == markers:
+            return True
+        print(f"[Journal] Replayed state differs from the journaled one: {snapshot.fingerprint()} "
+              f"{markers}, expected {record.get('timeline')} {record.get('markers')}")
+        return False
+
+    def _command(self, record: dict) -> Command:
+        return command_from_record(record, self.timeline, self.marker_manager)
+
+    def _commands(self, records: List[dict]) -> List[Command]:
+        commands = []
+        for record in records or []:
+            try:
+                commands.append(self._command(record))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"[Journal] Dropped undo history entry: {e}")
+        return commands
+
+    @staticmethod
+    def _records_of(commands: List[Command]) -> List[dict]:
+        """Records of a stack, bottom first; history below a command that cannot be replayed is dropped."""
+        records = []
+        for command in commands:
+            record = command.to_record()
+            if record is None:
+                records = []
+            else:
+                records.append(record)
+        return records
+
+    def _read_journal(self, generation: Optional[int]) -> List[dict]:
+        """Journal records written after the snapshot with this generation."""
+        records = []
+        try:
+            with open(self.journal_path, "r", encoding="utf-8", errors="replace") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("format") != JOURNAL_FORMAT or header.get("generation") != generation:
+                    # Crashed between writing a snapshot and starting its journal:
+                    # the old journal's edits are already in the snapshot
+                    return []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break  # Torn last write
+        except (OSError, ValueError, AttributeError):
+            pass
+        return records
+
+    def _run(self):
+        """Writer thread: appends records and writes snapshots in queue order."""
+        journal = None
+        stop = False
+        while not stop:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            pending = []
+            check = None  # State after the last pending record
+            for kind, payload in items:
+                if kind == "record":
+                    line, check = payload
+                    pending.append(line)
+                elif kind == "snapshot":
+                    snapshot, generation = payload
+                    journal = self._write_records(journal, pending)
+                    pending, check = [], None
+                    journal = self._write_snapshot(journal, snapshot_lines(*snapshot), generation)
+                elif kind == "stop":
+                    stop = True
+            if check is not None:
+                pending.append(self._check_line(check))
+            journal = self._write_records(journal, pending)
+
+        if journal is not None:
+            journal.close()
+
+    def _write_records(self, journal, lines: List[str]):
+        if not lines or journal is None:
+            return journal
+        try:
+            journal.write("\n".join(lines) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        except OSError as e:
+            print(f"[Journal] Failed to write journal: {e}")
+        return journal
+
+    def _write_snapshot(self, journal, lines: List[str], generation: int):
+        # Snapshot first: a crash before the new journal exists leaves a
+        # snapshot that already contains every journaled edit
+        try:
+            write_project_lines(self.snapshot_path, lines)
+            if journal is not None:
+                journal.close()
+            journal = open(self.journal_path, "w", encoding="utf-8")
+            journal.write(json.dumps({"format": JOURNAL_FORMAT, "generation": generation}) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        except OSError as e:
+            print(f"[Journal] Failed to write snapshot: {e}")
+        return journal
@@ -4,7 +4,8 @@ FFmpeg Processor - Video Editing Operations
 This module handles video processing operations using FFmpeg:
 - Trimming/cutting video segments
 - Concatenating multiple clips
-- Exporting with quality settings
+- Compositing overlay video and audio tracks over the main track
+- Exporting with quality settings, and markers as chapters (see chapters.py)
 """
 
 import subprocess
@@ -13,6 +14,8 @@ import tempfile
 from typing import List, Optional, Tuple
 from PyQt5.QtCore import QObject, pyqtSignal, QThread
 
+from video.chapters import Chapter, write_ffmetadata
+
 
 class FFmpegProcessor(QObject):
     """Handles FFmpeg video processing operations."""
@@ -52,6 +55,7 @@ class FFmpegProcessor(QObject):
         super().__init__()
         self.process = None
         self.is_cancelled = False
+        self._progress_span = (0, 100)  # Share of the progress bar the current stage fills
 
     @staticmethod
     def check_ffmpeg_available() -> bool:
@@ -114,14 +118,6 @@ class FFmpegProcessor(QObject):
             # Estimate total duration in seconds for progress
             total_sec = max(0.01, (end_time_ms - start_time_ms) / 1000.0)
 
-            def _parse_ff_time(s: str) -> float:
-                import re
-                m = re.search(r"time=(\d+):(\d+):(\d+\.?\d*)", s)
-                if not m:
-                    return -1.0
-                hh = int(m.group(1)); mm = int(m.group(2)); ss = float(m.group(3))
-                return hh * 3600.0 + mm * 60.0 + ss
-
             for line in self.process.stderr:
                 if self.is_cancelled:
                     self.process.terminate()
@@ -163,28 +159,48 @@ class FFmpegProcessor(QObject):
         output_path: str,
         quality: str = QUALITY_HIGH,
         transitions_enabled: bool = False,
-        transition_ms: int = 500
+        transition_ms: int = 500,
+        chapters: Optional[List[Chapter]] = None
     ):
         """
         Concatenate multiple video clips. Progress: trim stage 0→60%, concat stage 60→99%, finish 100%.
+
+        Chapters (output time) are written by the joining pass itself.
         """
         self.is_cancelled = False
         self.process_started.emit()
+        self._progress_span = (0, 100)
 
+        success, message = self._concatenate_sync(clips, output_path, quality, transitions_enabled, transition_ms,
+                                                  chapters)
+        if success:
+            self._report_progress(100)
+        self.process_completed.emit(success, message)
+
+    def _concatenate_sync(
+        self,
+        clips: List[Tuple[str, int, int]],
+        output_path: str,
+        quality: str,
+        transitions_enabled: bool,
+        transition_ms: int,
+        chapters: Optional[List[Chapter]] = None
+    ) -> Tuple[bool, str]:
+        """Trim and join clips into output_path. Returns (success, output path or error message)."""
         try:
             # Create temporary trimmed clips
             temp_dir = tempfile.mkdtemp()
             temp_clips = []
             durations_sec = []
             concat_file = os.path.join(temp_dir, "concat_list.txt")
+            chapters_file = os.path.join(temp_dir, "chapters.txt")
 
             print(f"[FFmpeg] Processing {len(clips)} clips...", flush=True)
 
             # Step 1: Trim each clip
             for idx, (path, start_ms, end_ms) in enumerate(clips):
                 if self.is_cancelled:
-                    self.process_completed.emit(False, "Cancelled by user")
-                    return
+                    return False, "Cancelled by user"
 
                 temp_clip = os.path.join(temp_dir, f"clip_{idx}.mp4")
                 temp_clips.append(temp_clip)
@@ -197,7 +213,7 @@ class FFmpegProcessor(QObject):
 
                 # Update progress (0→60%)
                 progress = int((idx + 1) / max(1, len(clips)) * 60)
-                self.progress_updated.emit(progress)
+                self._report_progress(progress)
 
             # Step 2: Concatenate
             if not transitions_enabled or len(temp_clips) <= 1:
@@ -206,11 +222,13 @@ class FFmpegProcessor(QObject):
                     for clip in temp_clips:
                         f.write(f"file '{clip}'\n")
 
+                chapter_input, chapter_output = _chapter_args(chapters, chapters_file, 1)
                 cmd = [
                     "ffmpeg",
                     "-f", "concat",
                     "-safe", "0",
-                    "-i", concat_file,
+                    "-i", concat_file
+                ] + chapter_input + chapter_output + [
                     "-c", "copy",
                     "-y", output_path
                 ]
@@ -219,14 +237,6 @@ class FFmpegProcessor(QObject):
                 # Total seconds for concat stage
                 acc_total = max(0.01, sum(durations_sec))
 
-                def _parse_ff_time(s: str) -> float:
-                    import re
-                    m = re.search(r"time=(\d+):(\d+):(\d+\.?\d*)", s)
-                    if not m:
-                        return -1.0
-                    hh = int(m.group(1)); mm = int(m.group(2)); ss = float(m.group(3))
-                    return hh * 3600.0 + mm * 60.0 + ss
-
                 self.process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
@@ -236,8 +246,7 @@ class FFmpegProcessor(QObject):
                 for line in self.process.stderr:
                     if self.is_cancelled:
                         self.process.terminate()
-                        self.process_completed.emit(False, "Cancelled by user")
-                        return
+                        return False, "Cancelled by user"
                     try:
                         print(f"[FFmpeg][Concat][stderr] {line.strip()}", flush=True)
                     except Exception:
@@ -246,7 +255,7 @@ class FFmpegProcessor(QObject):
                         cur = _parse_ff_time(line)
                         if cur >= 0:
                             pct = 60 + int(min(cur / acc_total, 1.0) * 39)
-                            self.progress_updated.emit(min(pct, 99))
+                            self._report_progress(min(pct, 99))
                 self.process.wait()
                 result_code = self.process.returncode
 
@@ -257,20 +266,11 @@ class FFmpegProcessor(QObject):
                 cmd = ["ffmpeg"]
                 for clip in temp_clips:
                     cmd.extend(["-i", clip])
+                chapter_input, chapter_output = _chapter_args(chapters, chapters_file, len(temp_clips))
+                cmd.extend(chapter_input)
 
                 # Detect audio presence; if any clip lacks audio -> degrade to video-only xfade
-                def _has_audio(path: str) -> bool:
-                    try:
-                        probe = subprocess.run([
-                            "ffprobe", "-v", "error", "-select_streams", "a:0",
-                            "-show_entries", "stream=codec_type", "-of", "csv=p=0", path
-                        ], capture_output=True, timeout=10)
-                        out = (probe.stdout or b"").decode(errors="ignore").strip()
-                        return "audio" in out.lower()
-                    except Exception:
-                        return False
-
-                has_audio_all = all(_has_audio(p) for p in temp_clips)
+                has_audio_all = all(has_audio_stream(p) for p in temp_clips)
 
                 filter_lines = []
                 out_v = "[0:v]"
@@ -302,6 +302,7 @@ class FFmpegProcessor(QObject):
                     cmd.extend(["-map", out_a, "-c:a", "aac", "-b:a", settings["bitrate_audio"]])
                 else:
                     cmd.extend(["-an"])  # no audio
+                cmd.extend(chapter_output)
                 cmd.extend([
                     "-c:v", "libx264",
                     "-crf", settings["crf"],
@@ -314,14 +315,6 @@ class FFmpegProcessor(QObject):
                 # Parse concat stage progress 60→100
                 acc_total = max(0.01, sum(durations_sec) - td * (len(durations_sec) - 1))
 
-                def _parse_ff_time(s: str) -> float:
-                    import re
-                    m = re.search(r"time=(\d+):(\d+):(\d+\.?\d*)", s)
-                    if not m:
-                        return -1.0
-                    hh = int(m.group(1)); mm = int(m.group(2)); ss = float(m.group(3))
-                    return hh * 3600.0 + mm * 60.0 + ss
-
                 self.process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
@@ -331,8 +324,7 @@ class FFmpegProcessor(QObject):
                 for line in self.process.stderr:
                     if self.is_cancelled:
                         self.process.terminate()
-                        self.process_completed.emit(False, "Cancelled by user")
-                        return
+                        return False, "Cancelled by user"
                     try:
                         print(f"[FFmpeg][Concat][stderr] {line.strip()}", flush=True)
                     except Exception:
@@ -341,7 +333,7 @@ class FFmpegProcessor(QObject):
                         cur = _parse_ff_time(line)
                         if cur >= 0:
                             pct = 60 + int(min(cur / acc_total, 1.0) * 39)
-                            self.progress_updated.emit(min(pct, 99))
+                            self._report_progress(min(pct, 99))
                 self.process.wait()
                 result_code = self.process.returncode
 
@@ -349,24 +341,137 @@ class FFmpegProcessor(QObject):
             for clip in temp_clips:
                 if os.path.exists(clip):
                     os.remove(clip)
-            if os.path.exists(concat_file):
-                os.remove(concat_file)
+            for path in (concat_file, chapters_file):
+                if os.path.exists(path):
+                    os.remove(path)
             try:
                 os.rmdir(temp_dir)
             except Exception:
                 pass
 
             if result_code == 0 and os.path.exists(output_path):
+                return True, output_path
+            return False, "Concatenation failed"
+
+        except Exception as e:
+            error_msg = f"Error concatenating clips: {str(e)}"
+            print(f"[FFmpeg] {error_msg}")
+            return False, error_msg
+
+    def _report_progress(self, percentage: int):
+        """Emit progress mapped into the current stage's share of the whole operation."""
+        low, high = self._progress_span
+        self.progress_updated.emit(low + int(percentage * (high - low) / 100))
+
+    def export_multitrack(
+        self,
+        clips: List[Tuple[str, int, int]],  # Main track [(path, start_ms, end_ms), ...]
+        tracks: List[dict],  # Track.to_spec() of each overlay/audio track, bottom to top
+        output_path: str,
+        quality: str = QUALITY_HIGH,
+        transitions_enabled: bool = False,
+        transition_ms: int = 500,
+        chapters: Optional[List[Chapter]] = None
+    ):
+        """
+        Export the main track with overlay video and audio tracks composited on top.
+
+        The main track is joined as in concatenate_clips (trim + concat or
+        xfade), then one ffmpeg filter graph overlays the video tracks and
+        mixes the audio tracks onto it (and writes the chapters). Progress:
+        main track 0→60%, compositing 60→99%, finish 100%.
+        """
+        self.is_cancelled = False
+        self.process_started.emit()
+        temp_dir = tempfile.mkdtemp()
+        base_path = None
+        chapters_file = os.path.join(temp_dir, "chapters.txt")
+        try:
+            settings = self.QUALITY_SETTINGS.get(quality, self.QUALITY_SETTINGS[self.QUALITY_HIGH])
+
+            # Step 1: main track
+            base_ms = 0
+            canvas = _scale_size(settings["scale"]) or (1280, 720)
+            if clips:
+                base_path = os.path.join(temp_dir, "main_track.mp4")
+                self._progress_span = (0, 60)
+                success, message = self._concatenate_sync(clips, base_path, quality, transitions_enabled, transition_ms)
+                if not success:
+                    self.process_completed.emit(False, message)
+                    return
+                info = get_video_info(base_path)
+                if info:
+                    base_ms = info["duration_ms"]
+                    canvas = (info["width"], info["height"])
+                else:
+                    base_ms = sum(end - start for _, start, end in clips)
+            if self.is_cancelled:
+                self.process_completed.emit(False, "Cancelled by user")
+                return
+
+            # Step 2: one overlay/amix graph over the main track
+            inputs, filter_complex, total_ms = build_overlay_graph(
+                base_path, base_ms, has_audio_stream(base_path) if base_path else False, tracks, canvas
+            )
+            chapter_input, chapter_output = _chapter_args(
+                chapters, chapters_file, len([a for a in inputs if a == "-i"])
+            )
+            cmd = ["ffmpeg"] + inputs + chapter_input + [
+                "-filter_complex", filter_complex,
+                "-map", "[vout]", "-map", "[aout]"
+            ] + chapter_output + [
+                "-c:v", "libx264",
+                "-crf", settings["crf"],
+                "-preset", settings["preset"],
+                "-c:a", "aac",
+                "-b:a", settings["bitrate_audio"],
+                "-t", f"{total_ms / 1000.0:.3f}",
+                "-y", output_path
+            ]
+            print(f"[FFmpeg] Composite command: {' '.join(cmd)}", flush=True)
+
+            total_sec = max(0.01, total_ms / 1000.0)
+            self.process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True
+            )
+            for line in self.process.stderr:
+                if self.is_cancelled:
+                    self.process.terminate()
+                    self.process_completed.emit(False, "Cancelled by user")
+                    return
+                try:
+                    print(f"[FFmpeg][Composite][stderr] {line.strip()}", flush=True)
+                except Exception:
+                    pass
+                if "time=" in line:
+                    cur = _parse_ff_time(line)
+                    if cur >= 0:
+                        pct = 60 + int(min(cur / total_sec, 1.0) * 39)
+                        self.progress_updated.emit(min(pct, 99))
+            self.process.wait()
+
+            if self.process.returncode == 0 and os.path.exists(output_path):
                 self.progress_updated.emit(100)
                 self.process_completed.emit(True, output_path)
             else:
-                error_msg = "Concatenation failed"
-                self.process_completed.emit(False, error_msg)
+                self.process_completed.emit(False, "Compositing failed")
 
         except Exception as e:
-            error_msg = f"Error concatenating clips: {str(e)}"
+            error_msg = f"Error exporting tracks: {str(e)}"
             print(f"[FFmpeg] {error_msg}")
             self.process_completed.emit(False, error_msg)
+        finally:
+            self._progress_span = (0, 100)
+            for path in (base_path, chapters_file):
+                if path and os.path.exists(path):
+                    os.remove(path)
+            try:
+                os.rmdir(temp_dir)
+            except Exception:
+                pass
 
     def _trim_clip_sync(
         self,
@@ -425,6 +530,8 @@ class FFmpegWorker(QThread):
             self.processor.trim_video(**self.kwargs)
         elif self.operation == "concatenate":
             self.processor.concatenate_clips(**self.kwargs)
+        elif self.operation == "multitrack":
+            self.processor.export_multitrack(**self.kwargs)
 
 
 # Utility functions
@@ -489,6 +596,149 @@ def get_video_info(file_path: str) -> Optional[dict]:
         return None
 
 
+def build_overlay_graph(
+    base_path: Optional[str],
+    base_ms: int,
+    base_has_audio: bool,
+    tracks: List[dict],
+    canvas: Tuple[int, int],
+    has_audio=None
+) -> Tuple[List[str], str, int]:
+    """
+    Build the ffmpeg inputs and filter graph that composite tracks over the main track.
+
+    Video track clips are scaled, shifted to their timeline position and
+    overlaid in track order (later tracks on top); audio track clips are
+    delayed to their position and mixed with the main track's audio. The
+    main track is padded with black/silence when tracks run past its end.
+    Overlay clips contribute picture only; their sound goes on audio tracks.
+
+    Args:
+        base_path: Rendered main track, or None for a black background
+        base_ms: Duration of the main track
+        base_has_audio: Whether the main track has an audio stream
+        tracks: Track.to_spec() dicts, bottom to top
+        canvas: Output (width, height)
+        has_audio: Audio stream check for track sources (default has_audio_stream)
+
+    Returns:
+        (input arguments, filter_complex with [vout] and [aout], total duration in ms)
+    """
+    has_audio = has_audio or has_audio_stream
+    width, height = canvas
+    active = [t for t in tracks if not t.get("muted")]
+    total_ms = max([base_ms] + [pos + (end - start) for t in active for _, start, end, pos in t["clips"]])
+    total_sec = total_ms / 1000.0
+
+    inputs: List[str] = []
+    graph: List[str] = []
+    if base_path:
+        inputs += ["-i", base_path]
+    else:
+        inputs += ["-f", "lavfi", "-i", f"color=c=black:s={width}x{height}:r=30:d={total_sec:.3f}"]
+    pad_sec = max(0.0, (total_ms - base_ms) / 1000.0)
+    graph.append(f"[0:v]tpad=stop_mode=add:stop_duration={pad_sec:.3f}:color=black[v0]")
+    if base_path and base_has_audio:
+        base_audio = "[0:a]"
+    else:
+        inputs += ["-f", "lavfi", "-i", "anullsrc=r=48000:cl=stereo"]
+        base_audio = "[1:a]"
+    graph.append(f"{base_audio}apad[a0]")
+    next_input = len([a for a in inputs if a == "-i"])
+
+    video_out = "[v0]"
+    mixed = ["[a0]"]
+    for t in active:
+        for path, start, end, pos in t["clips"]:
+            duration = max(0, end - start)
+            if duration <= 0:
+                continue
+            pos_sec = pos / 1000.0
+            if t["kind"] == "audio" and not has_audio(path):
+                continue
+            i = next_input
+            next_input += 1
+            inputs += ["-ss", f"{start / 1000.0:.3f}", "-t", f"{duration / 1000.0:.3f}", "-i", path]
+            if t["kind"] == "video":
+                ow = max(2, int(width * t.get("scale", 1.0)) // 2 * 2)
+                x, y = int(width * t.get("x", 0.0)), int(height * t.get("y", 0.0))
+                graph.append(f"[{i}:v]scale={ow}:-2,setpts=PTS-STARTPTS+{pos_sec:.3f}/TB[ov{i}]")
+                graph.append(
+                    f"{video_out}[ov{i}]overlay=x={x}:y={y}:eof_action=pass:"
+                    f"enable='between(t,{pos_sec:.3f},{pos_sec + duration / 1000.0:.3f})'[v{i}]"
+                )
+                video_out = f"[v{i}]"
+            else:
+                graph.append(
+                    f"[{i}:a]asetpts=PTS-STARTPTS,volume={t.get('volume', 1.0):.3f},"
+                    f"adelay=delays={int(pos)}:all=1[a{i}]"
+                )
+                mixed.append(f"[a{i}]")
+
+    graph.append(f"{video_out}format=yuv420p[vout]")
+    if len(mixed) > 1:
+        graph.append(f"{''.join(mixed)}amix=inputs={len(mixed)}:duration=first:dropout_transition=0:normalize=0[aout]")
+    else:
+        graph.append("[a0]anull[aout]")
+    return inputs, ";".join(graph), total_ms
+
+
+def _scale_size(scale: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse a quality preset scale such as "1280:720"."""
+    if not scale:
+        return None
+    w, h = scale.split(":")
+    return int(w), int(h)
+
+
+def _chapter_args(chapters: Optional[List[Chapter]], metadata_path: str,
+                  input_index: int) -> Tuple[List[str], List[str]]:
+    """
+    ffmpeg arguments that take chapters from an FFMETADATA input.
+
+    Writes metadata_path and returns (input arguments, output arguments);
+    both are empty when there are no chapters.
+    """
+    if not chapters:
+        return [], []
+    write_ffmetadata(chapters, metadata_path)
+    return ["-i", metadata_path], ["-map_chapters", str(input_index)]
+
+
+def _parse_ff_time(line: str) -> float:
+    """Seconds from an ffmpeg progress line (time=HH:MM:SS.mmm), -1 if absent."""
+    import re
+    m = re.search(r"time=(\d+):(\d+):(\d+\.?\d*)", line)
+    if not m:
+        return -1.0
+    return int(m.group(1)) * 3600.0 + int(m.group(2)) * 60.0 + float(m.group(3))
+
+
+def get_media_duration(file_path: str) -> Optional[int]:
+    """Container duration in ms via ffprobe (also for audio-only files); None if unknown."""
+    try:
+        probe = subprocess.run([
+            "ffprobe", "-v", "error", "-show_entries", "format=duration",
+            "-of", "csv=p=0", file_path
+        ], capture_output=True, timeout=10)
+        return int(float((probe.stdout or b"").decode(errors="ignore").strip()) * 1000)
+    except Exception:
+        return None
+
+
+def has_audio_stream(file_path: str) -> bool:
+    """Return True if ffprobe reports at least one audio stream in the file."""
+    try:
+        probe = subprocess.run([
+            "ffprobe", "-v", "error", "-select_streams", "a:0",
+            "-show_entries", "stream=codec_type", "-of", "csv=p=0", file_path
+        ], capture_output=True, timeout=10)
+        out = (probe.stdout or b"").decode(errors="ignore").strip()
+        return "audio" in out.lower()
+    except Exception:
+        return False
+
+
 def format_time(milliseconds: int) -> str:
     """Format milliseconds as HH:MM:SS."""
     seconds = milliseconds // 1000
@@ -0,0 +1,152 @@
+"""
+Loop Cache - In/out region decoded once into RAM for loop playback
+
+Looping a region normally means seeking back to the in point and decoding
+the whole GOP again on every pass. The builder decodes the region once,
+on a worker thread with its own pooled decoder, into one contiguous array
+at preview resolution. Playback then indexes the array, so wrapping
+around costs nothing regardless of the codec's GOP length.
+"""
+
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from video.decoder_pool import decoder_pool
+
+
+class LoopFrameStore:
+    """Decoded frames of one region: frames[i] is source frame start_frame + i."""
+
+    def __init__(self, source_path: str, start_frame: int, frames: np.ndarray, fps: float):
+        self.source_path = source_path
+        self.start_frame = start_frame
+        self.frames = frames
+        self.fps = fps
+
+    @property
+    def end_frame(self) -> int:
+        """Last source frame held (inclusive)."""
+        return self.start_frame + len(self.frames) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.frames.nbytes
+
+    def contains(self, frame_index: int) -> bool:
+        return self.start_frame <= frame_index <= self.end_frame
+
+    def frame(self, frame_index: int) -> np.ndarray:
+        return self.frames[frame_index - self.start_frame]
+
+
+class LoopCacheBuilder(QObject):
+    """
+    Builds a LoopFrameStore in the background.
+
+    Signals:
+        progress(int): Percentage decoded
+        finished(object): LoopFrameStore, or None if cancelled or failed
+    """
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+
+    # Smallest frame width the store shrinks to when fitting the memory cap
+    MIN_WIDTH = 320
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+
+    def start(self, source_path: str, start_frame: int, end_frame: int,
+              max_size: Tuple[int, int], max_bytes: int):
+        """
+        Decode frames start_frame..end_frame (inclusive) of a source.
+
+        Args:
+            source_path: Source file
+            start_frame, end_frame: Region in source frame indices
+            max_size: (width, height) box frames are scaled to fit (preview size)
+            max_bytes: Memory cap; resolution is lowered further to respect it
+        """
+        self.cancel()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._build,
+            args=(source_path, start_frame, end_frame, max_size, max_bytes, self._cancel),
+            daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @classmethod
+    def fit_size(cls, width: int, height: int, count: int, max_size: Tuple[int, int],
+                 max_bytes: int) -> Optional[Tuple[int, int]]:
+        """
+        Frame size for the store: fits max_size and keeps count frames under max_bytes.
+
+        Returns:
+            (width, height), or None if even MIN_WIDTH frames exceed the cap
+        """
+        scale = min(1.0, max_size[0] / float(width), max_size[1] / float(height))
+        budget_scale = (max_bytes / float(count * width * height * 3)) ** 0.5
+        scale = min(scale, budget_scale)
+        w, h = int(width * scale), int(height * scale)
+        if w < min(cls.MIN_WIDTH, width):
+            return None
+        return max(2, w - w % 2), max(2, h - h % 2)
+
+    def _build(self, source_path, start_frame, end_frame, max_size, max_bytes, cancel):
+        handle = decoder_pool.acquire(source_path)
+        if handle is None:
+            self.finished.emit(None)
+            return
+        store = None
+        try:
+            count = max(1, end_frame - start_frame + 1)
+            size = self.fit_size(handle.width, handle.height, count, max_size, max_bytes)
+            if size is None:
+                print(f"[LoopCache] {count} frames do not fit in {max_bytes // (1024 * 1024)} MB")
+                return
+            w, h = size
+            frames = np.empty((count, h, w, 3), dtype=np.uint8)
+            resize = (w, h) != (handle.width, handle.height)
+
+            decoded = 0
+            last_percent = -1
+            with handle.lock:
+                cap = handle.capture
+                cap.set(cv2.CAP_PROP_POS_FRAMES, handle.pts.capture_index(start_frame))
+                for i in range(count):
+                    if cancel.is_set():
+                        return
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    if resize:
+                        cv2.resize(frame, (w, h), dst=frames[i], interpolation=cv2.INTER_AREA)
+                    else:
+                        frames[i] = frame
+                    decoded += 1
+                    percent = decoded * 100 // count
+                    if percent != last_percent:
+                        last_percent = percent
+                        self.progress.emit(percent)
+            if decoded == 0:
+                return
+            store = LoopFrameStore(source_path, start_frame, frames[:decoded], handle.fps)
+            print(f"[LoopCache] Cached {decoded} frames at {w}x{h} ({store.nbytes // (1024 * 1024)} MB)")
+        finally:
+            decoder_pool.release(handle)
+            if not cancel.is_set():
+                self.finished.emit(store)
@@ -2,9 +2,16 @@
 Marker System
 
 Allows users to mark important moments in videos for quick navigation.
+
+Markers are kept sorted by time next to a parallel list of their times,
+so navigation, nearest-marker and range queries are binary searches, and
+an id index makes lookups by id O(1). Logging tools can generate tens of
+thousands of markers per file; import_markers() loads them in one sort
+and one markers_loaded signal.
 """
 
-from typing import List, Optional
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 from PyQt5.QtCore import QObject, pyqtSignal
 from PyQt5.QtGui import QColor
@@ -32,12 +39,15 @@ class MarkerManager(QObject):
         marker_removed: Emitted when marker is removed (marker_id)
         marker_modified: Emitted when marker is modified (marker)
         markers_cleared: Emitted when all markers are cleared
+        markers_loaded: Emitted once when import_markers() replaced all markers
+            (no marker_added/markers_cleared are emitted for the import)
     """
 
     marker_added = pyqtSignal(object)  # Marker
     marker_removed = pyqtSignal(int)  # marker_id
     marker_modified = pyqtSignal(object)  # Marker
     markers_cleared = pyqtSignal()
+    markers_loaded = pyqtSignal()
 
     # Predefined marker colors
     COLOR_RED = "#FF0000"
@@ -62,7 +72,9 @@ class MarkerManager(QObject):
 
     def __init__(self):
         super().__init__()
-        self.markers: List[Marker] = []
+        self.markers: List[Marker] = []  # Sorted by time (equal times in insertion order)
+        self._times: List[int] = []  # time_ms of each entry of markers, for bisect
+        self._by_id: Dict[int, Marker] = {}
         self._next_marker_id = 1
         self._color_index = 0  # For cycling through colors
 
@@ -101,14 +113,7 @@ class MarkerManager(QObject):
 
         self._next_marker_id += 1
 
-        # Insert in sorted order by time
-        insert_idx = 0
-        for i, existing_marker in enumerate(self.markers):
-            if existing_marker.time_ms > time_ms:
-                break
-            insert_idx = i + 1
-
-        self.markers.insert(insert_idx, marker)
+        self._insert(marker)
         self.marker_added.emit(marker)
 
         print(f"[Markers] Added marker: {marker}")
@@ -124,21 +129,17 @@ class MarkerManager(QObject):
         Returns:
             True if removed, False if not found
         """
-        for i, marker in enumerate(self.markers):
-            if marker.id == marker_id:
-                removed_marker = self.markers.pop(i)
-                self.marker_removed.emit(marker_id)
-                print(f"[Markers] Removed marker: {removed_marker}")
-                return True
-
-        return False
+        marker = self._by_id.pop(marker_id, None)
+        if marker is None:
+            return False
+        self._pop(marker)
+        self.marker_removed.emit(marker_id)
+        print(f"[Markers] Removed marker: {marker}")
+        return True
 
     def get_marker(self, marker_id: int) -> Optional[Marker]:
         """Get marker by ID."""
-        for marker in self.markers:
-            if marker.id == marker_id:
-                return marker
-        return None
+        return self._by_id.get(marker_id)
 
     def get_marker_at_time(self, time_ms: int, tolerance_ms: int = 500) -> Optional[Marker]:
         """
@@ -151,15 +152,21 @@ class MarkerManager(QObject):
         Returns:
             Nearest marker within tolerance, or None
         """
+        # Nearest on each side; on a tie the earlier marker wins
+        after = bisect_left(self._times, time_ms)
+        candidates = []
+        if after > 0:
+            # First of the markers sharing the closest earlier time
+            candidates.append(bisect_left(self._times, self._times[after - 1]))
+        if after < len(self._times):
+            candidates.append(after)
         nearest_marker = None
-        min_distance = float('inf')
-
-        for marker in self.markers:
-            distance = abs(marker.time_ms - time_ms)
-            if distance <= tolerance_ms and distance < min_distance:
+        min_distance = tolerance_ms + 1
+        for index in candidates:
+            distance = abs(self._times[index] - time_ms)
+            if distance < min_distance:
                 min_distance = distance
-                nearest_marker = marker
-
+                nearest_marker = self.markers[index]
         return nearest_marker
 
     def update_marker_label(self, marker_id: int, new_label: str) -> bool:
@@ -190,20 +197,9 @@ class MarkerManager(QObject):
         if not marker:
             return False
 
-        # Remove from current position
-        self.markers.remove(marker)
-
-        # Update time
+        self._pop(marker)
         marker.time_ms = new_time_ms
-
-        # Re-insert in sorted order
-        insert_idx = 0
-        for i, existing_marker in enumerate(self.markers):
-            if existing_marker.time_ms > new_time_ms:
-                break
-            insert_idx = i + 1
-
-        self.markers.insert(insert_idx, marker)
+        self._insert(marker)
         self.marker_modified.emit(marker)
 
         print(f"[Markers] Moved marker {marker_id} to {new_time_ms}ms")
@@ -211,29 +207,27 @@ class MarkerManager(QObject):
 
     def get_next_marker(self, current_time_ms: int) -> Optional[Marker]:
         """Get the next marker after current time."""
-        for marker in self.markers:
-            if marker.time_ms > current_time_ms:
-                return marker
-        return None
+        index = bisect_right(self._times, current_time_ms)
+        return self.markers[index] if index < len(self.markers) else None
 
     def get_previous_marker(self, current_time_ms: int) -> Optional[Marker]:
         """Get the previous marker before current time."""
-        for marker in reversed(self.markers):
-            if marker.time_ms < current_time_ms:
-                return marker
-        return None
+        index = bisect_left(self._times, current_time_ms)
+        return self.markers[index - 1] if index > 0 else None
 
     def get_all_markers(self) -> List[Marker]:
         """Get all markers sorted by time."""
         return self.markers.copy()
 
     def get_markers_in_range(self, start_ms: int, end_ms: int) -> List[Marker]:
-        """Get all markers within a time range."""
-        return [m for m in self.markers if start_ms <= m.time_ms <= end_ms]
+        """Get all markers within a time range (inclusive)."""
+        return self.markers[bisect_left(self._times, start_ms):bisect_right(self._times, end_ms)]
 
     def clear(self):
         """Remove all markers."""
         self.markers.clear()
+        self._times.clear()
+        self._by_id.clear()
         self._next_marker_id = 1
         self._color_index = 0
         self.markers_cleared.emit()
@@ -260,34 +254,53 @@ class MarkerManager(QObject):
             for m in self.markers
         ]
 
-    def import_markers(self, marker_data: List[dict]):
+    @property
+    def next_marker_id(self) -> int:
+        """Id the next marker will get (saved with projects)."""
+        return self._next_marker_id
+
+    def import_markers(self, marker_data: List[dict], next_marker_id: Optional[int] = None):
         """
         Import markers from list of dicts (for loading from file).
 
+        Replaces all markers in one sort and emits markers_loaded once.
+
         Args:
             marker_data: List of marker dictionaries
+            next_marker_id: Saved id counter, so ids are not reused
         """
-        self.clear()
-
-        for data in marker_data:
-            marker = Marker(
-                id=data["id"],
-                time_ms=data["time_ms"],
-                label=data["label"],
-                color=data["color"]
-            )
-            self.markers.append(marker)
-
-            # Update next ID
-            if marker.id >= self._next_marker_id:
-                self._next_marker_id = marker.id + 1
-
-            self.marker_added.emit(marker)
-
-        # Sort by time
-        self.markers.sort(key=lambda m: m.time_ms)
+        markers = [
+            Marker(id=data["id"], time_ms=data["time_ms"], label=data["label"], color=data["color"])
+            for data in marker_data
+        ]
+        # Stable: markers at the same time keep their saved order
+        markers.sort(key=lambda m: m.time_ms)
 
-        print(f"[Markers] Imported {len(marker_data)} markers")
+        self.markers = markers
+        self._times = [m.time_ms for m in markers]
+        self._by_id = {m.id: m for m in markers}
+        self._color_index = 0
+        self._next_marker_id = max((m.id for m in markers), default=0) + 1
+        if next_marker_id is not None:
+            self._next_marker_id = max(self._next_marker_id, int(next_marker_id))
+        self.markers_loaded.emit()
+
+        print(f"[Markers] Imported {len(markers)} markers")
+
+    def _insert(self, marker: Marker):
+        """Insert after any markers at the same time."""
+        index = bisect_right(self._times, marker.time_ms)
+        self.markers.insert(index, marker)
+        self._times.insert(index, marker.time_ms)
+        self._by_id[marker.id] = marker
+
+    def _pop(self, marker: Marker):
+        """Remove a marker from the sorted lists (not from the id index)."""
+        index = bisect_left(self._times, marker.time_ms)
+        while self.markers[index] is not marker:
+            index += 1  # Other markers at the same time
+        del self.markers[index]
+        del self._times[index]
 
     def __repr__(self):
         return f"MarkerManager(markers={len(self.markers)})"
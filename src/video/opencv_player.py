@@ -3,13 +3,36 @@ OpenCV Video Player Widget
 
 This module provides a video player using OpenCV backend,
 which has better codec support on Windows than QMediaPlayer.
+Audio is played through an ffmpeg pipe (see audio_player) and acts as
+the master clock when available; otherwise a wall clock scaled by the
+playback speed is used. Frames are picked from the clock rather than read
+one per tick, so high shuttle speeds skip frames instead of crawling, and
+negative speeds play in reverse from small cached blocks. When frames
+keep missing their deadlines the preview resolution steps down (full,
+1/2, 1/4) and climbs back once there is headroom again. An in/out region
+can be decoded once into RAM (see loop_cache) and looped from there.
 """
 
+import bisect
+import os
+import time
+
 import cv2
 import numpy as np
 from PyQt5.QtWidgets import QWidget, QLabel
-from PyQt5.QtCore import QTimer, Qt, pyqtSignal
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtCore import QElapsedTimer, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QImage, QPainter, QPixmap
+
+from video.audio_player import AudioPlayer
+from video.decode_backends import (
+    BACKEND_FFMPEG, BACKEND_OPENCV, BACKEND_PROCESS, FFmpegPipeCapture, choose_backend
+)
+from video.process_decoder import ProcessCapture
+from video.decoder_pool import decoder_pool
+from video.loop_cache import LoopCacheBuilder
+from video.playback_stats import PlaybackStats
+from video.pts_table import add_listener as add_pts_listener
+from video.seek_scheduler import ScrubCache, SeekScheduler
 
 
 class OpenCVVideoPlayer(QLabel):
@@ -28,17 +51,44 @@ class OpenCVVideoPlayer(QLabel):
     STATE_PLAYING = 1
     STATE_PAUSED = 2
 
+    # When video lags the clock by more than this, seek instead of dropping frames
+    MAX_FRAME_DROP = 12
+
+    # Shuttle (J/K/L) rates; negative speeds play in reverse
+    SHUTTLE_RATES = (1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+    # Frames decoded forward at once and then shown backwards in reverse playback
+    REVERSE_BLOCK_FRAMES = 16
+    # Shortest timer interval; at higher speeds the clock skips frames instead
+    MIN_TICK_MS = 15
+    # Retry interval for a still frame the decoder process has not delivered yet
+    PENDING_RETRY_MS = 20
+
+    # Adaptive preview resolution
+    PREVIEW_SCALES = (1.0, 0.5, 0.25)
+    ADAPT_WINDOW_FRAMES = 30  # Presented frames per evaluation window
+    ADAPT_DOWN_MISS_RATIO = 0.2  # Step down when this share of frames missed its deadline
+    ADAPT_UP_LOAD = 0.5  # Step up when frame work uses less than this share of the budget...
+    ADAPT_UP_WINDOWS = 3  # ...for this many consecutive windows without misses
+
     # Signals
     positionChanged = pyqtSignal(int)
     durationChanged = pyqtSignal(int)
     stateChanged = pyqtSignal(int)
+    previewScaleChanged = pyqtSignal(float)
+    loopChanged = pyqtSignal(bool)  # RAM loop playback started/stopped
+    loopProgress = pyqtSignal(int)  # Percentage of the loop region cached
+    _ptsReady = pyqtSignal(str, object)  # Background PTS probe finished (path, PtsTable)
 
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        # Video capture object
+        # Video capture object: the pooled cv2 handle, or an ffmpeg pipe / decoder process
         self.capture = None
         self.video_path = None
+        self._handle = None
+        self._pipe = None
+        # Reused output buffer for sequential reads
+        self._frame_buffer = None
 
         # Playback state
         self.state = self.STATE_STOPPED
@@ -46,18 +96,62 @@ class OpenCVVideoPlayer(QLabel):
         self.total_frames = 0
         self.fps = 30.0
         self.duration_ms = 0
+        # Frame timestamps of the source (drives every ms <-> frame conversion)
+        self.pts = None
+        self._ptsReady.connect(self._on_pts_ready)
+        add_pts_listener(self._ptsReady.emit)
 
-        # Playback speed (1.0 = normal, 0.5 = half speed, 2.0 = double speed)
+        # Playback speed (1.0 = normal, 0.5 = half speed, 2.0 = double speed, -1.0 = reverse)
         self.playback_speed = 1.0
 
+        # Wall clock used when there is no audio clock
+        self._clock = QElapsedTimer()
+        self._clock_origin_ms = 0
+        self._clock_loop = None  # Loop region the clock wraps in (set by _restart_clock)
+
+        # Reverse playback block: (first index, last index, sorted indices, frames by index)
+        self._reverse_block = None
+
         # Timer for frame updates
         self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
         self.timer.timeout.connect(self._update_frame)
 
-        # Volume (not applicable for OpenCV, but kept for API compatibility)
+        # Audio output (master clock while playing, if the source has audio)
+        self.audio = AudioPlayer(self)
+        self.audio.availabilityChanged.connect(self._on_audio_availability)
         self.volume = 70
         self.is_muted = False
 
+        # Asynchronous scrubbing: a worker decodes the newest seek target while
+        # recently decoded frames give an immediate approximate picture
+        self.seek_scheduler = SeekScheduler(self)
+        self.seek_scheduler.frameReady.connect(self._on_seek_frame_ready)
+        self.scrub_cache = ScrubCache()
+        self._latest_seek_id = 0
+        self._shown_seek_id = 0
+        # True when current_frame was moved by request_seek but the playback decoder was not
+        self._decoder_stale = False
+        self._display_retry_id = 0  # Invalidates pending still-frame retries
+
+        # Frame pipeline timing (see get_playback_stats) and optional overlay
+        self.stats = PlaybackStats()
+        self._show_stats = False
+
+        # Preview resolution: index into PREVIEW_SCALES, adapted unless locked
+        self._scale_index = 0
+        self._scale_locked = False
+        self._adapt_frames = 0
+        self._adapt_work_ms = 0.0
+        self._adapt_late_start = 0
+        self._adapt_clean_windows = 0
+
+        # RAM loop of an in/out region (LoopFrameStore while looping)
+        self._loop = None
+        self._loop_builder = LoopCacheBuilder(self)
+        self._loop_builder.progress.connect(self.loopProgress.emit)
+        self._loop_builder.finished.connect(self._on_loop_ready)
+
         # Widget setup
         self.setMinimumSize(640, 480)
         self.setScaledContents(True)
@@ -79,33 +173,57 @@ class OpenCVVideoPlayer(QLabel):
         """
         print(f"[DEBUG] Loading video with OpenCV: {file_path}")
 
-        # Release previous video if any
-        if self.capture is not None:
-            self.capture.release()
-
-        # Open video file
-        self.capture = cv2.VideoCapture(file_path)
+        # Switching between clips of the same source keeps the open decoder
+        same_source = (
+            self._handle is not None and self.video_path is not None
+            and os.path.abspath(self.video_path) == os.path.abspath(file_path)
+        )
+        self.stop_loop()
+        if not same_source:
+            # Return previous decoder to the pool and borrow one for the new file
+            self._release_pipe()
+            decoder_pool.release(self._handle)
+            self._handle = decoder_pool.acquire(file_path)
+            self.scrub_cache.clear()
+            self._reverse_block = None
+            self.seek_scheduler.set_source(file_path if self._handle is not None else None)
         self.video_path = file_path
+        self._drop_pending_seeks()
+        self._decoder_stale = False
 
-        if not self.capture.isOpened():
+        if self._handle is None:
             print(f"[ERROR] Failed to open video: {file_path}")
+            self.capture = None
             self.setText("Failed to load video")
+            self.audio.close()
             return False
 
-        # Get video properties
-        self.total_frames = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
-        if self.fps <= 0:
-            self.fps = 30.0  # Default fallback
+        # Get video properties (cached on the pooled handle)
+        if not same_source:
+            self._open_pipe_if_preferred()
+        self.capture = self._pipe if self._pipe is not None else self._handle.capture
+        self.total_frames = self._handle.frame_count
+        self.fps = self._handle.fps
+        self.pts = self._handle.pts
 
-        self.duration_ms = int((self.total_frames / self.fps) * 1000)
+        self.duration_ms = self._frame_to_ms(self.total_frames)
         self.current_frame = 0
+        # Pooled handles may have been left anywhere by a previous borrower
+        self._seek_capture(0)
 
         print(f"[DEBUG] Video loaded:")
         print(f"  Total frames: {self.total_frames}")
-        print(f"  FPS: {self.fps}")
+        print(f"  FPS: {self.fps}{' (variable)' if self.pts.is_vfr else ''}")
         print(f"  Duration: {self.duration_ms} ms")
 
+        # Prepare audio track (silently skipped if no audio/FFmpeg)
+        if not same_source or self.audio.source_path is None:
+            self.audio.open(file_path)
+        else:
+            self.audio.stop()
+        self.audio.set_volume(self.volume)
+        self.audio.set_muted(self.is_muted)
+
         # Emit duration
         self.durationChanged.emit(self.duration_ms)
 
@@ -114,6 +232,27 @@ class OpenCVVideoPlayer(QLabel):
 
         return True
 
+    def _on_pts_ready(self, path, table):
+        """Swap in the real frame timestamps of the loaded source once probed."""
+        if (self._handle is None or self.video_path is None
+                or os.path.abspath(path) != os.path.abspath(self.video_path)):
+            return
+        if table.is_vfr == self.pts.is_vfr and table.frame_count == self.total_frames:
+            self.pts = table
+            return
+        position_ms = self.get_position()
+        self.stop_loop()
+        self._reverse_block = None
+        self.pts = table
+        self.total_frames = table.frame_count
+        self.duration_ms = self._frame_to_ms(self.total_frames)
+        self.current_frame = min(self._ms_to_frame(position_ms), max(0, self.total_frames - 1))
+        self._decoder_stale = True
+        if self.state == self.STATE_PLAYING:
+            self._sync_decoder()
+        print(f"[DEBUG] Frame timestamps ready: {table}")
+        self.durationChanged.emit(self.duration_ms)
+
     def play(self):
         """Start video playback."""
         if self.capture is None or not self.capture.isOpened():
@@ -121,12 +260,16 @@ class OpenCVVideoPlayer(QLabel):
             return
 
         print(f"[DEBUG] Starting playback at {self.playback_speed}x speed")
+        if self._loop is not None and not self._loop.contains(self.current_frame):
+            self.stop_loop()
+        self._sync_decoder()
+        self._drop_pending_seeks()
+        self._reset_adapt_window()
         self.state = self.STATE_PLAYING
         self.stateChanged.emit(self.state)
 
-        # Calculate timer interval based on FPS and playback speed
-        interval = int((1000 / self.fps) / self.playback_speed)
-        self.timer.start(interval)
+        self.timer.start(self._tick_interval())
+        self._restart_clock()
 
     def pause(self):
         """Pause video playback."""
@@ -134,17 +277,24 @@ class OpenCVVideoPlayer(QLabel):
         self.state = self.STATE_PAUSED
         self.stateChanged.emit(self.state)
         self.timer.stop()
+        self.audio.stop()
+        self._reverse_block = None
 
     def stop(self):
         """Stop video playback and return to beginning."""
         print("[DEBUG] Stopping playback")
+        self.stop_loop()
         self.state = self.STATE_STOPPED
         self.stateChanged.emit(self.state)
         self.timer.stop()
+        self.audio.stop()
+        self._reverse_block = None
 
         if self.capture is not None:
+            self._drop_pending_seeks()
+            self._decoder_stale = False
             self.current_frame = 0
-            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._seek_capture(0)
             self._display_current_frame()
             self.positionChanged.emit(0)
 
@@ -159,52 +309,102 @@ class OpenCVVideoPlayer(QLabel):
             return
 
         # Calculate frame number from milliseconds
-        frame_number = int((position_ms / 1000.0) * self.fps)
+        frame_number = self._ms_to_frame(position_ms)
         frame_number = max(0, min(frame_number, self.total_frames - 1))
 
         print(f"[DEBUG] Seeking to {position_ms}ms (frame {frame_number})")
+        self.stop_loop()
 
+        self._drop_pending_seeks()
+        self._decoder_stale = False
         self.current_frame = frame_number
-        self.capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        self._seek_capture(frame_number)
         self._display_current_frame()
 
         # Emit position change
-        actual_position = int((self.current_frame / self.fps) * 1000)
+        actual_position = self._frame_to_ms(self.current_frame)
         self.positionChanged.emit(actual_position)
 
+        # Restart the clock (and audio) at the new position
+        if self.state == self.STATE_PLAYING:
+            self._restart_clock()
+
+    def request_seek(self, position_ms):
+        """
+        Seek without blocking the GUI, for scrubbing.
+
+        The nearest recently decoded frame is shown at once; the exact frame
+        is decoded in the background and replaces it when ready. Requests
+        that arrive while the worker is busy replace each other, so only the
+        newest target is ever decoded. While playing this falls back to seek().
+
+        Args:
+            position_ms (int): Position in milliseconds
+        """
+        if self.capture is None or not self.capture.isOpened():
+            return
+        if self.state == self.STATE_PLAYING:
+            self.seek(position_ms)
+            return
+
+        frame_number = self._ms_to_frame(position_ms)
+        frame_number = max(0, min(frame_number, self.total_frames - 1))
+
+        self.stop_loop()
+        self.current_frame = frame_number
+        self._decoder_stale = True
+
+        # Approximate picture from the scrub cache (within one second)
+        cached = self.scrub_cache.nearest(frame_number, max(1, int(self.fps)))
+        if cached is not None:
+            self._display_frame(cached[1])
+
+        self._latest_seek_id = self.seek_scheduler.request(frame_number)
+        self.positionChanged.emit(self._frame_to_ms(frame_number))
+
     def set_volume(self, volume):
         """
-        Set playback volume (not applicable for OpenCV, kept for API compatibility).
+        Set playback volume.
 
         Args:
             volume (int): Volume level 0-100
         """
         self.volume = volume
+        self.audio.set_volume(volume)
 
     def set_mute(self, muted):
         """
-        Set mute state (not applicable for OpenCV, kept for API compatibility).
+        Set mute state. The audio clock keeps running while muted.
 
         Args:
             muted (bool): True to mute, False to unmute
         """
         self.is_muted = muted
+        self.audio.set_muted(muted)
         print(f"[DEBUG] Mute: {muted}")
 
     def set_playback_speed(self, speed):
         """
         Set playback speed.
 
+        Speeds beyond AudioPlayer.MAX_SPEED and negative (reverse) speeds
+        play without sound.
+
         Args:
-            speed (float): Playback speed (0.25, 0.5, 1.0, 1.5, 2.0, etc.)
+            speed (float): Playback speed (0.25, 0.5, 1.0, 2.0, ... 32.0, or negative for reverse)
         """
+        if speed == 0:
+            return
+        if speed < 0:
+            # RAM loops only play forward
+            self.stop_loop()
         self.playback_speed = speed
         print(f"[DEBUG] Playback speed set to {speed}x")
 
-        # If currently playing, restart timer with new interval
+        # If currently playing, restart timer and clock for the new rate
         if self.state == self.STATE_PLAYING:
-            interval = int((1000 / self.fps) / self.playback_speed)
-            self.timer.setInterval(interval)
+            self.timer.setInterval(self._tick_interval())
+            self._restart_clock()
 
     def get_playback_speed(self):
         """Get current playback speed."""
@@ -214,11 +414,115 @@ class OpenCVVideoPlayer(QLabel):
         """Get current playback state."""
         return self.state
 
+    def get_playback_stats(self):
+        """
+        Get frame pipeline statistics.
+
+        Returns:
+            dict: See PlaybackStats.snapshot (stage times in ms with percentiles,
+            effective fps, presented/dropped frame counts, audio buffer fill)
+        """
+        return self.stats.snapshot()
+
+    def reset_playback_stats(self):
+        """Clear collected statistics."""
+        self.stats.reset()
+
+    def set_stats_overlay(self, visible):
+        """
+        Show or hide the performance overlay.
+
+        Args:
+            visible (bool): True to draw statistics over the video
+        """
+        self._show_stats = bool(visible)
+        self.update()
+
+    def is_stats_overlay_visible(self):
+        return self._show_stats
+
+    def set_preview_scale(self, scale=None):
+        """
+        Lock the preview resolution or let it adapt to load.
+
+        Args:
+            scale (float): One of PREVIEW_SCALES to lock, or None for automatic
+        """
+        if scale is None:
+            self._scale_locked = False
+            self._reset_adapt_window()
+            return
+        self._scale_locked = True
+        index = min(range(len(self.PREVIEW_SCALES)), key=lambda i: abs(self.PREVIEW_SCALES[i] - scale))
+        self._apply_preview_scale(index)
+
+    def get_preview_scale(self):
+        """Current preview resolution as a fraction of full size."""
+        return self.PREVIEW_SCALES[self._scale_index]
+
+    def is_preview_scale_locked(self):
+        return self._scale_locked
+
+    def start_loop(self, in_ms, out_ms, max_bytes):
+        """
+        Loop an in/out region from RAM.
+
+        The region is decoded once in the background at preview resolution;
+        looping starts when it is cached (loopChanged(True)).
+
+        Args:
+            in_ms (int): Region start in milliseconds
+            out_ms (int): Region end in milliseconds
+            max_bytes (int): Memory cap for the decoded frames
+
+        Returns:
+            bool: True if caching started
+        """
+        if self._handle is None or out_ms <= in_ms:
+            return False
+        # Replace any current loop quietly: loopChanged follows when the new one is cached
+        was_looping = self._leave_loop()
+        start_frame = max(0, self._ms_to_frame(in_ms))
+        end_frame = min(self.total_frames - 1, self._ms_to_frame(out_ms))
+        if end_frame <= start_frame:
+            if was_looping:
+                self.loopChanged.emit(False)
+            return False
+        scale = self.get_preview_scale()
+        box = (int(max(640, self.width()) * scale), int(max(360, self.height()) * scale))
+        self._loop_builder.start(self.video_path, start_frame, end_frame, box, max_bytes)
+        return True
+
+    def stop_loop(self):
+        """Leave RAM loop playback (and cancel caching) and free the frames."""
+        if self._leave_loop():
+            self.loopChanged.emit(False)
+
+    def _leave_loop(self):
+        """
+        Cancel caching and drop the loop frames without signalling.
+
+        Returns:
+            bool: True if a loop was playing or being cached
+        """
+        caching = self._loop_builder.is_running()
+        if caching:
+            self._loop_builder.cancel()
+        if self._loop is None:
+            return caching
+        self._loop = None
+        # The regular decoder has not followed the loop
+        self._decoder_stale = True
+        return True
+
+    def is_looping(self):
+        return self._loop is not None
+
     def get_position(self):
         """Get current playback position in milliseconds."""
         if self.capture is None:
             return 0
-        return int((self.current_frame / self.fps) * 1000)
+        return self._frame_to_ms(self.current_frame)
 
     def get_duration(self):
         """Get total duration in milliseconds."""
@@ -229,11 +533,39 @@ class OpenCVVideoPlayer(QLabel):
         if self.capture is None or not self.capture.isOpened():
             self.timer.stop()
             return
+        if self._loop is not None:
+            self._update_frame_loop()
+            return
+        if self._clock_loop is not None:
+            # The loop ended but the clock (and audio) still repeat its region
+            self._restart_clock()
+        if self.playback_speed < 0:
+            self._update_frame_reverse()
+            return
+        self._sync_decoder()
 
-        # Read next frame
-        ret, frame = self.capture.read()
+        if self.audio.is_active() and self.audio.is_exhausted():
+            # Audio ended before the picture; continue on the wall clock
+            self.audio.stop()
+            self._restart_clock()
+
+        # Follow the clock: hold the frame if ahead, drop frames if behind
+        decode_start = time.perf_counter()
+        if not self._sync_to_clock():
+            return
+
+        # Read next frame (into the reused buffer when the backend supports it)
+        ret, frame = self.capture.read(self._frame_buffer)
+        if ret:
+            self._frame_buffer = frame
+        self.stats.record("decode", (time.perf_counter() - decode_start) * 1000.0)
 
         if not ret:
+            if getattr(self.capture, "frame_pending", False):
+                # The decoder process is late: count a drop and try again next tick
+                self.stats.frames_skipped(1)
+                self.stats.frames_missed(1)
+                return
             # End of video
             print("[DEBUG] End of video reached")
             self.stop()
@@ -243,19 +575,350 @@ class OpenCVVideoPlayer(QLabel):
 
         # Display frame
         self._display_frame(frame)
+        self._adapt_preview_scale((time.perf_counter() - decode_start) * 1000.0)
 
         # Emit position update
-        position_ms = int((self.current_frame / self.fps) * 1000)
+        position_ms = self._frame_to_ms(self.current_frame)
         self.positionChanged.emit(position_ms)
 
+    def _update_frame_loop(self):
+        """Present the RAM loop frame for the clock, wrapping at the out point."""
+        loop = self._loop
+        # The clock itself wraps at the out point (see _playback_clock_ms)
+        clock_frame = self._ms_to_frame(self._playback_clock_ms())
+        clock_frame = max(loop.start_frame, min(clock_frame, loop.end_frame))
+        if clock_frame == self.current_frame:
+            return
+        if clock_frame > self.current_frame:
+            self.stats.frames_skipped(clock_frame - self.current_frame - 1)
+        else:
+            # Wrapped to the in point: no seek, no decode
+            self.stats.frames_skipped(loop.end_frame - self.current_frame + clock_frame - loop.start_frame)
+        self.current_frame = clock_frame
+        self._display_frame(loop.frame(self.current_frame))
+        self.positionChanged.emit(self._frame_to_ms(self.current_frame))
+
+    def _update_frame_reverse(self):
+        """Show the frame for the (decreasing) clock position in reverse playback."""
+        target_frame = max(0, self._ms_to_frame(self._playback_clock_ms()))
+        target_frame = min(target_frame, self.total_frames - 1)
+        if target_frame >= self.current_frame:
+            return
+
+        decode_start = time.perf_counter()
+        frame_index, frame = self._reverse_frame(target_frame)
+        self.stats.record("decode", (time.perf_counter() - decode_start) * 1000.0)
+        if frame is None:
+            self.pause()
+            return
+        self.stats.frames_skipped(self.current_frame - frame_index - 1)
+
+        self.current_frame = frame_index
+        # The forward decoder no longer matches current_frame
+        self._decoder_stale = True
+        self._display_frame(frame)
+        self.positionChanged.emit(self._frame_to_ms(self.current_frame))
+
+        if self.current_frame == 0:
+            print("[DEBUG] Start of video reached (reverse)")
+            self.pause()
+
+    def _reverse_frame(self, target_frame):
+        """
+        Get a frame at or just before target_frame for reverse playback.
+
+        Codecs only decode forwards, so a block of frames ending at the target
+        is decoded in one forward pass (every stride-th frame retained) and
+        then served backwards until the clock leaves the block.
+
+        Returns:
+            tuple: (frame index, frame) or (target_frame, None) on decode failure
+        """
+        block = self._reverse_block
+        if block is not None and block[0] <= target_frame <= block[1]:
+            keys = block[2]
+            index = keys[bisect.bisect_right(keys, target_frame) - 1]
+            return index, block[3][index]
+
+        # Frames the clock advances per tick decide how sparse the block can be
+        stride = max(1, int(round(abs(self.playback_speed) * self.fps * self._tick_interval() / 1000.0)))
+        if stride > self.MAX_FRAME_DROP:
+            # Frames too far apart to decode through: seek for each one
+            first = target_frame
+        else:
+            first = max(0, target_frame - stride * (self.REVERSE_BLOCK_FRAMES - 1))
+
+        frames = {}
+        self._seek_capture(first)
+        for index in range(first, target_frame + 1):
+            if (target_frame - index) % stride == 0:
+                ret, frame = self.capture.read()
+                if ret:
+                    # Frames from the decoder process live in its ring until the next read
+                    frames[index] = frame.copy() if getattr(self.capture, "frames_borrowed", False) else frame
+            elif not self.capture.grab():
+                break
+        if not frames:
+            self._reverse_block = None
+            return target_frame, None
+
+        keys = sorted(frames)
+        self._reverse_block = (keys[0], target_frame, keys, frames)
+        index = keys[-1]
+        return index, frames[index]
+
+    def _frame_to_ms(self, frame_index):
+        if self.pts is None:
+            return int((frame_index / self.fps) * 1000)
+        return self.pts.frame_to_ms(frame_index)
+
+    def _ms_to_frame(self, position_ms):
+        if self.pts is None:
+            return int((position_ms / 1000.0) * self.fps)
+        return self.pts.ms_to_frame(position_ms)
+
+    def _seek_capture(self, frame_index):
+        """Position the playback decoder so that the next read() returns frame_index."""
+        if self.pts is not None:
+            frame_index = self.pts.capture_index(frame_index)
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+
+    def _tick_interval(self):
+        """Timer interval in ms for the current speed."""
+        interval = int(1000 / self.fps / abs(self.playback_speed))
+        return max(self.MIN_TICK_MS, interval)
+
+    def _frames_per_tick(self):
+        """Source frames the clock advances per timer tick at the current speed."""
+        return max(1, int(round(abs(self.playback_speed) * self._tick_interval() * self.fps / 1000.0)))
+
+    def _restart_clock(self):
+        """Restart the playback clock at the current frame (audio if possible, else wall clock)."""
+        self._clock_origin_ms = self.get_position()
+        self._clock.start()
+        # Audio becomes the master clock; it refuses speeds it cannot play.
+        # In a RAM loop it repeats the region's audio, wrapping with the picture
+        self._clock_loop = self._loop_range_ms()
+        self.audio.start(self._clock_origin_ms, self.playback_speed, self._clock_loop)
+
+    def _loop_range_ms(self):
+        """(start_ms, end_ms) of the RAM loop, or None."""
+        if self._loop is None:
+            return None
+        return self._frame_to_ms(self._loop.start_frame), self._frame_to_ms(self._loop.end_frame + 1)
+
+    def _playback_clock_ms(self):
+        """Source position the picture should be showing now."""
+        clock_ms = self.audio.get_clock_ms()
+        if clock_ms is not None:
+            return clock_ms
+        clock_ms = self._clock_origin_ms + int(self._clock.elapsed() * self.playback_speed)
+        loop = self._clock_loop
+        if loop is not None and clock_ms >= loop[1]:
+            clock_ms = loop[0] + (clock_ms - loop[0]) % (loop[1] - loop[0])
+        return clock_ms
+
+    def _sync_to_clock(self):
+        """
+        Align the decoder with the playback clock before the next read.
+
+        Returns:
+            bool: False if the video is ahead and this tick should be skipped
+        """
+        clock_ms = self._playback_clock_ms()
+        target_frame = min(self._ms_to_frame(clock_ms), self.total_frames - 1)
+
+        # The next read() returns current_frame + 1
+        if self.current_frame >= target_frame:
+            return False
+
+        behind = target_frame - self.current_frame - 1
+        self.stats.frames_skipped(behind)
+        # Above 1x the clock steps over frames every tick by design; only lag beyond that is a miss
+        self.stats.frames_missed(behind - (self._frames_per_tick() - 1))
+        if behind > self.MAX_FRAME_DROP:
+            self._seek_capture(target_frame)
+            self.current_frame = target_frame - 1
+        else:
+            # grab() decodes without the BGR conversion of retrieve()
+            for _ in range(behind):
+                if not self.capture.grab():
+                    break
+                self.current_frame += 1
+        return True
+
+    def get_decode_backend(self):
+        """Name of the backend decoding the current source ("opencv", "ffmpeg" or "process")."""
+        if self._pipe is None:
+            return BACKEND_OPENCV
+        return BACKEND_PROCESS if isinstance(self._pipe, ProcessCapture) else BACKEND_FFMPEG
+
+    def reload_decoder(self):
+        """Choose the decode backend again for the current source, keeping the position."""
+        if self._handle is None:
+            return
+        position = self.get_position()
+        self._release_pipe()
+        self._open_pipe_if_preferred()
+        self.capture = self._pipe if self._pipe is not None else self._handle.capture
+        self.seek(position)
+
+    def _open_pipe_if_preferred(self):
+        """Decode through an ffmpeg pipe or a decoder process if the source needs it."""
+        backend = choose_backend(self._handle)
+        if backend == BACKEND_OPENCV:
+            return
+        self._open_pipe(backend)
+
+    def _open_pipe(self, backend):
+        """Open an out-of-line decoder (BACKEND_FFMPEG or BACKEND_PROCESS) scaled to the widget."""
+        h = self._handle
+        scale = self.get_preview_scale()
+        box = (int(max(640, self.width()) * scale), int(max(360, self.height()) * scale))
+        capture_class = ProcessCapture if backend == BACKEND_PROCESS else FFmpegPipeCapture
+        pipe = capture_class(h.path, h.fps, h.frame_count, h.width, h.height, max_size=box)
+        if pipe.isOpened():
+            self._pipe = pipe
+            print(f"[DEBUG] Decoding through {backend} backend at {pipe.width}x{pipe.height}")
+        else:
+            pipe.release()
+
+    def _release_pipe(self):
+        # Drop our frame first: it may be a view into the pipe's buffers
+        self._frame_buffer = None
+        if self._pipe is not None:
+            self._pipe.release()
+            self._pipe = None
+
+    def _adapt_preview_scale(self, work_ms):
+        """
+        Account one presented frame and re-evaluate the preview resolution
+        at the end of each window.
+
+        Args:
+            work_ms (float): Time spent decoding (including skipped frames) and presenting it
+        """
+        self._adapt_frames += 1
+        self._adapt_work_ms += work_ms
+        if self._adapt_frames < self.ADAPT_WINDOW_FRAMES:
+            return
+
+        missed = max(0, self.stats.frames_late - self._adapt_late_start)
+        miss_ratio = missed / float(self._adapt_frames + missed)
+        load = (self._adapt_work_ms / self._adapt_frames) / self._tick_interval()
+        self._reset_adapt_window()
+        if self._scale_locked:
+            return
+
+        if miss_ratio > self.ADAPT_DOWN_MISS_RATIO:
+            self._adapt_clean_windows = 0
+            if self._scale_index < len(self.PREVIEW_SCALES) - 1:
+                print(f"[DEBUG] Preview falling behind ({miss_ratio:.0%} missed), lowering resolution")
+                self._apply_preview_scale(self._scale_index + 1)
+        elif missed == 0 and load < self.ADAPT_UP_LOAD:
+            self._adapt_clean_windows += 1
+            if self._adapt_clean_windows >= self.ADAPT_UP_WINDOWS and self._scale_index > 0:
+                self._adapt_clean_windows = 0
+                print(f"[DEBUG] Preview has headroom (load {load:.0%}), raising resolution")
+                self._apply_preview_scale(self._scale_index - 1)
+        else:
+            self._adapt_clean_windows = 0
+
+    def _reset_adapt_window(self):
+        self._adapt_frames = 0
+        self._adapt_work_ms = 0.0
+        self._adapt_late_start = self.stats.frames_late
+
+    def _apply_preview_scale(self, index):
+        if index == self._scale_index:
+            return
+        self._scale_index = index
+        if self._pipe is not None:
+            # Restart the pipe at the new output size, continuing after the shown frame
+            backend = self.get_decode_backend()
+            self._release_pipe()
+            self._open_pipe(backend)
+            if self._pipe is not None:
+                self._pipe.set(cv2.CAP_PROP_POS_FRAMES, self.pts.capture_index(self.current_frame + 1))
+            self.capture = self._pipe if self._pipe is not None else self._handle.capture
+            if self._pipe is None:
+                self._decoder_stale = True
+        self.previewScaleChanged.emit(self.get_preview_scale())
+
+    def _on_audio_availability(self, available):
+        # The probe finished after playback started: let the audio take over the clock
+        if available and self.state == self.STATE_PLAYING and not self.audio.is_active():
+            self._restart_clock()
+
+    def _on_loop_ready(self, store):
+        if store is None or self.video_path is None or \
+                os.path.abspath(store.source_path) != os.path.abspath(self.video_path):
+            self.loopChanged.emit(False)
+            return
+        self._loop = store
+        self._drop_pending_seeks()
+        self.current_frame = store.start_frame
+        self._display_frame(store.frame(store.start_frame))
+        self.positionChanged.emit(self._frame_to_ms(self.current_frame))
+        self.loopChanged.emit(True)
+        if self.playback_speed < 0:
+            self.playback_speed = 1.0
+        if self.state == self.STATE_PLAYING:
+            self._restart_clock()
+        else:
+            self.play()
+
+    def _on_seek_frame_ready(self, request_id, frame_index, frame):
+        """Show a frame decoded by the seek scheduler unless a newer one is already shown."""
+        if request_id <= self._shown_seek_id:
+            return
+        self._shown_seek_id = request_id
+        self.scrub_cache.put(frame_index, frame)
+        self._display_frame(frame)
+
+    def _drop_pending_seeks(self):
+        """Ignore background seek results that are still in flight."""
+        self._shown_seek_id = self._latest_seek_id
+
+    def _sync_decoder(self):
+        """Move the playback decoder to current_frame after asynchronous seeks."""
+        if not self._decoder_stale:
+            return
+        self._decoder_stale = False
+        # The next read() must return current_frame + 1 (current_frame is on screen)
+        self._seek_capture(self.current_frame + 1)
+
     def _display_current_frame(self):
         """Display the current frame."""
         if self.capture is None or not self.capture.isOpened():
             return
 
+        self._display_retry_id += 1
         ret, frame = self.capture.read()
         if ret:
             self._display_frame(frame)
+        elif getattr(self.capture, "frame_pending", False):
+            # Not decoded yet by the decoder process: show it when it is, and
+            # make playback re-position the decoder
+            self._decoder_stale = True
+            retry_id = self._display_retry_id
+            QTimer.singleShot(self.PENDING_RETRY_MS, lambda: self._retry_display(retry_id))
+
+    def _retry_display(self, retry_id):
+        if retry_id != self._display_retry_id or self.state == self.STATE_PLAYING or self.capture is None:
+            return
+        self._seek_capture(self.current_frame)
+        self._display_current_frame()
+
+    def present_frame(self, frame):
+        """
+        Display a frame decoded outside the player (e.g. by the program preview engine).
+
+        Args:
+            frame: OpenCV frame (numpy array in BGR format)
+        """
+        self._drop_pending_seeks()
+        self._display_frame(frame)
 
     def _display_frame(self, frame):
         """
@@ -264,6 +927,16 @@ class OpenCVVideoPlayer(QLabel):
         Args:
             frame: OpenCV frame (numpy array in BGR format)
         """
+        convert_start = time.perf_counter()
+
+        # Reduced preview resolution: shrink cv2's full-size frames before converting
+        scale = self.get_preview_scale()
+        if scale < 1.0:
+            target_w = int(self.width() * scale) if self.width() > 0 else frame.shape[1]
+            if frame.shape[1] > target_w > 0:
+                factor = target_w / float(frame.shape[1])
+                frame = cv2.resize(frame, None, fx=factor, fy=factor, interpolation=cv2.INTER_LINEAR)
+
         # Convert BGR to RGB
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
@@ -276,20 +949,55 @@ class OpenCVVideoPlayer(QLabel):
 
         # Convert to QPixmap and display
         pixmap = QPixmap.fromImage(q_image)
+        scale_start = time.perf_counter()
 
         # Scale to fit widget while maintaining aspect ratio
         scaled_pixmap = pixmap.scaled(
             self.size(),
             Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
+            Qt.SmoothTransformation if scale >= 1.0 else Qt.FastTransformation
         )
+        scale_end = time.perf_counter()
+
+        self.stats.record("convert", (scale_start - convert_start) * 1000.0)
+        self.stats.record("scale", (scale_end - scale_start) * 1000.0)
+        self.stats.buffer_fill = self.audio.get_buffer_fill()
+        self.stats.frame_presented()
 
         self.setPixmap(scaled_pixmap)
 
+    def paintEvent(self, event):
+        """Paint the frame (timed) and the statistics overlay if enabled."""
+        paint_start = time.perf_counter()
+        super().paintEvent(event)
+        self.stats.record("paint", (time.perf_counter() - paint_start) * 1000.0)
+
+        if not self._show_stats:
+            return
+        painter = QPainter(self)
+        font = QFont("Monospace", 9)
+        font.setStyleHint(QFont.TypeWriter)
+        painter.setFont(font)
+        lines = self.stats.summary_lines()
+        line_h = painter.fontMetrics().height()
+        box_w = max(painter.fontMetrics().width(line) for line in lines) + 12
+        painter.fillRect(6, 6, box_w, line_h * len(lines) + 8, QColor(0, 0, 0, 170))
+        painter.setPen(QColor(120, 255, 120))
+        for i, line in enumerate(lines):
+            painter.drawText(12, 10 + line_h * (i + 1) - painter.fontMetrics().descent(), line)
+        painter.end()
+
     def cleanup(self):
         """Release resources."""
         print("[DEBUG] Cleaning up OpenCV player")
         self.timer.stop()
-        if self.capture is not None:
-            self.capture.release()
+        self.audio.close()
+        self._loop_builder.cancel()
+        self._loop = None
+        self.seek_scheduler.shutdown()
+        self.scrub_cache.clear()
+        self._release_pipe()
+        if self._handle is not None:
+            decoder_pool.release(self._handle)
+            self._handle = None
             self.capture = None
@@ -0,0 +1,137 @@
+"""
+Playback Stats - Per-frame timing of the presentation pipeline
+
+Times are collected per stage (decode, convert, scale, paint) over a
+rolling window so that percentiles reflect recent playback rather than
+the whole session. The same snapshot feeds the on-screen overlay and
+programmatic checks (benchmarks, headless tests).
+"""
+
+import time
+from collections import deque
+from typing import Dict, List
+
+
+class RollingStat:
+    """Rolling window of samples with percentile queries."""
+
+    def __init__(self, window: int = 240):
+        self._samples = deque(maxlen=window)
+
+    def add(self, value: float):
+        self._samples.append(value)
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile (p in 0..100); 0.0 with no samples."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        rank = int(round(p / 100.0 * (len(ordered) - 1)))
+        return ordered[max(0, min(rank, len(ordered) - 1))]
+
+    def mean(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(self._samples) / len(self._samples)
+
+    def last(self) -> float:
+        return self._samples[-1] if self._samples else 0.0
+
+    def count(self) -> int:
+        return len(self._samples)
+
+    def clear(self):
+        self._samples.clear()
+
+
+class PlaybackStats:
+    """
+    Timing statistics of the player's frame pipeline.
+
+    Stages are timed in milliseconds; presented/dropped frames are counted
+    since the last reset and the effective fps is measured over the window.
+    Dropped frames include planned skips (fast shuttle, loop wraps); late
+    frames only count those that missed their deadline.
+    """
+
+    STAGES = ("decode", "convert", "scale", "paint")
+
+    def __init__(self, window: int = 240):
+        self.window = window
+        self._stages: Dict[str, RollingStat] = {name: RollingStat(window) for name in self.STAGES}
+        self._present_times = deque(maxlen=window)
+        self.frames_presented = 0
+        self.frames_dropped = 0
+        self.frames_late = 0
+        self.buffer_fill = 0.0
+
+    def record(self, stage: str, duration_ms: float):
+        """Add one timing sample for a stage."""
+        self._stages[stage].add(duration_ms)
+
+    def frame_presented(self):
+        self.frames_presented += 1
+        self._present_times.append(time.perf_counter())
+
+    def frames_skipped(self, count: int):
+        """Count frames that were decoded past or seeked over without being shown."""
+        if count > 0:
+            self.frames_dropped += count
+
+    def frames_missed(self, count: int):
+        """Count frames that could not be shown in time (the pipeline fell behind the clock)."""
+        if count > 0:
+            self.frames_late += count
+
+    def effective_fps(self) -> float:
+        """Presented frames per second over the window."""
+        if len(self._present_times) < 2:
+            return 0.0
+        span = self._present_times[-1] - self._present_times[0]
+        if span <= 0:
+            return 0.0
+        return (len(self._present_times) - 1) / span
+
+    def reset(self):
+        for stat in self._stages.values():
+            stat.clear()
+        self._present_times.clear()
+        self.frames_presented = 0
+        self.frames_dropped = 0
+        self.frames_late = 0
+        self.buffer_fill = 0.0
+
+    def snapshot(self) -> dict:
+        """
+        Current statistics as plain data.
+
+        Returns:
+            dict with "<stage>_ms" entries (each {"last", "mean", "p50", "p95", "p99"}),
+            plus "fps", "presented", "dropped", "late" and "buffer_fill"
+        """
+        data = {}
+        for name, stat in self._stages.items():
+            data[f"{name}_ms"] = {
+                "last": stat.last(),
+                "mean": stat.mean(),
+                "p50": stat.percentile(50),
+                "p95": stat.percentile(95),
+                "p99": stat.percentile(99),
+            }
+        data["fps"] = self.effective_fps()
+        data["presented"] = self.frames_presented
+        data["dropped"] = self.frames_dropped
+        data["late"] = self.frames_late
+        data["buffer_fill"] = self.buffer_fill
+        return data
+
+    def summary_lines(self) -> List[str]:
+        """Short text lines for the on-screen overlay."""
+        snap = self.snapshot()
+        lines = []
+        for name in self.STAGES:
+            s = snap[f"{name}_ms"]
+            lines.append(f"{name:<8}{s['last']:6.1f} ms  p50 {s['p50']:5.1f}  p95 {s['p95']:5.1f}  p99 {s['p99']:5.1f}")
+        lines.append(f"fps {snap['fps']:5.1f}   dropped {snap['dropped']}/{snap['presented'] + snap['dropped']}"
+                     f"   late {snap['late']}   buffer {snap['buffer_fill'] * 100:3.0f}%")
+        return lines
@@ -0,0 +1,377 @@
+"""
+Process Decoder - Preview decoding in a separate worker process
+
+Decoding inside the GUI process has two costs: a corrupt file can crash
+OpenCV/FFmpeg and take the whole editor down with it, and heavy decodes
+compete with the GUI thread for the GIL. ProcessCapture moves the decoder
+into a worker process. Frames are written into a ring of slots in shared
+memory and only small (slot, index) messages cross the process boundary;
+the GUI reads each frame straight out of the ring without copying it.
+
+The GUI never waits long on the worker: read() gives up after a short
+FRAME_WAIT and reports the frame as pending (frame_pending), and the
+caller counts it as dropped and tries again on its next tick. If the
+worker dies, or delivers nothing for READ_TIMEOUT, it is restarted on a
+background thread at the frame the player expects next. A frame that
+keeps crashing the decoder is skipped, and after repeated crashes
+without progress the capture reports itself closed.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from video.decode_backends import FFmpegPipeCapture
+
+
+def _decode_worker(path: str, shm_name: str, shape: Tuple[int, int, int], slots: int,
+                   commands, results):
+    """
+    Worker process entry point.
+
+    Commands: ("seek", frame_index, generation), ("free", slot), ("stop",)
+    Results: ("frame", generation, slot, frame_index), ("eof", generation), ("error", message)
+    """
+    # The GUI process owns (and unlinks) the block; spawned workers share its resource tracker
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((slots,) + tuple(shape), dtype=np.uint8, buffer=shm.buf)
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        results.put(("error", f"cannot open {path}"))
+        del ring
+        shm.close()
+        return
+
+    height, width = shape[:2]
+    resize = (width, height) != (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    free = list(range(slots))
+    generation = None  # Idle until the first seek
+    index = 0
+    decoder_pos = -1
+    eof = True
+
+    while True:
+        idle = eof or not free
+        try:
+            msg = commands.get() if idle else commands.get_nowait()
+        except queue.Empty:
+            msg = None
+        if msg is not None:
+            if msg[0] == "stop":
+                break
+            if msg[0] == "free":
+                free.append(msg[1])
+            elif msg[0] == "seek":
+                index, generation = msg[1], msg[2]
+                eof = False
+            continue
+
+        slot = free.pop()
+        if index != decoder_pos:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ok, frame = cap.read()
+        if not ok:
+            free.append(slot)
+            decoder_pos = -1
+            eof = True
+            results.put(("eof", generation))
+            continue
+        decoder_pos = index + 1
+        if resize:
+            cv2.resize(frame, (width, height), dst=ring[slot], interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(ring[slot], frame)
+        results.put(("frame", generation, slot, index))
+        index += 1
+
+    cap.release()
+    del ring
+    shm.close()
+
+
+class ProcessCapture:
+    """
+    VideoCapture-like reader backed by a decoder process.
+
+    read() returns a view into the shared ring rather than a copy; it stays
+    valid until the next read(), grab(), set() or release(). Callers that
+    keep frames longer (e.g. reverse playback blocks) must copy them, which
+    frames_borrowed advertises.
+    """
+
+    frames_borrowed = True
+
+    # Slots in the shared ring (one held by the caller, the rest decoded ahead)
+    RING_SLOTS = 4
+    # Longest one read() waits for the worker (seconds); then the frame is pending
+    FRAME_WAIT = 0.04
+    # Seconds without any frame while one is pending before the worker counts as hung
+    READ_TIMEOUT = 10.0
+    # Crashes at one frame before it is skipped
+    CRASHES_BEFORE_SKIP = 2
+    # Consecutive crashes without a decoded frame before giving up
+    MAX_RESTARTS = 5
+
+    def __init__(self, path: str, fps: float, frame_count: int, width: int, height: int,
+                 max_size: Optional[Tuple[int, int]] = None):
+        """
+        Args:
+            path: Source file path
+            fps, frame_count, width, height: Source properties (e.g. from a pooled handle)
+            max_size: (width, height) box the output is scaled to fit, None for source size
+        """
+        self.path = path
+        self.fps = fps if fps > 0 else 30.0
+        self.frame_count = frame_count
+        self.width, self.height = FFmpegPipeCapture._fit(width, height, max_size)
+        self._shape = (self.height, self.width, 3)
+
+        self._pos = 0  # Index of the frame the next read() returns
+        self._eof = False
+        self._generation = 0
+        self._held: Optional[int] = None  # Slot the caller's last frame lives in
+        self._crashes = 0  # Crashes at _crash_pos
+        self._crash_pos = -1
+        self._failed_restarts = 0  # Restarts since the last decoded frame
+        self.restarts = 0  # Worker restarts so far (for diagnostics)
+        # True when the last read()/grab() failed only because the frame is not decoded yet
+        self.frame_pending = False
+        self._pending_since: Optional[float] = None
+        # Guards the worker/queue swap done by background restarts
+        self._lock = threading.Lock()
+        self._restart_thread: Optional[threading.Thread] = None
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._process = None
+        self._commands = None
+        self._results = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._ring: Optional[np.ndarray] = None
+        self._opened = False
+        if width <= 0 or height <= 0:
+            return
+        try:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.RING_SLOTS * self.height * self.width * 3)
+        except Exception as e:
+            print(f"[ProcessDecoder] Failed to allocate shared memory: {e}")
+            return
+        self._ring = np.ndarray((self.RING_SLOTS,) + self._shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._opened = self._start_worker()
+
+    # VideoCapture interface
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._pos)
+        return 0.0
+
+    def set(self, prop_id, value) -> bool:
+        if prop_id != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        if not self._opened:
+            return False
+        target = max(0, int(value))
+        with self._lock:
+            if target != self._pos or self._eof:
+                self._pos = target
+                self._eof = False
+                self._pending_since = None
+                if not self._restarting():
+                    # A restarting worker starts at _pos anyway
+                    self._release_held()
+                    self._request_seek()
+        return True
+
+    def grab(self) -> bool:
+        slot = self._next_slot()
+        if slot is None:
+            return False
+        self._release_held()
+        return True
+
+    def read(self, image: Optional[np.ndarray] = None):
+        """
+        Read the next frame.
+
+        Args:
+            image: Ignored; the frame is returned as a view into the shared ring
+
+        Returns:
+            (ok, BGR frame)
+        """
+        slot = self._next_slot()
+        if slot is None:
+            return False, None
+        return True, self._ring[slot]
+
+    def release(self):
+        if self._restart_thread is not None:
+            self._restart_thread.join(timeout=3.0)
+        self._stop_worker()
+        self._opened = False
+        self._ring = None
+        if self._shm is not None:
+            # Unlink first: close() fails while the caller still holds a frame view
+            try:
+                self._shm.unlink()
+                self._shm.close()
+            except Exception:
+                pass
+            self._shm = None
+
+    # Internal helpers
+    def _start_worker(self) -> bool:
+        self._commands = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_decode_worker,
+            args=(self.path, self._shm.name, self._shape, self.RING_SLOTS, self._commands, self._results),
+            daemon=True
+        )
+        try:
+            self._process.start()
+        except Exception as e:
+            print(f"[ProcessDecoder] Failed to start worker: {e}")
+            self._process = None
+            return False
+        self._held = None
+        self._request_seek()
+        return True
+
+    def _stop_worker(self):
+        if self._process is None:
+            return
+        try:
+            self._commands.put(("stop",))
+        except Exception:
+            pass
+        self._process.join(timeout=1.0)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join(timeout=1.0)
+        for q in (self._commands, self._results):
+            q.close()
+            q.cancel_join_thread()
+        self._process = None
+        self._commands = None
+        self._results = None
+
+    def _restarting(self) -> bool:
+        return self._restart_thread is not None and self._restart_thread.is_alive()
+
+    def _restart_in_background(self):
+        """Replace the worker on another thread; reads report pending meanwhile."""
+        if self._restarting():
+            return
+        self._held = None  # The new worker starts with every slot free
+        self._restart_thread = threading.Thread(target=self._restart_worker, name="ProcessDecoderRestart", daemon=True)
+        self._restart_thread.start()
+
+    def _restart_worker(self) -> bool:
+        """Replace a dead or hung worker and resume at the frame the caller expects next."""
+        if self._process is not None and self._process.is_alive():
+            # Hung rather than crashed
+            self._process.kill()
+            self._process.join(timeout=1.0)
+        exit_code = self._process.exitcode if self._process is not None else None
+        self._crashes = self._crashes + 1 if self._crash_pos == self._pos else 1
+        self._crash_pos = self._pos
+        self._failed_restarts += 1
+        self.restarts += 1
+        self._stop_worker()
+        if self._failed_restarts > self.MAX_RESTARTS:
+            print(f"[ProcessDecoder] Decoder keeps crashing on {self.path}, giving up")
+            self._opened = False
+            return False
+        if self._crashes >= self.CRASHES_BEFORE_SKIP:
+            print(f"[ProcessDecoder] Skipping frame {self._pos} (crashes the decoder)")
+            self._pos += 1
+            self._crashes = 0
+        print(f"[ProcessDecoder] Worker exited ({exit_code}), restarting at frame {self._pos}")
+        with self._lock:
+            self._pending_since = None
+            return self._start_worker()
+
+    def _request_seek(self):
+        self._generation += 1
+        self._commands.put(("seek", self._pos, self._generation))
+
+    def _release_held(self):
+        if self._held is not None:
+            self._commands.put(("free", self._held))
+            self._held = None
+
+    def _next_slot(self) -> Optional[int]:
+        """
+        Take the next frame of the current generation if it arrives within FRAME_WAIT.
+
+        Returns:
+            The held slot, or None at the end, on failure, or with frame_pending
+            set if the frame is not decoded yet
+        """
+        self.frame_pending = False
+        if not self._opened or self._eof:
+            return None
+        with self._lock:
+            if self._restarting():
+                return self._pending()
+            self._release_held()
+            results, process = self._results, self._process
+            generation = self._generation
+        deadline = time.monotonic() + self.FRAME_WAIT
+        while True:
+            try:
+                msg = results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                if not process.is_alive():
+                    self._restart_in_background()
+                elif self._pending_since is not None and time.monotonic() - self._pending_since > self.READ_TIMEOUT:
+                    print(f"[ProcessDecoder] No frame for {self.READ_TIMEOUT:.0f}s, restarting worker")
+                    self._restart_in_background()
+                return self._pending()
+            except Exception:
+                # The queue can break when the worker dies mid-message
+                self._restart_in_background()
+                return self._pending()
+
+            kind = msg[0]
+            if kind == "error":
+                print(f"[ProcessDecoder] {msg[1]}")
+                self._opened = False
+                return None
+            if msg[1] != generation:
+                if kind == "frame":
+                    self._commands.put(("free", msg[2]))
+                continue
+            self._pending_since = None
+            if kind == "eof":
+                self._eof = True
+                return None
+            self._held = msg[2]
+            self._pos = msg[3] + 1
+            self._crashes = 0
+            self._failed_restarts = 0
+            return self._held
+
+    def _pending(self) -> None:
+        self.frame_pending = self._opened
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+        return None
@@ -0,0 +1,456 @@
+"""
+Program Player - Gapless playback of the timeline's clips
+
+Plays the timeline as one program: while a clip is playing, the next clip
+is opened and its first frames are decoded on a background thread, so the
+cut is a buffer swap instead of a file open. With transitions enabled the
+two decoded streams are crossfaded in real time, matching the xfade used
+by the exporter.
+
+Nothing is opened on the GUI thread: a cut whose clip is still opening
+keeps the last frame on screen and is retried on the next tick. Frames
+are paced by the audio clock when the clip has audio (a wall clock
+otherwise), dropping frames when video falls behind, so picture and
+sound stay together over long programs.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+import cv2
+from PyQt5.QtCore import QElapsedTimer, QObject, QTimer, Qt, pyqtSignal
+
+from video.audio_player import AudioPlayer
+from video.decoder_pool import decoder_pool
+from video.ffmpeg_processor import has_audio_stream
+from video.timeline import TimelineClip
+
+
+class _ClipStream:
+    """Decoding state of one timeline clip inside the program player."""
+
+    def __init__(self, clip: TimelineClip, continue_from: Optional["_ClipStream"] = None):
+        self.clip = clip
+        # A continued stream keeps reading the previous clip's decoder
+        self.continued = continue_from is not None
+        self.handle = continue_from.handle if continue_from is not None else None
+        self.owns_handle = not self.continued
+        self.fps = 30.0
+        self.source_duration_ms = 0
+        self.start_frame = 0
+        self.end_frame = 0
+        self.next_frame = 0  # Frame index returned by the next read()
+        self.buffer = deque()
+        self.has_audio = False
+        self.failed = False
+        self.ready = threading.Event()
+
+    def open(self, preload_frames: int, fps: Optional[float] = None):
+        """Open (or continue) the source and pre-decode the first frames."""
+        try:
+            if self.handle is None:
+                self.handle = decoder_pool.acquire(self.clip.source_path)
+            if self.handle is None:
+                self.failed = True
+                return
+
+            self.fps = fps or self.handle.fps
+            total_frames = self.handle.frame_count
+            self.source_duration_ms = self.handle.duration_ms
+
+            pts = self.handle.pts
+            self.start_frame = pts.nearest_frame(self.clip.start_time_ms)
+            self.end_frame = max(self.start_frame + 1, pts.nearest_frame(self.clip.end_time_ms))
+            if total_frames > 0:
+                self.end_frame = min(self.end_frame, total_frames)
+            self.next_frame = self.start_frame
+
+            # A continued capture is already positioned at start_frame
+            if not self.continued:
+                self.handle.capture.set(cv2.CAP_PROP_POS_FRAMES, self.handle.pts.capture_index(self.start_frame))
+                for _ in range(min(preload_frames, self.end_frame - self.start_frame)):
+                    ok, frame = self.handle.capture.read()
+                    if not ok:
+                        break
+                    self.buffer.append(frame)
+                self.has_audio = AudioPlayer.is_available() and has_audio_stream(self.clip.source_path)
+        except Exception as e:
+            print(f"[Program] Failed to open clip {self.clip.id}: {e}")
+            self.failed = True
+        finally:
+            self.ready.set()
+
+    def remaining(self) -> int:
+        """Frames left to read in this clip."""
+        return max(0, self.end_frame - self.next_frame)
+
+    def read(self):
+        """Return the next frame of the clip, or None at its Out point."""
+        if self.next_frame >= self.end_frame:
+            return None
+        if self.buffer:
+            frame = self.buffer.popleft()
+        else:
+            ok, frame = self.handle.capture.read()
+            if not ok:
+                self.next_frame = self.end_frame
+                return None
+        self.next_frame += 1
+        return frame
+
+    def skip(self):
+        """Drop the next frame without returning it."""
+        if self.next_frame >= self.end_frame:
+            return
+        if self.buffer:
+            self.buffer.popleft()
+        elif not self.handle.capture.grab():
+            self.next_frame = self.end_frame
+            return
+        self.next_frame += 1
+
+    def frame_ms(self, frame_index: int) -> int:
+        """Source time of a frame."""
+        return self.handle.pts.frame_to_ms(frame_index)
+
+    def source_position_ms(self) -> int:
+        """Source time of the last frame returned by read()."""
+        return self.frame_ms(max(self.start_frame, self.next_frame - 1))
+
+    def release(self):
+        if self.handle is not None and self.owns_handle:
+            decoder_pool.release(self.handle)
+        self.handle = None
+        self.buffer.clear()
+
+
+class ProgramPlayer(QObject):
+    """
+    Plays a list of timeline clips back to back without gaps.
+
+    Frames are presented on an OpenCVVideoPlayer, which is only used as a
+    display surface while the program runs.
+
+    Signals:
+        clipChanged(int): Current clip changed (clip_id)
+        positionChanged(int): Source position of the current clip (ms)
+        programPositionChanged(int): Position on the timeline (ms)
+        durationChanged(int): Duration of the current clip's source file (ms)
+        stateChanged(int): Playback state (OpenCVVideoPlayer.STATE_*)
+        finished(): The last clip ended
+    """
+
+    clipChanged = pyqtSignal(int)
+    positionChanged = pyqtSignal(int)
+    programPositionChanged = pyqtSignal(int)
+    durationChanged = pyqtSignal(int)
+    stateChanged = pyqtSignal(int)
+    finished = pyqtSignal()
+
+    STATE_STOPPED = 0
+    STATE_PLAYING = 1
+    STATE_PAUSED = 2
+
+    # Frames decoded ahead for the upcoming clip (covers typical transitions)
+    PRELOAD_FRAMES = 12
+    # Longest a cut may hold the last frame for a preload that has not finished yet
+    PRELOAD_WAIT_SEC = 5.0
+    # When video lags the clock, at most this many frames are dropped per tick
+    MAX_FRAME_DROP = 12
+
+    def __init__(self, player, parent=None):
+        super().__init__(parent)
+        self.player = player
+        self.clips: List[TimelineClip] = []
+        self.index = 0
+        self.state = self.STATE_STOPPED
+        self.transitions_enabled = False
+        self.transition_ms = 500
+
+        self._current: Optional[_ClipStream] = None
+        self._upcoming: Optional[_ClipStream] = None
+        self._wait_started: Optional[float] = None  # When the pending cut started waiting
+
+        self.audio = AudioPlayer(self)
+        # Wall clock in source time of the current clip, used when it has no audio
+        self._clock = QElapsedTimer()
+        self._clock_origin_ms = 0
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+
+    # Public API
+    def start(self, clips: List[TimelineClip], start_index: int = 0,
+              transitions_enabled: bool = False, transition_ms: int = 500) -> bool:
+        """
+        Start program playback.
+
+        Args:
+            clips: Clips in program order
+            start_index: Index of the first clip to play
+            transitions_enabled: Crossfade between clips
+            transition_ms: Crossfade duration
+
+        Returns:
+            True if playback started (clips that turn out to be unreadable
+            are skipped, and finished is emitted if none is)
+        """
+        self.stop()
+        if not clips:
+            return False
+        self.clips = list(clips)
+        self.transitions_enabled = bool(transitions_enabled)
+        self.transition_ms = max(0, int(transition_ms))
+        self.audio.set_volume(self.player.volume)
+        self.audio.set_muted(self.player.is_muted)
+
+        print(f"[Program] Starting program of {len(self.clips)} clips at index {start_index}")
+        if not self._jump_to(max(0, min(start_index, len(self.clips) - 1))):
+            return False
+        self.resume()
+        return True
+
+    def stop(self):
+        """Stop playback and release decoders."""
+        self.timer.stop()
+        self.audio.stop()
+        for stream in (self._current, self._upcoming):
+            if stream is not None:
+                self._release_stream(stream)
+        self._current = None
+        self._upcoming = None
+        self.clips = []
+        if self.state != self.STATE_STOPPED:
+            self.state = self.STATE_STOPPED
+            self.stateChanged.emit(self.state)
+
+    def pause(self):
+        if self.state != self.STATE_PLAYING:
+            return
+        self.timer.stop()
+        self.audio.stop()
+        self.state = self.STATE_PAUSED
+        self.stateChanged.emit(self.state)
+
+    def resume(self):
+        if self._current is None and self._upcoming is None:
+            return
+        self.state = self.STATE_PLAYING
+        self._start_timer()
+        self._start_audio()
+        self.stateChanged.emit(self.state)
+
+    def toggle_pause(self):
+        if self.state == self.STATE_PLAYING:
+            self.pause()
+        else:
+            self.resume()
+
+    def skip(self, step: int):
+        """Jump to the clip `step` positions away (cuts immediately)."""
+        if not self.clips:
+            return
+        target = self.index + step
+        if target >= len(self.clips):
+            self._finish()
+            return
+        self.timer.stop()
+        self.audio.stop()
+        self._jump_to(max(0, target))
+        # While paused the timer runs until the new clip's first frame is shown
+        self._start_timer()
+
+    def is_running(self) -> bool:
+        return self.state != self.STATE_STOPPED
+
+    def get_current_clip_id(self) -> Optional[int]:
+        return self._current.clip.id if self._current is not None else None
+
+    # Internal helpers
+    def _jump_to(self, index: int) -> bool:
+        """Start opening clip `index` in the background; the next tick cuts to it."""
+        for stream in (self._current, self._upcoming):
+            if stream is not None:
+                self._release_stream(stream)
+        self._current = None
+        self._wait_started = None
+        self.index = index - 1
+        self._upcoming = self._open_async(index)
+        return True
+
+    def _open_async(self, index: int) -> _ClipStream:
+        stream = _ClipStream(self.clips[index])
+        threading.Thread(target=stream.open, args=(self.PRELOAD_FRAMES,), daemon=True).start()
+        return stream
+
+    def _make_current(self, stream: _ClipStream):
+        self._current = stream
+        clip = stream.clip
+        self.clipChanged.emit(clip.id)
+        self.durationChanged.emit(stream.source_duration_ms)
+        self._preload_next()
+
+    def _preload_next(self):
+        """Open the clip after the current one on a background thread."""
+        next_index = self.index + 1
+        if next_index >= len(self.clips):
+            self._upcoming = None
+            return
+        cur = self._current
+        nxt_clip = self.clips[next_index]
+        contiguous = (
+            nxt_clip.source_path == cur.clip.source_path
+            and cur.handle.pts.nearest_frame(nxt_clip.start_time_ms) == cur.end_frame
+        )
+        if contiguous:
+            # Same file, next frame: keep reading the current decoder
+            stream = _ClipStream(nxt_clip, continue_from=cur)
+            stream.open(0, fps=cur.fps)
+            stream.has_audio = cur.has_audio
+            self._upcoming = stream
+        else:
+            self._upcoming = self._open_async(next_index)
+
+    def _advance(self) -> Optional[bool]:
+        """
+        Cut to the preloaded clip.
+
+        Returns:
+            True after the cut, False when the program ended, None while the
+            next clip is still opening (the last frame stays on screen)
+        """
+        while True:
+            next_index = self.index + 1
+            if next_index >= len(self.clips):
+                self._finish()
+                return False
+            if self._upcoming is None:
+                self._upcoming = self._open_async(next_index)
+            nxt = self._upcoming
+            if not nxt.ready.is_set():
+                if self._wait_started is None:
+                    self._wait_started = time.monotonic()
+                    # The outgoing clip's audio would run on past its Out point
+                    self.audio.stop()
+                if time.monotonic() - self._wait_started < self.PRELOAD_WAIT_SEC:
+                    return None
+                print(f"[Program] Preload of clip {nxt.clip.id} timed out")
+                nxt.failed = True
+            self._wait_started = None
+            self._upcoming = None
+            self.index = next_index
+            if not nxt.failed:
+                break
+            print(f"[Program] Skipping unreadable clip {nxt.clip.id}")
+            self._release_stream(nxt)
+
+        old = self._current
+        audio_continues = nxt.continued and self.audio.is_active()
+        if old is not None:
+            if nxt.continued:
+                # Decoder ownership moves to the continued stream
+                old.owns_handle = False
+                nxt.owns_handle = True
+            self._release_stream(old)
+        self._make_current(nxt)
+        self._start_timer()
+        if not audio_continues:
+            # Also restarts the clock in the new clip's source time
+            self._start_audio()
+        return True
+
+    def _start_timer(self):
+        """Tick twice per frame so frames can be presented when the clock says so."""
+        fps = self._current.fps if self._current is not None else 30.0
+        self.timer.start(max(5, int(500 / fps)))
+
+    def _restart_clock(self, source_ms: int):
+        self._clock_origin_ms = source_ms
+        self._clock.start()
+
+    def _clock_ms(self) -> int:
+        """Source position of the current clip that should be on screen now."""
+        clock_ms = self.audio.get_clock_ms()
+        if clock_ms is not None:
+            return clock_ms
+        return self._clock_origin_ms + int(self._clock.elapsed())
+
+    def _frame_due(self, cur: _ClipStream) -> bool:
+        """Drop frames the clock has passed; True if the next frame should be shown now."""
+        clock_ms = self._clock_ms()
+        dropped = 0
+        while (cur.remaining() > 1 and dropped < self.MAX_FRAME_DROP
+               and cur.frame_ms(cur.next_frame + 1) <= clock_ms):
+            cur.skip()
+            dropped += 1
+        return cur.frame_ms(cur.next_frame) <= clock_ms
+
+    def _finish(self):
+        print("[Program] Program finished")
+        self.stop()
+        self.finished.emit()
+
+    def _release_stream(self, stream: _ClipStream):
+        if stream.ready.is_set():
+            stream.release()
+        else:
+            # Still opening in the background; release once it is done
+            def _later():
+                stream.ready.wait()
+                stream.release()
+            threading.Thread(target=_later, daemon=True).start()
+
+    def _start_audio(self):
+        cur = self._current
+        if cur is None or self.state != self.STATE_PLAYING:
+            return
+        self._restart_clock(cur.source_position_ms())
+        self.audio.open(cur.clip.source_path, has_audio=cur.has_audio)
+        self.audio.start(cur.source_position_ms())
+
+    def _tick(self):
+        cur = self._current
+        if cur is not None and cur.remaining() > 0 and not self._frame_due(cur):
+            return  # Ahead of the clock: keep the current frame on screen
+
+        frame = cur.read() if cur is not None else None
+        if frame is None:
+            if not self._advance():
+                return
+            frame = self._current.read()
+            if frame is None:
+                return
+            self._present(frame)
+            if self.state != self.STATE_PLAYING:
+                self.timer.stop()  # Cued while paused
+            return
+
+        nxt = self._upcoming
+        if (self.transitions_enabled and self.transition_ms > 0 and nxt is not None
+                and not nxt.continued and nxt.ready.is_set() and not nxt.failed):
+            fade_frames = max(1, int(self.transition_ms / 1000.0 * cur.fps))
+            remaining = cur.remaining()
+            if remaining < fade_frames:
+                incoming = nxt.read()
+                if incoming is not None:
+                    alpha = 1.0 - (remaining + 1) / float(fade_frames + 1)
+                    frame = self._crossfade(frame, incoming, alpha)
+
+        self._present(frame)
+
+    @staticmethod
+    def _crossfade(outgoing, incoming, alpha: float):
+        """Blend two BGR frames; the incoming frame is resized to match."""
+        if incoming.shape != outgoing.shape:
+            incoming = cv2.resize(incoming, (outgoing.shape[1], outgoing.shape[0]), interpolation=cv2.INTER_LINEAR)
+        return cv2.addWeighted(outgoing, 1.0 - alpha, incoming, alpha, 0.0)
+
+    def _present(self, frame):
+        cur = self._current
+        self.player.present_frame(frame)
+        source_ms = cur.source_position_ms()
+        self.positionChanged.emit(source_ms)
+        self.programPositionChanged.emit(cur.clip.position_ms + max(0, source_ms - cur.clip.start_time_ms))
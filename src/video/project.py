@@ -0,0 +1,207 @@
+"""
+Project Files - Save and load timelines, markers and editor state
+
+A project is a versioned JSON Lines file (.vproj): a header line, then one
+small record per line (state, source, track, clip, marker). Loading reads
+line by line and builds the timeline in a single bulk step, so projects
+with tens of thousands of clips open in a fraction of a second.
+
+Expensive per-clip data is not part of loading. Sources are stored once
+with the probe info known at save time; it is handed to the decoder pool
+only if the file is unchanged, and thumbnails are rendered when a clip is
+first shown. Saving writes a temporary file next to the target and renames
+it over the target, so an interrupted save never leaves a truncated project.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+from utils.cache_paths import source_key
+from video.decoder_pool import decoder_pool
+from video.marker import MarkerManager
+from video.timeline import Timeline, TimelineClip
+from video.timeline_snapshot import ClipState, TimelineSnapshot
+from video.tracks import Track
+
+PROJECT_FORMAT = "qt-cw-vedio-project"
+PROJECT_VERSION = 1
+PROJECT_EXTENSION = ".vproj"
+
+
+class ProjectFormatError(ValueError):
+    """The file is not a project this version can read."""
+
+
+def save_project(path: str, timeline: Timeline, markers: MarkerManager, state: Optional[dict] = None):
+    """
+    Write a project file atomically.
+
+    Args:
+        path: Target .vproj path
+        timeline: Timeline to save (main track and overlay/audio tracks)
+        markers: Markers to save
+        state: Editor state (in/out points, loaded video, export settings)
+    """
+    write_project_lines(path, project_lines(timeline, markers, state))
+    print(f"[Project] Saved {path} ({timeline.get_clip_count()} clips, {markers.get_marker_count()} markers)")
+
+
+def project_lines(timeline: Timeline, markers: MarkerManager, state: Optional[dict] = None) -> List[str]:
+    """
+    Serialize a project to its lines without writing anything.
+
+    Must run on the thread that owns the timeline; to serialize elsewhere,
+    take a snapshot there and pass it to snapshot_lines().
+    """
+    return snapshot_lines(timeline.snapshot(), markers.export_markers(), markers.next_marker_id, state)
+
+
+def snapshot_lines(snapshot: TimelineSnapshot, marker_records: List[dict], next_marker_id: int,
+                   state: Optional[dict] = None) -> List[str]:
+    """
+    Serialize a timeline snapshot and markers to project lines (any thread).
+
+    Args:
+        snapshot: Timeline.snapshot()
+        marker_records: MarkerManager.export_markers()
+        next_marker_id: MarkerManager.next_marker_id
+        state: Editor state
+    """
+    sources: Dict[str, int] = {}
+    next_ids = {"clip": snapshot.next_clip_id, "track": snapshot.next_track_id, "marker": next_marker_id}
+    lines = [_dump({"format": PROJECT_FORMAT, "version": PROJECT_VERSION,
+                    "clips": snapshot.clip_count, "markers": len(marker_records),
+                    "next_ids": next_ids})]
+    lines.append(_dump({"type": "state", **(state or {})}))
+
+    def source_id(clip_path: str) -> int:
+        sid = sources.get(clip_path)
+        if sid is None:
+            sid = sources[clip_path] = len(sources)
+            record = {"type": "source", "id": sid, "path": clip_path, "key": source_key(clip_path)}
+            info = decoder_pool.cached_info(clip_path)
+            if info:
+                record["info"] = info
+            lines.append(_dump(record))
+        return sid
+
+    def clip_record(clip: ClipState, position_ms: int, track_id: int) -> str:
+        return _dump({"type": "clip", "id": clip.id, "src": source_id(clip.source_path),
+                      "in": clip.start_time_ms, "dur": clip.duration_ms, "pos": position_ms,
+                      "label": clip.label, "track": track_id})
+
+    for clip, position in snapshot.items():
+        lines.append(clip_record(clip, position, 0))
+    for track in snapshot.tracks:
+        lines.append(_dump({"type": "track", "id": track.id, "kind": track.kind, "name": track.name,
+                            "muted": track.muted, "volume": track.volume,
+                            "x": track.x, "y": track.y, "scale": track.scale}))
+        for clip, position in track.items():
+            lines.append(clip_record(clip, position, track.id))
+    for marker in marker_records:
+        lines.append(_dump({"type": "marker", **marker}))
+    return lines
+
+
+def write_project_lines(path: str, lines: List[str]):
+    """Write serialized project lines to path atomically (temp file, fsync, rename)."""
+    tmp_path = path + ".part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+        f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_project(path: str, timeline: Timeline, markers: MarkerManager) -> dict:
+    """
+    Load a project file into a timeline and marker manager (replacing their contents).
+
+    Returns:
+        Saved editor state (empty dict if none)
+
+    Raises:
+        OSError: File cannot be read
+        ProjectFormatError: Not a project file, or saved by a newer version
+    """
+    state: dict = {}
+    paths: Dict[int, str] = {}
+    clips: List[TimelineClip] = []
+    tracks: Dict[int, Track] = {}
+    marker_data: List[dict] = []
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        header = _parse(f.readline(), 1)
+        if header.get("format") != PROJECT_FORMAT:
+            raise ProjectFormatError(f"{os.path.basename(path)} is not a project file")
+        if int(header.get("version", 0)) > PROJECT_VERSION:
+            raise ProjectFormatError(f"Project version {header.get('version')} is newer than supported ({PROJECT_VERSION})")
+
+        for line_no, line in enumerate(f, start=2):
+            if not line.strip():
+                continue
+            record = _parse(line, line_no)
+            try:
+                kind = record.pop("type", None)
+                if kind == "clip":
+                    clip = TimelineClip(
+                        id=record["id"],
+                        source_path=paths[record["src"]],
+                        start_time_ms=record["in"],
+                        duration_ms=record["dur"],
+                        position_ms=record["pos"],
+                        label=record.get("label", "")
+                    )
+                    track_id = record.get("track", 0)
+                    if track_id:
+                        if not tracks[track_id].insert(clip):
+                            print(f"[Project] Skipped overlapping clip {clip.id} on track {track_id}")
+                    else:
+                        clips.append(clip)
+                elif kind == "source":
+                    paths[record["id"]] = record["path"]
+                    _seed_probe_info(record)
+                elif kind == "track":
+                    track = Track(record["id"], record["kind"], record.get("name", ""))
+                    for attr in ("muted", "volume", "x", "y", "scale"):
+                        if attr in record:
+                            setattr(track, attr, record[attr])
+                    tracks[track.id] = track
+                elif kind == "marker":
+                    marker_data.append(record)
+                elif kind == "state":
+                    state = record
+                # Unknown record types come from newer minor versions and are skipped
+            except (KeyError, TypeError, ValueError) as e:
+                raise ProjectFormatError(f"Corrupt project (line {line_no}): bad or missing {e}")
+
+    next_ids = header.get("next_ids")
+    if not isinstance(next_ids, dict):
+        next_ids = {}  # Written before id counters were saved
+    timeline.load_clips(clips, list(tracks.values()), next_ids)
+    markers.import_markers(marker_data, next_ids.get("marker"))
+    print(f"[Project] Loaded {path} ({len(clips)} clips, {len(marker_data)} markers)")
+    return state
+
+
+def _seed_probe_info(record: dict):
+    # Saved probe info is only trusted if the source has not changed since
+    info = record.get("info")
+    if info and record.get("key") == source_key(record["path"]):
+        decoder_pool.seed_info(record["path"], info)
+
+
+def _dump(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def _parse(line: str, line_no: int) -> dict:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise ProjectFormatError(f"Corrupt project (line {line_no}): {e}")
+    if not isinstance(record, dict):
+        raise ProjectFormatError(f"Corrupt project (line {line_no})")
+    return record
@@ -0,0 +1,250 @@
+"""
+PTS Table - Frame timestamps of a source for ms <-> frame conversion
+
+Converting with ms / 1000 * fps assumes a constant frame rate. Phone and
+screen recordings are often variable-frame-rate, so that arithmetic puts
+positions, durations and in/out points somewhere other than where ffmpeg
+(which works in timestamps) cuts. A PtsTable holds the presentation
+timestamp of every frame, read once per source with ffprobe (packets
+only, no decoding) and cached on disk, and converts with binary search.
+
+Reading the timestamps of a long file takes seconds, so the first open of
+a source is served a constant-frame-rate estimate while a background
+thread probes it; the real table is swapped in when it is ready (see
+add_listener).
+
+Constant-frame-rate sources keep the plain arithmetic and no array, so
+their conversions are unchanged. Without ffprobe every source is treated
+as constant-frame-rate.
+"""
+
+import os
+import subprocess
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+from utils.cache_paths import cache_dir, source_key
+
+
+class PtsTable:
+    """
+    Frame timestamps of one source, in ms relative to its first frame.
+
+    Frame indices count frames in presentation (timestamp) order, which is
+    the order sequential reads return them in.
+    """
+
+    def __init__(self, fps: float, frame_count: int, times_ms: Optional[np.ndarray] = None,
+                 duration_ms: Optional[float] = None):
+        """
+        Args:
+            fps: Nominal frame rate (what the decoder's frame-number seeking is based on)
+            frame_count: Frame count for constant-frame-rate sources
+            times_ms: Sorted frame timestamps for variable-frame-rate sources, None for CFR
+            duration_ms: End of the last frame (VFR only)
+        """
+        self.fps = fps if fps > 0 else 30.0
+        self.times_ms = times_ms
+        if times_ms is None:
+            self.frame_count = max(0, int(frame_count))
+            self.duration_ms = int((self.frame_count / self.fps) * 1000)
+        else:
+            self.frame_count = len(times_ms)
+            self.duration_ms = int(duration_ms if duration_ms is not None else times_ms[-1])
+
+    @property
+    def is_vfr(self) -> bool:
+        return self.times_ms is not None
+
+    def frame_to_ms(self, frame_index: int) -> int:
+        """Presentation time of a frame."""
+        if self.times_ms is None:
+            return int((frame_index / self.fps) * 1000)
+        if frame_index >= self.frame_count:
+            return self.duration_ms
+        return int(self.times_ms[max(0, frame_index)])
+
+    def ms_to_frame(self, position_ms: float) -> int:
+        """Frame on screen at a time: the last frame starting at or before it."""
+        if self.times_ms is None:
+            return int((position_ms / 1000.0) * self.fps)
+        index = int(np.searchsorted(self.times_ms, position_ms, side="right")) - 1
+        return max(0, index)
+
+    def nearest_frame(self, position_ms: float) -> int:
+        """Frame whose timestamp is closest to a time (for cut points)."""
+        if self.times_ms is None:
+            return int(round(position_ms / 1000.0 * self.fps))
+        index = int(np.searchsorted(self.times_ms, position_ms))
+        if index >= self.frame_count:
+            return self.frame_count
+        if index > 0 and position_ms - self.times_ms[index - 1] < self.times_ms[index] - position_ms:
+            return index - 1
+        return index
+
+    def capture_index(self, frame_index: int) -> int:
+        """
+        CAP_PROP_POS_FRAMES value that seeks a decoder to a frame.
+
+        OpenCV (and FFmpegPipeCapture) seek to frame_number / fps seconds, so
+        a VFR frame is addressed through its timestamp.
+        """
+        if self.times_ms is None:
+            return frame_index
+        return int(round(self.frame_to_ms(frame_index) / 1000.0 * self.fps))
+
+    def __repr__(self):
+        kind = "vfr" if self.is_vfr else "cfr"
+        return f"PtsTable({kind}, frames={self.frame_count}, duration={self.duration_ms}ms)"
+
+
+# Built tables by cache key (source path + size + mtime)
+_tables: Dict[str, PtsTable] = {}
+_probing: Set[str] = set()  # Keys with a background probe running
+_listeners: List[Callable[[str, PtsTable], None]] = []
+_lock = threading.Lock()
+
+
+def pts_table_for(path: str, fps: float, frame_count: int, wait: bool = False) -> PtsTable:
+    """
+    Get the PTS table of a source.
+
+    Timestamps read before (this session or cached on disk) are used at
+    once. Otherwise a constant-frame-rate estimate is returned and the
+    source is probed in a background thread; listeners are told when the
+    real table replaces it.
+
+    Args:
+        path: Source file path
+        fps, frame_count: Decoder's nominal properties (used for CFR sources)
+        wait: Probe in the calling thread instead (for callers that are
+            already off the GUI thread and need exact frames)
+
+    Returns:
+        PtsTable (CFR if the timestamps are not known yet or cannot be read)
+    """
+    key = source_key(path)
+    table = ready_table(key)
+    if table is not None:
+        return table
+
+    times = _load_cached(key)
+    if times is not None:
+        return _store(key, path, _classify(times, fps, frame_count), notify=False)
+    if wait:
+        return _build(key, path, fps, frame_count)
+
+    with _lock:
+        start = key not in _probing
+        _probing.add(key)
+    if start:
+        threading.Thread(
+            target=_build, args=(key, path, fps, frame_count), name="PtsProbe", daemon=True
+        ).start()
+    return PtsTable(fps, frame_count)
+
+
+def ready_table(key: str) -> Optional[PtsTable]:
+    """Built table for a source_key(), or None while it is unknown or still probing."""
+    with _lock:
+        return _tables.get(key)
+
+
+def add_listener(callback: Callable[[str, PtsTable], None]):
+    """
+    Call callback(path, table) whenever a background probe finishes.
+
+    Callbacks run in the probing thread; Qt objects should re-emit through
+    a signal to get back to their own thread.
+    """
+    with _lock:
+        _listeners.append(callback)
+
+
+def _build(key: str, path: str, fps: float, frame_count: int) -> PtsTable:
+    try:
+        times = _probe_packet_times(path)
+        if times is not None:
+            _save_cached(key, times)
+        return _store(key, path, _classify(times, fps, frame_count), notify=True)
+    finally:
+        with _lock:
+            _probing.discard(key)
+
+
+def _store(key: str, path: str, table: PtsTable, notify: bool) -> PtsTable:
+    if table.is_vfr:
+        print(f"[PTS] {os.path.basename(path)}: variable frame rate, {table.frame_count} frames, {table.duration_ms}ms")
+    with _lock:
+        table = _tables.setdefault(key, table)
+        listeners = list(_listeners) if notify else []
+    for callback in listeners:
+        try:
+            callback(path, table)
+        except Exception as e:
+            print(f"[PTS] Listener failed: {e}")
+    return table
+
+
+def _classify(times: Optional[np.ndarray], fps: float, frame_count: int) -> PtsTable:
+    """Keep the timestamps only if fps arithmetic would misplace some frame."""
+    fps = fps if fps > 0 else 30.0
+    if times is None or len(times) < 2:
+        return PtsTable(fps, frame_count)
+    frame_ms = 1000.0 / fps
+    expected = np.arange(len(times)) * frame_ms
+    if abs(len(times) - frame_count) <= 1 and float(np.max(np.abs(times - expected))) < frame_ms / 2:
+        return PtsTable(fps, frame_count)
+    # The last frame lasts as long as the one before it
+    last_duration = float(times[-1] - times[-2])
+    return PtsTable(fps, len(times), times, float(times[-1]) + last_duration)
+
+
+def _probe_packet_times(path: str) -> Optional[np.ndarray]:
+    """Video packet timestamps via ffprobe, sorted and relative to the first (ms)."""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time",
+        "-of", "csv=p=0",
+        path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=120)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    values = []
+    for line in result.stdout.decode(errors="ignore").split():
+        try:
+            values.append(float(line.strip().strip(",")))
+        except ValueError:
+            continue  # "N/A" for packets without a timestamp
+    if not values:
+        return None
+    times = np.unique(np.asarray(values, dtype=np.float64)) * 1000.0
+    return times - times[0]
+
+
+def _cache_file(key: str) -> str:
+    return os.path.join(cache_dir("pts"), f"{key}.npy")
+
+
+def _load_cached(key: str) -> Optional[np.ndarray]:
+    try:
+        return np.load(_cache_file(key))
+    except Exception:
+        return None
+
+
+def _save_cached(key: str, times: np.ndarray):
+    path = _cache_file(key)
+    try:
+        with open(path + ".part", "wb") as f:
+            np.save(f, times)
+        os.replace(path + ".part", path)
+    except Exception as e:
+        print(f"[PTS] Failed to cache timestamps: {e}")
@@ -0,0 +1,271 @@
+"""
+Scene Detection - Propose cut points from frame-to-frame change scores
+
+A source is decoded once at a tiny resolution in worker processes, one
+chunk of frames per task, so long recordings use every core and the GUI
+process only waits for results. Each frame gets a score in 0..1 from two
+measures computed with NumPy over whole batches of frames: the change of
+the colour histogram and the mean luma difference to the previous frame.
+
+Scores are cached per source (like PTS tables), so after the first pass
+proposing cuts is a threshold over an array: moving the threshold slider
+is instant and reopening the detector on the same file decodes nothing.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from utils.cache_paths import cache_dir, source_key
+from video.decoder_pool import decoder_pool
+from video.pts_table import PtsTable, pts_table_for
+
+SCORE_VERSION = 1
+ANALYSIS_SIZE = (64, 36)  # Decoded frames are shrunk to this before scoring
+BATCH_FRAMES = 256  # Frames scored per NumPy pass
+CHUNK_MIN_FRAMES = 1500  # Sources shorter than this are analysed in one task
+HIST_LEVELS = 8  # Levels per colour channel (8 x 8 x 8 bins)
+
+
+class SceneScores:
+    """Change scores of every frame of a source, with cut proposal."""
+
+    def __init__(self, path: str, scores: np.ndarray, pts: PtsTable):
+        self.path = path
+        self.scores = scores  # scores[i]: change from frame i-1 to frame i
+        self.pts = pts
+
+    def cuts(self, threshold: float, min_scene_ms: int = 1000,
+             start_ms: int = 0, end_ms: Optional[int] = None) -> List[int]:
+        """
+        Proposed cut points (source ms) inside [start_ms, end_ms).
+
+        A frame starts a new scene if its score reaches threshold and it is
+        at least min_scene_ms after the previous cut (and the range start).
+        """
+        first = self.pts.ms_to_frame(start_ms) + 1
+        last = len(self.scores) if end_ms is None else min(len(self.scores), self.pts.ms_to_frame(end_ms))
+        candidates = np.flatnonzero(self.scores[first:last] >= threshold) + first
+        cuts = []
+        previous_ms = start_ms
+        for frame in candidates:
+            cut_ms = self.pts.frame_to_ms(int(frame))
+            if cut_ms - previous_ms >= min_scene_ms:
+                cuts.append(cut_ms)
+                previous_ms = cut_ms
+        if end_ms is not None and cuts and end_ms - cuts[-1] < min_scene_ms:
+            cuts.pop()  # Last scene would be too short
+        return cuts
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+def load_cached_scores(path: str) -> Optional[np.ndarray]:
+    """Scores computed earlier for this exact file, or None."""
+    try:
+        return np.load(_cache_file(path))
+    except Exception:
+        return None
+
+
+def analyse_scenes(path: str, workers: Optional[int] = None,
+                   progress: Optional[Callable[[int], None]] = None,
+                   cancel: Optional[threading.Event] = None) -> Optional[SceneScores]:
+    """
+    Score every frame of a source (cached after the first run).
+
+    Args:
+        path: Source file
+        workers: Worker processes (default: CPU count)
+        progress: Called with a percentage as chunks finish
+        cancel: Set to stop early (returns None)
+
+    Returns:
+        SceneScores, or None if the file cannot be decoded or analysis was cancelled
+    """
+    info = decoder_pool.probe(path)
+    if not info or info["frame_count"] <= 0:
+        return None
+    pts = pts_table_for(path, info["fps"], info["frame_count"], wait=True)
+    frame_count = pts.frame_count or info["frame_count"]
+
+    scores = load_cached_scores(path)
+    if scores is not None:
+        if progress:
+            progress(100)
+        return SceneScores(path, scores, pts)
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    chunk_count = max(1, min(-(-frame_count // CHUNK_MIN_FRAMES), workers * 4))
+    bounds = np.linspace(0, frame_count, chunk_count + 1).astype(int)
+    chunks = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+    scores = np.zeros(frame_count, dtype=np.float32)
+    print(f"[Scenes] Analysing {os.path.basename(path)}: {frame_count} frames in {len(chunks)} chunks")
+
+    decoded_any = False
+    failed = 0
+    if len(chunks) == 1:
+        part = _score_chunk(path, 0, frame_count, ANALYSIS_SIZE)
+        if part is not None:
+            scores[:len(part)] = part
+            decoded_any = True
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=ctx) as pool:
+            futures = {
+                pool.submit(_score_chunk, path, a, b, ANALYSIS_SIZE, pts.capture_index(max(0, a - 1))): a
+                for a, b in chunks
+            }
+            done = 0
+            for future in as_completed(futures):
+                if cancel is not None and cancel.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    return None
+                try:
+                    part = future.result()
+                except Exception as e:
+                    print(f"[Scenes] Chunk at frame {futures[future]} failed: {e}")
+                    part = None
+                if part is not None:
+                    start = futures[future]
+                    scores[start:start + len(part)] = part
+                    decoded_any = True
+                else:
+                    failed += 1
+                done += 1
+                if progress:
+                    progress(int(done * 100 / len(chunks)))
+    if cancel is not None and cancel.is_set():
+        return None
+    if not decoded_any:
+        return None
+
+    if failed:
+        # Failed chunks scored as zeros; usable now, but analyse again next time
+        print(f"[Scenes] {failed} of {len(chunks)} chunks failed; not caching scores")
+    else:
+        _save_cached(path, scores)
+    return SceneScores(path, scores, pts)
+
+
+class SceneDetector(QObject):
+    """
+    Runs analyse_scenes() in the background.
+
+    Signals:
+        progress(int): Percentage analysed
+        finished(str, object): Source path and SceneScores (None on failure or cancel)
+    """
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+
+    def start(self, path: str):
+        self.cancel()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(path, self._cancel), daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, path: str, cancel: threading.Event):
+        try:
+            result = analyse_scenes(path, progress=self.progress.emit, cancel=cancel)
+        except Exception as e:
+            print(f"[Scenes] Analysis failed for {path}: {e}")
+            result = None
+        if not cancel.is_set():
+            self.finished.emit(path, result)
+
+
+# Worker side
+def _score_chunk(path: str, start: int, end: int, size: Tuple[int, int],
+                 seek_index: int = 0) -> Optional[np.ndarray]:
+    """
+    Scores of frames start..end-1 (worker process entry point).
+
+    Decoding starts one frame early so the first frame is compared with its
+    real predecessor; frame 0 scores 0. seek_index is the CAP_PROP_POS_FRAMES
+    value of that frame (see PtsTable.capture_index).
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return None
+    first = max(0, start - 1)
+    if first:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, seek_index)
+
+    w, h = size
+    scores = np.zeros(end - start, dtype=np.float32)
+    batch = np.empty((BATCH_FRAMES + 1, h, w, 3), dtype=np.uint8)
+    filled = 0
+    base = first  # Frame index of batch[0]
+    index = first
+    while index < end:
+        ok, frame = cap.read()
+        if ok:
+            cv2.resize(frame, (w, h), dst=batch[filled], interpolation=cv2.INTER_AREA)
+            filled += 1
+            index += 1
+        if filled == len(batch) or ((not ok or index == end) and filled > 1):
+            # batch[k + 1] is frame base + k + 1, compared with batch[k]
+            diffs = _batch_scores(batch[:filled])
+            lo = base + 1 - start
+            scores[max(0, lo):lo + len(diffs)] = diffs[max(0, -lo):]
+            batch[0] = batch[filled - 1]  # Carried over as the next batch's predecessor
+            base += filled - 1
+            filled = 1
+        if not ok:
+            break
+    cap.release()
+    return scores if index > start else None
+
+
+def _batch_scores(frames: np.ndarray) -> np.ndarray:
+    """Change score between each pair of consecutive frames (n frames -> n - 1 scores)."""
+    n, h, w = frames.shape[:3]
+    # Mean absolute luma difference, 0..1
+    luma = frames.astype(np.float32) @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+    pixel = np.abs(np.diff(luma, axis=0)).mean(axis=(1, 2)) / 255.0
+
+    # Colour histogram distance (half the L1 distance of normalized histograms), 0..1
+    levels = HIST_LEVELS
+    q = (frames // (256 // levels)).astype(np.int32)
+    bins = (q[..., 0] * levels + q[..., 1]) * levels + q[..., 2]
+    bins = bins.reshape(n, -1) + (np.arange(n, dtype=np.int32) * levels ** 3)[:, None]
+    hist = np.bincount(bins.ravel(), minlength=n * levels ** 3).reshape(n, -1).astype(np.float32)
+    hist /= float(h * w)
+    histogram = 0.5 * np.abs(np.diff(hist, axis=0)).sum(axis=1)
+
+    return (0.5 * (pixel + histogram)).astype(np.float32)
+
+
+def _cache_file(path: str) -> str:
+    return os.path.join(cache_dir("scenes"), f"{source_key(path)}.v{SCORE_VERSION}.npy")
+
+
+def _save_cached(path: str, scores: np.ndarray):
+    cache_file = _cache_file(path)
+    try:
+        with open(cache_file + ".part", "wb") as f:
+            np.save(f, scores)
+        os.replace(cache_file + ".part", cache_file)
+    except Exception as e:
+        print(f"[Scenes] Failed to cache scores: {e}")
@@ -0,0 +1,149 @@
+"""
+Seek Scheduler - Asynchronous, coalescing seeks for scrubbing
+
+Dragging the slider produces far more seek requests than a decoder can
+serve. The scheduler decodes on a worker thread with its own pooled
+decoder and only ever works on the newest request ("latest wins"), so
+the GUI never queues up stale decodes. Recently decoded frames are kept
+in a small scrub cache that can answer a request approximately before
+the exact frame arrives.
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import cv2
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from video.decoder_pool import decoder_pool
+
+
+class ScrubCache:
+    """LRU of recently decoded (downscaled) frames, searchable by nearest index."""
+
+    def __init__(self, capacity: int = 120, max_width: int = 640):
+        self.capacity = capacity
+        self.max_width = max_width
+        self._frames: "OrderedDict[int, object]" = OrderedDict()
+        self._keys = []  # sorted frame indices
+
+    def put(self, frame_index: int, frame):
+        if frame_index in self._frames:
+            self._frames.move_to_end(frame_index)
+            return
+        h, w = frame.shape[:2]
+        if w > self.max_width:
+            scale = self.max_width / float(w)
+            frame = cv2.resize(frame, (self.max_width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        else:
+            frame = frame.copy()
+        self._frames[frame_index] = frame
+        bisect.insort(self._keys, frame_index)
+        while len(self._frames) > self.capacity:
+            old_index, _ = self._frames.popitem(last=False)
+            del self._keys[bisect.bisect_left(self._keys, old_index)]
+
+    def nearest(self, frame_index: int, max_distance: int) -> Optional[Tuple[int, object]]:
+        """Return (index, frame) of the cached frame closest to frame_index."""
+        if not self._keys:
+            return None
+        pos = bisect.bisect_left(self._keys, frame_index)
+        candidates = self._keys[max(0, pos - 1):pos + 1]
+        best = min(candidates, key=lambda k: abs(k - frame_index))
+        if abs(best - frame_index) > max_distance:
+            return None
+        return best, self._frames[best]
+
+    def clear(self):
+        self._frames.clear()
+        self._keys = []
+
+
+class SeekScheduler(QObject):
+    """
+    Decodes seek targets on a worker thread, newest request first.
+
+    Signals:
+        frameReady(int, int, object): request_id, frame_index, BGR frame
+    """
+
+    frameReady = pyqtSignal(int, int, object)
+
+    # Forward distance that is cheaper to decode through than to seek
+    MAX_FORWARD_GRAB = 15
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._path: Optional[str] = None
+        self._pending: Optional[Tuple[int, int]] = None  # (request_id, frame_index)
+        self._next_id = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def set_source(self, path: Optional[str]):
+        """Switch the file decoded by the worker (pending requests are dropped)."""
+        with self._cond:
+            self._path = path
+            self._pending = None
+            self._cond.notify()
+
+    def request(self, frame_index: int) -> int:
+        """
+        Ask for a frame; replaces any request the worker has not started yet.
+
+        Returns:
+            Request id (monotonically increasing)
+        """
+        with self._cond:
+            self._next_id += 1
+            self._pending = (self._next_id, int(frame_index))
+            self._cond.notify()
+            return self._next_id
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        handle = None
+        handle_path = None
+        position = -1  # Index of the next frame the worker decoder will return
+        while True:
+            with self._cond:
+                while self._running and (self._pending is None or self._path is None):
+                    self._cond.wait()
+                if not self._running:
+                    break
+                request_id, frame_index = self._pending
+                self._pending = None
+                path = self._path
+
+            if path != handle_path:
+                decoder_pool.release(handle)
+                handle = decoder_pool.acquire(path)
+                handle_path = path
+                position = -1
+            if handle is None:
+                continue
+
+            with handle.lock:
+                cap = handle.capture
+                if 0 <= position <= frame_index <= position + self.MAX_FORWARD_GRAB:
+                    # Close ahead of the decoder: grabbing through is cheaper than a seek
+                    for _ in range(frame_index - position):
+                        cap.grab()
+                else:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, handle.pts.capture_index(frame_index))
+                ok, frame = cap.read()
+                position = frame_index + 1 if ok else -1
+
+            if ok:
+                self.frameReady.emit(request_id, frame_index, frame)
+
+        decoder_pool.release(handle)
@@ -0,0 +1,219 @@
+"""
+Sprite Cache - Thumbnail sprite sheets for hover previews
+
+Each source is sampled once by ffmpeg (fps + scale + tile filters) into a
+raw RGB file of sprite sheets in the user cache. The file is memory-mapped,
+so a hover preview is a slice of an array rather than a decode, and the
+pages the OS has not touched yet cost nothing.
+"""
+
+import json
+import math
+import os
+import queue
+import subprocess
+import threading
+from typing import Dict, Optional, Set
+
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from video.decoder_pool import decoder_pool
+from video.ffmpeg_processor import FFmpegProcessor
+from utils.cache_paths import cache_dir, source_key
+
+
+class SpriteSheet:
+    """Read-only view over a memory-mapped sprite file."""
+
+    def __init__(self, raw_path: str, meta: dict):
+        self.raw_path = raw_path
+        self.interval_ms = int(meta["interval_ms"])
+        self.tile_w = int(meta["tile_w"])
+        self.tile_h = int(meta["tile_h"])
+        self.columns = int(meta["columns"])
+        self.rows = int(meta["rows"])
+        self.count = int(meta["count"])
+
+        sheet_h = self.rows * self.tile_h
+        sheet_w = self.columns * self.tile_w
+        sheets = os.path.getsize(raw_path) // (sheet_h * sheet_w * 3)
+        self._sheets = np.memmap(raw_path, dtype=np.uint8, mode="r",
+                                 shape=(sheets, sheet_h, sheet_w, 3))
+        self.count = min(self.count, sheets * self.columns * self.rows)
+
+    def tile(self, index: int) -> np.ndarray:
+        """
+        Get one thumbnail.
+
+        Returns:
+            Contiguous RGB array (tile_h x tile_w x 3)
+        """
+        index = max(0, min(index, self.count - 1))
+        per_sheet = self.columns * self.rows
+        sheet, k = divmod(index, per_sheet)
+        row, col = divmod(k, self.columns)
+        y, x = row * self.tile_h, col * self.tile_w
+        return np.ascontiguousarray(self._sheets[sheet, y:y + self.tile_h, x:x + self.tile_w])
+
+    def tile_for_time(self, source_ms: int) -> np.ndarray:
+        """Get the thumbnail sampled closest before a source position."""
+        return self.tile(int(max(0, source_ms) // self.interval_ms))
+
+
+class SpriteCache(QObject):
+    """
+    Generates sprite sheets in the background and hands out loaded ones.
+
+    Signals:
+        spriteReady(str): Sprite sheet for a source path is available
+    """
+
+    spriteReady = pyqtSignal(str)
+
+    VERSION = 1
+    TILE_W = 160
+    TILE_H = 90
+    COLUMNS = 10
+    ROWS = 10
+    MIN_INTERVAL_MS = 1000
+    # Long recordings are sampled more sparsely to bound generation time and size
+    MAX_TILES = 600
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sheets: Dict[str, SpriteSheet] = {}
+        self._pending: Set[str] = set()
+        self._failed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._ffmpeg_ok: Optional[bool] = None
+
+    def get(self, path: str) -> Optional[SpriteSheet]:
+        """
+        Get the sprite sheet for a source, scheduling generation if needed.
+
+        Returns:
+            SpriteSheet, or None until spriteReady is emitted for the path
+        """
+        sheet = self._sheets.get(path)
+        if sheet is not None or path in self._pending or path in self._failed:
+            return sheet
+        sheet = self._load(path)
+        if sheet is not None:
+            self._sheets[path] = sheet
+            return sheet
+        self.prefetch(path)
+        return None
+
+    def prefetch(self, path: str):
+        """Generate the sprite sheet for a source in the background if it is not cached yet."""
+        if path in self._sheets:
+            return
+        with self._lock:
+            if path in self._pending or path in self._failed:
+                return
+            if self._ffmpeg_ok is None:
+                self._ffmpeg_ok = FFmpegProcessor.check_ffmpeg_available()
+            if not self._ffmpeg_ok:
+                self._failed.add(path)
+                return
+            self._pending.add(path)
+            # Enqueued under the lock the idle worker exits under: it either sees this path or has cleared _worker
+            self._queue.put(path)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    # Internal helpers
+    @staticmethod
+    def _paths(path: str):
+        base = os.path.join(cache_dir("sprites"), source_key(path))
+        return base + ".rgb", base + ".json"
+
+    def _load(self, path: str) -> Optional[SpriteSheet]:
+        raw_path, meta_path = self._paths(path)
+        if not (os.path.exists(raw_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != self.VERSION:
+                return None
+            return SpriteSheet(raw_path, meta)
+        except Exception as e:
+            print(f"[Sprites] Ignoring unreadable sprite cache for {path}: {e}")
+            return None
+
+    def _run(self):
+        while True:
+            try:
+                path = self._queue.get(timeout=5)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+                continue
+            ok = self._generate(path)
+            with self._lock:
+                self._pending.discard(path)
+                if not ok:
+                    self._failed.add(path)
+            if ok:
+                self.spriteReady.emit(path)
+
+    def _generate(self, path: str) -> bool:
+        """Run one ffmpeg pass producing every sprite sheet of a source."""
+        raw_path, meta_path = self._paths(path)
+        info = decoder_pool.probe(path)
+        duration_ms = info["duration_ms"] if info else 0
+
+        interval_ms = self.MIN_INTERVAL_MS
+        if duration_ms > 0:
+            interval_ms = max(interval_ms, int(math.ceil(duration_ms / float(self.MAX_TILES))))
+        count = max(1, int(math.ceil(duration_ms / float(interval_ms)))) if duration_ms else \
+            self.COLUMNS * self.ROWS
+
+        w, h = self.TILE_W, self.TILE_H
+        vf = (
+            f"fps=1000/{interval_ms},"
+            f"scale={w}:{h}:force_original_aspect_ratio=decrease,"
+            f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
+            f"tile={self.COLUMNS}x{self.ROWS}"
+        )
+        tmp_path = raw_path + ".part"
+        cmd = [
+            "ffmpeg", "-y", "-v", "error", "-nostdin",
+            "-i", path,
+            "-an", "-sn",
+            "-vf", vf,
+            "-pix_fmt", "rgb24", "-f", "rawvideo",
+            tmp_path
+        ]
+        print(f"[Sprites] Generating sprites for {path} every {interval_ms}ms")
+        try:
+            result = subprocess.run(cmd, capture_output=True)
+        except Exception as e:
+            print(f"[Sprites] ffmpeg failed to start: {e}")
+            return False
+        if result.returncode != 0 or not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+            print(f"[Sprites] Generation failed for {path}: {result.stderr.decode(errors='ignore')[-300:]}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+        meta = {
+            "version": self.VERSION,
+            "interval_ms": interval_ms,
+            "tile_w": w,
+            "tile_h": h,
+            "columns": self.COLUMNS,
+            "rows": self.ROWS,
+            "count": count,
+        }
+        os.replace(tmp_path, raw_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        return True
@@ -3,23 +3,122 @@ Timeline Data Model
 
 Manages multi-clip timeline for video editing.
 Supports adding, removing, reordering clips.
+
+Clips are held in a ClipIndex (see clip_index.py), so id lookups are
+O(1) and position lookups, range queries, inserts and ripple shifts are
+O(log n) even on generated timelines with tens of thousands of clips.
+
+Bulk edits (imports, scene splits, macro commands) run inside
+Timeline.batch(): per-clip signals are held back, positions are packed
+once, and a single batch_committed signal summarizes the whole batch.
+
+Overlay video and audio tracks (see tracks.py) sit alongside the main
+track and hold clips at free positions; clip ids are unique across all
+tracks.
+
+Timeline.snapshot() freezes the whole state into an immutable, structurally
+shared TimelineSnapshot (see timeline_snapshot.py) that other threads can
+read while editing goes on; Timeline.restore() puts one back.
 """
 
-from typing import List, Optional
-from dataclasses import dataclass
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
 from PyQt5.QtCore import QObject, pyqtSignal
 
+# Add parent directory to path for imports when run directly
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from video.clip_index import ClipIndex, node_position
+from video.timeline_snapshot import ClipState, TimelineSnapshot, TrackState
+from video.tracks import Track
+
 
-@dataclass
 class TimelineClip:
-    """Represents a video clip on the timeline."""
+    """
+    Represents a video clip on the timeline.
+
+    A slotted class rather than a dataclass: timelines can hold tens of
+    thousands of clips, and a per-instance __dict__ more than doubles the
+    size of each one. Source paths are interned, so clips cut from the same
+    file share one string.
+
+    The clip's content lives in an immutable ClipState that the clip shares
+    with its index node and with every snapshot taken since it last changed;
+    setting a field replaces the state.
+    """
+
+    __slots__ = ("_state", "_position_ms", "_node", "_index")
+
+    def __init__(self, id: int, source_path: str, start_time_ms: int, duration_ms: int,
+                 position_ms: int, label: str = ""):
+        self._state = ClipState(id, sys.intern(source_path), start_time_ms, duration_ms, label)
+        self._position_ms = position_ms  # Position on timeline (while not in an index)
+        # Index node and owning ClipIndex while on a timeline (None otherwise)
+        self._node = None
+        self._index = None
+
+    @property
+    def id(self) -> int:
+        return self._state.id
+
+    @property
+    def source_path(self) -> str:
+        """Path to source video file."""
+        return self._state.source_path
+
+    @source_path.setter
+    def source_path(self, value: str):
+        self._set(source_path=sys.intern(value))
+
+    @property
+    def start_time_ms(self) -> int:
+        """Trim start in source video."""
+        return self._state.start_time_ms
+
+    @start_time_ms.setter
+    def start_time_ms(self, value: int):
+        self._set(start_time_ms=value)
+
+    @property
+    def label(self) -> str:
+        """Optional clip label."""
+        return self._state.label
+
+    @label.setter
+    def label(self, value: str):
+        self._set(label=value)
+
+    # position_ms and duration_ms go through the clip's index while it is on
+    # a timeline: positions may carry a pending ripple shift, and a duration
+    # change must update the cached subtree ends.
+    @property
+    def position_ms(self) -> int:
+        """Position on timeline."""
+        node = self._node
+        return self._position_ms if node is None else node_position(node)
+
+    @position_ms.setter
+    def position_ms(self, value: int):
+        if self._index is None:
+            self._position_ms = value
+        else:
+            self._index.set_position(self, value)
+
+    @property
+    def duration_ms(self) -> int:
+        """Duration of clip (after trim)."""
+        return self._state.duration_ms
 
-    id: int
-    source_path: str  # Path to source video file
-    start_time_ms: int  # Trim start in source video
-    duration_ms: int  # Duration of clip (after trim)
-    position_ms: int  # Position on timeline
-    label: str = ""  # Optional clip label
+    @duration_ms.setter
+    def duration_ms(self, value: int):
+        self._set(duration_ms=value)
+
+    def _set(self, **fields):
+        self._state = self._state._replace(**fields)
+        if self._index is not None:
+            self._index.refresh(self)
 
     @property
     def end_time_ms(self) -> int:
@@ -31,6 +130,16 @@ class TimelineClip:
         """End position on timeline."""
         return self.position_ms + self.duration_ms
 
+    def _key(self):
+        return (self.id, self.source_path, self.start_time_ms, self.duration_ms, self.position_ms, self.label)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._key() == other._key()
+
+    __hash__ = None  # Mutable, compared by value
+
     def __repr__(self):
         return (
             f"TimelineClip(id={self.id}, source='{self.source_path}', "
@@ -39,16 +148,38 @@ class TimelineClip:
         )
 
 
+@dataclass
+class TimelineChange:
+    """Net effect of one Timeline.batch() (ids in the order they were first touched)."""
+
+    added: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)  # Clips that existed before the batch
+    modified: List[int] = field(default_factory=list)  # Surviving clips that were not added
+    cleared: bool = False  # Timeline was cleared (before the adds above)
+    tracks: List[int] = field(default_factory=list)  # Overlay/audio tracks that changed
+    duration_ms: int = 0  # Total duration after the batch
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.modified or self.cleared or self.tracks)
+
+
 class Timeline(QObject):
     """
     Timeline data model for multi-clip editing.
 
+    Trim operations (ripple_trim, roll_edit, slip_clip, slide_clip) change
+    only the clips at the edit and shift everything after it as one lazy
+    index update, so each step of a drag-trim is O(log n).
+
     Signals:
         clip_added: Emitted when clip is added (clip)
         clip_removed: Emitted when clip is removed (clip_id)
         clip_modified: Emitted when clip is modified (clip)
         timeline_cleared: Emitted when timeline is cleared
         duration_changed: Emitted when total duration changes (duration_ms)
+        track_changed: Emitted when an overlay/audio track or its clips change (track_id)
+        batch_committed: Emitted once at the end of a batch (TimelineChange);
+            the per-clip signals above are not emitted for edits inside it
     """
 
     clip_added = pyqtSignal(object)  # TimelineClip
@@ -56,11 +187,63 @@ class Timeline(QObject):
     clip_modified = pyqtSignal(object)  # TimelineClip
     timeline_cleared = pyqtSignal()
     duration_changed = pyqtSignal(int)  # total_duration_ms
+    track_changed = pyqtSignal(int)  # track_id
+    batch_committed = pyqtSignal(object)  # TimelineChange
+
+    MIN_CLIP_DURATION_MS = 100  # Trims never make a clip shorter than this
 
     def __init__(self):
         super().__init__()
-        self.clips: List[TimelineClip] = []
+        self.clips = ClipIndex()  # Timeline order
+        self._by_id: Dict[int, TimelineClip] = {}
+        self._sorted_cache: Optional[List[TimelineClip]] = None
         self._next_clip_id = 1
+        self.tracks: List[Track] = []  # Overlay/audio tracks, bottom to top
+        self._next_track_id = 1
+
+        # Batch state
+        self._batch_depth = 0
+        self._pending: Optional[Dict] = None  # Ordered id sets collected by the open batch
+        self._positions_dirty = False  # A repack was deferred by the open batch
+
+        # Snapshot state: bumped on every change; track records reused until their track changes
+        self._version = 0
+        self._track_states: Dict[int, TrackState] = {}
+        self._snapshot: Optional[TimelineSnapshot] = None
+
+        # Source length lookup (path -> ms or None) that trims are kept within
+        self.source_duration_lookup: Optional[Callable[[str], Optional[int]]] = None
+
+    @contextmanager
+    def batch(self):
+        """
+        Group edits into one change.
+
+        Inside the block clip_added/clip_removed/clip_modified/timeline_cleared
+        and duration_changed are not emitted and position repacks are deferred;
+        on exit positions are packed once and only batch_committed is emitted
+        (its TimelineChange carries the new duration). Batches nest; only the
+        outermost emits.
+        Edits are not rolled back if the block raises.
+
+        Example:
+            with timeline.batch():
+                for path in paths:
+                    timeline.add_clip(path, duration_ms=...)
+        """
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self._pending = {"added": {}, "removed": {}, "modified": {}, "tracks": {}, "cleared": False}
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._commit_batch()
+
+    def in_batch(self) -> bool:
+        """Check if a batch is open."""
+        return self._batch_depth > 0
 
     def add_clip(
         self,
@@ -83,6 +266,8 @@ class Timeline(QObject):
         Returns:
             The created TimelineClip
         """
+        self._settle_positions()
+
         # If no position specified, append at end
         if position_ms is None:
             position_ms = self.get_total_duration()
@@ -103,19 +288,14 @@ class Timeline(QObject):
         self._next_clip_id += 1
 
         # Insert clip at correct position (maintain sorted order)
-        insert_idx = 0
-        for i, existing_clip in enumerate(self.clips):
-            if existing_clip.position_ms > position_ms:
-                break
-            insert_idx = i + 1
-
-        self.clips.insert(insert_idx, clip)
+        insert_idx = self.clips.count_starting_at_or_before(position_ms)
+        self._insert(insert_idx, clip)
 
         # Shift subsequent clips if inserting in middle
         if insert_idx < len(self.clips) - 1:
             self._shift_clips_after(insert_idx, clip.duration_ms)
 
-        self.clip_added.emit(clip)
+        self._notify_added(clip)
         self._update_duration()
 
         print(f"[Timeline] Added clip: {clip}")
@@ -131,34 +311,30 @@ class Timeline(QObject):
         Returns:
             True if removed, False if not found
         """
-        for i, clip in enumerate(self.clips):
-            if clip.id == clip_id:
-                removed_clip = self.clips.pop(i)
+        clip = self._by_id.get(clip_id)
+        if clip is None:
+            return False
 
-                # Shift subsequent clips backward
-                self._shift_clips_after(i - 1, -removed_clip.duration_ms)
+        i = self.clips.index(clip)
+        removed_clip = self._pop(i)
 
-                self.clip_removed.emit(clip_id)
-                self._update_duration()
+        # Shift subsequent clips backward
+        self._shift_clips_after(i - 1, -removed_clip.duration_ms)
 
-                print(f"[Timeline] Removed clip: {removed_clip}")
-                return True
+        self._notify_removed(clip_id)
+        self._update_duration()
 
-        return False
+        print(f"[Timeline] Removed clip: {removed_clip}")
+        return True
 
     def get_clip(self, clip_id: int) -> Optional[TimelineClip]:
         """Get clip by ID."""
-        for clip in self.clips:
-            if clip.id == clip_id:
-                return clip
-        return None
+        return self._by_id.get(clip_id)
 
     def get_clip_at_position(self, position_ms: int) -> Optional[TimelineClip]:
         """Get clip at specific timeline position."""
-        for clip in self.clips:
-            if clip.position_ms <= position_ms < clip.timeline_end_ms:
-                return clip
-        return None
+        self._settle_positions()
+        return self.clips.clip_at(position_ms)
 
     def move_clip(self, clip_id: int, new_position_ms: int) -> bool:
         """
@@ -174,26 +350,22 @@ class Timeline(QObject):
         clip = self.get_clip(clip_id)
         if not clip:
             return False
+        self._settle_positions()
 
         # Remove from current position
-        self.clips.remove(clip)
+        self._pop(self.clips.index(clip))
 
         # Update position
         clip.position_ms = new_position_ms
 
         # Re-insert at new position
-        insert_idx = 0
-        for i, existing_clip in enumerate(self.clips):
-            if existing_clip.position_ms > new_position_ms:
-                break
-            insert_idx = i + 1
-
-        self.clips.insert(insert_idx, clip)
+        insert_idx = self.clips.count_starting_at_or_before(new_position_ms)
+        self._insert(insert_idx, clip)
 
         # Recalculate all positions to close gaps
         self._recalculate_positions()
 
-        self.clip_modified.emit(clip)
+        self._notify_modified(clip)
         self._update_duration()
 
         print(f"[Timeline] Moved clip {clip_id} to {new_position_ms}ms")
@@ -211,14 +383,10 @@ class Timeline(QObject):
             True if reordered successfully
         """
         # Find current index
-        old_index = None
-        for i, clip in enumerate(self.clips):
-            if clip.id == clip_id:
-                old_index = i
-                break
-
-        if old_index is None:
+        clip = self._by_id.get(clip_id)
+        if clip is None:
             return False
+        old_index = self.clips.index(clip)
 
         # Clamp new_index
         new_index = max(0, min(new_index, len(self.clips) - 1))
@@ -227,13 +395,13 @@ class Timeline(QObject):
             return True
 
         # Remove and reinsert
-        clip = self.clips.pop(old_index)
-        self.clips.insert(new_index, clip)
+        clip = self._pop(old_index)
+        self._insert(new_index, clip)
 
         # Recalculate positions
         self._recalculate_positions()
 
-        self.clip_modified.emit(clip)
+        self._notify_modified(clip)
         self._update_duration()
 
         print(f"[Timeline] Reordered clip {clip_id} from index {old_index} to {new_index}")
@@ -255,7 +423,7 @@ class Timeline(QObject):
         duration_delta = new_duration_ms - old_duration
         self._shift_clips_after(clip_idx, duration_delta)
 
-        self.clip_modified.emit(clip)
+        self._notify_modified(clip)
         self._update_duration()
 
         return True
@@ -277,7 +445,7 @@ class Timeline(QObject):
         duration_delta = clip.duration_ms - old_duration
         self._shift_clips_after(clip_idx, duration_delta)
 
-        self.clip_modified.emit(clip)
+        self._notify_modified(clip)
         self._update_duration()
         return True
 
@@ -287,14 +455,15 @@ class Timeline(QObject):
         if not clip:
             return False
         clip.label = new_label or ""
-        self.clip_modified.emit(clip)
+        self._notify_modified(clip)
         return True
 
-    def split_clip(self, clip_id: int, split_ms: int) -> Optional[TimelineClip]:
+    def split_clip(self, clip_id: int, split_ms: int, new_clip_id: Optional[int] = None) -> Optional[TimelineClip]:
         """
         Split a clip at split_ms (absolute in source time). Returns the new right clip.
         Left clip keeps [start, split), right clip is [split, end).
         Positions on timeline are recomputed to avoid gaps.
+        new_clip_id gives the right clip a known id (redo), if that id is free.
         """
         clip = self.get_clip(clip_id)
         if not clip:
@@ -312,23 +481,25 @@ class Timeline(QObject):
         clip_idx = self.clips.index(clip)
         duration_delta = left_duration - old_duration
         self._shift_clips_after(clip_idx, duration_delta)
-        self.clip_modified.emit(clip)
+        self._notify_modified(clip)
 
         # Create right clip positioned immediately after left
         right_position = clip.timeline_end_ms
+        if new_clip_id is None or new_clip_id in self._by_id:
+            new_clip_id = self._next_clip_id
         new_clip = TimelineClip(
-            id=self._next_clip_id,
+            id=new_clip_id,
             source_path=clip.source_path,
             start_time_ms=split_ms,
             duration_ms=right_duration,
             position_ms=right_position,
             label=clip.label + " (part 2)" if clip.label else ""
         )
-        self._next_clip_id += 1
+        self._next_clip_id = max(self._next_clip_id, new_clip_id + 1)
 
         # Insert new clip right after current index
         insert_idx = clip_idx + 1
-        self.clips.insert(insert_idx, new_clip)
+        self._insert(insert_idx, new_clip)
 
         # Shift any clips after the inserted right clip by its duration
         if insert_idx < len(self.clips) - 1:
@@ -337,32 +508,342 @@ class Timeline(QObject):
         # Recalculate positions to remove any rounding issues
         self._recalculate_positions()
 
-        self.clip_added.emit(new_clip)
+        self._notify_added(new_clip)
         self._update_duration()
         print(f"[Timeline] Split clip {clip_id} at {split_ms}ms -> new clip {new_clip.id}")
         return new_clip
 
+    # Trim operations
+    def ripple_trim(self, clip_id: int, edge: str, delta_ms: int, clamp: bool = True) -> Optional[int]:
+        """
+        Move a clip's in or out point; everything after the clip moves with it.
+
+        Args:
+            clip_id: Clip to trim
+            edge: "in" (start of the clip) or "out" (end of the clip)
+            delta_ms: Source-time change of the edit point (positive = later)
+            clamp: Limit the delta to the media and minimum length; False
+                re-applies a delta that was already clamped (undo, redo, replay)
+
+        Returns:
+            Applied delta, or None if not found
+        """
+        clip = self.get_clip(clip_id)
+        if not clip or edge not in ("in", "out"):
+            return None
+        self._settle_positions()
+        if edge == "in":
+            if clamp:
+                delta_ms = self._clamp(delta_ms, -clip.start_time_ms, clip.duration_ms - self.MIN_CLIP_DURATION_MS)
+            clip.start_time_ms += delta_ms
+            duration_delta = -delta_ms
+        else:
+            if clamp:
+                delta_ms = self._clamp(delta_ms, self.MIN_CLIP_DURATION_MS - clip.duration_ms, self._room_after(clip))
+            duration_delta = delta_ms
+        if delta_ms:
+            clip.duration_ms += duration_delta
+            self._shift_clips_after(self.clips.index(clip), duration_delta)
+            self._notify_modified(clip)
+            self._update_duration()
+        return delta_ms
+
+    def roll_edit(self, clip_id: int, delta_ms: int, clamp: bool = True) -> Optional[int]:
+        """
+        Move the cut between a clip and the next one; the total length is unchanged.
+
+        Args:
+            clip_id: Clip on the left of the cut
+            delta_ms: Change of the cut position (positive = later)
+            clamp: See ripple_trim
+
+        Returns:
+            Applied delta, or None if the clip is not found or is the last one
+        """
+        left, right = self._with_neighbours(clip_id, 0, 1)
+        if left is None or right is None:
+            return None
+        if clamp:
+            delta_ms = self._clamp(
+                delta_ms,
+                max(self.MIN_CLIP_DURATION_MS - left.duration_ms, -right.start_time_ms),
+                min(right.duration_ms - self.MIN_CLIP_DURATION_MS, self._room_after(left))
+            )
+        if delta_ms:
+            left.duration_ms += delta_ms
+            right.start_time_ms += delta_ms
+            right.duration_ms -= delta_ms
+            right.position_ms += delta_ms
+            self._notify_modified(left)
+            self._notify_modified(right)
+        return delta_ms
+
+    def slip_clip(self, clip_id: int, delta_ms: int, clamp: bool = True) -> Optional[int]:
+        """
+        Move the source range shown by a clip without changing its place or length
+        (clamp: see ripple_trim).
+
+        Returns:
+            Applied delta, or None if not found
+        """
+        clip = self.get_clip(clip_id)
+        if not clip:
+            return None
+        if clamp:
+            delta_ms = self._clamp(delta_ms, -clip.start_time_ms, self._room_after(clip))
+        if delta_ms:
+            clip.start_time_ms += delta_ms
+            self._notify_modified(clip)
+        return delta_ms
+
+    def slide_clip(self, clip_id: int, delta_ms: int, clamp: bool = True) -> Optional[int]:
+        """
+        Move a clip along the timeline between its neighbours.
+
+        The previous clip's out point and the next clip's in point absorb the
+        move; the clip's own content and the total length are unchanged
+        (clamp: see ripple_trim).
+
+        Returns:
+            Applied delta, or None if the clip is not found or lacks a neighbour
+        """
+        prev, clip, nxt = self._with_neighbours(clip_id, -1, 0, 1)
+        if prev is None or clip is None or nxt is None:
+            return None
+        if clamp:
+            delta_ms = self._clamp(
+                delta_ms,
+                max(self.MIN_CLIP_DURATION_MS - prev.duration_ms, -nxt.start_time_ms),
+                min(nxt.duration_ms - self.MIN_CLIP_DURATION_MS, self._room_after(prev))
+            )
+        if delta_ms:
+            prev.duration_ms += delta_ms
+            clip.position_ms += delta_ms
+            nxt.start_time_ms += delta_ms
+            nxt.duration_ms -= delta_ms
+            nxt.position_ms += delta_ms
+            for changed in (prev, clip, nxt):
+                self._notify_modified(changed)
+        return delta_ms
+
     def clear(self):
         """Clear all clips from timeline."""
         self.clips.clear()
+        self._by_id.clear()
+        self._sorted_cache = None
+        self._positions_dirty = False
         self._next_clip_id = 1
-        self.timeline_cleared.emit()
+        for track in self.tracks:
+            track.clear()
+        self.tracks = []
+        self._next_track_id = 1
+        self._notify_cleared()
         self._update_duration()
         print("[Timeline] Cleared all clips")
 
+    # Overlay and audio tracks
+    def add_track(self, kind: str, name: str = "") -> Track:
+        """
+        Add an empty track on top of the existing ones.
+
+        Args:
+            kind: Track.KIND_VIDEO (overlay) or Track.KIND_AUDIO
+            name: Display name (default V<n>/A<n>)
+        """
+        track = Track(self._next_track_id, kind, name)
+        self._next_track_id += 1
+        self.tracks.append(track)
+        self._notify_track(track.id)
+        print(f"[Timeline] Added track: {track}")
+        return track
+
+    def remove_track(self, track_id: int) -> bool:
+        track = self.get_track(track_id)
+        if track is None:
+            return False
+        track.clear()
+        self.tracks.remove(track)
+        self._notify_track(track_id)
+        print(f"[Timeline] Removed track {track_id}")
+        return True
+
+    def get_track(self, track_id: int) -> Optional[Track]:
+        for track in self.tracks:
+            if track.id == track_id:
+                return track
+        return None
+
+    def find_free_track(self, kind: str, position_ms: int, duration_ms: int) -> Track:
+        """Lowest track of a kind with room for a span, adding a new track if none has."""
+        for track in self.tracks:
+            if track.kind == kind and track.can_place(position_ms, duration_ms):
+                return track
+        return self.add_track(kind)
+
+    def add_track_clip(
+        self,
+        track_id: int,
+        source_path: str,
+        start_time_ms: int = 0,
+        duration_ms: int = 0,
+        position_ms: int = 0,
+        label: str = ""
+    ) -> Optional[TimelineClip]:
+        """
+        Place a clip on an overlay/audio track.
+
+        Returns:
+            The created TimelineClip, or None if the track does not exist or
+            the span overlaps another clip on it
+        """
+        track = self.get_track(track_id)
+        if track is None:
+            return None
+        clip = TimelineClip(
+            id=self._next_clip_id,
+            source_path=source_path,
+            start_time_ms=start_time_ms,
+            duration_ms=duration_ms,
+            position_ms=max(0, position_ms),
+            label=label
+        )
+        if not track.insert(clip):
+            print(f"[Timeline] Track {track_id} is occupied at {position_ms}ms")
+            return None
+        self._next_clip_id += 1
+        self._notify_track(track_id)
+        print(f"[Timeline] Added clip to track {track_id}: {clip}")
+        return clip
+
+    def remove_track_clip(self, track_id: int, clip_id: int) -> bool:
+        track = self.get_track(track_id)
+        if track is None or track.remove(clip_id) is None:
+            return False
+        self._notify_track(track_id)
+        return True
+
+    def move_track_clip(self, track_id: int, clip_id: int, new_position_ms: int) -> bool:
+        """Move a track clip in time; False if the new span is taken."""
+        track = self.get_track(track_id)
+        if track is None or not track.move(clip_id, new_position_ms):
+            return False
+        self._notify_track(track_id)
+        return True
+
+    def has_overlay_tracks(self) -> bool:
+        """Check if any overlay/audio track has clips (export needs compositing)."""
+        return any(len(track) for track in self.tracks)
+
+    def get_program_duration(self) -> int:
+        """Length of the composited program: main track or the latest track clip."""
+        return max([self.get_total_duration()] + [track.end_ms() for track in self.tracks])
+
+    def load_clips(self, clips: List[TimelineClip], tracks: Optional[List[Track]] = None,
+                   next_ids: Optional[Dict[str, int]] = None):
+        """
+        Replace the whole timeline in one step (project loading).
+
+        Clips must be in timeline order with ids and positions set; the index
+        is built in O(n) and the change is reported as one cleared batch.
+
+        Args:
+            clips: Main track clips in order
+            tracks: Overlay/audio tracks with their clips already placed
+            next_ids: Saved id counters (see next_ids()), so ids are not reused
+        """
+        with self.batch():
+            self.clear()
+            self.clips.build(clips)
+            self._by_id = {clip.id: clip for clip in clips}
+            self.tracks = list(tracks or [])
+            ids = [clip.id for clip in clips] + [c.id for t in self.tracks for c in t.clips]
+            self._next_clip_id = max(ids, default=0) + 1
+            self._next_track_id = max((t.id for t in self.tracks), default=0) + 1
+            if next_ids:
+                self._next_clip_id = max(self._next_clip_id, int(next_ids.get("clip", 0)))
+                self._next_track_id = max(self._next_track_id, int(next_ids.get("track", 0)))
+            self._pending["added"] = dict.fromkeys(clip.id for clip in clips)
+            self._pending["tracks"] = dict.fromkeys(t.id for t in self.tracks)
+            self._version += 1
+        print(f"[Timeline] Loaded {len(clips)} clips, {len(self.tracks)} tracks")
+
+    def snapshot(self) -> TimelineSnapshot:
+        """
+        Immutable copy of the current state, safe to read from any thread.
+
+        O(1) for the main track: the snapshot keeps a frozen version of the
+        clip index, which later edits leave alone (see ClipIndex.freeze()).
+        Records of tracks that did not change since the last snapshot are
+        shared with it; an unchanged timeline returns the last snapshot itself.
+        """
+        if self._snapshot is not None and self._snapshot.version == self._version:
+            return self._snapshot
+        self._settle_positions()
+        tracks = []
+        for track in self.tracks:
+            state = self._track_states.get(track.id)
+            if state is None:
+                items = list(track.clips.items())
+                state = self._track_states[track.id] = TrackState(
+                    track.id, track.kind, track.name, track.muted, track.volume, track.x, track.y, track.scale,
+                    tuple(clip._state for clip, _ in items), tuple(position for _, position in items)
+                )
+            tracks.append(state)
+        self._snapshot = TimelineSnapshot(self._version, self.clips.freeze(), len(self.clips), tuple(tracks),
+                                          self._next_clip_id, self._next_track_id)
+        return self._snapshot
+
+    def restore(self, snapshot: TimelineSnapshot):
+        """
+        Return to the state of a snapshot, in one batch.
+
+        Only the index nodes that differ from the snapshot are visited, so
+        undoing or redoing a small edit is O(log n) however long the
+        timeline is. Clips keep their TimelineClip objects, and only clips
+        that differ are reported as added, removed or modified.
+        Id counters never go back, so ids stay unique.
+        """
+        with self.batch():
+            added, removed, changed = self.clips.restore(snapshot.root)
+            for clip in removed:
+                del self._by_id[clip.id]
+                self._notify_removed(clip.id)
+            for clip in added:
+                self._by_id[clip.id] = clip
+                self._notify_added(clip)
+            for clip in changed:
+                self._notify_modified(clip)
+            self._sorted_cache = None
+            self._positions_dirty = False
+
+            tracks = {track.id: track for track in self.tracks}
+            self.tracks = []
+            for state in snapshot.tracks:
+                track = tracks.pop(state.id, None)
+                if track is None or self._track_states.get(state.id) is not state:
+                    track = self._track_from_state(state)
+                    self._notify_track(state.id)
+                    self._track_states[state.id] = state
+                self.tracks.append(track)
+            for track_id in tracks:
+                self._notify_track(track_id)
+
+            self._next_clip_id = max(self._next_clip_id, snapshot.next_clip_id)
+            self._next_track_id = max(self._next_track_id, snapshot.next_track_id)
+        # The timeline is the snapshot again: the next snapshot() can reuse it
+        self._snapshot = snapshot._replace(version=self._version, next_clip_id=self._next_clip_id,
+                                           next_track_id=self._next_track_id)
+        print(f"[Timeline] Restored snapshot {snapshot.version}")
+
     def get_total_duration(self) -> int:
         """Get total timeline duration in milliseconds."""
-        if not self.clips:
-            return 0
+        # Latest clip end, cached in the index
+        self._settle_positions()
+        return self.clips.max_end()
 
-        # Find the end of the last clip
-        max_end = 0
-        for clip in self.clips:
-            end = clip.timeline_end_ms
-            if end > max_end:
-                max_end = end
-
-        return max_end
+    def next_ids(self) -> Dict[str, int]:
+        """Ids the next clip and track will get (saved with projects)."""
+        return {"clip": self._next_clip_id, "track": self._next_track_id}
 
     def get_clip_count(self) -> int:
         """Get number of clips on timeline."""
@@ -370,29 +851,139 @@ class Timeline(QObject):
 
     def _shift_clips_after(self, start_index: int, shift_ms: int):
         """Shift all clips after start_index by shift_ms."""
-        for i in range(start_index + 1, len(self.clips)):
-            self.clips[i].position_ms += shift_ms
+        self.clips.shift_from(start_index + 1, shift_ms)
 
     def _recalculate_positions(self):
         """Recalculate all clip positions to ensure no gaps/overlaps."""
-        current_pos = 0
-        for clip in self.clips:
-            clip.position_ms = current_pos
-            current_pos += clip.duration_ms
+        if self._batch_depth:
+            # Packing only depends on order and durations: once at the end is enough
+            self._positions_dirty = True
+            return
+        self.clips.pack()
+
+    def _with_neighbours(self, clip_id: int, *offsets: int) -> Tuple[Optional[TimelineClip], ...]:
+        """Clips at the given index offsets from a clip (None where there is none)."""
+        clip = self.get_clip(clip_id)
+        if not clip:
+            return (None,) * len(offsets)
+        self._settle_positions()
+        index = self.clips.index(clip)
+        return tuple(
+            self.clips[index + offset] if 0 <= index + offset < len(self.clips) else None
+            for offset in offsets
+        )
+
+    def _room_after(self, clip: TimelineClip) -> int:
+        """How far a clip's out point can move later within its source (unbounded if unknown)."""
+        length = self.source_duration_lookup(clip.source_path) if self.source_duration_lookup else None
+        if not length:
+            return 1 << 62
+        return max(0, length - clip.end_time_ms)
+
+    @staticmethod
+    def _clamp(delta_ms: int, lowest: int, highest: int) -> int:
+        # An edit that is already past a limit is never pushed further
+        return max(min(int(delta_ms), max(0, highest)), min(0, lowest))
+
+    def _settle_positions(self):
+        """Apply a repack deferred by the open batch (before anything reads positions)."""
+        if self._positions_dirty:
+            self._positions_dirty = False
+            self.clips.pack()
+
+    @staticmethod
+    def _track_from_state(state: TrackState) -> Track:
+        track = Track(state.id, state.kind, state.name)
+        track.muted, track.volume = state.muted, state.volume
+        track.x, track.y, track.scale = state.x, state.y, state.scale
+        for clip_state, position in state.items():
+            track.insert(TimelineClip(clip_state.id, clip_state.source_path, clip_state.start_time_ms,
+                                      clip_state.duration_ms, position, clip_state.label))
+        return track
+
+    def _insert(self, index: int, clip: TimelineClip):
+        self.clips.insert(index, clip)
+        self._by_id[clip.id] = clip
+        self._sorted_cache = None
+
+    def _pop(self, index: int) -> TimelineClip:
+        clip = self.clips.pop(index)
+        del self._by_id[clip.id]
+        self._sorted_cache = None
+        return clip
 
     def _update_duration(self):
         """Emit duration changed signal."""
+        if self._batch_depth:
+            return  # Reported in the batch's TimelineChange
         total = self.get_total_duration()
         self.duration_changed.emit(total)
 
+    # Change notification (collected while a batch is open)
+    def _notify_added(self, clip: TimelineClip):
+        self._version += 1
+        if self._pending is None:
+            self.clip_added.emit(clip)
+            return
+        self._pending["added"][clip.id] = None
+
+    def _notify_removed(self, clip_id: int):
+        self._version += 1
+        if self._pending is None:
+            self.clip_removed.emit(clip_id)
+            return
+        self._pending["modified"].pop(clip_id, None)
+        if clip_id in self._pending["added"]:
+            del self._pending["added"][clip_id]  # Added and removed in the same batch
+        else:
+            self._pending["removed"][clip_id] = None
+
+    def _notify_modified(self, clip: TimelineClip):
+        self._version += 1
+        if self._pending is None:
+            self.clip_modified.emit(clip)
+            return
+        if clip.id not in self._pending["added"]:
+            self._pending["modified"][clip.id] = None
+
+    def _notify_cleared(self):
+        self._version += 1
+        self._track_states.clear()
+        if self._pending is None:
+            self.timeline_cleared.emit()
+            return
+        # Everything before the clear is gone; later adds are reported on top of it
+        self._pending = {"added": {}, "removed": {}, "modified": {}, "tracks": {}, "cleared": True}
+
+    def _notify_track(self, track_id: int):
+        self._version += 1
+        self._track_states.pop(track_id, None)
+        if self._pending is None:
+            self.track_changed.emit(track_id)
+            return
+        self._pending["tracks"][track_id] = None
+
+    def _commit_batch(self):
+        pending, self._pending = self._pending, None
+        self._settle_positions()
+        change = TimelineChange(
+            added=list(pending["added"]),
+            removed=list(pending["removed"]),
+            modified=list(pending["modified"]),
+            cleared=pending["cleared"],
+            tracks=list(pending["tracks"]),
+            duration_ms=self.get_total_duration()
+        )
+        if change.is_empty():
+            return
+        print(f"[Timeline] Batch committed: +{len(change.added)} -{len(change.removed)} ~{len(change.modified)}"
+              f"{' (cleared)' if change.cleared else ''}")
+        self.batch_committed.emit(change)
+
     def get_clips_in_range(self, start_ms: int, end_ms: int) -> List[TimelineClip]:
         """Get all clips that overlap with the given time range."""
-        result = []
-        for clip in self.clips:
-            # Check if clip overlaps with range
-            if clip.timeline_end_ms > start_ms and clip.position_ms < end_ms:
-                result.append(clip)
-        return result
+        self._settle_positions()
+        return self.clips.clips_in_range(start_ms, end_ms)
 
     def __repr__(self):
         return (
@@ -403,15 +994,18 @@ class Timeline(QObject):
     # Helpers for program preview
     def get_sorted_clips(self) -> List[TimelineClip]:
         """Return clips sorted by position_ms."""
-        return sorted(self.clips, key=lambda c: c.position_ms)
+        # Clips are kept in position order; the list only changes on insert/remove
+        self._settle_positions()
+        if self._sorted_cache is None:
+            self._sorted_cache = list(self.clips)
+        return list(self._sorted_cache)
 
     def get_index_of_clip(self, clip_id: int) -> int:
         """Return index of clip in sorted order; -1 if not found."""
-        sorted_clips = self.get_sorted_clips()
-        for idx, c in enumerate(sorted_clips):
-            if c.id == clip_id:
-                return idx
-        return -1
+        clip = self._by_id.get(clip_id)
+        if clip is None:
+            return -1
+        return self.clips.index(clip)
 
 
 # Example usage
@@ -0,0 +1,115 @@
+"""
+Timeline Snapshots - Frozen, structurally shared copies of timeline state
+
+A TimelineSnapshot holds only immutable data, so it can be handed to
+another thread (export, project serialization) while the user keeps
+editing the live timeline, and kept in undo history without copying.
+
+Snapshots share structure: the main track is a frozen version of the
+timeline's clip index (see ClipIndex.freeze()), which shares every node
+an edit did not touch with the live index and with other snapshots, so
+taking one is O(1) and consecutive snapshots of a large timeline differ
+in O(log n) nodes per edit. A clip's ClipState holds everything except
+its position and is reused until that clip itself is edited, and
+unchanged tracks reuse their TrackState. Taking a snapshot of an
+unchanged timeline returns the previous one.
+"""
+
+import zlib
+from typing import Iterator, List, NamedTuple, Tuple
+
+from video.clip_index import frozen_digest, frozen_end, frozen_items
+
+
+class ClipState(NamedTuple):
+    """One clip's content (its position lives in the index node or track that holds it)."""
+
+    id: int
+    source_path: str
+    start_time_ms: int
+    duration_ms: int
+    label: str
+
+    @property
+    def end_time_ms(self) -> int:
+        return self.start_time_ms + self.duration_ms
+
+
+class TrackState(NamedTuple):
+    """One overlay/audio track with its clips in start order."""
+
+    id: int
+    kind: str
+    name: str
+    muted: bool
+    volume: float
+    x: float
+    y: float
+    scale: float
+    clips: Tuple[ClipState, ...]
+    positions: Tuple[int, ...]
+
+    def items(self) -> Iterator[Tuple[ClipState, int]]:
+        return zip(self.clips, self.positions)
+
+    def end_ms(self) -> int:
+        return max((position + clip.duration_ms for clip, position in self.items()), default=0)
+
+    def to_spec(self) -> dict:
+        """Plain description for the exporter (same shape as Track.to_spec())."""
+        return {
+            "kind": self.kind,
+            "muted": self.muted,
+            "volume": self.volume,
+            "x": self.x,
+            "y": self.y,
+            "scale": self.scale,
+            "clips": [
+                (clip.source_path, clip.start_time_ms, clip.end_time_ms, position)
+                for clip, position in self.items()
+            ]
+        }
+
+
+class TimelineSnapshot(NamedTuple):
+    """
+    The whole timeline at one version: main track, tracks and id counters.
+
+    Take one with Timeline.snapshot(); Timeline.restore() puts it back.
+    """
+
+    version: int
+    root: object  # Frozen ClipIndex root of the main track (read with items())
+    clip_count: int  # Main track clips
+    tracks: Tuple[TrackState, ...]  # Bottom to top
+    next_clip_id: int
+    next_track_id: int
+
+    def items(self) -> Iterator[Tuple[ClipState, int]]:
+        """Main track clips with their positions, in timeline order (O(n))."""
+        return frozen_items(self.root)
+
+    def get_total_duration(self) -> int:
+        """Latest main track clip end (0 when empty)."""
+        return frozen_end(self.root)
+
+    def has_overlay_tracks(self) -> bool:
+        return any(track.clips for track in self.tracks)
+
+    def clip_data(self) -> List[Tuple[str, int, int]]:
+        """(source, in, out) of each main track clip, as the exporter takes them."""
+        return [(clip.source_path, clip.start_time_ms, clip.end_time_ms) for clip, _ in self.items()]
+
+    def track_specs(self) -> List[dict]:
+        return [track.to_spec() for track in self.tracks]
+
+    def fingerprint(self) -> str:
+        """
+        Short digest of the whole snapshot (clip contents and order, length,
+        tracks and id counters); equal timelines give equal fingerprints in
+        any session. Cheap for a snapshot that shares most of its main track
+        with one fingerprinted before (see frozen_digest()).
+        """
+        tracks = zlib.crc32(repr(self.tracks).encode("utf-8"))
+        return (f"{self.clip_count}:{self.get_total_duration()}:{frozen_digest(self.root):x}:{tracks:x}:"
+                f"{self.next_clip_id}:{self.next_track_id}")
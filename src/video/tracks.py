@@ -0,0 +1,126 @@
+"""
+Tracks - Overlay video and audio tracks alongside the main timeline
+
+The main track (Timeline.clips) is a gapless sequence of clips. Tracks
+hold clips at free positions on top of it: picture-in-picture or title
+overlays on video tracks, music beds and voice-over on audio tracks.
+Clips on one track may not overlap; clips on different tracks may.
+
+Each track keeps its clips in a ClipIndex ordered by start position. With
+the cached subtree end (max_end) that is an augmented interval tree, so
+"what is on this track at t" and "does this span collide" are O(log n).
+"""
+
+from typing import Dict, List, Optional
+
+from video.clip_index import ClipIndex
+
+
+class Track:
+    """
+    One overlay video track or audio track.
+
+    Video clips are drawn at (x, y) scaled to scale x the output width,
+    all as fractions of the output frame. Audio clips are mixed in at
+    volume. A muted track is left out of the export.
+    """
+
+    KIND_VIDEO = "video"
+    KIND_AUDIO = "audio"
+
+    def __init__(self, track_id: int, kind: str, name: str = ""):
+        if kind not in (self.KIND_VIDEO, self.KIND_AUDIO):
+            raise ValueError(f"Unknown track kind: {kind}")
+        self.id = track_id
+        self.kind = kind
+        self.name = name or f"{'V' if kind == self.KIND_VIDEO else 'A'}{track_id}"
+        self.muted = False
+        self.volume = 1.0  # Audio gain
+        # Picture-in-picture placement (top right corner by default)
+        self.x = 0.65
+        self.y = 0.05
+        self.scale = 0.3
+        self.clips = ClipIndex()  # Start position order
+        self._by_id: Dict[int, object] = {}
+
+    @property
+    def is_video(self) -> bool:
+        return self.kind == self.KIND_VIDEO
+
+    def __len__(self) -> int:
+        return len(self.clips)
+
+    def get_clip(self, clip_id: int):
+        return self._by_id.get(clip_id)
+
+    def get_clips(self) -> List:
+        """Clips in start position order."""
+        return list(self.clips)
+
+    def can_place(self, position_ms: int, duration_ms: int, ignore_id: Optional[int] = None) -> bool:
+        """Check if [position_ms, position_ms + duration_ms) is free on this track."""
+        if position_ms < 0:
+            return False
+        for clip in self.clips.clips_in_range(position_ms, position_ms + max(1, duration_ms)):
+            if clip.id != ignore_id:
+                return False
+        return True
+
+    def insert(self, clip) -> bool:
+        """Add a clip at its position_ms; False if it would overlap another clip."""
+        if not self.can_place(clip.position_ms, clip.duration_ms):
+            return False
+        self.clips.insert(self.clips.count_starting_at_or_before(clip.position_ms), clip)
+        self._by_id[clip.id] = clip
+        return True
+
+    def remove(self, clip_id: int):
+        """Remove a clip; returns it, or None if it is not on this track."""
+        clip = self._by_id.pop(clip_id, None)
+        if clip is not None:
+            self.clips.remove(clip)
+        return clip
+
+    def move(self, clip_id: int, position_ms: int) -> bool:
+        """Move a clip to a new start; False if the new span is taken."""
+        clip = self._by_id.get(clip_id)
+        if clip is None or not self.can_place(position_ms, clip.duration_ms, ignore_id=clip_id):
+            return False
+        self.clips.remove(clip)
+        clip.position_ms = position_ms
+        self.clips.insert(self.clips.count_starting_at_or_before(position_ms), clip)
+        return True
+
+    def clear(self):
+        self.clips.clear()
+        self._by_id.clear()
+
+    def clip_at(self, position_ms: int):
+        """Clip playing at a timeline position, or None."""
+        return self.clips.clip_at(position_ms)
+
+    def clips_in_range(self, start_ms: int, end_ms: int) -> List:
+        """Clips overlapping [start_ms, end_ms), in start order."""
+        return self.clips.clips_in_range(start_ms, end_ms)
+
+    def end_ms(self) -> int:
+        """End of the last clip (0 when empty)."""
+        return self.clips.max_end()
+
+    def to_spec(self) -> dict:
+        """Plain description for the exporter (safe to hand to a worker thread)."""
+        return {
+            "kind": self.kind,
+            "muted": self.muted,
+            "volume": self.volume,
+            "x": self.x,
+            "y": self.y,
+            "scale": self.scale,
+            "clips": [
+                (clip.source_path, clip.start_time_ms, clip.end_time_ms, clip.position_ms)
+                for clip in self.clips
+            ]
+        }
+
+    def __repr__(self):
+        return f"Track(id={self.id}, kind={self.kind}, clips={len(self.clips)})"